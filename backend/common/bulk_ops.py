@@ -0,0 +1,60 @@
+"""
+bulk_ops.py – Multi-row INSERT / upsert helpers for menu writes.
+
+Menu imports and POS syncs write hundreds to thousands of rows per table.
+Instead of one ORM object (and often one SELECT + flush) per row, rows are
+sent as one multi-row statement per INSERT_CHUNK:
+
+    bulk_insert(db, MenuItem, rows, returning=[MenuItem.id, MenuItem.external_id])
+    bulk_upsert(db, Variation, rows, "uix_variation_pos", ["name", "is_active"])
+
+`bulk_upsert` is INSERT … ON CONFLICT ON CONSTRAINT … DO UPDATE (Postgres), so
+it needs the table's unique constraint name from models/schema.py.
+"""
+
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy.dialects.postgresql import insert
+
+# Rows per multi-row INSERT statement
+INSERT_CHUNK = 1000
+
+
+def bulk_insert(db, model, rows: List[Dict[str, Any]], returning: Iterable = ()) -> List[tuple]:
+    """Multi-row INSERT in INSERT_CHUNK batches. Returns the `returning` columns of the new rows."""
+    returning = list(returning)
+    out = []
+    for start in range(0, len(rows), INSERT_CHUNK):
+        stmt = insert(model).values(rows[start:start + INSERT_CHUNK])
+        if returning:
+            out.extend(tuple(r) for r in db.execute(stmt.returning(*returning)))
+        else:
+            db.execute(stmt)
+    return out
+
+
+def bulk_upsert(db, model, rows: List[Dict[str, Any]], constraint: str,
+                update_columns: Iterable[str], returning: Iterable = (),
+                dedupe_on: Iterable[str] = ()) -> List[tuple]:
+    """INSERT … ON CONFLICT ON CONSTRAINT … DO UPDATE in INSERT_CHUNK batches.
+
+    Postgres rejects a statement that updates the same row twice, so pass the
+    constraint's columns as `dedupe_on` when rows may repeat a key (the last one wins).
+    """
+    dedupe_on = list(dedupe_on)
+    if dedupe_on:
+        rows = list({tuple(row[col] for col in dedupe_on): row for row in rows}.values())
+    returning = list(returning)
+    update_columns = list(update_columns)
+    out = []
+    for start in range(0, len(rows), INSERT_CHUNK):
+        stmt = insert(model).values(rows[start:start + INSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            constraint=constraint,
+            set_={col: stmt.excluded[col] for col in update_columns},
+        )
+        if returning:
+            out.extend(tuple(r) for r in db.execute(stmt.returning(*returning)))
+        else:
+            db.execute(stmt)
+    return out
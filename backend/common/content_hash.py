@@ -0,0 +1,66 @@
+"""
+content_hash.py – Fingerprint of everything a dish's embedding is built from.
+
+A menu item's vector is `text embedding(name, categories, description)` +
+`CLIP embedding(image or video thumbnail)`. Hashing exactly those inputs plus
+the model version tells re-onboarding which items need a new vector; price,
+flags and availability live in the Qdrant payload and never require one.
+
+Re-onboarding stores a changed item's hash only after its new vector is in
+Qdrant (`provisional_content_hashes`), so a stored hash always describes the
+vector that is actually there.
+
+Bump EMBEDDING_MODEL_VERSION whenever the text / image models or the embedding
+text template change, so every item is re-embedded once.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+EMBEDDING_MODEL_VERSION = "all-mpnet-base-v2+clip-ViT-B/32:v1"
+
+
+def _clean(value: Any) -> Optional[str]:
+    # Treat None / NaN / blank the same way, so CSV and DB values hash alike
+    if value is None or value != value:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def menu_item_content_hash(name: Any,
+                           category_brief: Any,
+                           group_category: Any,
+                           description: Any,
+                           image_path: Any = None,
+                           cloudflare_image_id: Any = None,
+                           cloudflare_video_id: Any = None,
+                           model_version: str = EMBEDDING_MODEL_VERSION) -> str:
+    """sha256 hex digest of an item's embedding inputs."""
+    fields = [
+        model_version,
+        _clean(name), _clean(category_brief), _clean(group_category), _clean(description),
+        _clean(image_path), _clean(cloudflare_image_id), _clean(cloudflare_video_id),
+    ]
+    return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+
+
+def unchanged_public_ids(public_ids: Iterable[str],
+                         content_hashes: Iterable[str],
+                         stored_hashes: Dict[str, str]) -> List[str]:
+    """Items whose stored hash matches their current embedding inputs (their vector can be reused)."""
+    return [
+        public_id for public_id, content_hash in zip(public_ids, content_hashes)
+        if stored_hashes.get(public_id) == content_hash
+    ]
+
+
+def provisional_content_hashes(content_hashes: Iterable[str], changed: Iterable[bool]) -> List[Optional[str]]:
+    """Hashes to store before the new vectors are in Qdrant: None for every (re-)embedded item.
+
+    The real hashes of those items are written only once the push succeeded,
+    so a failed push leaves them without a hash and the next run embeds them
+    again instead of reusing the old point's vector.
+    """
+    return [None if is_changed else content_hash for content_hash, is_changed in zip(content_hashes, changed)]
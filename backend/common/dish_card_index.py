@@ -0,0 +1,103 @@
+"""
+dish_card_index.py – Per-restaurant lookup table for enriching dish blocks.
+
+Chat answers and upsell carousels reference dishes by `MenuItem.id`; the
+frontend needs name, price, description, media and the public id. Instead of
+a Restaurant lookup plus an `IN` query per response, every restaurant's cards
+are loaded once per menu version into a dict, and enrichment is pure
+dictionary lookups:
+
+    card = get_dish_card_index(slug).get(menu_item_id)
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config import logger
+from models.schema import SessionLocal, MenuItem, Restaurant
+from common.menu_version import get_menu_version
+
+# Fields copied onto dish_card / carousel options by enrich_blocks
+CARD_FIELDS = ("image_url", "cloudflare_image_id", "cloudflare_video_id", "name", "price", "description")
+
+_indexes: Dict[str, Tuple[int, "DishCardIndex"]] = {}
+_lock = threading.Lock()
+
+
+class DishCardIndex:
+    """Enrichment data of one restaurant's dishes, keyed by MenuItem.id."""
+
+    def __init__(self, restaurant_slug: str, cards: Dict[int, Dict[str, Any]], version: int):
+        self.restaurant_slug = restaurant_slug
+        self.cards = cards
+        self.version = version
+        self._ids_by_public_id = {card["public_id"]: menu_item_id for menu_item_id, card in cards.items()}
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def get(self, menu_item_id: int) -> Optional[Dict[str, Any]]:
+        return self.cards.get(menu_item_id)
+
+    def id_for(self, public_id: str) -> Optional[int]:
+        """MenuItem.id of a dish public id (Qdrant payloads carry public ids)."""
+        return self._ids_by_public_id.get(public_id)
+
+    def enrich(self, target: Dict[str, Any]) -> None:
+        """Fill a dish_card / carousel option in place (id becomes the public id)."""
+        card = self.cards.get(target.get("id"))
+        if card is None:
+            return
+        for field in CARD_FIELDS:
+            target[field] = card[field]
+        target["id"] = card["public_id"]
+
+
+def _image_url(restaurant_slug: str, image_path: Optional[str]) -> Optional[str]:
+    return f"image_data/{restaurant_slug}/{image_path}" if restaurant_slug and image_path else None
+
+
+def build_dish_card_index(restaurant_slug: str, version: int = 0) -> DishCardIndex:
+    """Load every dish of a restaurant in one query."""
+    with SessionLocal() as db:
+        rows = db.query(
+            MenuItem.id, MenuItem.public_id, MenuItem.name, MenuItem.price, MenuItem.description,
+            MenuItem.image_path, MenuItem.cloudflare_image_id, MenuItem.cloudflare_video_id,
+        ).join(
+            Restaurant, Restaurant.id == MenuItem.restaurant_id
+        ).filter(
+            Restaurant.slug == restaurant_slug
+        ).all()
+
+    cards = {
+        row.id: {
+            "public_id": row.public_id,
+            "name": row.name,
+            "price": float(row.price) if row.price is not None else None,
+            "description": row.description,
+            "image_url": _image_url(restaurant_slug, row.image_path),
+            "cloudflare_image_id": row.cloudflare_image_id,
+            "cloudflare_video_id": row.cloudflare_video_id,
+        }
+        for row in rows
+    }
+    return DishCardIndex(restaurant_slug, cards, version)
+
+
+def get_dish_card_index(restaurant_slug: str) -> DishCardIndex:
+    """Return the index for the current menu version (built at most once per version)."""
+    version = get_menu_version(restaurant_slug)
+    cached = _indexes.get(restaurant_slug)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _indexes.get(restaurant_slug)
+        if cached and cached[0] == version:
+            return cached[1]
+        index = build_dish_card_index(restaurant_slug, version)
+        _indexes[restaurant_slug] = (version, index)
+        logger.info(f"Built dish card index for {restaurant_slug} (menu version {version}, {len(index)} dishes)")
+        return index
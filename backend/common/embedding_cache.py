@@ -0,0 +1,63 @@
+"""
+embedding_cache.py – Dish vectors on disk, keyed by content hash.
+
+Outlets of a chain share most of their menu: same names, descriptions and
+media, hence the same content hash (common/content_hash.py, which includes the
+embedding model version) and the same vector. Batch onboarding keeps every
+vector it computes here, so each distinct dish is embedded once per chain
+instead of once per outlet:
+
+    cache = EmbeddingCache(directory)
+    hits = cache.get_many(hashes)           # {hash: vector}
+    cache.put_many({hash: vector, ...})
+
+One .npy file per hash, written to a temp file and renamed, so any number of
+onboarding processes can share a directory.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable
+
+import numpy as np
+
+
+class EmbeddingCache:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, content_hash: str) -> Path:
+        return self.directory / content_hash[:2] / f"{content_hash}.npy"
+
+    def get_many(self, content_hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors of the given hashes (misses are left out)."""
+        found = {}
+        for content_hash in set(content_hashes):
+            if not content_hash:
+                continue
+            try:
+                found[content_hash] = np.load(self._path(content_hash))
+            except (FileNotFoundError, ValueError, OSError):
+                continue
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> int:
+        """Store vectors that are not cached yet. Returns the number written."""
+        written = 0
+        for content_hash, vector in vectors.items():
+            path = self._path(content_hash)
+            if not content_hash or path.exists():
+                continue
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, np.asarray(vector, dtype=np.float32))
+                os.replace(tmp, path)
+                written += 1
+            except OSError:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+        return written
@@ -0,0 +1,328 @@
+"""
+media_pipeline.py – Concurrent, resumable media ingest for menu onboarding.
+
+Every menu row with an `image_path` (a URL to download or a file already in the
+images folder) goes through two stages:
+
+    download (Instagram / Google Drive / URL)  ->  upload (Cloudflare)
+
+Each stage has its own bounded worker pool, so slow uploads never stall
+downloads and vice versa. Requests are rate limited per host (Instagram is
+far stricter than a CDN) and failed attempts are retried with exponential
+backoff.
+
+Finished rows are appended to an on-disk manifest (JSON lines, one record per
+row, keyed by row id + source). A re-run after a crash reads the manifest and
+only processes rows that are not in it yet. Only successful uploads are
+recorded: a download or upload that still fails after its retries leaves the
+row for the next run, so a temporary outage never sticks.
+
+The uploader is a plain callable with the signature of
+`upload_media_to_cloudflare`; `LocalStubUploader` (or MEDIA_UPLOAD_STUB_DIR)
+replaces Cloudflare with a local directory for tests and dry runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from loguru import logger
+
+# (file_path, content_type, success) – same contract as common.utils.download_*_content
+Downloader = Callable[[str, str, str], Tuple[str, str, bool]]
+# (cloudflare_image_id, cloudflare_video_id, success, message) – same as upload_media_to_cloudflare
+Uploader = Callable[[str, str, str], Tuple[Optional[str], Optional[str], bool, str]]
+
+DOWNLOAD_WORKERS = int(os.getenv("MEDIA_DOWNLOAD_WORKERS", "8"))
+UPLOAD_WORKERS = int(os.getenv("MEDIA_UPLOAD_WORKERS", "4"))
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 2.0
+# Upload to a local directory instead of Cloudflare (tests / dry runs)
+MEDIA_UPLOAD_STUB_DIR = os.getenv("MEDIA_UPLOAD_STUB_DIR")
+
+MANIFEST_NAME = ".media_manifest.jsonl"
+
+# host suffix -> (max concurrent requests, min seconds between request starts)
+HOST_LIMITS = {
+    "instagram.com": (1, 2.0),
+    "drive.google.com": (2, 0.5),
+    "cloudflare.com": (UPLOAD_WORKERS, 0.0),
+}
+DEFAULT_HOST_LIMIT = (4, 0.0)
+
+
+@dataclass
+class MediaJob:
+    row_key: Any                 # DataFrame index of the row
+    item_id: str                 # stable row id (menu.csv `id`)
+    name: str
+    source: str                  # URL or local filename from image_path
+    is_url: bool
+
+    @property
+    def manifest_key(self) -> str:
+        return hashlib.sha1(f"{self.item_id}|{self.source}".encode()).hexdigest()
+
+
+@dataclass
+class MediaResult:
+    image_path: Optional[str] = None
+    cloudflare_image_id: Optional[str] = None
+    cloudflare_video_id: Optional[str] = None
+    done: bool = False           # finished for good (recorded in the manifest)
+    message: str = ""
+
+
+# ------------------------------------------------------------------#
+# Manifest
+# ------------------------------------------------------------------#
+class MediaManifest:
+    """Append-only record of finished rows, safe to write from worker threads."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                self.entries[entry["key"]] = entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def record(self, key: str, result: MediaResult) -> None:
+        entry = {
+            "key": key,
+            "image_path": result.image_path,
+            "cloudflare_image_id": result.cloudflare_image_id,
+            "cloudflare_video_id": result.cloudflare_video_id,
+        }
+        with self._lock:
+            self.entries[key] = entry
+            with self.path.open("a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+# ------------------------------------------------------------------#
+# Rate limiting & retries
+# ------------------------------------------------------------------#
+class HostRateLimiter:
+    """Caps concurrent requests and request spacing per host."""
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]] = HOST_LIMITS,
+                 default: Tuple[int, float] = DEFAULT_HOST_LIMIT):
+        self.limits = limits
+        self.default = default
+        self._hosts: Dict[str, Tuple[threading.Semaphore, threading.Lock, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _limit_for(self, host: str) -> Tuple[int, float]:
+        for suffix, limit in self.limits.items():
+            if host == suffix or host.endswith("." + suffix):
+                return limit
+        return self.default
+
+    def _state(self, host: str):
+        with self._lock:
+            if host not in self._hosts:
+                concurrency, _ = self._limit_for(host)
+                self._hosts[host] = (threading.Semaphore(concurrency), threading.Lock(), [0.0])
+            return self._hosts[host]
+
+    def call(self, host: str, fn: Callable, *args):
+        semaphore, spacing_lock, last_start = self._state(host)
+        _, interval = self._limit_for(host)
+        with semaphore:
+            if interval:
+                with spacing_lock:
+                    wait = last_start[0] + interval - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    last_start[0] = time.monotonic()
+            return fn(*args)
+
+
+def with_retries(fn: Callable[[], Tuple[bool, Any]], what: str,
+                 attempts: int = MAX_ATTEMPTS, backoff: float = BACKOFF_SECONDS) -> Tuple[bool, Any]:
+    """Call `fn` (returning (ok, value)) until it succeeds, sleeping backoff * 2^n (+ jitter) between tries."""
+    value = None
+    for attempt in range(attempts):
+        try:
+            ok, value = fn()
+        except Exception as e:
+            ok, value = False, str(e)
+        if ok:
+            return True, value
+        if attempt + 1 < attempts:
+            delay = backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            logger.warning(f"🔁 {what} failed (attempt {attempt + 1}/{attempts}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+    return False, value
+
+
+# ------------------------------------------------------------------#
+# Default download / upload backends
+# ------------------------------------------------------------------#
+def download_media(url: str, save_dir: str, base_filename: str) -> Tuple[str, str, bool]:
+    """Pick the downloader for a URL (Instagram, Google Drive or plain URL)."""
+    # Imported here so the pipeline itself does not need the app config
+    from common.utils import (
+        download_instagram_content, download_google_drive_content, download_url_content,
+        is_instagram_url, is_google_drive_url,
+    )
+    if is_instagram_url(url):
+        return download_instagram_content(url, save_dir, base_filename)
+    if is_google_drive_url(url):
+        return download_google_drive_content(url, save_dir, base_filename)
+    return download_url_content(url, save_dir, base_filename)
+
+
+class LocalStubUploader:
+    """Stand-in for Cloudflare: copies files into a directory and returns content-hash ids."""
+
+    VIDEO_EXTENSIONS = {".mp4", ".mov", ".webm", ".avi", ".mkv"}
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.calls = 0
+
+    def __call__(self, file_path: str, item_name: str, restaurant_slug: str):
+        self.calls += 1
+        digest = hashlib.sha1(Path(file_path).read_bytes()).hexdigest()[:16]
+        media_id = f"stub-{digest}"
+        shutil.copyfile(file_path, self.directory / f"{media_id}{Path(file_path).suffix}")
+        if Path(file_path).suffix.lower() in self.VIDEO_EXTENSIONS:
+            return None, media_id, True, "stub upload"
+        return media_id, None, True, "stub upload"
+
+
+def default_uploader() -> Uploader:
+    if MEDIA_UPLOAD_STUB_DIR:
+        logger.warning(f"⚠️  MEDIA_UPLOAD_STUB_DIR set, uploading to {MEDIA_UPLOAD_STUB_DIR} instead of Cloudflare")
+        return LocalStubUploader(MEDIA_UPLOAD_STUB_DIR)
+    from common.cloudflare_utils import upload_media_to_cloudflare
+    return upload_media_to_cloudflare
+
+
+# ------------------------------------------------------------------#
+# Pipeline
+# ------------------------------------------------------------------#
+@dataclass
+class MediaPipeline:
+    image_directory: str
+    restaurant_slug: str
+    uploader: Optional[Uploader] = None
+    downloader: Downloader = download_media
+    download_workers: int = DOWNLOAD_WORKERS
+    upload_workers: int = UPLOAD_WORKERS
+    limiter: HostRateLimiter = field(default_factory=HostRateLimiter)
+    attempts: int = MAX_ATTEMPTS
+    backoff: float = BACKOFF_SECONDS
+
+    def __post_init__(self):
+        os.makedirs(self.image_directory, exist_ok=True)
+        self.uploader = self.uploader or default_uploader()
+        self.manifest = MediaManifest(Path(self.image_directory) / MANIFEST_NAME)
+
+    def _download(self, job: MediaJob) -> MediaResult:
+        safe_name = job.name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+        base_filename = f"{job.row_key}_{safe_name}"
+        host = urlparse(job.source).hostname or ""
+
+        def attempt():
+            path, _, ok = self.limiter.call(host, self.downloader, job.source, self.image_directory, base_filename)
+            return bool(ok and path), path
+
+        ok, path = with_retries(attempt, f"Download for {job.name}", self.attempts, self.backoff)
+        if not ok:
+            # The row goes without media for this run; not recorded, so the next run tries again
+            logger.warning(f"⚠️  Failed to download URL for {job.name}, setting image_path to null")
+            return MediaResult(image_path=None, message="download failed")
+        logger.success(f"✅ Downloaded {job.name}: {Path(path).name}")
+        return MediaResult(image_path=Path(path).name)
+
+    def _upload(self, job: MediaJob, result: MediaResult) -> Tuple[MediaJob, MediaResult]:
+        local_file = Path(self.image_directory) / result.image_path
+
+        def attempt():
+            image_id, video_id, ok, message = self.limiter.call(
+                "cloudflare.com", self.uploader, str(local_file), job.name, self.restaurant_slug
+            )
+            return ok, (image_id, video_id) if ok else message
+
+        ok, value = with_retries(attempt, f"Cloudflare upload for {job.name}", self.attempts, self.backoff)
+        if not ok:
+            # Not recorded: the next run retries the upload
+            logger.warning(f"⚠️  Cloudflare upload failed for {job.name}: {value}")
+            result.message = "upload failed"
+            return job, result
+        result.cloudflare_image_id, result.cloudflare_video_id = value
+        result.done = True
+        # Recorded right away so a crash later in the run keeps this upload
+        self.manifest.record(job.manifest_key, result)
+        logger.success(f"✅ Cloudflare upload successful for {job.name}")
+        return job, result
+
+    def run(self, jobs: Iterable[MediaJob]) -> List[Tuple[MediaJob, MediaResult]]:
+        """Process jobs concurrently; returns (job, result) for every job, resumed ones included."""
+        finished: List[Tuple[MediaJob, MediaResult]] = []
+        pending: List[MediaJob] = []
+        for job in jobs:
+            entry = self.manifest.get(job.manifest_key)
+            # Older manifests also recorded failed downloads (no media at all): retry those
+            if entry is not None and (entry["image_path"] or entry["cloudflare_image_id"] or entry["cloudflare_video_id"]):
+                finished.append((job, MediaResult(
+                    image_path=entry["image_path"],
+                    cloudflare_image_id=entry["cloudflare_image_id"],
+                    cloudflare_video_id=entry["cloudflare_video_id"],
+                    done=True,
+                    message="resumed",
+                )))
+            else:
+                pending.append(job)
+        if finished:
+            logger.info(f"⏭️  {len(finished)} rows already processed (manifest), {len(pending)} to go")
+
+        with ThreadPoolExecutor(self.download_workers, thread_name_prefix="media-dl") as downloads, \
+                ThreadPoolExecutor(self.upload_workers, thread_name_prefix="media-up") as uploads:
+            download_futures = {}
+            upload_futures = []
+            for job in pending:
+                if job.is_url:
+                    download_futures[downloads.submit(self._download, job)] = job
+                elif (Path(self.image_directory) / job.source).exists():
+                    upload_futures.append(uploads.submit(self._upload, job, MediaResult(image_path=job.source)))
+                else:
+                    logger.warning(f"⚠️  Local file not found for {job.name}: {job.source}")
+                    finished.append((job, MediaResult(image_path=job.source, message="missing local file")))
+
+            # Hand each download to the upload pool as soon as it lands
+            for future in as_completed(download_futures):
+                job = download_futures[future]
+                result = future.result()
+                if result.image_path:
+                    upload_futures.append(uploads.submit(self._upload, job, result))
+                else:
+                    finished.append((job, result))
+
+            finished.extend(future.result() for future in upload_futures)
+
+        return finished
@@ -0,0 +1,185 @@
+"""
+menu_import.py – Vectorized validation and bulk inserts for menu CSV imports.
+
+Validation runs column-wise (pandas `duplicated`, `isna`, `isin`, regex
+`str.extract`) over menu.csv and the no-POS customisation CSVs and collects
+every problem into one report instead of stopping at the first bad row:
+
+    issues = validate_menu_csv(df_menu) + validate_customisation_csvs(frames, df_menu["id"])
+    if issues:
+        raise CsvValidationError(issues)
+
+Rows are then written with the bulk statements of common/bulk_ops.py instead
+of one ORM object + flush per row, so a 20k-row chain menu imports in seconds.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columns menu.csv must have (ALWAYS ADD THESE, DO NOT REMOVE ANY)
+MENU_REQUIRED_COLUMNS = [
+    'name', 'category_brief', 'group_category', 'description', 'price', 'image_path',
+    'cloudflare_image_id', 'cloudflare_video_id', 'id', 'veg_flag', 'is_bestseller',
+    'is_recommended', 'promote', 'priority', 'kind',
+]
+
+# customisations/<file>: columns that must be filled in every row
+CUSTOMISATION_REQUIRED = {
+    "variations.csv": ["id", "name", "display_name", "group_name"],
+    "addon_groups.csv": ["id", "name", "display_name"],
+    "addon_items.csv": ["id", "addon_group_id", "name", "display_name", "price"],
+    "item_variations.csv": ["id", "menu_item_id", "variation_id", "price"],
+    "item_addons.csv": ["menu_item_id", "addon_group_id", "min_selection", "max_selection"],
+    "item_variation_addons.csv": ["item_variation_id", "addon_group_id", "min_selection", "max_selection"],
+}
+
+# (file, column) -> (referenced file, referenced column); "menu.csv" ids are passed in
+CUSTOMISATION_REFERENCES = {
+    ("addon_items.csv", "addon_group_id"): ("addon_groups.csv", "id"),
+    ("item_variations.csv", "menu_item_id"): ("menu.csv", "id"),
+    ("item_variations.csv", "variation_id"): ("variations.csv", "id"),
+    ("item_addons.csv", "menu_item_id"): ("menu.csv", "id"),
+    ("item_addons.csv", "addon_group_id"): ("addon_groups.csv", "id"),
+    ("item_variation_addons.csv", "item_variation_id"): ("item_variations.csv", "id"),
+    ("item_variation_addons.csv", "addon_group_id"): ("addon_groups.csv", "id"),
+}
+
+# Offending values listed per issue (the row count is always complete)
+MAX_REPORTED_VALUES = 20
+
+_TRUE_STRINGS = {"1", "true", "yes"}
+
+
+@dataclass
+class ValidationIssue:
+    file: str
+    message: str
+    column: Optional[str] = None
+    rows: List[int] = field(default_factory=list)      # 0-based data row indices
+    values: List[Any] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        where = f"{self.file}" + (f"[{self.column}]" if self.column else "")
+        text = f"{where}: {self.message}"
+        if self.rows:
+            shown = self.rows[:MAX_REPORTED_VALUES]
+            more = f" (+{len(self.rows) - len(shown)} more)" if len(self.rows) > len(shown) else ""
+            text += f" in rows {shown}{more}"
+        if self.values:
+            text += f": {self.values[:MAX_REPORTED_VALUES]}"
+        return text
+
+
+class CsvValidationError(ValueError):
+    """Raised with every validation issue of an import at once."""
+
+    def __init__(self, issues: List[ValidationIssue]):
+        self.issues = issues
+        super().__init__("\n".join(str(issue) for issue in issues))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"issues": [issue.__dict__ for issue in self.issues]}
+
+
+# ---------- column helpers ----------------------------------------------------
+
+def _issue(file: str, message: str, column: Optional[str], mask: pd.Series, values: Optional[pd.Series] = None):
+    rows = np.flatnonzero(mask.to_numpy()).tolist()
+    reported = [] if values is None else pd.unique(values[mask].astype(str)).tolist()
+    return ValidationIssue(file=file, message=message, column=column, rows=rows, values=reported)
+
+
+def clean_str(series: pd.Series) -> pd.Series:
+    """Stripped strings with NaN / blank as None-like NaN."""
+    stripped = series.astype("string").str.strip()
+    return stripped.mask(stripped == "")
+
+
+def invalid_timing_mask(series: pd.Series) -> pd.Series:
+    """True where a non-blank value is not a 24-hour HH:MM time (what strptime("%H:%M") accepts)."""
+    values = clean_str(series)
+    parts = values.str.extract(r"^(\d{1,2}):(\d{1,2})$")
+    hours = pd.to_numeric(parts[0], errors="coerce")
+    minutes = pd.to_numeric(parts[1], errors="coerce")
+    valid = (hours < 24) & (minutes < 60)
+    return values.notna() & ~valid.fillna(False).astype(bool)
+
+
+def bool_column(series: pd.Series, default: bool = True) -> pd.Series:
+    """"1" / "true" / "yes" (any case) → True; missing → default."""
+    values = clean_str(series).str.lower()
+    return values.isin(_TRUE_STRINGS).where(values.notna(), default).astype(bool)
+
+
+def int_column(series: pd.Series, default: int = 0) -> pd.Series:
+    return pd.to_numeric(series, errors="coerce").fillna(default).astype(int)
+
+
+def records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows as JSON-safe dicts (NaN → None), e.g. for `external_data`."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+# ---------- validation --------------------------------------------------------
+
+def validate_menu_csv(df_menu: pd.DataFrame) -> List[ValidationIssue]:
+    """Every problem of menu.csv: missing columns, bad timings, missing / duplicate ids."""
+    file = "menu.csv"
+    missing_columns = [col for col in MENU_REQUIRED_COLUMNS if col not in df_menu.columns]
+    if missing_columns:
+        # Row checks need these columns
+        return [ValidationIssue(file=file, message=f"Missing required columns in CSV: {missing_columns}")]
+
+    issues = []
+    for col in ("timing_start", "timing_end"):
+        if col in df_menu.columns:
+            bad = invalid_timing_mask(df_menu[col])
+            if bad.any():
+                issues.append(_issue(file, "Invalid time format (must be HH:MM)", col, bad, df_menu[col]))
+
+    ids = clean_str(df_menu["id"])
+    if ids.isna().any():
+        issues.append(_issue(file, "Missing ID values", "id", ids.isna()))
+    duplicated = ids.notna() & ids.duplicated(keep=False)
+    if duplicated.any():
+        issues.append(_issue(file, "Duplicate IDs found", "id", duplicated, ids))
+    return issues
+
+
+def validate_customisation_csvs(frames: Dict[str, Optional[pd.DataFrame]],
+                                menu_ids: Iterable[Any]) -> List[ValidationIssue]:
+    """Required values, duplicate ids and dangling references across the no-POS customisation CSVs."""
+    issues = []
+    ids_of = {"menu.csv": set(clean_str(pd.Series(list(menu_ids))).dropna())}
+
+    for file, required in CUSTOMISATION_REQUIRED.items():
+        df = frames.get(file)
+        if df is None:
+            continue
+        missing_columns = [col for col in required if col not in df.columns]
+        if missing_columns:
+            issues.append(ValidationIssue(file=file, message=f"Missing required columns: {missing_columns}"))
+            continue
+        for col in required:
+            empty = clean_str(df[col]).isna()
+            if empty.any():
+                issues.append(_issue(file, "Missing value", col, empty))
+        if "id" in df.columns:
+            ids = clean_str(df["id"])
+            duplicated = ids.notna() & ids.duplicated(keep=False)
+            if duplicated.any():
+                issues.append(_issue(file, "Duplicate IDs found", "id", duplicated, ids))
+            ids_of[file] = set(ids.dropna())
+
+    for (file, col), (ref_file, _) in CUSTOMISATION_REFERENCES.items():
+        df = frames.get(file)
+        if df is None or col not in df.columns:
+            continue
+        keys = clean_str(df[col])
+        dangling = keys.notna() & ~keys.isin(ids_of.get(ref_file, set()))
+        if dangling.any():
+            issues.append(_issue(file, f"References unknown {ref_file} id", col, dangling, keys))
+    return issues
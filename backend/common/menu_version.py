@@ -0,0 +1,47 @@
+"""
+Per-restaurant menu version counter.
+
+Every code path that changes what a restaurant serves (onboarding, menu CRUD,
+PetPooja item switches and menu syncs) bumps the counter. In-process caches
+built from the menu remember the version they were built at and rebuild when
+the counter moves.
+
+Hot paths read the counter through `get_menu_version_cached`, which keeps each
+value in-process for MENU_VERSION_CACHE_SECONDS instead of a Redis GET per
+request; a bump made by this process is visible at once, one made elsewhere
+after at most that long.
+"""
+
+import time
+from typing import Dict, Tuple
+
+from config import rdb, logger, get_menu_version_key
+
+MENU_VERSION_CACHE_SECONDS = 2.0
+
+# restaurant_slug -> (version, monotonic time it was read)
+_cached_versions: Dict[str, Tuple[int, float]] = {}
+
+
+def get_menu_version(restaurant_slug: str) -> int:
+    """Return the current menu version for a restaurant (0 if never bumped)."""
+    raw = rdb.get(get_menu_version_key(restaurant_slug))
+    version = int(raw) if raw else 0
+    _cached_versions[restaurant_slug] = (version, time.monotonic())
+    return version
+
+
+def get_menu_version_cached(restaurant_slug: str, max_age: float = MENU_VERSION_CACHE_SECONDS) -> int:
+    """The menu version as read at most `max_age` seconds ago."""
+    cached = _cached_versions.get(restaurant_slug)
+    if cached is not None and time.monotonic() - cached[1] < max_age:
+        return cached[0]
+    return get_menu_version(restaurant_slug)
+
+
+def bump_menu_version(restaurant_slug: str) -> int:
+    """Mark the restaurant's menu as changed and return the new version."""
+    version = int(rdb.incr(get_menu_version_key(restaurant_slug)))
+    _cached_versions[restaurant_slug] = (version, time.monotonic())
+    logger.info(f"Menu version for {restaurant_slug} bumped to {version}")
+    return version
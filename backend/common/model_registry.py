@@ -0,0 +1,71 @@
+"""
+model_registry.py – Embedding models, loaded on first use.
+
+The text model (all-mpnet-base-v2, ~420 MB) and CLIP ViT-B/32 (~350 MB) cost
+seconds and over a gigabyte of RSS to load, so nothing imports torch,
+sentence-transformers or clip at module level. Each model is loaded once per
+process, the first time something asks for it:
+
+    vectors = get_text_model().encode(texts)
+    clip_model, preprocess = get_clip_model()
+
+Code paths that never embed anything (CSV validation, payload-only re-seeds,
+the API's non-chat endpoints) never pay for them.
+"""
+
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Tuple
+
+from loguru import logger
+
+TEXT_MODEL_NAME = "all-mpnet-base-v2"
+CLIP_MODEL_NAME = "ViT-B/32"
+
+_models: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def _torch_device() -> str:
+    import torch
+    return "mps" if torch.backends.mps.is_available() else "cpu"
+
+
+def _load_text_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(TEXT_MODEL_NAME, device=_torch_device())
+
+
+def _load_clip_model():
+    import clip
+    # CLIP stays on CPU: its image tower is fast enough and mps support is patchy
+    return clip.load(CLIP_MODEL_NAME, device="cpu")
+
+
+def _get(name: str, loader: Callable[[], Any]) -> Any:
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            started = perf_counter()
+            model = loader()
+            _models[name] = model
+            logger.info(f"🧠 Loaded {name} in {perf_counter() - started:.1f}s")
+        return model
+
+
+def get_text_model():
+    """Shared SentenceTransformer (768-dim text embeddings)."""
+    return _get(TEXT_MODEL_NAME, _load_text_model)
+
+
+def get_clip_model() -> Tuple[Any, Callable]:
+    """Shared (clip_model, preprocess) pair (512-dim image embeddings)."""
+    return _get(CLIP_MODEL_NAME, _load_clip_model)
+
+
+def loaded_models() -> list:
+    """Names of the models loaded in this process so far."""
+    return list(_models)
@@ -0,0 +1,383 @@
+"""
+Qdrant helpers shared by onboarding, the recommender and menu-edit endpoints.
+
+Dish points carry the fields the recommender filters on (veg_flag, price,
+category_brief, group_category, is_active, show_on_menu) as indexed payload, so
+user filters are pushed into the vector query and one round trip returns k
+eligible dishes. Postgres stays the source of truth; every code path that edits
+those fields calls `sync_menu_item_payloads` afterwards. Collections written
+before these fields existed match nothing under `build_menu_filter` until
+scripts/backfill_qdrant_payloads.py has run, so searches check
+`filter_payloads_ready` first and otherwise search unfiltered and leave the
+filtering to Postgres.
+
+Two layouts are supported (config.QDRANT_LAYOUT):
+    per_restaurant – one `{slug}_qdb` collection per restaurant (default)
+    shared         – one collection for every restaurant, partitioned by a
+                     `restaurant_id` tenant index (value: the restaurant slug,
+                     the same tenant id used for Redis keys), with int8 scalar
+                     quantization in RAM and the float32 originals on disk
+Callers go through `get_collection_name` / `tenant_filter` / `point_id_for`
+and never need to know which layout is active.
+
+In the per-restaurant layout `{slug}_qdb` is a Qdrant alias. Full rebuilds
+write into a fresh `{slug}_qdb_v{timestamp}` collection and `swap_collection_alias`
+repoints the alias in one atomic request, so searches never see a missing or
+half-filled collection; `gc_collection_versions` then drops old versions and
+`restore_collection_alias` undoes a swap whose onboarding failed later on.
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from qdrant_client.models import (
+    Filter, FieldCondition, MatchValue, MatchAny, Range, PayloadSchemaType,
+    SetPayload, SetPayloadOperation, VectorParams, Distance, HnswConfigDiff,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, KeywordIndexParams,
+    KeywordIndexType, FilterSelector, CreateAlias, CreateAliasOperation,
+    DeleteAlias, DeleteAliasOperation, IsEmptyCondition, PayloadField, PointIdsList,
+)
+
+from config import qd, logger, QDRANT_LAYOUT, QDRANT_SHARED_COLLECTION
+
+VECTOR_SIZE = 1280  # 768 text (all-mpnet-base-v2) + 512 image (CLIP ViT-B/32)
+TENANT_FIELD = "restaurant_id"
+
+# Alias creation after a legacy collection was dropped
+ALIAS_RETRY_ATTEMPTS = 5
+ALIAS_RETRY_BACKOFF_SECONDS = 1.0
+
+# Payload field -> index type
+PAYLOAD_INDEXES = {
+    "public_id": PayloadSchemaType.KEYWORD,
+    "veg_flag": PayloadSchemaType.BOOL,
+    "price": PayloadSchemaType.FLOAT,
+    "category_brief": PayloadSchemaType.KEYWORD,
+    "group_category": PayloadSchemaType.KEYWORD,
+    "is_active": PayloadSchemaType.BOOL,
+    "show_on_menu": PayloadSchemaType.BOOL,
+}
+
+
+def is_shared_layout() -> bool:
+    return QDRANT_LAYOUT == "shared"
+
+
+def per_restaurant_collection_name(restaurant_slug: str) -> str:
+    return f"{restaurant_slug}_qdb"
+
+
+def get_collection_name(restaurant_slug: str) -> str:
+    """Qdrant collection holding a restaurant's dish vectors."""
+    if is_shared_layout():
+        return QDRANT_SHARED_COLLECTION
+    return per_restaurant_collection_name(restaurant_slug)
+
+
+def tenant_conditions(restaurant_slug: str) -> List[FieldCondition]:
+    """Conditions restricting a query to one restaurant (empty for per-restaurant collections)."""
+    if is_shared_layout():
+        return [FieldCondition(key=TENANT_FIELD, match=MatchValue(value=restaurant_slug))]
+    return []
+
+
+def tenant_filter(restaurant_slug: str, *conditions: FieldCondition) -> Optional[Filter]:
+    """Filter matching `conditions` within one restaurant (None when there is nothing to filter)."""
+    must = tenant_conditions(restaurant_slug) + list(conditions)
+    return Filter(must=must) if must else None
+
+
+def point_id_for(restaurant_slug: str, public_id: str) -> str:
+    """Deterministic point id of a dish, unique across restaurants."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"aglio:{restaurant_slug}:{public_id}"))
+
+
+def create_shared_collection(collection_name: str = QDRANT_SHARED_COLLECTION) -> None:
+    """Create the multi-tenant collection if it does not exist yet.
+
+    - `restaurant_id` keyword index flagged `is_tenant` so Qdrant co-locates each
+      tenant's points and builds per-tenant HNSW graphs (`payload_m`); the global
+      graph is disabled (`m=0`) since every search is tenant-scoped
+    - int8 scalar quantization kept in RAM, float32 originals on disk (used only
+      for rescoring)
+    """
+    if qd.collection_exists(collection_name):
+        return
+    qd.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE, on_disk=True),
+        hnsw_config=HnswConfigDiff(payload_m=16, m=0),
+        quantization_config=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        ),
+    )
+    qd.create_payload_index(
+        collection_name=collection_name,
+        field_name=TENANT_FIELD,
+        field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+    )
+    ensure_payload_indexes(collection_name)
+    logger.info(f"Created shared Qdrant collection {collection_name}")
+
+
+def delete_restaurant_points(restaurant_slug: str) -> None:
+    """Remove all of a restaurant's vectors (drops the alias and collections in the per-restaurant layout)."""
+    if is_shared_layout():
+        qd.delete(
+            collection_name=QDRANT_SHARED_COLLECTION,
+            points_selector=FilterSelector(filter=tenant_filter(restaurant_slug)),
+        )
+        return
+    drop_per_restaurant_collections(restaurant_slug)
+
+
+def delete_stale_restaurant_points(restaurant_slug: str, keep_point_ids: Iterable[str]) -> int:
+    """Delete a restaurant's points in the shared collection other than `keep_point_ids`. Returns the count.
+
+    Full rebuilds upsert the new points first and call this afterwards, so the
+    restaurant never has an empty (or half-filled) menu in between.
+    """
+    keep = set(keep_point_ids)
+    stale, offset = [], None
+    while True:
+        points, offset = qd.scroll(
+            collection_name=QDRANT_SHARED_COLLECTION,
+            scroll_filter=tenant_filter(restaurant_slug),
+            limit=1024,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        stale.extend(point.id for point in points if str(point.id) not in keep)
+        if offset is None:
+            break
+    for start in range(0, len(stale), 1024):
+        qd.delete(
+            collection_name=QDRANT_SHARED_COLLECTION,
+            points_selector=PointIdsList(points=stale[start:start + 1024]),
+        )
+    return len(stale)
+
+
+# ------------------------------------------------------------------#
+# Versioned per-restaurant collections behind an alias
+# ------------------------------------------------------------------#
+def versioned_collection_name(restaurant_slug: str, version: Optional[int] = None) -> str:
+    """Name of a new build of a restaurant's collection (version defaults to now, in ms)."""
+    return f"{per_restaurant_collection_name(restaurant_slug)}_v{version or int(time.time() * 1000)}"
+
+
+def get_alias_target(alias_name: str) -> Optional[str]:
+    """Collection an alias points to (None if there is no such alias)."""
+    for alias in qd.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+def collection_or_alias_exists(name: str) -> bool:
+    return get_alias_target(name) is not None or qd.collection_exists(name)
+
+
+def create_dish_collection(collection_name: str) -> None:
+    """Create an empty per-restaurant dish collection with its payload indexes."""
+    qd.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+    )
+    ensure_payload_indexes(collection_name)
+
+
+def swap_collection_alias(alias_name: str, collection_name: str) -> Optional[str]:
+    """Atomically point `alias_name` at `collection_name`. Returns the previous target.
+
+    A legacy collection that still carries the alias name itself is dropped
+    first (one-time migration; searches miss it only for that moment). From
+    then on the alias is the restaurant's only way to its dishes, so its
+    creation is retried; if it still fails the error names the collection
+    that now holds them.
+    """
+    previous = get_alias_target(alias_name)
+    dropped_legacy = False
+    if previous is None and qd.collection_exists(alias_name):
+        logger.warning(f"Replacing legacy collection {alias_name} with an alias")
+        qd.delete_collection(collection_name=alias_name)
+        dropped_legacy = True
+
+    operations = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name)))
+    attempts = ALIAS_RETRY_ATTEMPTS if dropped_legacy else 1
+    for attempt in range(1, attempts + 1):
+        try:
+            # One request: Qdrant applies all alias changes together
+            qd.update_collection_aliases(change_aliases_operations=operations)
+            break
+        except Exception as e:
+            if attempt < attempts:
+                logger.warning(f"Creating alias {alias_name} failed (attempt {attempt}/{attempts}): {e}")
+                time.sleep(attempt * ALIAS_RETRY_BACKOFF_SECONDS)
+            elif dropped_legacy:
+                logger.error(f"Legacy collection {alias_name} was dropped but the alias to {collection_name} "
+                             f"could not be created; {collection_name} holds the dishes, re-run onboarding "
+                             f"or create the alias by hand: {e}")
+                raise
+            else:
+                raise
+    logger.info(f"Alias {alias_name} -> {collection_name} (was {previous})")
+    return previous
+
+
+def restore_collection_alias(alias_name: str, previous: Optional[str], collection_name: str) -> None:
+    """Undo `swap_collection_alias`: point the alias back at `previous` and drop `collection_name`.
+
+    With no previous target the alias is removed as well (it was created by the swap).
+    """
+    if previous is not None and qd.collection_exists(previous):
+        swap_collection_alias(alias_name, previous)
+    elif get_alias_target(alias_name) == collection_name:
+        qd.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name))
+        ])
+    if qd.collection_exists(collection_name):
+        qd.delete_collection(collection_name=collection_name)
+    logger.info(f"Alias {alias_name} restored to {previous}, dropped {collection_name}")
+
+
+def _collection_versions(restaurant_slug: str) -> List[str]:
+    """Versioned collections of a restaurant, oldest first."""
+    prefix = f"{per_restaurant_collection_name(restaurant_slug)}_v"
+    names = [c.name for c in qd.get_collections().collections if c.name.startswith(prefix)]
+    return sorted(names, key=lambda name: int(name[len(prefix):]) if name[len(prefix):].isdigit() else 0)
+
+
+def gc_collection_versions(restaurant_slug: str, keep: int = 1) -> List[str]:
+    """Drop old versions except the live one and the `keep` most recent others (for rollback)."""
+    live = get_alias_target(per_restaurant_collection_name(restaurant_slug))
+    stale = [name for name in _collection_versions(restaurant_slug) if name != live]
+    dropped = stale[:max(len(stale) - keep, 0)]
+    for name in dropped:
+        qd.delete_collection(collection_name=name)
+        logger.info(f"Dropped old Qdrant collection {name}")
+    return dropped
+
+
+def drop_per_restaurant_collections(restaurant_slug: str) -> None:
+    """Remove a restaurant's alias, legacy collection and every versioned collection."""
+    alias_name = per_restaurant_collection_name(restaurant_slug)
+    if get_alias_target(alias_name) is not None:
+        qd.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name))
+        ])
+    elif qd.collection_exists(alias_name):
+        qd.delete_collection(collection_name=alias_name)
+    for name in _collection_versions(restaurant_slug):
+        qd.delete_collection(collection_name=name)
+
+
+def ensure_payload_indexes(collection_name: str) -> None:
+    """Create the payload indexes used for filtered search (idempotent)."""
+    existing = qd.get_collection(collection_name).payload_schema or {}
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        if field_name in existing:
+            continue
+        qd.create_payload_index(collection_name=collection_name, field_name=field_name, field_schema=schema)
+        logger.info(f"Created payload index {collection_name}.{field_name} ({schema})")
+
+
+def menu_item_payload(item) -> Dict[str, Any]:
+    """Filterable payload fields of a MenuItem row."""
+    return {
+        "public_id": item.public_id,
+        "category_brief": item.category_brief or "",
+        "group_category": item.group_category or "",
+        "veg_flag": bool(item.veg_flag),
+        "price": float(item.price or 0.0),
+        "is_active": bool(item.is_active),
+        "show_on_menu": bool(item.show_on_menu),
+    }
+
+
+# Seconds before a restaurant whose points lack filter payloads is checked again
+PAYLOAD_CHECK_RETRY_SECONDS = 60.0
+
+# (collection, restaurant_slug) -> (ready, monotonic time checked); ready results never expire
+_payload_ready: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+
+
+def filter_payloads_ready(restaurant_slug: str, collection_name: str) -> bool:
+    """True once every point of the restaurant carries the filter payload (`build_menu_filter` is safe)."""
+    key = (collection_name, restaurant_slug)
+    cached = _payload_ready.get(key)
+    if cached and (cached[0] or time.monotonic() - cached[1] < PAYLOAD_CHECK_RETRY_SECONDS):
+        return cached[0]
+
+    try:
+        missing = qd.count(
+            collection_name=collection_name,
+            count_filter=tenant_filter(restaurant_slug, IsEmptyCondition(is_empty=PayloadField(key="is_active"))),
+            exact=True,
+        ).count
+    except Exception as e:
+        logger.warning(f"Could not check filter payloads of {collection_name} for {restaurant_slug}: {e}")
+        missing = None
+    ready = missing == 0
+    if not ready and not cached:
+        logger.warning(f"{restaurant_slug}: Qdrant points lack filter payloads, searching unfiltered "
+                       f"(run scripts/backfill_qdrant_payloads.py)")
+    _payload_ready[key] = (ready, time.monotonic())
+    return ready
+
+
+def build_menu_filter(restaurant_slug: str,
+                      filters: Dict[str, Any] | None = None,
+                      exclude_public_ids: Iterable[str] | None = None) -> Filter:
+    """Qdrant filter equivalent of the availability checks plus `tools._apply_pg_filters`."""
+    filters = filters or {}
+    must: List[FieldCondition] = tenant_conditions(restaurant_slug) + [
+        FieldCondition(key="is_active", match=MatchValue(value=True)),
+        FieldCondition(key="show_on_menu", match=MatchValue(value=True)),
+    ]
+    if filters.get("isVeg") is True:
+        must.append(FieldCondition(key="veg_flag", match=MatchValue(value=True)))
+    if filters.get("priceEnabled") and (price_range := filters.get("priceRange")):
+        must.append(FieldCondition(key="price", range=Range(lte=float(price_range[1]))))
+    if categories := filters.get("category"):
+        if isinstance(categories, list):
+            must.append(FieldCondition(key="category_brief", match=MatchAny(any=categories)))
+        else:
+            must.append(FieldCondition(key="category_brief", match=MatchValue(value=categories)))
+
+    must_not: Optional[List[FieldCondition]] = None
+    if exclude_public_ids:
+        must_not = [FieldCondition(key="public_id", match=MatchAny(any=list(exclude_public_ids)))]
+    return Filter(must=must, must_not=must_not)
+
+
+def sync_menu_item_payloads(restaurant_slug: str, items: Iterable) -> bool:
+    """Copy the filterable fields of edited MenuItems onto their Qdrant points.
+
+    Runs as a single batch request. Failures are logged rather than raised so a
+    Qdrant hiccup never fails the menu edit itself.
+    """
+    operations = [
+        SetPayloadOperation(set_payload=SetPayload(
+            payload=menu_item_payload(item),
+            filter=tenant_filter(restaurant_slug, FieldCondition(key="public_id", match=MatchValue(value=item.public_id))),
+        ))
+        for item in items
+    ]
+    if not operations:
+        return True
+
+    collection_name = get_collection_name(restaurant_slug)
+    try:
+        qd.batch_update_points(collection_name=collection_name, update_operations=operations)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not sync Qdrant payloads for {restaurant_slug} ({len(operations)} items): {e}")
+        return False
@@ -1,6 +1,6 @@
 from recommender import Blocks
 from config import qd
-from models.schema import SessionLocal, MenuItem, Restaurant
+from common.dish_card_index import get_dish_card_index
 import os
 import requests
 import instaloader
@@ -12,73 +12,29 @@ import shutil
 
 def enrich_blocks(blocks: Blocks, restaurant_slug: str) -> dict:
     """
-    Enrich blocks with additional data from PostgreSQL MenuItem table.
+    Enrich blocks with dish data (name, price, description, media, public id).
+    
+    Uses the per-restaurant dish card index (built once per menu version), so
+    enrichment needs no database round trip.
     
     Args:
         blocks: The blocks object to enrich
         restaurant_slug: The restaurant slug to identify the restaurant
-        tenant_id: The tenant subdomain for constructing image URLs
         
     Returns:
         dict: The enriched blocks as a dictionary
     """
     blocks = blocks.model_dump() if not isinstance(blocks, dict) else blocks
-    
-    with SessionLocal() as db:
-        # Get restaurant_id from slug
-        restaurant = db.query(Restaurant).filter_by(slug=restaurant_slug).first()
-        if not restaurant:
-            return blocks
-        
-        # Collect all dish IDs that need enrichment
-        dish_ids = []
-        for block in blocks["blocks"]:
-            if block["type"] == "dish_carousal":
-                for option in block["options"]:
-                    dish_ids.append(option["id"])
-            elif block["type"] == "dish_card":
-                dish_ids.append(block["id"])
-        
-        if not dish_ids:
-            return blocks
-        
-        # Fetch all menu items in one query
-        menu_items = db.query(MenuItem).filter(
-            MenuItem.restaurant_id == restaurant.id,
-            MenuItem.id.in_(dish_ids)
-        ).all()
-        
-        # Create lookup dict by MenuItem.id
-        menu_items_dict = {item.id: item for item in menu_items}
-        
-        # Enrich blocks with PostgreSQL data
-        for block in blocks["blocks"]:
-            if block["type"] == "dish_carousal":
-                for option in block["options"]:
-                    menu_item = menu_items_dict.get(option["id"])
-                    if menu_item:
-                        image_path = menu_item.image_path
-                        option["image_url"] = f"image_data/{restaurant_slug}/{image_path}" if restaurant_slug and image_path else None
-                        option["cloudflare_image_id"] = menu_item.cloudflare_image_id
-                        option["cloudflare_video_id"] = menu_item.cloudflare_video_id
-                        option["name"] = menu_item.name
-                        option["price"] = float(menu_item.price)
-                        option["description"] = menu_item.description
-                        # Overwrite option["id"] with public_id
-                        option["id"] = menu_item.public_id
-            
-            elif block["type"] == "dish_card":
-                menu_item = menu_items_dict.get(block["id"])
-                if menu_item:
-                    image_path = menu_item.image_path
-                    block["image_url"] = f"image_data/{restaurant_slug}/{image_path}" if restaurant_slug and image_path else None
-                    block["cloudflare_image_id"] = menu_item.cloudflare_image_id
-                    block["cloudflare_video_id"] = menu_item.cloudflare_video_id
-                    block["name"] = menu_item.name
-                    block["price"] = float(menu_item.price)
-                    block["description"] = menu_item.description
-                    # Overwrite block["id"] with public_id
-                    block["id"] = menu_item.public_id
+    if not any(block["type"] in ("dish_carousal", "dish_card") for block in blocks["blocks"]):
+        return blocks
+
+    index = get_dish_card_index(restaurant_slug)
+    for block in blocks["blocks"]:
+        if block["type"] == "dish_carousal":
+            for option in block["options"]:
+                index.enrich(option)
+        elif block["type"] == "dish_card":
+            index.enrich(block)
 
     return blocks
 
@@ -35,6 +35,57 @@ pg_url = f"postgresql://{PG_DB_USER}:{PG_DB_PASS}@{PG_DB_HOST}:{PG_DB_PORT}/{PG_
 
 image_dir = Path(os.getenv("IMAGE_DIR", "images"))
 
+# Serve recommender vector searches from an in-process per-restaurant matrix
+# (Qdrant stays the source of truth and the fallback)
+LOCAL_VECTOR_INDEX = ast.literal_eval(os.getenv("LOCAL_VECTOR_INDEX", "False"))
+
+# Qdrant layout: "per_restaurant" ({slug}_qdb collections) or "shared" (one
+# tenant-partitioned, int8-quantized collection for all restaurants)
+QDRANT_LAYOUT = os.getenv("QDRANT_LAYOUT", "per_restaurant")
+QDRANT_SHARED_COLLECTION = os.getenv("QDRANT_SHARED_COLLECTION", "menu_items")
+
+# Chat: inject a compact per-restaurant menu digest at the start of each thread
+MENU_DIGEST_ENABLED = ast.literal_eval(os.getenv("MENU_DIGEST_ENABLED", "True"))
+MENU_DIGEST_TOKEN_BUDGET = int(os.getenv("MENU_DIGEST_TOKEN_BUDGET", "1500"))
+
+# Chat: per-restaurant semantic cache of opening-question answers
+# (invalidated by menu version, starter quick replies precomputed)
+ANSWER_CACHE_ENABLED = ast.literal_eval(os.getenv("ANSWER_CACHE_ENABLED", "True"))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+
+# Chat: bounded model concurrency (global and per restaurant); turns that
+# cannot start within CHAT_QUEUE_TIMEOUT seconds or find the queue full are shed
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "16"))
+CHAT_MAX_CONCURRENCY_PER_RESTAURANT = int(os.getenv("CHAT_MAX_CONCURRENCY_PER_RESTAURANT", "4"))
+CHAT_MAX_QUEUE_PER_RESTAURANT = int(os.getenv("CHAT_MAX_QUEUE_PER_RESTAURANT", "20"))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "20"))
+
+# Chat: attach server-side timings (queue, model, tools, enrichment, loop lag)
+# to chat_response events - for scripts/benchmarks/bench_chat_ws.py
+CHAT_EXPOSE_TIMINGS = ast.literal_eval(os.getenv("CHAT_EXPOSE_TIMINGS", "False"))
+
+# Feedback bandit: reward/impression counts are aggregated in memory and
+# written to Redis every BANDIT_FLUSH_SECONDS or BANDIT_FLUSH_MAX_PENDING dishes
+BANDIT_FLUSH_SECONDS = float(os.getenv("BANDIT_FLUSH_SECONDS", "5"))
+BANDIT_FLUSH_MAX_PENDING = int(os.getenv("BANDIT_FLUSH_MAX_PENDING", "500"))
+
+# PetPooja menu sync: pushes are stored as menu_sync_jobs and applied by a
+# background worker, which also polls every MENU_SYNC_POLL_SECONDS for jobs
+# queued by other processes. A running job heartbeats every
+# MENU_SYNC_HEARTBEAT_SECONDS; one without a heartbeat for MENU_SYNC_STALE_SECONDS
+# (its process died) is re-queued, up to MENU_SYNC_MAX_ATTEMPTS runs in all.
+# Payloads of finished jobs are dropped (failed ones after MENU_SYNC_PAYLOAD_RETENTION_DAYS)
+MENU_SYNC_POLL_SECONDS = float(os.getenv("MENU_SYNC_POLL_SECONDS", "30"))
+MENU_SYNC_HEARTBEAT_SECONDS = float(os.getenv("MENU_SYNC_HEARTBEAT_SECONDS", "30"))
+MENU_SYNC_STALE_SECONDS = float(os.getenv("MENU_SYNC_STALE_SECONDS", "300"))
+MENU_SYNC_MAX_ATTEMPTS = int(os.getenv("MENU_SYNC_MAX_ATTEMPTS", "3"))
+MENU_SYNC_PAYLOAD_RETENTION_DAYS = float(os.getenv("MENU_SYNC_PAYLOAD_RETENTION_DAYS", "7"))
+
+# Per-session Redis keys (taste vector, seen dishes, feedback history) expire
+# after this long; table sessions are short
+SESSION_VECTOR_TTL = int(os.getenv("SESSION_VECTOR_TTL", str(6 * 60 * 60)))
+
 # Multi-tenant Redis key generators
 def get_tenant_redis_key(tenant_id: str, key_type: str, identifier: str = "") -> str:
     """Generate tenant-scoped Redis keys"""
@@ -64,4 +115,8 @@ def get_session_details_key(tenant_id: str, session_id: str) -> str:
 
 def get_table_sessions_key(tenant_id: str, table_number: int) -> str:
     """Return key for sorted-set that stores all session IDs ever used by a table"""
-    return get_tenant_redis_key(tenant_id, "table_sessions", str(table_number))
\ No newline at end of file
+    return get_tenant_redis_key(tenant_id, "table_sessions", str(table_number))
+
+# Menu version counter (bumped whenever a restaurant's menu changes)
+def get_menu_version_key(tenant_id: str) -> str:
+    return get_tenant_redis_key(tenant_id, "menu_version")
\ No newline at end of file
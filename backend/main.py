@@ -11,7 +11,8 @@ from contextlib import asynccontextmanager
 # from models.schema import init_db
 
 
-from config import rdb, qd, root_dir, DEBUG_MODE, image_dir
+from config import rdb, qd, root_dir, DEBUG_MODE, image_dir, CHAT_EXPOSE_TIMINGS
+from utils.loop_lag import loop_lag_monitor
 # from middleware.tenant_resolver import tenant_middleware, tenant_resolver, get_qdrant_collection
 # from urls.filtered_recommendations import router as filtered_router
 from urls.menu import router as menu_router
@@ -21,6 +22,7 @@ from urls.categories import router as categories_router
 # from urls.featured import router as featured_router
 # from urls.prev_orders import router as prev_orders_router
 from urls.upsell import router as upsell_router
+from urls.feed import router as feed_router
 # from urls.settings import router as settings_router
 from urls.admin.dashboard import router as admin_router
 from urls.admin.dashboard_ws import router as admin_ws_router
@@ -28,7 +30,9 @@ from urls.table_session import router as table_session_router
 from urls.session_ws import router as session_ws_router
 from urls.cart import router as cart_router
 from urls.waiter_requests import router as waiter_requests_router
-from urls.petpooja_callback import router as petpooja_callback_router
+from urls.petpooja_callback import router as petpooja_callback_router, menu_sync_worker
+from olearning.rl import router as bandit_router, stats_buffer as bandit_stats_buffer
+from websocket.chat_scheduler import chat_scheduler
 # from urls.pos import router as pos_router
 
 
@@ -41,6 +45,12 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting Aglio Multi-Tenant Restaurant API")
     logger.info(f"🔧 Debug mode: {DEBUG_MODE}")
+    if CHAT_EXPOSE_TIMINGS:
+        loop_lag_monitor.start()
+        logger.info("⏱️  Chat timings exposed, event-loop lag monitor running")
+    menu_sync_worker.start()
+    logger.info("🔄 Menu sync worker running")
+    chat_scheduler.start()
     
     # Display loaded restaurants status
     # tenant_count = len(tenant_resolver.restaurants_data)
@@ -56,6 +66,9 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown (if needed)
+    loop_lag_monitor.stop()
+    menu_sync_worker.stop()
+    bandit_stats_buffer.flush()
     logger.info("🛑 Shutting down Aglio Multi-Tenant Restaurant API")
 
 # Create the FastAPI app with lifespan
@@ -88,6 +101,7 @@ app.include_router(menu_crud_router, prefix="/menu", tags=["menu-management"])
 # app.include_router(featured_router, prefix="/featured", tags=["featured"])
 # app.include_router(prev_orders_router, prefix="/prev_orders", tags=["orders"])
 app.include_router(upsell_router, prefix="/upsell", tags=["upsell"])
+app.include_router(feed_router, tags=["feed"])  # No prefix - full path in router
 # app.include_router(settings_router, prefix="/settings", tags=["settings"])
 app.include_router(admin_router, prefix="/admin", tags=["admin"])
 app.include_router(admin_ws_router, prefix="/admin", tags=["admin_ws"])
@@ -96,6 +110,7 @@ app.include_router(session_ws_router, tags=["session_ws"])
 app.include_router(cart_router, tags=["cart"])
 app.include_router(waiter_requests_router, tags=["waiter_requests"])
 app.include_router(petpooja_callback_router, tags=["petpooja_callback"])
+app.include_router(bandit_router, tags=["bandit"])
 # app.include_router(pos_router, tags=["pos"])
 
 
@@ -259,6 +259,7 @@ class Order(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     confirmed_at = Column(DateTime, nullable=True)
     failed_at = Column(DateTime, nullable=True)
+    cooccurrence_recorded_at = Column(DateTime, nullable=True)  # Set once the basket is in item_cooccurrence
 
     session = relationship("Session", back_populates="orders")
     pos_system = relationship("POSSystem")
@@ -266,6 +267,21 @@ class Order(Base):
     cart_items = relationship("CartItem", back_populates="order")
 
 
+class ItemCooccurrence(Base):
+    """How often two dishes were ordered together (sparse, per restaurant).
+
+    Stored in both directions (a->b and b->a) so a cart's pairings are one
+    indexed lookup per cart item; the diagonal (a, a) holds how many orders
+    contained a dish and ("*", "*") the restaurant's confirmed order count.
+    """
+    __tablename__ = "item_cooccurrence"
+
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    item_a = Column(String(36), primary_key=True)  # MenuItem.public_id
+    item_b = Column(String(36), primary_key=True)  # MenuItem.public_id
+    count = Column(Integer, nullable=False, default=0)
+
+
 # ---------------------------------------------------------------------------
 # Events
 # ---------------------------------------------------------------------------
@@ -325,6 +341,41 @@ class POSSystem(Base):
     restaurant = relationship("Restaurant")
 
 
+class MenuSyncJob(Base):
+    """A POS menu push waiting for / applied by the background sync worker.
+
+    The callback stores the raw payload and returns at once; the worker applies
+    it (services/pos/menu_sync_jobs.py) and records progress and the change report.
+    """
+    __tablename__ = "menu_sync_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    public_id = Column(String(36), unique=True, nullable=False)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    pos_system_id = Column(Integer, ForeignKey("pos_systems.id"), nullable=False)
+    payload = Column(JSON, nullable=True)  # Raw POS menu payload (dropped once the job is finished)
+    payload_hash = Column(String(64), nullable=False)  # sha256 of the canonical payload JSON
+    status = Column(Enum("queued", "running", "succeeded", "failed", "superseded", name="menu_sync_job_status"),
+                    default="queued", nullable=False)
+    stage = Column(String, nullable=True)  # Table being synced while running
+    progress = Column(Integer, default=0, nullable=False)  # 0-100
+    attempts = Column(Integer, default=0, nullable=False)
+    result = Column(JSON, nullable=True)  # MenuDiff.report() of a finished sync
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)  # Heartbeat of the run; staleness is measured from here
+    finished_at = Column(DateTime, nullable=True)
+
+    restaurant = relationship("Restaurant")
+    pos_system = relationship("POSSystem")
+
+    __table_args__ = (
+        Index("ix_menu_sync_jobs_status", "status"),
+        Index("ix_menu_sync_jobs_restaurant_hash", "restaurant_id", "payload_hash"),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Menu Structure (Following PetPooja Architecture)
 # ---------------------------------------------------------------------------
@@ -366,6 +417,10 @@ class MenuItem(Base):
     itemallowaddon = Column(Boolean, default=False)  # Can this item have addons?
     pos_system_id = Column(Integer, ForeignKey("pos_systems.id"), nullable=True)
 
+    # Hash of the embedded content (text fields, media ids, embedding model) –
+    # re-onboarding re-embeds only items whose hash changed
+    content_hash = Column(String(64), nullable=True)
+
     restaurant = relationship("Restaurant", back_populates="menu_items")
     pos_system = relationship("POSSystem")
     # Relationships to junction tables
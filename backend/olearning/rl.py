@@ -1,121 +1,231 @@
-DIM = 1280
-EPS = 0.1     # ε-greedy rate
+"""
+rl.py – Feedback bandit: one dish at a time, learned from "maybe" / "skip".
+
+Each recommendation takes the session's preference vector, keeps the nearest
+eligible dishes the session has not been shown yet and picks one by Thompson
+sampling over the per-dish reward / impression counts. Every step runs on
+in-process data so it is cheap enough to call per scroll event:
+
+* dish vectors come from the restaurant's local vector index (one matrix per
+  menu version) instead of a Qdrant search / retrieve per call;
+* the candidates' counts are read with one pipelined HMGET batch and all Beta
+  samples are drawn with one vectorized `rng.beta` call;
+* reward / impression increments are aggregated in memory (`BanditStatsBuffer`)
+  and flushed to Redis every BANDIT_FLUSH_SECONDS or BANDIT_FLUSH_MAX_PENDING
+  dishes; unflushed increments are added to what Redis returns so the sampler
+  always sees them.
+
+Dishes are addressed by public id and stats live under
+`{slug}:stat:{public_id}`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Path, Query
+from pydantic import BaseModel
+
+from config import (
+    rdb, logger, BANDIT_FLUSH_SECONDS, BANDIT_FLUSH_MAX_PENDING, SESSION_VECTOR_TTL,
+    get_tenant_vec_key, get_tenant_stat_key, get_tenant_seen_key, get_tenant_history_key,
+)
+from common.qdrant_utils import get_collection_name
+from common.dish_card_index import get_dish_card_index
+from recommender.vector_index import MenuVectorIndex, get_vector_index
+
+# Nearest dishes the bandit samples from
+CANDIDATES = 10
+# Reward credited per action (every action is an impression)
+REWARDS = {"maybe": 0.4, "skip": 0.0}
+# Preference vector step per action
+PREFERENCE_WEIGHTS = {"maybe": 0.5, "skip": -0.3}
+
+router = APIRouter()
+
 
 class Feedback(BaseModel):
     session_id: str
-    id: int
+    id: str            # dish public id
     action: str        # "maybe" | "skip"
 
-# -------- utility functions (now tenant-aware) -----------------------------
-def vec_key(tenant_id: str, sess: str) -> str:
-    return f"{tenant_id}:vec:{sess}"
 
-def stat_key(tenant_id: str, d: int) -> str:
-    return f"{tenant_id}:stat:{d}"
+# -------- reward / impression aggregation ----------------------------------
+class BanditStatsBuffer:
+    """Per-dish reward / impression increments waiting to be written to Redis."""
+
+    def __init__(self, client=None,
+                 flush_seconds: float = BANDIT_FLUSH_SECONDS,
+                 max_pending: int = BANDIT_FLUSH_MAX_PENDING):
+        self.client = client if client is not None else rdb
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[str, List[float]] = {}   # stat key -> [reward, impressions]
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, stat_key: str, reward: float, impressions: int = 1) -> None:
+        with self._lock:
+            counts = self._pending.setdefault(stat_key, [0.0, 0])
+            counts[0] += reward
+            counts[1] += impressions
+            due = (len(self._pending) >= self.max_pending
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def pending(self, stat_keys: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Unflushed (rewards, impressions) of the given keys."""
+        with self._lock:
+            counts = [self._pending.get(key, (0.0, 0)) for key in stat_keys]
+        rewards = np.fromiter((c[0] for c in counts), dtype=np.float64, count=len(counts))
+        impressions = np.fromiter((c[1] for c in counts), dtype=np.float64, count=len(counts))
+        return rewards, impressions
+
+    def flush(self) -> int:
+        """Write all pending increments in one pipeline. Returns the number of dishes flushed."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        pipe = self.client.pipeline(transaction=False)
+        for key, (reward, impressions) in pending.items():
+            if reward:
+                pipe.hincrbyfloat(key, "reward", reward)
+            pipe.hincrby(key, "impr", impressions)
+        try:
+            pipe.execute()
+        except Exception as e:
+            # Put the increments back so the next flush retries them
+            logger.warning(f"Bandit stats flush failed, keeping {len(pending)} dishes pending: {e}")
+            with self._lock:
+                for key, (reward, impressions) in pending.items():
+                    counts = self._pending.setdefault(key, [0.0, 0])
+                    counts[0] += reward
+                    counts[1] += impressions
+            return 0
+        return len(pending)
+
+
+stats_buffer = BanditStatsBuffer()
+
+
+def fetch_stats(stat_keys: List[str], buffer: BanditStatsBuffer = stats_buffer) -> Tuple[np.ndarray, np.ndarray]:
+    """(rewards, impressions) of the given stat keys: one pipelined HMGET batch plus unflushed counts."""
+    pipe = buffer.client.pipeline(transaction=False)
+    for key in stat_keys:
+        pipe.hmget(key, "reward", "impr")
+    rows = pipe.execute()
+    rewards = np.fromiter((float(r[0] or 0) for r in rows), dtype=np.float64, count=len(rows))
+    impressions = np.fromiter((float(r[1] or 0) for r in rows), dtype=np.float64, count=len(rows))
+    pending_rewards, pending_impressions = buffer.pending(stat_keys)
+    return rewards + pending_rewards, impressions + pending_impressions
+
+
+def thompson_pick(rewards: np.ndarray, impressions: np.ndarray, rng: Optional[np.random.Generator] = None) -> int:
+    """Index of the candidate with the highest Beta(reward + 1, misses + 1) sample."""
+    rng = rng or np.random.default_rng()
+    misses = np.maximum(impressions - rewards, 0.0)
+    return int(np.argmax(rng.beta(rewards + 1.0, misses + 1.0)))
+
+
+# -------- session preference vector ----------------------------------------
+def get_user_vec(restaurant_slug: str, session_id: str, dim: int) -> np.ndarray:
+    raw = rdb.get(get_tenant_vec_key(restaurant_slug, session_id))
+    if raw:
+        vec = np.frombuffer(raw, dtype=np.float32)
+        if vec.shape[0] == dim:
+            return vec
+    # cold-start tiny random vector
+    return np.random.normal(0, 0.01, dim).astype(np.float32)
+
 
-def seen_key(tenant_id: str, sess: str) -> str:
-    return f"{tenant_id}:seen:{sess}"
+def update_user_vec(vec: np.ndarray, dish_vec: np.ndarray, action: str) -> np.ndarray:
+    new_vec = vec + PREFERENCE_WEIGHTS.get(action, 0.0) * dish_vec
+    return new_vec / (np.linalg.norm(new_vec) + 1e-8)
 
-def get_user_vec(tenant_id: str, sess_id: str):
-    raw = rdb.get(vec_key(tenant_id, sess_id))
-    if raw:
-        return np.frombuffer(raw, dtype=np.float32)
-    else:
-        # cold-start tiny random vector
-        return np.random.normal(0, 0.01, DIM).astype(np.float32)
-
-def set_user_vec(tenant_id: str, sess_id: str, vec):
-    rdb.set(vec_key(tenant_id, sess_id), vec.astype(np.float32).tobytes())
-
-def update_user_vec(vec, dish_vec, action):
-    if action=="maybe":  w=0.5
-    else:                w=-0.3
-    new_vec = vec + w* dish_vec
-    return new_vec / (np.linalg.norm(new_vec)+1e-8)
-
-# -------- endpoints (updated for multi-tenant) -----------------------------
-@app.get("/recommend")
-def recommend(request: Request, session_id: str, is_veg: bool|None=None, price_cap: int|None=None):
-    # Get tenant-specific collection
-    collection_name = get_qdrant_collection(request)
-    tenant_id = request.state.tenant_id
-    
-    user_vec = get_user_vec(tenant_id, session_id)
-    filt = []
-    if is_veg is not None:
-        filt.append({"key": "veg_flag", "match": {"value": 1 if is_veg else 0}})
-    if price_cap is not None:
-        # use RangeCondition for numeric filtering
-        filt.append({"key": "price", "range": {"lte": price_cap}})
-    
-    res = qd.search(collection_name, user_vec.tolist(), query_filter={"must":filt} if filt else None, limit=10)
-    cand_ids = [hit.id for hit in res]
+
+def _dish_index(restaurant_slug: str) -> MenuVectorIndex:
+    index = get_vector_index(restaurant_slug, get_collection_name(restaurant_slug), force=True)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Restaurant menu not available")
+    return index
+
+
+def _dish_payload(restaurant_slug: str, public_id: str) -> Dict:
+    cards = get_dish_card_index(restaurant_slug)
+    card = cards.get(cards.id_for(public_id)) or {}
+    return {**card, "id": public_id}
+
+
+# -------- endpoints ---------------------------------------------------------
+@router.get("/restaurants/{restaurant_slug}/recommend")
+def recommend(restaurant_slug: str = Path(..., description="Restaurant slug"),
+              session_id: str = Query(...),
+              is_veg: bool | None = None,
+              price_cap: int | None = None):
+    index = _dish_index(restaurant_slug)
+    user_vec = get_user_vec(restaurant_slug, session_id, index.vectors.shape[1])
+
+    filters = {"isVeg": is_veg, "priceEnabled": price_cap is not None, "priceRange": [0, price_cap]}
+    seen_key = get_tenant_seen_key(restaurant_slug, session_id)
+    seen = {x.decode() for x in rdb.smembers(seen_key)}
 
     # seen-item filter: drop items already shown and reset when exhausted
-    seen = rdb.smembers(seen_key(tenant_id, session_id))
-    used = {int(x.decode()) for x in seen} if seen else set()
-    remaining = [d for d in cand_ids if d not in used]
-    if not remaining:
-        rdb.delete(seen_key(tenant_id, session_id))
-        remaining = cand_ids
-    cand_ids = remaining
+    candidates = [pid for pid, _ in index.search(user_vec, CANDIDATES, filters, exclude=seen)]
+    if not candidates:
+        rdb.delete(seen_key)
+        candidates = [pid for pid, _ in index.search(user_vec, CANDIDATES, filters)]
+    if not candidates:
+        raise HTTPException(status_code=404, detail="No dishes match the filters")
 
     # Thompson sampling for best candidate
-    samples = []
-    for d in cand_ids:
-        s = float(rdb.hget(stat_key(tenant_id, d), "reward") or 0)
-        r = float(rdb.hget(stat_key(tenant_id, d), "impr") or 0)
-        # Beta prior: add 1 to each count for smoothing
-        sample = np.random.beta(s + 1, r - s + 1 if r - s > 0 else 1)
-        samples.append((sample, d))
-    dish_id = max(samples)[1]
-
-    # record this recommendation
-    rdb.sadd(seen_key(tenant_id, session_id), dish_id)
-
-    payload = qd.retrieve(collection_name, ids=[dish_id])[0].payload
-    return {"id": dish_id, **payload}
-
-@app.post("/feedback")
-def feedback(request: Request, fb: Feedback):
-    collection_name = get_qdrant_collection(request)
-    tenant_id = request.state.tenant_id
-    
-    dish = qd.retrieve(
-        collection_name,
-        ids=[fb.id],
-        with_vectors=True
-    )[0]
-    vec = np.array(dish.vector)
-
-    # --- bandit update
-    r = 0.4 if fb.action=="maybe" else 0.0
-    pipe = rdb.pipeline()
-    pipe.hincrbyfloat(stat_key(tenant_id, fb.id),"reward", r)
-    pipe.hincrby(stat_key(tenant_id, fb.id),"impr", 1)
-    pipe.execute()
+    rewards, impressions = fetch_stats([get_tenant_stat_key(restaurant_slug, pid) for pid in candidates])
+    dish_id = candidates[thompson_pick(rewards, impressions)]
 
-    # --- preference vector update
-    uvec = get_user_vec(tenant_id, fb.session_id)
-    uvec = update_user_vec(uvec, vec, fb.action)
-    set_user_vec(tenant_id, fb.session_id, uvec)
-    # record feedback history per session and action
-    rdb.rpush(f"{tenant_id}:history:{fb.session_id}:{fb.action}", fb.id)
+    # record this recommendation (per-session keys expire with the session)
+    pipe = rdb.pipeline(transaction=False)
+    pipe.sadd(seen_key, dish_id)
+    pipe.expire(seen_key, SESSION_VECTOR_TTL)
+    pipe.execute()
+    return _dish_payload(restaurant_slug, dish_id)
+
+
+@router.post("/restaurants/{restaurant_slug}/feedback")
+def feedback(fb: Feedback, restaurant_slug: str = Path(..., description="Restaurant slug")):
+    if fb.action not in REWARDS:
+        raise HTTPException(status_code=400, detail=f"Unknown action: {fb.action}")
+    index = _dish_index(restaurant_slug)
+    dish_vec = index.vectors_for([fb.id])
+    if not len(dish_vec):
+        raise HTTPException(status_code=404, detail="Dish not found")
+
+    # --- bandit update (aggregated in memory, flushed periodically)
+    stats_buffer.record(get_tenant_stat_key(restaurant_slug, fb.id), REWARDS[fb.action])
+
+    # --- preference vector update + feedback history per session and action
+    uvec = get_user_vec(restaurant_slug, fb.session_id, index.vectors.shape[1])
+    uvec = update_user_vec(uvec, dish_vec[0], fb.action)
+    history_key = get_tenant_history_key(restaurant_slug, fb.session_id, fb.action)
+    pipe = rdb.pipeline(transaction=False)
+    pipe.set(get_tenant_vec_key(restaurant_slug, fb.session_id), uvec.astype(np.float32).tobytes(), ex=SESSION_VECTOR_TTL)
+    pipe.rpush(history_key, fb.id)
+    pipe.expire(history_key, SESSION_VECTOR_TTL)
+    pipe.execute()
     return {"ok": True}
 
-@app.get("/history")
-def history(request: Request, session_id: str):
-    collection_name = get_qdrant_collection(request)
-    tenant_id = request.state.tenant_id
-    
+
+@router.get("/restaurants/{restaurant_slug}/history")
+def history(restaurant_slug: str = Path(..., description="Restaurant slug"), session_id: str = Query(...)):
     def fetch(action: str):
-        key = f"{tenant_id}:history:{session_id}:{action}"
-        ids = [int(x) for x in rdb.lrange(key, 0, -1)]
-        if not ids:
-            return []
-        recs = qd.retrieve(collection_name, ids=ids)
-        return [{"id": r.id, **r.payload} for r in recs]
+        key = get_tenant_history_key(restaurant_slug, session_id, action)
+        return [_dish_payload(restaurant_slug, x.decode()) for x in rdb.lrange(key, 0, -1)]
     return {
         "maybe": fetch("maybe"),
         "skip":  fetch("skip"),
-    }
\ No newline at end of file
+    }
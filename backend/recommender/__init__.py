@@ -68,7 +68,8 @@ TOOLS YOU CAN CALL
 • budget_friendly_options   – dishes under a price cap
 • get_cart_pairings         – sides/drinks for current cart (call ONLY when cart array is not empty)
 
-All tools return dish objects containing id, name, description and category.
+All tools return dish objects containing id, name, description and category, as a pipe-delimited table whose first row is the header.
+If a MENU DIGEST is provided, use it to know what the restaurant serves and pick ids directly; call tools only for search, descriptions, similar dishes or pairings.
 
 ------------------------------------
 GENERAL GUIDELINES
@@ -17,10 +17,11 @@ from dotenv import load_dotenv
 from openai import OpenAI
 from redis import Redis
 
-from config import rdb  # redis instance from your config
+from config import rdb, MENU_DIGEST_ENABLED  # redis instance from your config
 from .tools_registry import openai_tools
 from . import SYSTEM_PROMPT, Blocks
 from . import tools
+from .menu_digest import get_menu_digest, encode_tool_result, estimate_tokens
 
 load_dotenv()
 client = OpenAI()                # assumes OPENAI_API_KEY env var
@@ -44,7 +45,8 @@ RESP_KEY = lambda sid: f"resp:{sid}"   # redis key to store last response.id
 # ------------------------------------------------------------ #
 #  Public entry
 # ------------------------------------------------------------ #
-def generate_blocks(payload: Dict[str, Any], thread_id: str, restaurant_slug: str) -> Blocks:
+def generate_blocks(payload: Dict[str, Any], thread_id: str, restaurant_slug: str,
+                    stats: Dict[str, Any] | None = None) -> Blocks:
     """
     Main entry used by the WebSocket handler.
 
@@ -56,6 +58,10 @@ def generate_blocks(payload: Dict[str, Any], thread_id: str, restaurant_slug: st
         Socket thread ID (maps to redis key storing last response.id).
     restaurant_slug : str
         Tenant-specific Qdrant collection name.
+    stats : dict, optional
+        Filled with per-turn measurements (model rounds, tool calls, token usage,
+        model/tool seconds, final response id) for benchmarks, logging and the
+        answer cache.
 
     Returns
     -------
@@ -70,6 +76,11 @@ def generate_blocks(payload: Dict[str, Any], thread_id: str, restaurant_slug: st
     cart = payload.pop("cart")
     extra_context = payload.pop("extra_context")
 
+    if stats is None:
+        stats = {}
+    stats.update(rounds=0, tool_calls=0, input_tokens=0, output_tokens=0,
+                 tool_output_tokens=0, model_seconds=0.0, tool_seconds=0.0, response_id=None)
+
     msgs = []
     if prev_id is None:
         system_msg = {
@@ -77,6 +88,12 @@ def generate_blocks(payload: Dict[str, Any], thread_id: str, restaurant_slug: st
             "content": SYSTEM_PROMPT,
         }
         msgs.append(system_msg)
+
+        # Menu digest once per thread – saves the "what do you serve?" tool round
+        if MENU_DIGEST_ENABLED:
+            digest = get_menu_digest(restaurant_slug)
+            if digest:
+                msgs.append({"role": "system", "content": digest})
     
     if extra_context:
         try:
@@ -108,10 +125,16 @@ def generate_blocks(payload: Dict[str, Any], thread_id: str, restaurant_slug: st
             timeout=60,
         )
         logger.debug(f"Model Response took {time.time() - t1}")
+        stats["rounds"] += 1
+        stats["model_seconds"] += time.time() - t1
+        if response.usage:
+            stats["input_tokens"] += response.usage.input_tokens
+            stats["output_tokens"] += response.usage.output_tokens
         msgs = []
         # Persist context id for next turn
         prev_id = response.id
         rdb.set(RESP_KEY(thread_id), prev_id)
+        stats["response_id"] = prev_id
 
         check_tools_calls = any([output.type == "function_call" for output in response.output])
 
@@ -138,9 +161,14 @@ def generate_blocks(payload: Dict[str, Any], thread_id: str, restaurant_slug: st
                     fn_args["cart"] = cart
 
                 logger.info(f"Calling tool {fn_name} with args {fn_args}")
+                t2 = time.time()
                 result = _TOOL_MAP[fn_name](**fn_args)
+                stats["tool_seconds"] += time.time() - t2
 
-                msgs.append({"type": "function_call_output", "output": str(result), "call_id": call_id})
+                output = encode_tool_result(result)
+                stats["tool_calls"] += 1
+                stats["tool_output_tokens"] += estimate_tokens(output)
+                msgs.append({"type": "function_call_output", "output": output, "call_id": call_id})
             continue
         else:
             # WRITE EXIT ROUTINE AND ENRICHMENT
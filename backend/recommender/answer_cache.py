@@ -0,0 +1,235 @@
+"""
+answer_cache.py – Per-restaurant semantic cache of chat answers.
+
+Every table taps the same starter quick replies ("Most Popular", "Chef's
+Recommendations", ...) and asks the same handful of questions, and each one
+used to cost a full `generate_blocks` run plus `enrich_blocks`. Answers to the
+first question of a thread are cached here and served again when a new thread
+asks the same – or a semantically equivalent – question with the same filters.
+
+Layout (Redis hash per restaurant and menu version):
+
+    {slug}:answer_cache:{menu_version}
+        field = sha1(filters_key + normalised question)
+        value = JSON {question, filters, embedding, blocks, response_id}
+
+Keying by menu version means any menu change (edit, toggle, POS sync,
+re-onboarding) invalidates the cache without deleting anything; old hashes
+expire via TTL. An exact field lookup serves quick replies without encoding
+the question; otherwise the question embedding is compared against an
+in-process matrix of the cached questions (reloaded when the hash grows).
+
+The cached `response_id` is copied onto the new thread so follow-up questions
+continue from the cached answer's context (Responses API forking).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    rdb, logger, get_tenant_redis_key,
+    ANSWER_CACHE_ENABLED, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_MAX_ENTRIES,
+)
+from common.menu_version import get_menu_version
+from websocket.chat_scheduler import chat_scheduler
+
+# Fixed quick replies shown when the chat opens (qrmenu core store/chat.js)
+STARTER_QUESTIONS = ["Most Popular", "Chef's Recommendations", "A Combo Meal"]
+
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+WARMUP_LOCK_SECONDS = 10 * 60
+# Wait after a menu change before warming, in case more edits follow
+WARMUP_DELAY_SECONDS = 30
+
+# slug -> (menu version, hash length, questions matrix, fields)
+_matrices: Dict[str, Tuple[int, int, np.ndarray, List[bytes]]] = {}
+_warmed: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _cache_key(restaurant_slug: str, version: int) -> str:
+    return get_tenant_redis_key(restaurant_slug, "answer_cache", str(version))
+
+
+def _normalise(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(filters or {}, sort_keys=True, separators=(",", ":"))
+
+
+def _field(question: str, filters_key: str) -> str:
+    return hashlib.sha1(f"{filters_key}\n{_normalise(question)}".encode()).hexdigest()
+
+
+def _encode(question: str) -> np.ndarray:
+    from recommender.tools import _txt_model
+    return np.asarray(_txt_model().encode(_normalise(question), normalize_embeddings=True), dtype=np.float32)
+
+
+def is_cacheable(payload: Dict[str, Any], thread_id: str) -> bool:
+    """Only the opening question of a thread, without cart or extra context."""
+    from recommender.ai import RESP_KEY
+
+    if not ANSWER_CACHE_ENABLED or not thread_id:
+        return False
+    if payload.get("cart") or payload.get("extra_context"):
+        return False
+    return not rdb.exists(RESP_KEY(thread_id))
+
+
+def _load_matrix(restaurant_slug: str, version: int) -> Tuple[np.ndarray, List[bytes]]:
+    key = _cache_key(restaurant_slug, version)
+    size = rdb.hlen(key)
+    cached = _matrices.get(restaurant_slug)
+    if cached and cached[0] == version and cached[1] == size:
+        return cached[2], cached[3]
+
+    with _lock:
+        entries = rdb.hgetall(key)
+        fields = list(entries)
+        embeddings = [json.loads(entries[f])["embedding"] for f in fields]
+        matrix = np.asarray(embeddings, dtype=np.float32) if embeddings else np.zeros((0, 0), dtype=np.float32)
+        _matrices[restaurant_slug] = (version, len(fields), matrix, fields)
+        return matrix, fields
+
+
+def lookup_answer(restaurant_slug: str, question: str,
+                  filters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Return the cached entry for a question (exact or above the similarity threshold)."""
+    version = get_menu_version(restaurant_slug)
+    key = _cache_key(restaurant_slug, version)
+    filters_key = _filters_key(filters)
+
+    raw = rdb.hget(key, _field(question, filters_key))
+    if raw:
+        return json.loads(raw)
+
+    matrix, fields = _load_matrix(restaurant_slug, version)
+    if not len(fields):
+        return None
+
+    scores = matrix @ _encode(question)
+    for row in np.argsort(-scores):
+        if scores[row] < ANSWER_CACHE_THRESHOLD:
+            break
+        raw = rdb.hget(key, fields[row])
+        if not raw:
+            continue
+        entry = json.loads(raw)
+        if entry["filters"] == filters_key:
+            logger.debug(f"Answer cache hit for '{question}' ~ '{entry['question']}' ({scores[row]:.3f})")
+            return entry
+    return None
+
+
+def store_answer(restaurant_slug: str, question: str, filters: Optional[Dict[str, Any]],
+                 blocks: Dict[str, Any], response_id: Optional[str], version: Optional[int] = None) -> bool:
+    """Cache an enriched answer under the menu version it was generated for."""
+    if version is None:
+        version = get_menu_version(restaurant_slug)
+    key = _cache_key(restaurant_slug, version)
+    if rdb.hlen(key) >= ANSWER_CACHE_MAX_ENTRIES:
+        return False
+
+    filters_key = _filters_key(filters)
+    entry = {
+        "question": question,
+        "filters": filters_key,
+        "embedding": _encode(question).tolist(),
+        "blocks": blocks,
+        "response_id": response_id,
+    }
+    pipe = rdb.pipeline()
+    pipe.hset(key, _field(question, filters_key), json.dumps(entry))
+    pipe.expire(key, CACHE_TTL_SECONDS)
+    pipe.execute()
+    return True
+
+
+def fork_thread(thread_id: str, entry: Dict[str, Any]) -> None:
+    """Point a new thread at the cached answer's response so follow-ups keep context."""
+    from recommender.ai import RESP_KEY
+
+    if entry.get("response_id"):
+        rdb.set(RESP_KEY(thread_id), entry["response_id"])
+
+
+# ------------------------------------------------------------------#
+# Starter quick-reply precompute
+# ------------------------------------------------------------------#
+def _warm_starter_answer(restaurant_slug: str, question: str, version: int) -> bool:
+    """Generate and cache one starter answer for `version` of the menu. Blocking."""
+    from recommender.ai import generate_blocks, RESP_KEY
+    from common.utils import enrich_blocks
+
+    # Superseded by a newer menu change, whose own warmup covers it
+    if get_menu_version(restaurant_slug) != version or lookup_answer(restaurant_slug, question, {}):
+        return False
+    thread_id = f"warmup-{uuid.uuid4().hex}"
+    stats: Dict[str, Any] = {}
+    try:
+        payload = {"text": question, "filters": {}, "cart": [], "extra_context": None}
+        blocks = generate_blocks(payload, thread_id, restaurant_slug, stats=stats)
+        enriched = enrich_blocks(blocks, restaurant_slug)
+    finally:
+        rdb.delete(RESP_KEY(thread_id))
+    if get_menu_version(restaurant_slug) != version:
+        return False
+    return store_answer(restaurant_slug, question, {}, enriched, stats.get("response_id"), version)
+
+
+async def warm_starter_answers(restaurant_slug: str, version: int, delay: float = 0.0) -> int:
+    """Generate and cache answers to the starter quick replies for `version` of the menu.
+
+    Each model call goes through the chat scheduler at background priority, so
+    warmups share the global concurrency cap and yield to diners' turns.
+    """
+    await asyncio.sleep(delay)
+    warmed = 0
+    for question in STARTER_QUESTIONS:
+        try:
+            warmed += await chat_scheduler.run_background(
+                restaurant_slug, _warm_starter_answer, restaurant_slug, question, version
+            )
+        except Exception as e:
+            logger.warning(f"Answer cache warmup failed for {restaurant_slug} '{question}': {e}")
+    logger.info(f"Warmed {warmed} starter answers for {restaurant_slug} (menu version {version})")
+    return warmed
+
+
+def schedule_starter_warmup(restaurant_slug: str, delay: float = 0.0) -> bool:
+    """Precompute starter answers in the background, once per menu version.
+
+    Called right after `bump_menu_version` (with WARMUP_DELAY_SECONDS, so a burst
+    of edits warms only the last version) and on every chat message, which
+    covers menu changes made outside the API such as re-onboarding. Safe from
+    worker threads. An in-process check skips versions already handled, and a
+    Redis lock keeps several API workers from warming the same version.
+    """
+    if not ANSWER_CACHE_ENABLED:
+        return False
+    version = get_menu_version(restaurant_slug)
+    if _warmed.get(restaurant_slug) == version:
+        return False
+
+    lock_key = get_tenant_redis_key(restaurant_slug, "answer_cache_warmup", str(version))
+    if not rdb.set(lock_key, 1, nx=True, ex=WARMUP_LOCK_SECONDS):
+        _warmed[restaurant_slug] = version
+        return False
+
+    if not chat_scheduler.spawn(warm_starter_answers(restaurant_slug, version, delay)):
+        # No serving loop in this process (scripts); leave the version to the API
+        rdb.delete(lock_key)
+        return False
+    _warmed[restaurant_slug] = version
+    return True
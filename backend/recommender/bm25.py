@@ -0,0 +1,236 @@
+"""
+bm25.py – Compact per-restaurant BM25 engine.
+
+The index is a CSR-style inverted index stored as plain `.npy` arrays so it can
+be memory-mapped instead of unpickled:
+
+    bm25_indexes/{slug}_bm25/
+        CURRENT                 name of the live generation, replaced atomically
+        v{time_ns}/             one directory per build, never modified once written
+            indptr.npy     (V+1,)  int64    postings of term t are [indptr[t], indptr[t+1])
+            doc_ids.npy    (P,)    int32    document row of each posting
+            weights.npy    (P,)    float32  precomputed BM25 term weight of each posting
+            idf.npy        (V,)    float32
+            doc_len.npy    (N,)    int32
+            meta.json               vocabulary, public_ids, k1/b/avgdl
+
+A rebuild writes a new generation and then switches CURRENT over, so a reader
+always sees the meta.json and arrays of one build; the previous generation is
+kept (it may still be memory-mapped) and older ones are removed.
+
+Because document lengths and IDF are folded into `weights` at build time, a
+query is a handful of slice additions plus `argpartition`. Scores match
+`rank_bm25.BM25Okapi` (same IDF floor for very common terms).
+
+`tokenize` and `bm25_document` are shared with the onboarding script so
+queries and documents are split the same way. Restaurants onboarded before
+this format only have a pickled rank_bm25 index (`{slug}_bm25.pkl`), which is
+not read any more: scripts/rebuild_bm25_indexes.py rebuilds them from Postgres,
+and `get_bm25_index` logs a warning for each one still missing.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import logger
+
+BM25_INDEX_DIR = Path(__file__).parent.parent / "bm25_indexes"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens (punctuation is dropped)."""
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def bm25_document(name, description, category_brief, group_category) -> str:
+    """Indexed text of a dish (the category counts twice)."""
+    return f"{name} {description} {category_brief} {category_brief} {group_category}"
+
+
+class BM25Index:
+    """Read-only BM25 index of one restaurant."""
+
+    def __init__(self, vocab: Dict[str, int], public_ids: List[str],
+                 indptr: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray,
+                 idf: np.ndarray, doc_len: np.ndarray):
+        self.vocab = vocab
+        self.public_ids = public_ids
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.idf = idf
+        self.doc_len = doc_len
+
+    def __len__(self) -> int:
+        return len(self.public_ids)
+
+    def get_scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for a query."""
+        scores = np.zeros(len(self.public_ids), dtype=np.float32)
+        for token in tokenize(query):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = self.indptr[term], self.indptr[term + 1]
+            # A term occurs at most once per posting list, so plain fancy-index add is safe
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Top `limit` (public_id, score) pairs with a positive score, best first."""
+        scores = self.get_scores(query)
+        hits = np.flatnonzero(scores > 0)
+        if hits.size == 0 or limit <= 0:
+            return []
+        k = min(limit, hits.size)
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self.public_ids[i], float(scores[i])) for i in top]
+
+
+def build_bm25_arrays(corpus: Sequence[List[str]], k1: float = 1.5, b: float = 0.75,
+                      epsilon: float = 0.25) -> Dict[str, object]:
+    """Build CSR postings, IDF and per-posting weights from tokenized documents."""
+    n_docs = len(corpus)
+    doc_len = np.asarray([len(doc) for doc in corpus], dtype=np.int32)
+    avgdl = float(doc_len.mean()) if n_docs else 0.0
+
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for doc_id, doc in enumerate(corpus):
+        for token, tf in Counter(doc).items():
+            postings.setdefault(token, []).append((doc_id, tf))
+
+    vocab = {token: term for term, token in enumerate(sorted(postings))}
+
+    # Same IDF as rank_bm25.BM25Okapi: negative IDFs are floored at epsilon * mean IDF
+    idf = np.asarray([
+        math.log(n_docs - len(postings[token]) + 0.5) - math.log(len(postings[token]) + 0.5)
+        for token in vocab
+    ], dtype=np.float32)
+    if idf.size:
+        idf[idf < 0] = epsilon * float(idf.mean())
+
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    doc_ids, tfs = [], []
+    for token, term in vocab.items():
+        docs = postings[token]
+        indptr[term + 1] = indptr[term] + len(docs)
+        doc_ids.extend(d for d, _ in docs)
+        tfs.extend(tf for _, tf in docs)
+
+    doc_ids = np.asarray(doc_ids, dtype=np.int32)
+    tfs = np.asarray(tfs, dtype=np.float32)
+    term_of_posting = np.repeat(np.arange(len(vocab)), np.diff(indptr))
+    norm = k1 * (1 - b + b * doc_len[doc_ids] / max(avgdl, 1e-8))
+    weights = (idf[term_of_posting] * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+    return {
+        "vocab": vocab, "indptr": indptr, "doc_ids": doc_ids, "weights": weights,
+        "idf": idf, "doc_len": doc_len, "avgdl": avgdl, "k1": k1, "b": b,
+    }
+
+
+def _index_path(restaurant_slug: str, index_dir: Path = BM25_INDEX_DIR) -> Path:
+    return index_dir / f"{restaurant_slug}_bm25"
+
+
+def _current_generation(root: Path) -> Optional[str]:
+    try:
+        return (root / "CURRENT").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_bm25_index(restaurant_slug: str, texts: Sequence[str], public_ids: Sequence[str],
+                    index_dir: Path = BM25_INDEX_DIR) -> Path:
+    """Tokenize `texts`, build the index and make it the live generation for `restaurant_slug`."""
+    arrays = build_bm25_arrays([tokenize(text) for text in texts])
+    root = _index_path(restaurant_slug, index_dir)
+    previous = _current_generation(root)
+    generation = f"v{time.time_ns()}"
+    path = root / generation
+    path.mkdir(parents=True)
+
+    for name in ("indptr", "doc_ids", "weights", "idf", "doc_len"):
+        np.save(path / f"{name}.npy", arrays[name])
+    meta = {
+        "vocab": arrays["vocab"],
+        "public_ids": [str(pid) for pid in public_ids],
+        "avgdl": arrays["avgdl"],
+        "k1": arrays["k1"],
+        "b": arrays["b"],
+    }
+    with open(path / "meta.json", "w") as f:
+        json.dump(meta, f)
+
+    # The switch: CURRENT is replaced in one rename, after the whole generation is on disk
+    tmp_current = root / "CURRENT.tmp"
+    tmp_current.write_text(generation)
+    os.replace(tmp_current, root / "CURRENT")
+
+    # Keep the previous generation: running servers may still have it memory-mapped
+    for old in root.iterdir():
+        if old.is_dir() and old.name not in (generation, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def load_bm25_index(path: Path) -> BM25Index:
+    """Memory-map an index directory written by `save_bm25_index`."""
+    with open(path / "meta.json") as f:
+        meta = json.load(f)
+    arrays = {
+        name: np.load(path / f"{name}.npy", mmap_mode="r")
+        for name in ("indptr", "doc_ids", "weights", "idf", "doc_len")
+    }
+    return BM25Index(meta["vocab"], meta["public_ids"], **arrays)
+
+
+_indexes: Dict[str, Tuple[str, BM25Index]] = {}
+_lock = threading.Lock()
+_missing_warned = set()
+
+
+def get_bm25_index(restaurant_slug: str, index_dir: Path = BM25_INDEX_DIR) -> Optional[BM25Index]:
+    """Lazily load a restaurant's index, reloading it when onboarding switches generations."""
+    root = _index_path(restaurant_slug, index_dir)
+    generation = _current_generation(root)
+    if generation is None:
+        if restaurant_slug not in _missing_warned:
+            _missing_warned.add(restaurant_slug)
+            legacy = index_dir / f"{restaurant_slug}_bm25.pkl"
+            hint = f" (only the old {legacy.name})" if legacy.exists() else ""
+            logger.warning(f"No BM25 index for {restaurant_slug}{hint}; keyword search is off until "
+                           f"scripts/rebuild_bm25_indexes.py or onboarding builds one")
+        return None
+
+    cached = _indexes.get(str(root))
+    if cached and cached[0] == generation:
+        return cached[1]
+
+    with _lock:
+        cached = _indexes.get(str(root))
+        if cached and cached[0] == generation:
+            return cached[1]
+        try:
+            index = load_bm25_index(root / generation)
+        except Exception as e:
+            logger.warning(f"Could not load BM25 index for {restaurant_slug}: {e}")
+            return None
+        _indexes[str(root)] = (generation, index)
+        _missing_warned.discard(restaurant_slug)
+        return index
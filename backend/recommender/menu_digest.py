@@ -0,0 +1,172 @@
+"""
+menu_digest.py – Compact, token-budgeted menu summary for the chat model.
+
+Without it the model spends its first tool round (`list_all_items` /
+`search_menu`) just learning what the restaurant serves. The digest lists every
+orderable dish once – grouped by category, one `id|name|veg|price band` row per
+dish – and is injected as a system message at the start of each thread.
+
+It is rebuilt only when the restaurant's menu version changes. When a menu is
+too large for the token budget, each category keeps its highlighted dishes
+(promoted / chef's pick / bestseller / priority) and notes how many were left
+out, so the model knows to search for the rest.
+
+`encode_tool_result` gives tool outputs the same tabular shape instead of a
+Python `repr`, which is roughly half the tokens.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from config import logger, MENU_DIGEST_TOKEN_BUDGET
+from models.schema import SessionLocal, MenuItem, Restaurant
+from common.menu_version import get_menu_version
+
+PRICE_BANDS = ("₹", "₹₹", "₹₹₹")
+
+_digests: Dict[str, Tuple[int, str]] = {}
+_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English/menu text)."""
+    return len(text) // 4 + 1
+
+
+def _price_band_edges(prices: List[float]) -> Tuple[float, float]:
+    """Tercile cut points of a restaurant's prices."""
+    low, high = np.quantile(np.asarray(prices, dtype=float), [1 / 3, 2 / 3])
+    return float(low), float(high)
+
+
+def _band(price: float, edges: Tuple[float, float]) -> str:
+    if price <= edges[0]:
+        return PRICE_BANDS[0]
+    if price <= edges[1]:
+        return PRICE_BANDS[1]
+    return PRICE_BANDS[2]
+
+
+def _clean(value: Any) -> str:
+    return str(value).replace("|", "/").replace("\n", " ").strip()
+
+
+def build_menu_digest(restaurant_slug: str, max_tokens: int = MENU_DIGEST_TOKEN_BUDGET) -> str:
+    """Render the digest for a restaurant's current menu."""
+    with SessionLocal() as db:
+        items = db.query(MenuItem).join(
+            Restaurant, Restaurant.id == MenuItem.restaurant_id
+        ).filter(
+            Restaurant.slug == restaurant_slug,
+            MenuItem.is_active == True,
+            MenuItem.show_on_menu == True,
+            MenuItem.kind == "food",
+        ).all()
+
+        if not items:
+            return ""
+
+        edges = _price_band_edges([float(item.price or 0.0) for item in items])
+
+        categories: Dict[str, List[MenuItem]] = {}
+        for item in items:
+            categories.setdefault(item.category_brief or "Other", []).append(item)
+
+        # Highlighted dishes first so truncation keeps the ones worth recommending
+        for dishes in categories.values():
+            dishes.sort(key=lambda d: (not d.promote, not d.is_recommended, not d.is_bestseller, -(d.priority or 0)))
+
+        header = (
+            f"MENU DIGEST (ids are valid dish_card ids). Rows: id|name|v=veg,n=non-veg|price band "
+            f"({PRICE_BANDS[0]} ≤{edges[0]:.0f} < {PRICE_BANDS[1]} ≤{edges[1]:.0f} < {PRICE_BANDS[2]}). "
+            f"Use tools for descriptions, search or pairings."
+        )
+        rendered = {
+            category: [
+                f"{d.id}|{_clean(d.name)}|{'v' if d.veg_flag else 'n'}|{_band(float(d.price or 0.0), edges)}"
+                for d in dishes
+            ]
+            for category, dishes in categories.items()
+        }
+
+    def render(per_category: int | None) -> str:
+        lines = [header]
+        for category, rows in rendered.items():
+            shown = rows if per_category is None else rows[:per_category]
+            hidden = len(rows) - len(shown)
+            lines.append(f"## {_clean(category)}" + (f" (+{hidden} more)" if hidden else ""))
+            lines.extend(shown)
+        return "\n".join(lines)
+
+    digest = render(None)
+    if estimate_tokens(digest) > max_tokens:
+        # Shrink rows-per-category until the digest fits the budget
+        per_category = max(len(rows) for rows in rendered.values())
+        while per_category > 1 and estimate_tokens(digest) > max_tokens:
+            per_category = max(1, per_category * 3 // 4)
+            digest = render(per_category)
+    return digest
+
+
+def get_menu_digest(restaurant_slug: str) -> str:
+    """Return the digest for the current menu version (built at most once per version)."""
+    version = get_menu_version(restaurant_slug)
+    cached = _digests.get(restaurant_slug)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _digests.get(restaurant_slug)
+        if cached and cached[0] == version:
+            return cached[1]
+        digest = build_menu_digest(restaurant_slug)
+        _digests[restaurant_slug] = (version, digest)
+        logger.info(f"Built menu digest for {restaurant_slug} (menu version {version}, ~{estimate_tokens(digest)} tokens)")
+        return digest
+
+
+# ------------------------------------------------------------------#
+# Tool output encoding
+# ------------------------------------------------------------------#
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return f"{value:g}"
+    return _clean(value)
+
+
+def _encode_rows(rows: List[Dict[str, Any]]) -> str:
+    columns: List[str] = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+    lines = ["|".join(columns)]
+    lines.extend("|".join(_format_value(row.get(col)) for col in columns) for row in rows)
+    return "\n".join(lines)
+
+
+def encode_tool_result(result: Any) -> str:
+    """Compact tabular encoding of a tool result for the model.
+
+    A list of dish dicts becomes a header row plus one pipe-delimited row per
+    dish; `(items, has_more)` from `list_all_items` gets a trailing flag.
+    """
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        items, has_more = result
+        return f"{encode_tool_result(items)}\nhas_more={_format_value(bool(has_more))}"
+    if isinstance(result, list):
+        if not result:
+            return "no results"
+        if all(isinstance(row, dict) for row in result):
+            return _encode_rows(result)
+    if isinstance(result, dict):
+        return _encode_rows([result])
+    if result is None:
+        return "not found"
+    return str(result)
@@ -0,0 +1,102 @@
+"""
+session_feed.py – Personalized "For you" ranking from a per-session taste vector.
+
+Every table session keeps a unit-length preference vector in Redis (the same
+`{slug}:vec:{session}` key the feedback bandit uses). Dish views and cart adds
+pull it towards the dish's embedding; ranking is then one matmul against the
+restaurant's in-process vector index with the veg / price masks applied, so a
+feed request costs one Redis GET plus a few hundred dot products.
+
+Sessions without any events have no vector: callers get None and keep their
+non-personalized order without the index being loaded. A failed index load is
+not retried on every request (see `get_vector_index`). Recording an event does
+Redis (and, on a cold index, Qdrant) I/O, so async handlers run
+`record_feed_event` with `asyncio.to_thread`.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import rdb, logger, get_tenant_vec_key, SESSION_VECTOR_TTL
+from common.qdrant_utils import get_collection_name
+from recommender.vector_index import MenuVectorIndex, get_vector_index
+
+# How far one event moves the session vector towards the dish
+FEED_EVENT_WEIGHTS = {"view": 0.15, "cart_add": 0.5}
+
+
+def _index(restaurant_slug: str) -> Optional[MenuVectorIndex]:
+    return get_vector_index(restaurant_slug, get_collection_name(restaurant_slug), force=True)
+
+
+def get_session_vector(restaurant_slug: str, session_id: str, dim: Optional[int] = None) -> Optional[np.ndarray]:
+    """The session's preference vector, or None before its first event (or if it is not `dim` long)."""
+    if not session_id:
+        return None
+    raw = rdb.get(get_tenant_vec_key(restaurant_slug, session_id))
+    if not raw:
+        return None
+    vec = np.frombuffer(raw, dtype=np.float32)
+    return vec if dim is None or vec.shape[0] == dim else None
+
+
+def _session_and_index(restaurant_slug: str, session_id: str) -> Tuple[Optional[np.ndarray], Optional[MenuVectorIndex]]:
+    # Cold sessions (most menu loads) stop at the Redis GET, before the index is touched
+    vec = get_session_vector(restaurant_slug, session_id)
+    if vec is None:
+        return None, None
+    index = _index(restaurant_slug)
+    if index is None or vec.shape[0] != index.vectors.shape[1]:
+        return None, None
+    return vec, index
+
+
+def record_feed_event(restaurant_slug: str, session_id: str, public_id: str, event: str) -> bool:
+    """Move the session vector towards a dish the diner viewed or added. Returns False if ignored."""
+    weight = FEED_EVENT_WEIGHTS.get(event)
+    if weight is None or not session_id:
+        return False
+    try:
+        index = _index(restaurant_slug)
+        if index is None or public_id not in index:
+            return False
+        dish_vec = index.vectors_for([public_id])
+
+        vec = get_session_vector(restaurant_slug, session_id, index.vectors.shape[1])
+        new_vec = dish_vec[0] * weight if vec is None else vec + dish_vec[0] * weight
+        new_vec = new_vec / max(float(np.linalg.norm(new_vec)), 1e-8)
+        rdb.set(get_tenant_vec_key(restaurant_slug, session_id),
+                new_vec.astype(np.float32).tobytes(), ex=SESSION_VECTOR_TTL)
+        return True
+    except Exception as e:
+        # Personalization must never break a cart add
+        logger.warning(f"Could not record {event} of {public_id} for {restaurant_slug}: {e}")
+        return False
+
+
+def rank_feed(restaurant_slug: str,
+              session_id: str,
+              limit: int = 20,
+              is_veg: Optional[bool] = None,
+              price_cap: Optional[float] = None,
+              exclude: Iterable[str] | None = None) -> Optional[List[Tuple[str, float]]]:
+    """(public_id, score) of the dishes closest to the session's taste, or None for cold sessions."""
+    vec, index = _session_and_index(restaurant_slug, session_id)
+    if vec is None:
+        return None
+    filters = {"isVeg": is_veg, "priceEnabled": price_cap is not None, "priceRange": [0, price_cap]}
+    return index.search(vec, limit, filters, exclude)
+
+
+def order_by_session(restaurant_slug: str, session_id: str, public_ids: List[str]) -> Optional[List[str]]:
+    """Sort the given dishes by the session's taste (dishes without vectors go last), or None for cold sessions."""
+    vec, index = _session_and_index(restaurant_slug, session_id)
+    if vec is None:
+        return None
+    known = [pid for pid in public_ids if pid in index]
+    scores = index.vectors_for(known) @ vec if known else np.empty(0, dtype=np.float32)
+    ranked = [known[i] for i in np.argsort(-scores, kind="stable")]
+    return ranked + [pid for pid in public_ids if pid not in index]
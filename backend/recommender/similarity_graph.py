@@ -0,0 +1,173 @@
+"""
+similarity_graph.py – Precomputed item-to-item kNN graph per restaurant.
+
+Dish vectors are only written by onboarding, so the top-k neighbours of every
+dish are computed there (one vectorised pass over the restaurant's vectors)
+and stored as a compact NumPy artifact:
+
+    similarity_graphs/{slug}_knn.npz
+        public_ids   (n,)     str
+        neighbours   (n, k)   int32   row numbers, best first (-1 = empty slot)
+        scores       (n, k)   float32 cosine similarity
+
+Lookups are then O(1); callers filter the neighbours by availability. The
+graph is rebuilt in full on every onboarding run; there is no incremental
+update, since no other code path upserts dish vectors.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import logger
+from common.qdrant_utils import tenant_filter
+
+GRAPH_DIR = Path(__file__).parent.parent / "similarity_graphs"
+DEFAULT_K = 20
+
+_graphs: Dict[str, Tuple[float, "SimilarityGraph"]] = {}
+_lock = threading.Lock()
+
+
+class SimilarityGraph:
+    """Top-k neighbour table of one restaurant."""
+
+    def __init__(self, public_ids, neighbours, scores):
+        self.public_ids = np.asarray(public_ids, dtype=object)
+        self.neighbours = np.asarray(neighbours, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self._rows = {pid: row for row, pid in enumerate(self.public_ids)}
+
+    def __len__(self) -> int:
+        return len(self.public_ids)
+
+    def neighbours_of(self, public_id: str) -> List[Tuple[str, float]]:
+        """(public_id, score) neighbours of a dish, best first."""
+        row = self._rows.get(public_id)
+        if row is None:
+            return []
+        return [
+            (self.public_ids[n], float(s))
+            for n, s in zip(self.neighbours[row], self.scores[row]) if n >= 0
+        ]
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-8)
+
+
+def build_neighbour_table(vectors: np.ndarray, k: int = DEFAULT_K) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (neighbours, scores) of shape (n, k) for unit-length `vectors`.
+
+    One matmul gives the full similarity matrix; `argpartition` picks the top-k
+    per row without sorting every row completely.
+    """
+    n = len(vectors)
+    neighbours = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if n < 2:
+        return neighbours, scores
+
+    sims = vectors @ vectors.T
+    np.fill_diagonal(sims, -np.inf)
+
+    kk = min(k, n - 1)
+    top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+    top_scores = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    neighbours[:, :kk] = np.take_along_axis(top, order, axis=1)
+    scores[:, :kk] = np.take_along_axis(top_scores, order, axis=1)
+    return neighbours, scores
+
+
+def _graph_path(restaurant_slug: str) -> Path:
+    return GRAPH_DIR / f"{restaurant_slug}_knn.npz"
+
+
+def _save(restaurant_slug: str, graph: SimilarityGraph) -> Path:
+    GRAPH_DIR.mkdir(exist_ok=True)
+    path = _graph_path(restaurant_slug)
+    tmp_path = path.with_suffix(".tmp.npz")
+    np.savez(
+        tmp_path,
+        public_ids=graph.public_ids.astype(str),
+        neighbours=graph.neighbours,
+        scores=graph.scores,
+    )
+    # Atomic swap so readers never see a half-written file
+    os.replace(tmp_path, path)
+    return path
+
+
+def save_similarity_graph(restaurant_slug: str,
+                          public_ids: List[str],
+                          vectors: np.ndarray,
+                          k: int = DEFAULT_K) -> Path:
+    """Build the full neighbour table from vectors and write it to disk."""
+    vectors = _normalise(vectors)
+    neighbours, scores = build_neighbour_table(vectors, k)
+    path = _save(restaurant_slug, SimilarityGraph(public_ids, neighbours, scores))
+    logger.info(f"Saved kNN graph for {restaurant_slug}: {len(public_ids)} dishes, k={k} -> {path}")
+    return path
+
+
+def build_similarity_graph(restaurant_slug: str, collection_name: str, k: int = DEFAULT_K) -> Path:
+    """Build the graph from the restaurant's Qdrant collection."""
+    from recommender.vector_index import scroll_collection_vectors
+
+    vectors_by_pid = scroll_collection_vectors(collection_name, tenant_filter(restaurant_slug))
+    public_ids = list(vectors_by_pid)
+    return save_similarity_graph(restaurant_slug, public_ids, np.asarray([vectors_by_pid[p] for p in public_ids]), k)
+
+
+def get_similarity_graph(restaurant_slug: str) -> Optional[SimilarityGraph]:
+    """Load a restaurant's graph, reloading when the artifact changes on disk."""
+    path = _graph_path(restaurant_slug)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    cached = _graphs.get(restaurant_slug)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _lock:
+        cached = _graphs.get(restaurant_slug)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                graph = SimilarityGraph(data["public_ids"], data["neighbours"], data["scores"])
+        except Exception as e:
+            logger.warning(f"Could not load kNN graph for {restaurant_slug}: {e}")
+            return None
+        _graphs[restaurant_slug] = (mtime, graph)
+        return graph
+
+
+def get_neighbours(restaurant_slug: str, public_ids: Iterable[str], limit: int = DEFAULT_K) -> Optional[List[str]]:
+    """Neighbours of one or more dishes, best first, excluding the dishes themselves.
+
+    For several dishes (e.g. a cart) the neighbour lists are merged keeping each
+    candidate's best score. Returns None when no graph exists for the restaurant
+    so callers can fall back to a live vector search.
+    """
+    graph = get_similarity_graph(restaurant_slug)
+    if graph is None:
+        return None
+
+    public_ids = set(public_ids)
+    best: Dict[str, float] = {}
+    for public_id in public_ids:
+        for neighbour, score in graph.neighbours_of(public_id):
+            if neighbour not in public_ids and score > best.get(neighbour, -np.inf):
+                best[neighbour] = score
+    return sorted(best, key=best.get, reverse=True)[:limit]
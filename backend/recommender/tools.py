@@ -17,26 +17,32 @@ Internal helpers (prefixed with "_") keep the code DRY.
 
 from __future__ import annotations
 
-from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import os
-import pickle
-from rank_bm25 import BM25Okapi
+
+from qdrant_client.models import FieldCondition, MatchAny
 
 from config import qd, logger
-from models.schema import SessionLocal, MenuItem
+from models.schema import SessionLocal, MenuItem, Restaurant
+from common.qdrant_utils import get_collection_name, build_menu_filter, tenant_filter, filter_payloads_ready
+from common.model_registry import get_text_model
+from recommender.vector_index import get_vector_index
+from recommender.similarity_graph import get_neighbours
+from recommender.bm25 import get_bm25_index
+from services.cooccurrence_service import get_lift_pairings
+
+
+# Unfiltered Qdrant fallback: candidates fetched per requested result
+UNFILTERED_OVERFETCH = 5
 
 
 # ------------------------------------------------------------------#
 # Embedding helpers
 # ------------------------------------------------------------------#
-@lru_cache(maxsize=1)
-def _txt_model() -> SentenceTransformer:
-    """Lazy‑load the sentence‑transformer used in 01_build_embeddings.py."""
-    return SentenceTransformer("all-mpnet-base-v2")
+def _txt_model():
+    """The shared sentence‑transformer used at onboarding (loaded on first use)."""
+    return get_text_model()
 
 
 def _embed(text: str) -> np.ndarray:
@@ -50,7 +56,7 @@ def _embed(text: str) -> np.ndarray:
 
 def _get_collection_name(restaurant_slug: str) -> str:
     """Get Qdrant collection name for a restaurant."""
-    return f"{restaurant_slug}_qdb"
+    return get_collection_name(restaurant_slug)
 
 
 def _get_menu_items_by_public_ids(public_ids: List[str], restaurant_slug: str) -> Dict[str, Dict[str, Any]]:
@@ -132,24 +138,93 @@ def _apply_pg_filters(query, filters: Dict[str, Any]):
     return query
 
 
-# ------------------------------------------------------------------#
-# BM25 Index Loader
-# ------------------------------------------------------------------#
-_bm25_indexes = {}
-_bm25_index_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'bm25_indexes')
-if os.path.exists(_bm25_index_dir):
-    for fname in os.listdir(_bm25_index_dir):
-        if fname.endswith('_bm25.pkl'):
-            slug = fname.replace('_bm25.pkl', '')
-            try:
-                with open(os.path.join(_bm25_index_dir, fname), 'rb') as f:
-                    data = pickle.load(f)
-                    _bm25_indexes[slug] = data
-            except Exception as e:
-                pass  # Could log error if needed
-
-def _get_bm25_index(restaurant_slug):
-    return _bm25_indexes.get(restaurant_slug)
+def _vector_search(restaurant_slug: str,
+                   query_vector,
+                   limit: int,
+                   filters: Dict[str, Any] | None = None,
+                   exclude: List[str] | None = None) -> List[str]:
+    """Return public_ids nearest to `query_vector`, best first.
+
+    Filters, availability and exclusions are applied before ranking – as masks
+    in the in-process vector index when it is enabled, otherwise pushed into the
+    Qdrant query as indexed payload conditions – so `limit` eligible dishes come
+    back in one round trip. Until a collection's payloads are backfilled the
+    Qdrant query is unfiltered and over-fetched; callers filter in Postgres.
+    """
+    collection_name = _get_collection_name(restaurant_slug)
+    index = get_vector_index(restaurant_slug, collection_name)
+    if index is not None:
+        return [pid for pid, _ in index.search(query_vector, limit, filters, exclude)]
+
+    if filter_payloads_ready(restaurant_slug, collection_name):
+        query_filter = build_menu_filter(restaurant_slug, filters, exclude)
+    else:
+        # Points not backfilled yet: rank within the restaurant only, over-fetch and
+        # let the callers' Postgres filters drop unavailable / filtered-out dishes
+        query_filter = tenant_filter(restaurant_slug)
+        limit = limit * UNFILTERED_OVERFETCH + len(exclude or [])
+
+    points = qd.search(
+        collection_name=collection_name,
+        query_vector=list(query_vector),
+        query_filter=query_filter,
+        limit=limit,
+        with_payload=["public_id"]
+    )
+    excluded = set(exclude or [])
+    return [
+        p.payload.get("public_id") for p in points
+        if p.payload.get("public_id") and p.payload.get("public_id") not in excluded
+    ]
+
+
+def _fetch_vectors(restaurant_slug: str, public_ids: List[str]) -> Dict[str, np.ndarray]:
+    """Fetch dish vectors by public_id in one batch ({public_id: vector}).
+
+    Served from the in-process vector index when available, otherwise a single
+    Qdrant scroll with a `MatchAny` filter on `public_id`.
+    """
+    if not public_ids:
+        return {}
+
+    collection_name = _get_collection_name(restaurant_slug)
+    index = get_vector_index(restaurant_slug, collection_name)
+    if index is not None:
+        rows = index.rows_for(public_ids)
+        return {index.public_ids[row]: index.vectors[row] for row in rows}
+
+    points, _ = qd.scroll(
+        collection_name=collection_name,
+        scroll_filter=tenant_filter(
+            restaurant_slug, FieldCondition(key="public_id", match=MatchAny(any=list(public_ids)))
+        ),
+        with_payload=["public_id"],
+        with_vectors=True,
+        limit=len(public_ids)
+    )
+    return {
+        p.payload["public_id"]: np.asarray(p.vector, dtype=np.float32)
+        for p in points if p.vector and p.payload.get("public_id")
+    }
+
+
+def _get_ranked_menu_items(db, restaurant_slug: str, public_ids: List[str],
+                           filters: Dict[str, Any] | None, limit: int) -> List[MenuItem]:
+    """Fetch menu items by public_id in one query, keeping the ranking order of `public_ids`."""
+    if not public_ids:
+        return []
+
+    query_obj = db.query(MenuItem).join(
+        Restaurant, Restaurant.id == MenuItem.restaurant_id
+    ).filter(
+        Restaurant.slug == restaurant_slug,
+        MenuItem.public_id.in_(public_ids),
+        MenuItem.is_active == True,
+        MenuItem.show_on_menu == True
+    )
+    query_obj = _apply_pg_filters(query_obj, filters or {})
+    rank = {pid: i for i, pid in enumerate(public_ids)}
+    return sorted(query_obj.all(), key=lambda item: rank[item.public_id])[:limit]
 
 
 # ------------------------------------------------------------------#
@@ -160,29 +235,16 @@ def search_menu(restaurant_slug: str,
                 filters: Dict[str, Any] | None = None,
                 limit: int = 10) -> List[Dict[str, Any]]:
     """Free‑text semantic search across name + description using embeddings and BM25."""
-    # --- Qdrant semantic search ---
-    collection_name = _get_collection_name(restaurant_slug)
-    vec = _embed(query).tolist()
+    # --- Semantic search ---
+    vec = _embed(query)
     limit = min(limit, 10)
-    points = qd.search(
-        collection_name=collection_name,
-        query_vector=vec,
-        limit=limit,
-        with_payload=True
-    )
-    qdrant_public_ids = [p.payload.get("public_id") for p in points if p.payload.get("public_id")]
+    qdrant_public_ids = _vector_search(restaurant_slug, vec, limit, filters)
 
     # --- BM25 search ---
-    bm25_data = _get_bm25_index(restaurant_slug)
+    bm25_index = get_bm25_index(restaurant_slug)
     bm25_public_ids = []
-    if bm25_data:
-        bm25 = bm25_data['bm25']
-        id_map = bm25_data['id_map']
-        tokenized_query = query.lower().split()
-        scores = bm25.get_scores(tokenized_query)
-        ranked = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
-        for idx, score in ranked[:10]:
-            bm25_public_ids.append(id_map[idx])
+    if bm25_index:
+        bm25_public_ids = [pid for pid, _ in bm25_index.search(query, 10)]
 
     logger.debug(f"Qdrant public ids: {qdrant_public_ids}")
     logger.debug(f"BM25 public ids: {bm25_public_ids}")
@@ -309,74 +371,35 @@ def find_similar_items(restaurant_slug: str,
                        filters: Dict[str, Any] | None = None,
                        limit: int = 6) -> List[Dict[str, Any]]:
     """Return dishes with embedding‑space proximity to a reference dish."""
-    collection_name = _get_collection_name(restaurant_slug)
-    
     with SessionLocal() as db:
-        from models.schema import Restaurant
-        restaurant = db.query(Restaurant).filter_by(slug=restaurant_slug).first()
-        if not restaurant:
-            return []
-        
-        # First, get the public_id of the reference dish from PostgreSQL
-        ref_dish = db.query(MenuItem).filter(
-            MenuItem.restaurant_id == restaurant.id,
+        # Resolve the reference dish's public_id (scoped to the restaurant by join)
+        ref_public_id = db.query(MenuItem.public_id).join(
+            Restaurant, Restaurant.id == MenuItem.restaurant_id
+        ).filter(
+            Restaurant.slug == restaurant_slug,
             MenuItem.id == dish_id
-        ).first()
-        
-        if not ref_dish:
-            return []
-        
-        ref_public_id = ref_dish.public_id
-    
-    # Find the Qdrant point with this public_id and get its vector
-    try:
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
-        ref_points = qd.scroll(
-            collection_name=collection_name,
-            scroll_filter=Filter(
-                must=[FieldCondition(key="public_id", match=MatchValue(value=ref_public_id))]
-            ),
-            with_vectors=True,
-            limit=1
-        )[0]
-        
-        if not ref_points or not ref_points[0].vector:
+        ).scalar()
+
+        if not ref_public_id:
             return []
-        
-        ref_vector = ref_points[0].vector
-        
-    except Exception:
-        return []
-    
-    # Search for similar vectors
-    points = qd.search(
-        collection_name=collection_name,
-        query_vector=list(ref_vector),
-        limit=limit + 1,  # +1 to account for excluding reference
-        with_payload=True
-    )
-    
-    # Filter out the reference dish and extract public_ids
-    public_ids = []
-    for p in points:
-        p_public_id = p.payload.get("public_id")
-        if p_public_id and p_public_id != ref_public_id:
-            public_ids.append(p_public_id)
-    
-    # Get filtered results from PostgreSQL
-    with SessionLocal() as db:
-        from models.schema import Restaurant
-        restaurant = db.query(Restaurant).filter_by(slug=restaurant_slug).first()
-        if not restaurant:
+
+        # Precomputed kNN graph first; neighbours are filtered by availability in PG
+        try:
+            public_ids = get_neighbours(restaurant_slug, [ref_public_id])
+            if not public_ids:
+                ref_vector = _fetch_vectors(restaurant_slug, [ref_public_id]).get(ref_public_id)
+                if ref_vector is None:
+                    return []
+
+                # Search for similar vectors, excluding the reference dish
+                public_ids = _vector_search(restaurant_slug, ref_vector, limit, filters, exclude=[ref_public_id])
+        except Exception as e:
+            logger.warning(f"Similar items lookup failed for {restaurant_slug} dish {dish_id}: {e}")
             return []
-        
-        query_obj = db.query(MenuItem).filter(
-            MenuItem.restaurant_id == restaurant.id,
-            MenuItem.public_id.in_(public_ids[:limit])
-        )
-        query_obj = _apply_pg_filters(query_obj, filters or {})
-        items = query_obj.limit(limit).all()
-        
+
+        # Get filtered results from PostgreSQL
+        items = _get_ranked_menu_items(db, restaurant_slug, public_ids, filters, limit)
+
         # Convert to result format
         result = []
         for item in items:
@@ -388,7 +411,7 @@ def find_similar_items(restaurant_slug: str,
                 "group_category": item.group_category,
                 "reason": "Similar taste profile"
             })
-        
+
         return result
 
 
@@ -467,101 +490,65 @@ def get_cart_pairings(restaurant_slug: str,
                       limit: int = 6) -> List[Dict[str, Any]]:
     """
     Recommend dishes that complement items in the cart.
-    Uses embeddings to find semantically related dishes.
+    Dishes diners actually order together (lift from confirmed orders) come
+    first; embeddings of the cart fill the remaining slots.
     """
     if not cart:
         return []
 
-    collection_name = _get_collection_name(restaurant_slug)
-    
     # Extract dish IDs from cart (these should be PostgreSQL MenuItem.id values)
     cart_dish_ids = [item["id"] for item in cart if "id" in item]
     if not cart_dish_ids:
         return []
-    
-    # Get public_ids for cart items from PostgreSQL
-    with SessionLocal() as db:
-        from models.schema import Restaurant
-        restaurant = db.query(Restaurant).filter_by(slug=restaurant_slug).first()
-        if not restaurant:
-            return []
-        
-        cart_items = db.query(MenuItem).filter(
-            MenuItem.restaurant_id == restaurant.id,
-            MenuItem.id.in_(cart_dish_ids)
-        ).all()
-        
-        cart_public_ids = [item.public_id for item in cart_items]
-    
-    if not cart_public_ids:
-        return []
-    
-    # Find Qdrant point IDs for cart items
+
     try:
-        # We need to find the Qdrant point IDs that correspond to these public_ids
-        # This is a bit tricky - we'll search for exact matches by public_id
-        cart_vectors = []
-        for public_id in cart_public_ids:
-            # Search for the exact public_id in Qdrant
-            from qdrant_client.models import Filter, FieldCondition, MatchValue
-            points = qd.scroll(
-                collection_name=collection_name,
-                scroll_filter=Filter(
-                    must=[FieldCondition(key="public_id", match=MatchValue(value=public_id))]
-                ),
-                with_vectors=True,
-                limit=1
-            )[0]
-            
-            if points and points[0].vector:
-                cart_vectors.append(np.array(points[0].vector))
-        
-        if not cart_vectors:
-            return []
-        
-        # Calculate average vector
-        avg_vec = np.mean(cart_vectors, axis=0)
-        
-        # Search for similar items
-        points = qd.search(
-            collection_name=collection_name,
-            query_vector=avg_vec.tolist(),
-            limit=limit * 2,  # Get more to filter out cart items
-            with_payload=True
-        )
-        
-        # Extract public_ids, excluding cart items
-        public_ids = []
-        for p in points:
-            p_id = p.payload.get("public_id")
-            if p_id and p_id not in cart_public_ids:
-                public_ids.append(p_id)
-        
-        # Get filtered results from PostgreSQL
-        query_obj = db.query(MenuItem).filter(
-            MenuItem.restaurant_id == restaurant.id,
-            MenuItem.public_id.in_(public_ids[:limit])
-        )
-        query_obj = _apply_pg_filters(query_obj, filters or {})
-        items = query_obj.limit(limit).all()
-        
-        # Convert to result format
-        result = []
-        for item in items:
-            result.append({
-                "id": item.id,
-                "public_id": item.public_id,
-                "name": item.name,
-                "description": item.description,
-                "category": item.category_brief,
-                "group_category": item.group_category,
-                "price": float(item.price),
-                "veg": item.veg_flag,
-                "reason": "Pairs well with your cart"
-            })
-        
-        return result
-        
+        with SessionLocal() as db:
+            # Get public_ids for cart items from PostgreSQL
+            cart_public_ids = [row.public_id for row in db.query(MenuItem.public_id).join(
+                Restaurant, Restaurant.id == MenuItem.restaurant_id
+            ).filter(
+                Restaurant.slug == restaurant_slug,
+                MenuItem.id.in_(cart_dish_ids)
+            ).all()]
+
+            if not cart_public_ids:
+                return []
+
+            # Co-occurrence pairings from order history
+            lifted = dict(get_lift_pairings(restaurant_slug, cart_public_ids, limit * 2))
+            items = _get_ranked_menu_items(db, restaurant_slug, list(lifted), filters, limit) if lifted else []
+
+            if len(items) < limit:
+                # One batched vector fetch for the whole cart
+                cart_vectors = list(_fetch_vectors(restaurant_slug, cart_public_ids).values())
+                if cart_vectors:
+                    # Calculate average vector
+                    avg_vec = np.mean(cart_vectors, axis=0)
+
+                    # Search for similar items, excluding cart items and co-occurrence picks
+                    exclude = cart_public_ids + [item.public_id for item in items]
+                    public_ids = _vector_search(restaurant_slug, avg_vec, limit, filters, exclude=exclude)
+
+                    # Get filtered results from PostgreSQL
+                    items += _get_ranked_menu_items(db, restaurant_slug, public_ids, filters, limit - len(items))
+
+            # Convert to result format
+            result = []
+            for item in items:
+                result.append({
+                    "id": item.id,
+                    "public_id": item.public_id,
+                    "name": item.name,
+                    "description": item.description,
+                    "category": item.category_brief,
+                    "group_category": item.group_category,
+                    "price": float(item.price),
+                    "veg": item.veg_flag,
+                    "reason": "Often ordered together" if item.public_id in lifted else "Pairs well with your cart"
+                })
+
+            return result
+
     except Exception:
         return []
 
@@ -0,0 +1,175 @@
+"""
+upsell_pool.py – Precomputed per-restaurant upsell candidates.
+
+The cart upsell runs on every cart open, so its candidates are computed once
+per menu version instead of per request: every orderable dish the restaurant
+flags (promoted, chef's pick, bestseller – the menu's stand-in for "high
+margin") together with its enriched card (name, price, media, public id).
+
+`UpsellPool.select` then works purely in memory: it drops dishes already in
+the cart, applies veg / price / category filters, prefers categories the cart
+does not have yet and samples weighted by the menu flags, so repeated cart
+opens show some variety.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import logger
+from models.schema import SessionLocal, MenuItem, Restaurant
+from common.menu_version import get_menu_version
+from common.dish_card_index import get_dish_card_index
+
+# Weight of each menu flag in the candidate score
+FLAG_WEIGHTS = {"promote": 3.0, "is_recommended": 2.0, "is_bestseller": 1.5}
+# Categories the cart already has are still eligible, just less likely
+SAME_CATEGORY_PENALTY = 0.3
+
+_pools: Dict[str, Tuple[int, "UpsellPool"]] = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class UpsellCandidate:
+    menu_item_id: int
+    public_id: str
+    veg: bool
+    price: float
+    category: str
+    group_category: str
+    score: float
+    card: Dict[str, Any]     # enriched dish_card, ready for a carousel
+
+
+class UpsellPool:
+    """Upsell candidates of one restaurant plus the category of every dish."""
+
+    def __init__(self, restaurant_slug: str, candidates: List[UpsellCandidate],
+                 categories: Dict[str, str], ids: Dict[str, int], version: int):
+        self.restaurant_slug = restaurant_slug
+        self.candidates = candidates
+        # public_id -> category_brief for every dish, to know what the cart holds
+        self.categories = categories
+        # public_id -> MenuItem.id
+        self.ids = ids
+        self._public_ids = {menu_item_id: public_id for public_id, menu_item_id in ids.items()}
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def cart_public_ids(self, cart_ids: Iterable[Any]) -> set:
+        """Public ids of cart entries given as public ids or MenuItem ids."""
+        public_ids = set()
+        for cart_id in cart_ids:
+            if cart_id in self.ids:
+                public_ids.add(cart_id)
+            elif isinstance(cart_id, int) or str(cart_id).isdigit():
+                public_id = self._public_ids.get(int(cart_id))
+                if public_id:
+                    public_ids.add(public_id)
+        return public_ids
+
+    def select(self,
+               cart_ids: Iterable[Any] = (),
+               is_veg: Optional[bool] = None,
+               price_cap: Optional[float] = None,
+               category: Optional[str] = None,
+               limit: int = 3,
+               boosts: Optional[Dict[str, float]] = None,
+               rng: Optional[random.Random] = None) -> List[UpsellCandidate]:
+        """
+        Pick up to `limit` candidates for a cart.
+
+        Args:
+            cart_ids: Dish public ids or MenuItem ids already in the cart
+            is_veg / price_cap / category: Optional filters
+            boosts: Extra score per public id (e.g. lift-scored pairings)
+            rng: Random source (tests)
+        """
+        rng = rng or random
+        in_cart = self.cart_public_ids(cart_ids)
+        cart_categories = {self.categories[p] for p in in_cart if p in self.categories}
+
+        weighted = []
+        for candidate in self.candidates:
+            if candidate.public_id in in_cart:
+                continue
+            if is_veg and not candidate.veg:
+                continue
+            if price_cap is not None and candidate.price > price_cap:
+                continue
+            if category and category not in (candidate.category, candidate.group_category):
+                continue
+            weight = candidate.score + (boosts or {}).get(candidate.public_id, 0.0)
+            if candidate.category in cart_categories:
+                weight *= SAME_CATEGORY_PENALTY
+            weighted.append((weight, candidate))
+
+        # Weighted sampling without replacement (Efraimidis–Spirakis keys)
+        keyed = sorted(weighted, key=lambda wc: rng.random() ** (1.0 / max(wc[0], 1e-6)), reverse=True)
+        return [candidate for _, candidate in keyed[:limit]]
+
+
+def _flag_score(item: MenuItem) -> float:
+    score = sum(weight for flag, weight in FLAG_WEIGHTS.items() if getattr(item, flag))
+    return score + min(max(item.priority or 0, 0), 10) * 0.1
+
+
+def build_upsell_pool(restaurant_slug: str, version: int = 0) -> UpsellPool:
+    """Load the restaurant's orderable dishes once and keep the flagged ones as candidates."""
+    with SessionLocal() as db:
+        items = db.query(MenuItem).join(
+            Restaurant, Restaurant.id == MenuItem.restaurant_id
+        ).filter(
+            Restaurant.slug == restaurant_slug,
+            MenuItem.is_active == True,
+            MenuItem.show_on_menu == True,
+            MenuItem.kind == "food",
+        ).all()
+
+        cards = get_dish_card_index(restaurant_slug)
+        categories = {item.public_id: item.category_brief or "" for item in items}
+        ids = {item.public_id: item.id for item in items}
+
+        candidates = []
+        for item in items:
+            score = _flag_score(item)
+            card = cards.get(item.id)
+            if score <= 0 or card is None:
+                continue
+            card_block = {"type": "dish_card", "id": item.id, "name": item.name}
+            cards.enrich(card_block)
+            candidates.append(UpsellCandidate(
+                menu_item_id=item.id,
+                public_id=item.public_id,
+                veg=bool(item.veg_flag),
+                price=float(item.price or 0.0),
+                category=item.category_brief or "",
+                group_category=item.group_category or "",
+                score=score,
+                card=card_block,
+            ))
+
+    return UpsellPool(restaurant_slug, candidates, categories, ids, version)
+
+
+def get_upsell_pool(restaurant_slug: str) -> UpsellPool:
+    """Return the pool for the current menu version (rebuilt at most once per version)."""
+    version = get_menu_version(restaurant_slug)
+    cached = _pools.get(restaurant_slug)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with _lock:
+        cached = _pools.get(restaurant_slug)
+        if cached and cached[0] == version:
+            return cached[1]
+        pool = build_upsell_pool(restaurant_slug, version)
+        _pools[restaurant_slug] = (version, pool)
+        logger.info(f"Built upsell pool for {restaurant_slug} (menu version {version}, {len(pool)} candidates)")
+        return pool
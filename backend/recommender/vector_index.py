@@ -0,0 +1,204 @@
+"""
+vector_index.py – In-process vector index for menu-sized collections.
+
+A restaurant menu is a few hundred dishes, so its vectors fit in a single
+contiguous float32 matrix. Top-k is one matmul plus `argpartition`, and the
+user filters (veg, price, category) become boolean masks over attribute arrays
+instead of a Qdrant round trip followed by Postgres post-filtering.
+
+Qdrant remains the source of truth: the index is loaded from the restaurant's
+collection, rebuilt whenever the menu version changes, and callers fall back to
+Qdrant whenever `get_vector_index` returns None. A failed load is not retried
+for FAILED_LOAD_RETRY_SECONDS (or until the menu version moves), so a
+restaurant without vectors does not cost a Qdrant scroll on every request.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import qd, logger, LOCAL_VECTOR_INDEX
+from models.schema import SessionLocal, MenuItem, Restaurant
+from common.menu_version import get_menu_version_cached
+from common.qdrant_utils import tenant_filter
+
+
+class MenuVectorIndex:
+    """Normalised dish vectors of one restaurant plus the attributes used for filtering."""
+
+    def __init__(self,
+                 public_ids: List[str],
+                 item_ids: List[int],
+                 vectors: np.ndarray,
+                 veg: List[bool],
+                 price: List[float],
+                 category: List[str],
+                 available: List[bool],
+                 version: int = 0):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Stored vectors are unit length so cosine similarity is a plain dot product
+        self.vectors = vectors / np.maximum(norms, 1e-8)
+        self.public_ids = np.asarray(public_ids, dtype=object)
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.veg = np.asarray(veg, dtype=bool)
+        self.price = np.asarray(price, dtype=np.float32)
+        self.category = np.asarray(category, dtype=object)
+        self.available = np.asarray(available, dtype=bool)
+        self.version = version
+        self._rows = {pid: row for row, pid in enumerate(public_ids)}
+
+    def __len__(self) -> int:
+        return len(self.public_ids)
+
+    def __contains__(self, public_id: str) -> bool:
+        return public_id in self._rows
+
+    def rows_for(self, public_ids: Iterable[str]) -> np.ndarray:
+        """Row numbers of the given public_ids (unknown ids are skipped)."""
+        return np.asarray([self._rows[pid] for pid in public_ids if pid in self._rows], dtype=np.int64)
+
+    def vectors_for(self, public_ids: Iterable[str]) -> np.ndarray:
+        """Stacked vectors of the given public_ids (unknown ids are skipped)."""
+        return self.vectors[self.rows_for(public_ids)]
+
+    def mask(self, filters: Dict[str, Any] | None = None, exclude: Iterable[str] | None = None) -> np.ndarray:
+        """Boolean mask of dishes that are on the menu and pass the user filters.
+
+        Mirrors `tools._apply_pg_filters` so both paths return the same dishes.
+        """
+        filters = filters or {}
+        mask = self.available.copy()
+        if filters.get("isVeg") is True:
+            mask &= self.veg
+        if filters.get("priceEnabled") and (price_range := filters.get("priceRange")):
+            mask &= self.price <= float(price_range[1])
+        if categories := filters.get("category"):
+            if not isinstance(categories, list):
+                categories = [categories]
+            mask &= np.isin(self.category, categories)
+        if exclude:
+            mask[self.rows_for(exclude)] = False
+        return mask
+
+    def search(self,
+               query_vector,
+               limit: int,
+               filters: Dict[str, Any] | None = None,
+               exclude: Iterable[str] | None = None) -> List[Tuple[str, float]]:
+        """Return up to `limit` (public_id, cosine score) pairs, best first."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-8)
+
+        candidates = np.flatnonzero(self.mask(filters, exclude))
+        if limit <= 0 or candidates.size == 0:
+            return []
+
+        scores = self.vectors[candidates] @ query
+        k = min(limit, candidates.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.public_ids[candidates[i]], float(scores[i])) for i in top]
+
+
+# ------------------------------------------------------------------#
+# Loading & per-restaurant cache
+# ------------------------------------------------------------------#
+FAILED_LOAD_RETRY_SECONDS = 60.0
+
+_indexes: Dict[str, MenuVectorIndex] = {}
+# restaurant_slug -> (menu version, monotonic time) of the last failed load
+_failed_loads: Dict[str, Tuple[int, float]] = {}
+_lock = threading.Lock()
+
+
+def scroll_collection_vectors(collection_name: str, scroll_filter=None) -> Dict[str, List[float]]:
+    """Read every (matching) point of a collection as {public_id: vector}."""
+    vectors: Dict[str, List[float]] = {}
+    offset = None
+    while True:
+        points, offset = qd.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=256,
+            offset=offset,
+            with_payload=["public_id"],
+            with_vectors=True,
+        )
+        for point in points:
+            public_id = (point.payload or {}).get("public_id")
+            if public_id and point.vector:
+                vectors[public_id] = point.vector
+        if offset is None:
+            return vectors
+
+
+def load_vector_index(restaurant_slug: str, collection_name: str, version: int = 0) -> MenuVectorIndex:
+    """Build a restaurant's index from its Qdrant collection and Postgres menu rows."""
+    vectors_by_pid = scroll_collection_vectors(collection_name, tenant_filter(restaurant_slug))
+
+    with SessionLocal() as db:
+        rows = db.query(
+            MenuItem.id, MenuItem.public_id, MenuItem.veg_flag, MenuItem.price,
+            MenuItem.category_brief, MenuItem.is_active, MenuItem.show_on_menu
+        ).join(Restaurant, Restaurant.id == MenuItem.restaurant_id).filter(
+            Restaurant.slug == restaurant_slug
+        ).all()
+
+    rows = [row for row in rows if row.public_id in vectors_by_pid]
+    if not rows:
+        raise ValueError(f"No vectors found for restaurant {restaurant_slug} in {collection_name}")
+
+    return MenuVectorIndex(
+        public_ids=[row.public_id for row in rows],
+        item_ids=[row.id for row in rows],
+        vectors=np.asarray([vectors_by_pid[row.public_id] for row in rows], dtype=np.float32),
+        veg=[bool(row.veg_flag) for row in rows],
+        price=[float(row.price or 0.0) for row in rows],
+        category=[row.category_brief or "" for row in rows],
+        available=[bool(row.is_active) and bool(row.show_on_menu) for row in rows],
+        version=version,
+    )
+
+
+def _recently_failed(restaurant_slug: str, version: int) -> bool:
+    failed = _failed_loads.get(restaurant_slug)
+    return (failed is not None and failed[0] == version
+            and time.monotonic() - failed[1] < FAILED_LOAD_RETRY_SECONDS)
+
+
+def get_vector_index(restaurant_slug: str, collection_name: str, force: bool = False) -> Optional[MenuVectorIndex]:
+    """Return the up-to-date index for a restaurant, or None to use Qdrant directly.
+
+    `force` loads the index even when LOCAL_VECTOR_INDEX is off, for callers
+    that have no Qdrant fallback (the feedback bandit).
+    """
+    if not LOCAL_VECTOR_INDEX and not force:
+        return None
+
+    version = get_menu_version_cached(restaurant_slug)
+    index = _indexes.get(restaurant_slug)
+    if index is not None and index.version == version:
+        return index
+    if _recently_failed(restaurant_slug, version):
+        return None
+
+    with _lock:
+        index = _indexes.get(restaurant_slug)
+        if index is None or index.version != version:
+            if _recently_failed(restaurant_slug, version):
+                return None
+            try:
+                index = load_vector_index(restaurant_slug, collection_name, version)
+            except Exception as e:
+                _failed_loads[restaurant_slug] = (version, time.monotonic())
+                logger.warning(f"Vector index unavailable for {restaurant_slug}, using Qdrant: {e}")
+                return None
+            _failed_loads.pop(restaurant_slug, None)
+            _indexes[restaurant_slug] = index
+            logger.info(f"Loaded vector index for {restaurant_slug}: {len(index)} dishes (menu version {version})")
+    return index
@@ -22,30 +22,61 @@ API Response Format:
 """
 Seed a single restaurant folder into Postgres and Qdrant.
 
+Re-running it for an onboarded restaurant is incremental: only items whose
+content hash (text fields, media ids, embedding model) changed are re-embedded
+and upserted, removed items' points are deleted and all other vectors are left
+alone. Pass --full to re-embed everything.
+
+The embedding models are loaded on first use (common.model_registry), so
+--validate-only checks meta.json, the required files and menu.csv in about a
+second without loading torch or touching Postgres / Qdrant.
+
+Several folders (e.g. the outlets of a chain) are seeded in parallel on a
+process pool that shares the loaded models; dishes with the same content hash
+are embedded once and reused across outlets, and a summary table is printed.
+
 Usage:
-    python 1_onboard_restaurants.py /path/to/restaurant_folder
+    python 1_onboard_restaurants.py /path/to/restaurant_folder [--full]
+    python 1_onboard_restaurants.py /path/to/restaurant_folder --validate-only
+    python 1_onboard_restaurants.py /path/to/outlet_1 /path/to/outlet_2 ... [--workers 4]
 """
 
-import csv, json, uuid, hashlib, hmac, sys, os, shutil
+import argparse, csv, json, uuid, hashlib, hmac, sys, os, shutil, tempfile, multiprocessing
 from pathlib import Path
 from datetime import datetime, date, time
 import pandas as pd
 import numpy as np
-import torch
-import clip
 import requests
 from io import BytesIO
-from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from time import perf_counter
 from PIL import Image
 from loguru import logger
-import pickle
-from rank_bm25 import BM25Okapi
 
 # Add parent directory to path to import config and models
 sys.path.append(str(Path(__file__).parent.parent))
-from models.schema import SessionLocal
-from common.utils import download_instagram_content, download_url_content, download_google_drive_content, is_url, is_instagram_url, is_google_drive_url
-from common.cloudflare_utils import upload_media_to_cloudflare
+from models.schema import SessionLocal, engine
+from common.utils import is_url
+from common.media_pipeline import MediaJob, MediaPipeline
+from common.menu_version import bump_menu_version
+from common.content_hash import menu_item_content_hash, unchanged_public_ids, provisional_content_hashes
+from common.embedding_cache import EmbeddingCache
+from common.model_registry import get_text_model, get_clip_model
+from common.menu_import import (
+    CsvValidationError, CUSTOMISATION_REQUIRED, validate_menu_csv, validate_customisation_csvs,
+    clean_str, bool_column, int_column, records,
+)
+from common.bulk_ops import INSERT_CHUNK, bulk_insert, bulk_upsert
+from sqlalchemy import update, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from common.qdrant_utils import (
+    sync_menu_item_payloads, get_collection_name, is_shared_layout, menu_item_payload,
+    create_shared_collection, delete_restaurant_points, point_id_for, TENANT_FIELD,
+    collection_or_alias_exists, versioned_collection_name, create_dish_collection,
+    swap_collection_alias, gc_collection_versions, restore_collection_alias, delete_stale_restaurant_points,
+)
+from recommender.similarity_graph import save_similarity_graph
+from recommender.bm25 import save_bm25_index, bm25_document
 from urls.admin.auth_utils import generate_api_key
 from utils.jwt_utils import create_qr_token  # Unified QR token generation
 from models.schema import (
@@ -61,12 +92,14 @@ from pos_onboarding.petpooja_dinein import (
     create_pos_system_for_dinein, process_dinein_addon_groups, create_dinein_item_relationships
 )
 
-# Initialize ML models for embedding generation
-mps = torch.backends.mps.is_available()
-device = "mps" if mps else "cpu"
-
-txt_model = SentenceTransformer("all-mpnet-base-v2", device=device)
-clip_model, clip_preprocess = clip.load("ViT-B/32", device="cpu")
+# Embedding batch size (texts and stacked CLIP image tensors) and image decode threads
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_IMAGE_WORKERS = int(os.getenv("EMBED_IMAGE_WORKERS", "8"))
+# Decoded image tensors held at once, in CLIP batches (bounds memory on large menus)
+EMBED_PREFETCH_BATCHES = int(os.getenv("EMBED_PREFETCH_BATCHES", "2"))
+# Qdrant upsert batch size and parallel batches
+QDRANT_UPSERT_CHUNK = int(os.getenv("QDRANT_UPSERT_CHUNK", "256"))
+QDRANT_UPSERT_WORKERS = int(os.getenv("QDRANT_UPSERT_WORKERS", "4"))
 
 # ---------- helpers -----------------------------------------------------------
 
@@ -74,22 +107,6 @@ def new_id() -> str:
     """Generate 6‑char public_id."""
     return uuid.uuid4().hex[:6]
 
-def validate_timing_format(timing_str: str) -> bool:
-    """Validate timing string is in 24-hour format (HH:MM)"""
-    if not timing_str or pd.isna(timing_str):
-        return True  # Null values are allowed
-    
-    timing_str = str(timing_str).strip()
-    if not timing_str:
-        return True  # Empty strings are allowed
-    
-    try:
-        # Parse time in 24-hour format
-        time_obj = datetime.strptime(timing_str, "%H:%M").time()
-        return True
-    except ValueError:
-        return False
-
 def validate_and_clean_csv(df_menu: pd.DataFrame) -> pd.DataFrame:
     """Validate CSV format and clean extra columns"""
     # Expected columns according to documentation
@@ -100,11 +117,10 @@ def validate_and_clean_csv(df_menu: pd.DataFrame) -> pd.DataFrame:
         'cloudflare_image_id', 'cloudflare_video_id', 'id', 'show_on_menu', "timing_start", "timing_end", "tags"
     ]
     
-    # Check for required columns, ALWAYS ADD THESE, DO NOT REMOVE ANY
-    required_columns = ['name', 'category_brief', 'group_category', 'description', 'price', 'image_path', 'cloudflare_image_id', 'cloudflare_video_id', 'id', 'veg_flag', 'is_bestseller', 'is_recommended', 'promote', 'priority', 'kind']
-    missing_columns = [col for col in required_columns if col not in df_menu.columns]
-    if missing_columns:
-        raise ValueError(f"Missing required columns in CSV: {missing_columns}")
+    # Column-wise checks (missing columns, timings, ids); every problem is reported at once
+    issues = validate_menu_csv(df_menu)
+    if issues:
+        raise CsvValidationError(issues)
     
     # Filter to only expected columns (ignore extra columns like id, ADDED, FORCE_UPDATE)
     available_columns = [col for col in expected_columns if col in df_menu.columns]
@@ -118,297 +134,297 @@ def validate_and_clean_csv(df_menu: pd.DataFrame) -> pd.DataFrame:
             elif col == 'show_on_menu':
                 df_cleaned[col] = True
     
-    # Validate timing format if timing columns exist
-    if 'timing_start' in df_cleaned.columns:
-        invalid_start_timing = []
-        for idx, timing_str in enumerate(df_cleaned['timing_start']):
-            if not validate_timing_format(timing_str):
-                invalid_start_timing.append((idx, timing_str))
-        
-        if invalid_start_timing:
-            raise ValueError(f"Invalid timing_start format (must be HH:MM): {invalid_start_timing}")
-    
-    if 'timing_end' in df_cleaned.columns:
-        invalid_end_timing = []
-        for idx, timing_str in enumerate(df_cleaned['timing_end']):
-            if not validate_timing_format(timing_str):
-                invalid_end_timing.append((idx, timing_str))
-        
-        if invalid_end_timing:
-            raise ValueError(f"Invalid timing_end format (must be HH:MM): {invalid_end_timing}")
-    
-    # Validate that all rows have non-null IDs
-    id_series = df_cleaned['id'].tolist()
-    null_id_indices = [i for i, val in enumerate(id_series) if pd.isnull(val)]
-    if null_id_indices:
-        raise ValueError(f"Missing ID values in rows (0-based index): {null_id_indices}")
-    
-    # Validate that all IDs are unique
-    non_null_ids = [str(x) for x in id_series if not pd.isnull(x)]
-    duplicate_ids = [x for x in set(non_null_ids) if non_null_ids.count(x) > 1]
-    if duplicate_ids:
-        raise ValueError(f"Duplicate IDs found: {duplicate_ids}")
-    
     logger.info(f"📋 CSV validated and cleaned: {len(df_cleaned)} rows, {len(available_columns)} columns")
     return df_cleaned
 
 def process_image_urls_and_upload_to_cloudflare(df_menu: pd.DataFrame, image_directory: str, restaurant_slug: str) -> pd.DataFrame:
-    """Process image_path URLs, download them, and upload to Cloudflare"""
+    """Process image_path URLs, download them, and upload to Cloudflare
+
+    Downloads and uploads run in separate bounded worker pools with per-host
+    rate limits and retries (common/media_pipeline.py). Finished rows are kept
+    in images/.media_manifest.jsonl, so a re-run after a crash only redoes the
+    rows that did not finish.
+    """
     logger.info(f"📷 Processing image URLs and uploading to Cloudflare, target directory: {image_directory}")
     
-    # Ensure image directory exists
-    os.makedirs(image_directory, exist_ok=True)
-    
     processed_df = df_menu.copy()
     
-    # # Initialize Cloudflare columns only if they don't already exist
-    # if 'cloudflare_image_id' not in processed_df.columns:
-    #     processed_df['cloudflare_image_id'] = None
-    # if 'cloudflare_video_id' not in processed_df.columns:
-    #     processed_df['cloudflare_video_id'] = None
-    
+    jobs = []
     for idx, row in processed_df.iterrows():
         image_path_value = row.get('image_path')
-        cloudflare_image_id = row.get('cloudflare_image_id')
-        cloudflare_video_id = row.get('cloudflare_video_id')
-
-        if pd.notna(cloudflare_image_id) or pd.notna(cloudflare_video_id):
+        if pd.notna(row.get('cloudflare_image_id')) or pd.notna(row.get('cloudflare_video_id')):
             continue
-        
-        has_url = pd.notna(image_path_value) and is_url(str(image_path_value))
-        
-        local_file_path = None
-        
-        if has_url:
-            image_url = str(row['image_path']).strip()
-            logger.info(f"🔗 Found URL in image_path for {row['name']}: {image_url}")
-            
-            # Generate base filename for download
-            safe_name = str(row['name']).replace(' ', '_').replace('/', '_').replace('\\', '_')
-            base_filename = f"{idx}_{safe_name}"
-            
-            try:
-                downloaded_path = None
-                if is_instagram_url(image_url):
-                    # Handle Instagram URLs
-                    logger.info(f"📸 Downloading Instagram content for {row['name']}")
-                    downloaded_path, content_type, success = download_instagram_content(
-                        image_url, image_directory, base_filename
-                    )
-                elif is_google_drive_url(image_url):
-                    # Handle Google Drive URLs
-                    logger.info(f"☁️  Downloading Google Drive content for {row['name']}")
-                    downloaded_path, content_type, success = download_google_drive_content(
-                        image_url, image_directory, base_filename
-                    )
-                else:
-                    # Handle regular URLs
-                    logger.info(f"🌐 Downloading content from URL for {row['name']}")
-                    downloaded_path, content_type, success = download_url_content(
-                        image_url, image_directory, base_filename
-                    )
-                
-                if success and downloaded_path:
-                    local_file_path = downloaded_path
-                    # Update the image_path in the dataframe with just the filename (for fallback)
-                    new_filename = Path(downloaded_path).name
-                    processed_df.at[idx, 'image_path'] = new_filename
-                    logger.success(f"✅ Downloaded {row['name']}: {new_filename}")
-                else:
-                    # Download failed, set image_path to null
-                    processed_df.at[idx, 'image_path'] = None
-                    logger.warning(f"⚠️  Failed to download URL for {row['name']}, setting image_path to null")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error downloading URL for {row['name']}: {e}")
-                processed_df.at[idx, 'image_path'] = None
-        else:
-            # Not a URL, check if local file exists
-            image_path_value = row.get('image_path')
-            has_local_path = pd.notna(image_path_value)
-            if has_local_path:
-                local_file_path = Path(image_directory) / str(image_path_value)
-                if local_file_path.exists():
-                    logger.info(f"📁 Using local file for {row['name']}: {image_path_value}")
-                else:
-                    logger.warning(f"⚠️  Local file not found for {row['name']}: {image_path_value}")
-                    local_file_path = None
-        
-        # Upload to Cloudflare only if we have a local file AND no existing Cloudflare IDs
-        cf_img_id = row.get('cloudflare_image_id')
-        cf_vid_id = row.get('cloudflare_video_id')
-        has_local_file = local_file_path and Path(local_file_path).exists()
-        img_id_empty = pd.isna(cf_img_id) if cf_img_id is not None else True
-        vid_id_empty = pd.isna(cf_vid_id) if cf_vid_id is not None else True
-        should_upload = has_local_file and img_id_empty and vid_id_empty
-        if should_upload:
-            try:
-                logger.info(f"☁️  Uploading {row['name']} to Cloudflare...")
-                cf_image_id, cf_video_id, cf_success, cf_message = upload_media_to_cloudflare(
-                    str(local_file_path), 
-                    str(row['name']), 
-                    restaurant_slug
-                )
-                
-                if cf_success:
-                    processed_df.at[idx, 'cloudflare_image_id'] = cf_image_id
-                    processed_df.at[idx, 'cloudflare_video_id'] = cf_video_id
-                    logger.success(f"✅ Cloudflare upload successful for {row['name']}")
-                else:
-                    logger.warning(f"⚠️  Cloudflare upload failed for {row['name']}: {cf_message}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Exception uploading {row['name']} to Cloudflare: {e}")
-        else:
-            logger.info(f"⏭️  Skipping Cloudflare upload for {row['name']} (no local file or already has Cloudflare IDs)")
+        if pd.isna(image_path_value):
+            continue
+        source = str(image_path_value).strip()
+        jobs.append(MediaJob(
+            row_key=idx,
+            item_id=str(row['id']) if pd.notna(row.get('id')) else str(idx),
+            name=str(row['name']),
+            source=source,
+            is_url=is_url(source),
+        ))
+    logger.info(f"📷 {len(jobs)} rows need media processing")
+    
+    pipeline = MediaPipeline(image_directory, restaurant_slug)
+    for job, result in pipeline.run(jobs):
+        if job.is_url:
+            # Downloaded file name (for fallback), or null when the download failed
+            processed_df.at[job.row_key, 'image_path'] = result.image_path
+        if result.cloudflare_image_id or result.cloudflare_video_id:
+            processed_df.at[job.row_key, 'cloudflare_image_id'] = result.cloudflare_image_id
+            processed_df.at[job.row_key, 'cloudflare_video_id'] = result.cloudflare_video_id
     
     return processed_df
 
+def _has_media(row) -> bool:
+    return pd.notna(row.get('cloudflare_image_id')) or (
+        pd.notna(row.get('cloudflare_video_id')) and bool(str(row.get('cloudflare_video_id')).strip())
+    )
+
+def _load_clip_input(row, image_dir_path: Path, clip_preprocess):
+    """Decode + preprocess a row's image (or Cloudflare video thumbnail) into a CLIP input tensor, or None."""
+    import torch
+    try:
+        # First, try to process local image
+        image_path_val = row.get('image_path')
+        has_image = image_path_val is not None and pd.notna(image_path_val) and pd.notna(row.get('cloudflare_image_id'))
+        if has_image:
+            specified_image_path = image_dir_path / str(image_path_val)
+            if specified_image_path.exists():
+                img = Image.open(specified_image_path)
+            else:
+                return None
+
+        # If no local image, try to get video thumbnail from Cloudflare
+        elif pd.notna(row.get('cloudflare_video_id')) and str(row.get('cloudflare_video_id')).strip():
+            video_id = str(row.get('cloudflare_video_id')).strip()
+            # Using the standard videodelivery.net domain for Cloudflare Stream
+            thumbnail_url = f"https://videodelivery.net/{video_id}/thumbnails/thumbnail.jpg?time=1s&height=480"
+            response = requests.get(thumbnail_url, timeout=10)
+            if response.status_code != 200:
+                logger.warning(f"⚠️  Failed to fetch video thumbnail for {row['name']}: HTTP {response.status_code}")
+                return None
+            img = Image.open(BytesIO(response.content))
+        else:
+            return None
+
+        img_preprocessed = clip_preprocess(img)
+        if not isinstance(img_preprocessed, torch.Tensor):
+            img_preprocessed = torch.tensor(img_preprocessed)
+        return img_preprocessed
+    except Exception as e:
+        logger.warning(f"⚠️  Error processing media for {row['name']}: {e}")
+        return None
+
+
 def generate_embeddings_for_menu_items(df_menu: pd.DataFrame, image_directory: str) -> pd.DataFrame:
-    """Generate embeddings for menu items using text, image, and video thumbnail data"""
+    """Generate embeddings for menu items using text, image, and video thumbnail data
+
+    Texts are encoded in one batched call. Images are decoded and preprocessed
+    on a thread pool (EMBED_IMAGE_WORKERS) while CLIP encodes stacked batches
+    of EMBED_BATCH_SIZE tensors; decoding runs at most EMBED_PREFETCH_BATCHES
+    batches ahead of encoding.
+    """
     logger.info(f"🏗️  Generating embeddings for {len(df_menu)} menu items...")
+    started = perf_counter()
     
     processed_df = df_menu.copy()
-    vecs = []
     image_dir_path = Path(image_directory)
+    rows = [row for _, row in processed_df.iterrows()]
+    if not rows:
+        processed_df["vector"] = []
+        return processed_df
+
+    # Text embeddings: one batched encode for the whole menu
+    texts = [
+        f"{row['name']} - {row['category_brief']} - {row['group_category']} - {row['description']}"
+        for row in rows
+    ]
+    t_vecs = get_text_model().encode(texts, batch_size=EMBED_BATCH_SIZE, convert_to_numpy=True, show_progress_bar=False)
+    text_seconds = perf_counter() - started
+
+    # Image embeddings: zero vector unless the row has an image / video thumbnail
+    i_vecs = np.zeros((len(rows), 512), dtype=np.float32)
+    batch_positions, batch_tensors = [], []
+    # CLIP is only loaded when some row actually has media
+    clip_model, clip_preprocess = get_clip_model() if any(_has_media(row) for row in rows) else (None, None)
+
+    def encode_batch():
+        import torch
+        with torch.no_grad():
+            encoded = clip_model.encode_image(torch.stack(batch_tensors)).float().cpu().numpy()
+        i_vecs[batch_positions] = encoded
+        batch_positions.clear()
+        batch_tensors.clear()
+
+    def load(row):
+        return _load_clip_input(row, image_dir_path, clip_preprocess) if _has_media(row) else None
+
+    # Rows are submitted one window at a time and each window is drained before
+    # the next, so at most `window` decoded tensors are alive at once
+    window = EMBED_BATCH_SIZE * max(EMBED_PREFETCH_BATCHES, 1)
+    with ThreadPoolExecutor(EMBED_IMAGE_WORKERS) as pool:
+        for start in range(0, len(rows), window):
+            # map() yields in order while later images of the window are still decoding
+            tensors = pool.map(load, rows[start:start + window])
+            for position, tensor in enumerate(tensors, start):
+                if tensor is None:
+                    continue
+                batch_positions.append(position)
+                batch_tensors.append(tensor)
+                if len(batch_tensors) >= EMBED_BATCH_SIZE:
+                    encode_batch()
+        if batch_tensors:
+            encode_batch()
+
+    # Concatenate text and image embeddings
+    processed_df["vector"] = list(np.concatenate([t_vecs, i_vecs], axis=1))
     
-    for idx, row in processed_df.iterrows():
-        # Create text embedding
-        text = f"{row['name']} - {row['category_brief']} - {row['group_category']} - {row['description']}"
-        t_vec = txt_model.encode(text)
-        
-        i_vec = np.zeros(512)  # Default zero vector
-        
-        # Process image or video thumbnail
-        try:
-            # First, try to process local image
-            image_path_val = row.get('image_path')
-            has_image = image_path_val is not None and pd.notna(image_path_val) and pd.notna(row.get('cloudflare_image_id'))
-            if has_image:
-                specified_image_path = image_dir_path / str(image_path_val)
-                if specified_image_path.exists():
-                    img = Image.open(specified_image_path)
-                    # Convert PIL Image to tensor properly
-                    img_preprocessed = clip_preprocess(img)
-                    # Ensure proper tensor conversion
-                    if isinstance(img_preprocessed, torch.Tensor):
-                        img_tensor = img_preprocessed.unsqueeze(0)
-                    else:
-                        img_tensor = torch.tensor(img_preprocessed).unsqueeze(0)
-                    with torch.no_grad():
-                        i_vec = clip_model.encode_image(img_tensor)[0].cpu().numpy()
-                    logger.info(f"📷 Using specified image: {image_path_val}")
-            
-            # If no local image, try to get video thumbnail from Cloudflare
-            elif pd.notna(row.get('cloudflare_video_id')):
-                video_id_val = row.get('cloudflare_video_id')
-                has_video = video_id_val is not None and pd.notna(video_id_val) and str(video_id_val).strip()
-                if has_video:
-                    video_id = str(video_id_val).strip()
-                    # Generate Cloudflare Stream thumbnail URL
-                    # Using the standard videodelivery.net domain for Cloudflare Stream
-                    thumbnail_url = f"https://videodelivery.net/{video_id}/thumbnails/thumbnail.jpg?time=1s&height=480"
-                    
-                    try:
-                        # Download thumbnail image
-                        response = requests.get(thumbnail_url, timeout=10)
-                        if response.status_code == 200:
-                            img = Image.open(BytesIO(response.content))
-                            # Convert PIL Image to tensor properly
-                            img_preprocessed = clip_preprocess(img)
-                            # Ensure proper tensor conversion
-                            if isinstance(img_preprocessed, torch.Tensor):
-                                img_tensor = img_preprocessed.unsqueeze(0)
-                            else:
-                                img_tensor = torch.tensor(img_preprocessed).unsqueeze(0)
-                            with torch.no_grad():
-                                i_vec = clip_model.encode_image(img_tensor)[0].cpu().numpy()
-                            logger.info(f"🎬 Using video thumbnail for: {row['name']} (video ID: {video_id})")
-                        else:
-                            logger.warning(f"⚠️  Failed to fetch video thumbnail for {row['name']}: HTTP {response.status_code}")
-                    except Exception as video_error:
-                        logger.warning(f"⚠️  Error processing video thumbnail for {row['name']}: {video_error}")
-                
-        except Exception as e:
-            logger.warning(f"⚠️  Error processing media for {row['name']}: {e}")
-            i_vec = np.zeros(512)
-
-        # Concatenate text and image embeddings
-        vecs.append(np.concatenate([t_vec, i_vec]))
-    
-    # Add vectors to dataframe
-    processed_df["vector"] = vecs
-    
-    logger.success(f"✅ Generated embeddings for {len(processed_df)} menu items")
+    elapsed = perf_counter() - started
+    with_media = int(np.count_nonzero(np.any(i_vecs, axis=1)))
+    logger.success(
+        f"✅ Generated embeddings for {len(processed_df)} menu items ({with_media} with media) in {elapsed:.1f}s "
+        f"({len(processed_df) / max(elapsed, 1e-9):.1f} items/s; text {text_seconds:.1f}s)"
+    )
     return processed_df
 
-def push_to_qdrant(restaurant_slug: str, df_with_embeddings: pd.DataFrame) -> bool:
-    """Push restaurant embeddings to Qdrant"""
-    collection_name = f"{restaurant_slug}_qdb"
+def upsert_points_parallel(collection_name: str, points: list) -> int:
+    """Upsert points in QDRANT_UPSERT_CHUNK-sized batches on QDRANT_UPSERT_WORKERS threads."""
+    chunks = [points[i:i + QDRANT_UPSERT_CHUNK] for i in range(0, len(points), QDRANT_UPSERT_CHUNK)]
+    with ThreadPoolExecutor(QDRANT_UPSERT_WORKERS) as pool:
+        # list() re-raises the first failed batch
+        list(pool.map(lambda chunk: qd.upsert(collection_name=collection_name, points=chunk, wait=True), chunks))
+    return len(points)
+
+def push_to_qdrant(restaurant_slug: str, df_with_embeddings: pd.DataFrame,
+                   removed_public_ids: list | None = None, incremental: bool = False,
+                   filter_payloads: dict | None = None, undo: dict | None = None) -> bool:
+    """Push restaurant embeddings to Qdrant
+
+    With `incremental`, the existing collection is kept: only the given rows
+    are upserted and the points of `removed_public_ids` are deleted.
+
+    A full rebuild in the per-restaurant layout never touches the live
+    collection: points go into a new versioned collection, the point count is
+    validated and only then is the `{slug}_qdb` alias switched over; old
+    versions are garbage-collected afterwards (the previous one is kept).
+    After the switch, `undo` (if given) is filled with the alias, its
+    previous target and the new collection, so a later onboarding failure can
+    hand them to `restore_collection_alias`. A full rebuild in the shared
+    layout upserts first and then deletes only the restaurant's stale points.
+    `filter_payloads` ({public_id: menu_item_payload}) are written with the
+    points so the new collection is fully filterable the moment it goes live.
+    """
+    collection_name = get_collection_name(restaurant_slug)
     logger.info(f"📤 Pushing embeddings to Qdrant collection: {collection_name}")
     
-    if len(df_with_embeddings) == 0:
-        logger.info(f"⏭️  No items to upload to Qdrant")
-        return True
+    # Prepare points for upsert
+    points = []
+    from qdrant_client.models import PointStruct
     
-    try:
-        # Check if collection exists
-        collections = qd.get_collections().collections
-        collection_names = [col.name for col in collections]
-        collection_exists = collection_name in collection_names
-        
-        if collection_exists:
-            logger.info(f"🗑️ Deleting existing Qdrant collection: {collection_name}")
-            qd.delete_collection(collection_name=collection_name)
-            logger.success(f"✅ Deleted Qdrant collection: {collection_name}")
+    for idx, row in df_with_embeddings.iterrows():
+        # Create minimal payload - only essential fields for search
+        # Full details will be fetched from PostgreSQL using public_id
+        payload = {
+            'public_id': str(row['public_id']),
+            'name': str(row['name']),
+            'description': str(row['description']),
+            'category_brief': str(row['category_brief']),  # Use category_brief as the main category
+            'group_category': str(row['group_category']),
+        }
+        payload.update((filter_payloads or {}).get(str(row['public_id']), {}))
+        if is_shared_layout():
+            payload[TENANT_FIELD] = restaurant_slug
         
-        logger.info(f"🆕 Creating new Qdrant collection: {collection_name}")
-        from qdrant_client.models import VectorParams, Distance
-        qd.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(
-                size=1280, distance=Distance.COSINE
-            )
-        )
-        logger.success(f"✅ Created Qdrant collection: {collection_name}")
-        
-        # Prepare points for upsert
-        points = []
-        from qdrant_client.models import PointStruct
-        
-        for idx, row in df_with_embeddings.iterrows():
-            # Create minimal payload - only essential fields for search
-            # Full details will be fetched from PostgreSQL using public_id
-            payload = {
-                'public_id': str(row['public_id']),
-                'name': str(row['name']),
-                'description': str(row['description']),
-                'category_brief': str(row['category_brief']),  # Use category_brief as the main category
-                'group_category': str(row['group_category']),
-            }
-            
-            # Convert pandas index to proper integer for Qdrant
-            point_id = hash(str(idx)) % (10**9)  # Ensure it's a valid integer ID
-            point = PointStruct(
-                id=point_id,
-                vector=row["vector"].tolist(),
-                payload=payload
-            )
-            points.append(point)
-        
-        # Upsert points (this will add new points or update existing ones)
-        qd.upsert(
-            collection_name=collection_name,
-            points=points
+        # Deterministic id derived from restaurant + public_id (unique across tenants)
+        point_id = point_id_for(restaurant_slug, str(row['public_id']))
+        point = PointStruct(
+            id=point_id,
+            vector=row["vector"].tolist(),
+            payload=payload
         )
-        
-        logger.success(f"✅ Uploaded {len(points)} embeddings to Qdrant collection: {collection_name}")
+        points.append(point)
+    
+    try:
+        if incremental and collection_or_alias_exists(collection_name):
+            if removed_public_ids:
+                from qdrant_client.models import PointIdsList
+                qd.delete(
+                    collection_name=collection_name,
+                    points_selector=PointIdsList(points=[point_id_for(restaurant_slug, pid) for pid in removed_public_ids]),
+                )
+                logger.info(f"🗑️ Deleted {len(removed_public_ids)} removed items from {collection_name}")
+            # Upsert points (this will add new points or update existing ones)
+            upsert_points_parallel(collection_name, points)
+            logger.success(f"✅ Uploaded {len(points)} embeddings to Qdrant collection: {collection_name}")
+            return True
+
+        if not points:
+            logger.info(f"⏭️  No items to upload to Qdrant")
+            return True
+
+        if is_shared_layout():
+            # Shared multi-tenant collection: replace only this restaurant's points,
+            # upserting before deleting so the live menu is never empty
+            create_shared_collection(collection_name)
+            upsert_points_parallel(collection_name, points)
+            logger.success(f"✅ Uploaded {len(points)} embeddings to Qdrant collection: {collection_name}")
+            stale = delete_stale_restaurant_points(restaurant_slug, [point.id for point in points])
+            logger.info(f"🗑️ Deleted {stale} stale points of {restaurant_slug} from {collection_name}")
+            return True
+
+        # Per-restaurant layout: build a new version next to the live one
+        new_collection = versioned_collection_name(restaurant_slug)
+        logger.info(f"🆕 Creating new Qdrant collection: {new_collection}")
+        create_dish_collection(new_collection)
+        try:
+            upsert_points_parallel(new_collection, points)
+            stored = qd.count(collection_name=new_collection, exact=True).count
+            if stored != len(points):
+                raise ValueError(f"{new_collection} has {stored} points, expected {len(points)}")
+        except Exception:
+            # The live collection was never touched; just drop the partial build
+            qd.delete_collection(collection_name=new_collection)
+            raise
+
+        previous = swap_collection_alias(collection_name, new_collection)
+        if undo is not None:
+            undo.update(alias=collection_name, previous=previous, collection=new_collection)
+        logger.success(f"✅ Uploaded {len(points)} embeddings to {new_collection}, alias {collection_name} switched")
+        gc_collection_versions(restaurant_slug)
         return True
         
     except Exception as e:
         logger.error(f"❌ Error uploading to Qdrant: {e}")
         return False
 
+def row_content_hash(row) -> str:
+    """Content hash of a menu.csv row (see common/content_hash.py)."""
+    return menu_item_content_hash(
+        row.get('name'), row.get('category_brief'), row.get('group_category'), row.get('description'),
+        row.get('image_path'), row.get('cloudflare_image_id'), row.get('cloudflare_video_id'),
+    )
+
+def fetch_existing_vectors(restaurant_slug: str, public_ids: list) -> dict:
+    """{public_id: vector} of the given items' current Qdrant points (missing points are left out)."""
+    collection_name = get_collection_name(restaurant_slug)
+    if not public_ids or not collection_or_alias_exists(collection_name):
+        return {}
+    vectors = {}
+    for start in range(0, len(public_ids), 256):
+        points = qd.retrieve(
+            collection_name=collection_name,
+            ids=[point_id_for(restaurant_slug, pid) for pid in public_ids[start:start + 256]],
+            with_payload=["public_id"],
+            with_vectors=True,
+        )
+        for point in points:
+            public_id = (point.payload or {}).get("public_id")
+            if public_id and point.vector:
+                vectors[public_id] = np.asarray(point.vector, dtype=np.float32)
+    return vectors
+
 # ---------- helpers -----------------------------------------------------------
 
 def safe_read_csv(csv_path: Path):
@@ -417,22 +433,33 @@ def safe_read_csv(csv_path: Path):
         return pd.read_csv(csv_path)
     return None
 
-def clean_row_for_json(row):
-    """Clean pandas row data for JSON serialization by replacing NaN with None."""
-    cleaned = {}
-    for key, value in row.items():
-        if pd.isna(value):
-            cleaned[key] = None
-        else:
-            cleaned[key] = value
-    return cleaned
-
 # -----------------------------------------------------------------------------
 # No-POS onboarding helper
 # -----------------------------------------------------------------------------
 
+def load_customisation_csvs(custom_dir: Path) -> dict:
+    """customisations/*.csv as DataFrames (None for files that are not there)."""
+    return {name: safe_read_csv(custom_dir / name) for name in CUSTOMISATION_REQUIRED}
+
+
+def _is_active(df: pd.DataFrame) -> pd.Series:
+    # Column absent → active; blank cell → inactive (as str(nan) never matched "true")
+    if "is_active" not in df.columns:
+        return pd.Series(True, index=df.index)
+    return bool_column(df["is_active"], default=False)
+
+
+def _priority(df: pd.DataFrame) -> pd.Series:
+    return int_column(df["priority"]) if "priority" in df.columns else pd.Series(0, index=df.index)
+
+
 def onboard_no_pos(folder: Path, db, restaurant_id: int, df_menu: pd.DataFrame, rest, logger):
-    """Process customisation CSVs for pos_type==no_pos."""
+    """Process customisation CSVs for pos_type==no_pos.
+
+    All six CSVs are validated together up front (column-wise, every problem
+    reported at once), then each table is written with bulk INSERT / upsert
+    statements instead of one ORM object and flush per row.
+    """
 
     custom_dir = folder / "customisations"
 
@@ -448,257 +475,176 @@ def onboard_no_pos(folder: Path, db, restaurant_id: int, df_menu: pd.DataFrame,
         db.add(pos_system)
         db.flush()
 
-    # 2. Load CSVs (skip silently if directory / file missing)
-    variations_df = safe_read_csv(custom_dir / "variations.csv")
-    addon_groups_df = safe_read_csv(custom_dir / "addon_groups.csv")
-    addon_items_df = safe_read_csv(custom_dir / "addon_items.csv")
-    item_variations_df = safe_read_csv(custom_dir / "item_variations.csv")
-    item_addons_df = safe_read_csv(custom_dir / "item_addons.csv")
-    item_variation_addons_df = safe_read_csv(custom_dir / "item_variation_addons.csv")
-
-    # Build lookup for menu items via external_id (id column of menu.csv)
-    menu_items = db.query(MenuItem).filter(MenuItem.restaurant_id == restaurant_id).all()
-    menu_item_map = {mi.external_id: mi for mi in menu_items}
-
-    # 3. Insert Variations
-    variation_map = {}
+    # 2. Load CSVs (skip silently if directory / file missing) and validate them together
+    frames = load_customisation_csvs(custom_dir)
+    issues = validate_customisation_csvs(frames, df_menu["id"])
+    if issues:
+        raise CsvValidationError(issues)
+    variations_df = frames["variations.csv"]
+    addon_groups_df = frames["addon_groups.csv"]
+    addon_items_df = frames["addon_items.csv"]
+    item_variations_df = frames["item_variations.csv"]
+    item_addons_df = frames["item_addons.csv"]
+    item_variation_addons_df = frames["item_variation_addons.csv"]
+
+    # Lookup for menu items via external_id (id column of menu.csv)
+    menu_item_map = dict(
+        db.query(MenuItem.external_id, MenuItem.id).filter(MenuItem.restaurant_id == restaurant_id).all()
+    )
+
+    # 3. Insert Variations (existing ones are kept as they are)
+    variation_map = dict(
+        db.query(Variation.external_variation_id, Variation.id).filter(Variation.pos_system_id == pos_system.id).all()
+    )
     if variations_df is not None:
-        for _, row in variations_df.iterrows():
-            if pd.isna(row.get("id")):
-                raise ValueError("variations.csv missing 'id' value in one of the rows")
-
-            var_ext_id = str(row["id"]).strip()
-            # Skip if already exists (idempotent)
-            existing = db.query(Variation).filter_by(external_variation_id=var_ext_id, pos_system_id=pos_system.id).first()
-            if existing:
-                variation_map[var_ext_id] = existing
-                continue
-
-            variation = Variation(
-                name=str(row["name"]),
-                display_name=str(row["display_name"]),
-                group_name=str(row["group_name"]),
-                is_active=str(row["is_active"]).lower().strip() in ["1", "true", "yes"],
-                external_variation_id=var_ext_id,
-                external_data=clean_row_for_json(row),
-                pos_system_id=pos_system.id,
+        ext_ids = clean_str(variations_df["id"])
+        new = variations_df[~ext_ids.isin(variation_map.keys())].drop_duplicates("id")
+        rows = [
+            {
+                "name": str(name), "display_name": str(display_name), "group_name": str(group_name),
+                "is_active": bool(active), "external_variation_id": ext_id,
+                "external_data": data, "pos_system_id": pos_system.id,
+            }
+            for name, display_name, group_name, active, ext_id, data in zip(
+                new["name"], new["display_name"], new["group_name"], _is_active(new),
+                clean_str(new["id"]), records(new),
             )
-            db.add(variation)
-            db.flush()
-            variation_map[var_ext_id] = variation
+        ]
+        variation_map.update(
+            (ext_id, vid) for vid, ext_id in bulk_insert(
+                db, Variation, rows, returning=[Variation.id, Variation.external_variation_id])
+        )
+        logger.info(f"Variations: {len(rows)} inserted, {len(variations_df) - len(rows)} already present")
 
-    # 4. Insert Addon Groups
-    addon_group_map = {}
+    # 4. Insert Addon Groups (existing ones are kept as they are)
+    addon_group_map = dict(
+        db.query(AddonGroup.external_group_id, AddonGroup.id).filter(AddonGroup.pos_system_id == pos_system.id).all()
+    )
     if addon_groups_df is not None:
-        for _, row in addon_groups_df.iterrows():
-            if pd.isna(row.get("id")):
-                raise ValueError("addon_groups.csv missing 'id' value in one of the rows")
-            ag_ext_id = str(row["id"]).strip()
-            existing = db.query(AddonGroup).filter_by(external_group_id=ag_ext_id, pos_system_id=pos_system.id).first()
-            if existing:
-                addon_group_map[ag_ext_id] = existing
-                continue
-
-            addon_group = AddonGroup(
-                name=str(row["name"]),
-                display_name=str(row["display_name"]),
-                priority=int(row.get("priority", 0) or 0),
-                is_active=str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"],
-                external_group_id=ag_ext_id,
-                external_data=clean_row_for_json(row),
-                pos_system_id=pos_system.id,
+        ext_ids = clean_str(addon_groups_df["id"])
+        new = addon_groups_df[~ext_ids.isin(addon_group_map.keys())].drop_duplicates("id")
+        rows = [
+            {
+                "name": str(name), "display_name": str(display_name), "priority": int(priority),
+                "is_active": bool(active), "external_group_id": ext_id,
+                "external_data": data, "pos_system_id": pos_system.id,
+            }
+            for name, display_name, priority, active, ext_id, data in zip(
+                new["name"], new["display_name"], _priority(new), _is_active(new),
+                clean_str(new["id"]), records(new),
             )
-            db.add(addon_group)
-            db.flush()
-            addon_group_map[ag_ext_id] = addon_group
+        ]
+        addon_group_map.update(
+            (ext_id, gid) for gid, ext_id in bulk_insert(
+                db, AddonGroup, rows, returning=[AddonGroup.id, AddonGroup.external_group_id])
+        )
+        logger.info(f"Addon groups: {len(rows)} inserted, {len(addon_groups_df) - len(rows)} already present")
 
-    # 5. Insert Addon Items
+    # 5. Insert Addon Items (existing ones are kept as they are)
     if addon_items_df is not None:
-        for _, row in addon_items_df.iterrows():
-            grp_id = str(row["addon_group_id"]).strip()
-            if grp_id not in addon_group_map:
-                raise ValueError(f"addon_items.csv references unknown addon_group_id '{grp_id}'")
-
-            if pd.isna(row.get("id")):
-                raise ValueError("addon_items.csv missing 'id' value in one of the rows")
-            ai_ext_id = str(row["id"]).strip()
-
-            existing = db.query(AddonGroupItem).filter_by(
-                external_addon_id=ai_ext_id, addon_group_id=addon_group_map[grp_id].id
-            ).first()
-            if existing:
-                continue
-
-            tags_raw = row.get("tags", "")
-            if tags_raw is None or (hasattr(tags_raw, '__bool__') and not tags_raw) or pd.isna(tags_raw):
-                tags = []
-            else:
-                tags_raw = str(tags_raw).strip()
-                tags = [t.strip() for t in tags_raw.split(",") if t.strip()] if tags_raw else []
-
-            addon_item = AddonGroupItem(
-                addon_group_id=addon_group_map[grp_id].id,
-                name=str(row["name"]),
-                display_name=str(row["display_name"]),
-                price=float(row["price"]),
-                is_active=str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"],
-                priority=int(row.get("priority", 0) or 0),
-                tags=tags,
-                external_addon_id=ai_ext_id,
-                external_data=clean_row_for_json(row),
+        group_ids = clean_str(addon_items_df["addon_group_id"]).map(addon_group_map)
+        tags = clean_str(addon_items_df["tags"]).fillna("") if "tags" in addon_items_df.columns \
+            else pd.Series("", index=addon_items_df.index)
+        rows = [
+            {
+                "addon_group_id": int(group_id), "name": str(name), "display_name": str(display_name),
+                "price": float(price), "is_active": bool(active), "priority": int(priority),
+                "tags": [t.strip() for t in tag_str.split(",") if t.strip()],
+                "external_addon_id": ext_id, "external_data": data,
+            }
+            for group_id, name, display_name, price, active, priority, tag_str, ext_id, data in zip(
+                group_ids, addon_items_df["name"], addon_items_df["display_name"], addon_items_df["price"],
+                _is_active(addon_items_df), _priority(addon_items_df), tags,
+                clean_str(addon_items_df["id"]), records(addon_items_df),
             )
-            db.add(addon_item)
-
-    # 6. Insert Item Variations
+        ]
+        inserted = 0
+        for start in range(0, len(rows), INSERT_CHUNK):
+            stmt = insert(AddonGroupItem).values(rows[start:start + INSERT_CHUNK])
+            inserted += db.execute(
+                stmt.on_conflict_do_nothing(constraint="uix_addon_item_pos")
+            ).rowcount
+        logger.info(f"Addon items: {inserted} inserted, {len(rows) - inserted} already present")
+
+    # 6. Upsert Item Variations (variationallowaddon: the item variation has addon groups)
     item_variation_map = {}
-    # First, check which item variations have addons (for variationallowaddon flag)
-    item_variations_with_addons = set()
-    if item_variation_addons_df is not None:
-        item_variations_with_addons = set(
-            str(row["item_variation_id"]).strip() 
-            for _, row in item_variation_addons_df.iterrows() 
-            if not pd.isna(row.get("item_variation_id"))
-        )
-    
     if item_variations_df is not None:
-        for _, row in item_variations_df.iterrows():
-            # Mandatory columns check
-            required_cols = ["id", "menu_item_id", "variation_id", "price"]
-            for col in required_cols:
-                if pd.isna(row.get(col)):
-                    raise ValueError(f"item_variations.csv missing '{col}' in one of the rows")
-
-            menu_item_key = str(row["menu_item_id"]).strip()
-            variation_key = str(row["variation_id"]).strip()
-            item_var_ext_id = str(row["id"]).strip()
-
-            if menu_item_key not in menu_item_map:
-                raise ValueError(f"item_variations.csv references unknown menu_item_id '{menu_item_key}'")
-            if variation_key not in variation_map:
-                raise ValueError(f"item_variations.csv references unknown variation_id '{variation_key}'")
-
-            menu_item = menu_item_map[menu_item_key]
-            variation = variation_map[variation_key]
-
-            # Check if this item variation has addons
-            has_addons = item_var_ext_id in item_variations_with_addons
-
-            # Check if ItemVariation already exists
-            existing_item_variation = db.query(ItemVariation).filter_by(
-                menu_item_id=menu_item.id,
-                variation_id=variation.id,
-                external_id=item_var_ext_id
-            ).first()
-
-            if existing_item_variation:
-                # Update existing record
-                existing_item_variation.price = float(row["price"])
-                existing_item_variation.is_active = str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"]
-                existing_item_variation.priority = int(row.get("priority", 0) or 0)
-                existing_item_variation.variationallowaddon = has_addons
-                existing_item_variation.external_data = clean_row_for_json(row)
-                item_variation_map[item_var_ext_id] = existing_item_variation
-            else:
-                # Create new record
-                item_variation = ItemVariation(
-                    menu_item_id=menu_item.id,
-                    variation_id=variation.id,
-                    price=float(row["price"]),
-                    is_active=str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"],
-                    priority=int(row.get("priority", 0) or 0),
-                    variationallowaddon=has_addons,
-                    external_id=item_var_ext_id,
-                    external_data=clean_row_for_json(row),
-                )
-                db.add(item_variation)
-                db.flush()
-                item_variation_map[item_var_ext_id] = item_variation
+        with_addons = set()
+        if item_variation_addons_df is not None:
+            with_addons = set(clean_str(item_variation_addons_df["item_variation_id"]).dropna())
+        # (menu item, variation) is unique: the last row of a pair wins
+        df = item_variations_df.assign(
+            _menu_item=clean_str(item_variations_df["menu_item_id"]).map(menu_item_map),
+            _variation=clean_str(item_variations_df["variation_id"]).map(variation_map),
+            _ext_id=clean_str(item_variations_df["id"]),
+        ).drop_duplicates(["_menu_item", "_variation"], keep="last")
+        rows = [
+            {
+                "menu_item_id": int(menu_item_id), "variation_id": int(variation_id),
+                "price": float(price), "is_active": bool(active), "priority": int(priority),
+                "variationallowaddon": ext_id in with_addons,
+                "external_id": ext_id, "external_data": data,
+            }
+            for menu_item_id, variation_id, price, active, priority, ext_id, data in zip(
+                df["_menu_item"], df["_variation"], df["price"], _is_active(df), _priority(df),
+                df["_ext_id"], records(df.drop(columns=["_menu_item", "_variation", "_ext_id"])),
+            )
+        ]
+        item_variation_map = {
+            ext_id: iv_id for iv_id, ext_id in bulk_upsert(
+                db, ItemVariation, rows, "uix_item_variation",
+                ["price", "is_active", "priority", "variationallowaddon", "external_id", "external_data"],
+                returning=[ItemVariation.id, ItemVariation.external_id],
+            )
+        }
+        logger.info(f"Item variations: {len(rows)} upserted")
 
-    # 7. Insert Item Addons
+    # 7. Upsert Item Addons
     if item_addons_df is not None:
-        for _, row in item_addons_df.iterrows():
-            required_cols = ["menu_item_id", "addon_group_id", "min_selection", "max_selection"]
-            for col in required_cols:
-                if pd.isna(row.get(col)):
-                    raise ValueError(f"item_addons.csv missing '{col}' in one of the rows")
-
-            menu_item_key = str(row["menu_item_id"]).strip()
-            addon_group_key = str(row["addon_group_id"]).strip()
-
-            if menu_item_key not in menu_item_map:
-                raise ValueError(f"item_addons.csv references unknown menu_item_id '{menu_item_key}'")
-            if addon_group_key not in addon_group_map:
-                raise ValueError(f"item_addons.csv references unknown addon_group_id '{addon_group_key}'")
-
-            menu_item = menu_item_map[menu_item_key]
-            addon_group = addon_group_map[addon_group_key]
-
-            # Check if ItemAddon already exists
-            existing_item_addon = db.query(ItemAddon).filter_by(
-                menu_item_id=menu_item.id,
-                addon_group_id=addon_group.id
-            ).first()
-
-            if existing_item_addon:
-                # Update existing record
-                existing_item_addon.min_selection = int(row["min_selection"])
-                existing_item_addon.max_selection = int(row["max_selection"])
-                existing_item_addon.is_active = str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"]
-                existing_item_addon.priority = int(row.get("priority", 0) or 0)
-            else:
-                # Create new record
-                item_addon = ItemAddon(
-                    menu_item_id=menu_item.id,
-                    addon_group_id=addon_group.id,
-                    min_selection=int(row["min_selection"]),
-                    max_selection=int(row["max_selection"]),
-                    is_active=str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"],
-                    priority=int(row.get("priority", 0) or 0),
-                )
-                db.add(item_addon)
+        df = item_addons_df.assign(
+            _menu_item=clean_str(item_addons_df["menu_item_id"]).map(menu_item_map),
+            _group=clean_str(item_addons_df["addon_group_id"]).map(addon_group_map),
+        ).drop_duplicates(["_menu_item", "_group"], keep="last")
+        rows = [
+            {
+                "menu_item_id": int(menu_item_id), "addon_group_id": int(group_id),
+                "min_selection": int(min_sel), "max_selection": int(max_sel),
+                "is_active": bool(active), "priority": int(priority),
+            }
+            for menu_item_id, group_id, min_sel, max_sel, active, priority in zip(
+                df["_menu_item"], df["_group"], df["min_selection"], df["max_selection"],
+                _is_active(df), _priority(df),
+            )
+        ]
+        bulk_upsert(db, ItemAddon, rows, "uix_item_addon",
+                    ["min_selection", "max_selection", "is_active", "priority"])
+        logger.info(f"Item addons: {len(rows)} upserted")
 
-    # 8. Insert ItemVariation Addons
+    # 8. Upsert ItemVariation Addons
     if item_variation_addons_df is not None:
-        for _, row in item_variation_addons_df.iterrows():
-            required_cols = ["item_variation_id", "addon_group_id", "min_selection", "max_selection"]
-            for col in required_cols:
-                if pd.isna(row.get(col)):
-                    raise ValueError(f"item_variation_addons.csv missing '{col}' in one of the rows")
-
-            item_var_key = str(row["item_variation_id"]).strip()
-            addon_group_key = str(row["addon_group_id"]).strip()
-
-            if item_var_key not in item_variation_map:
-                raise ValueError(f"item_variation_addons.csv references unknown item_variation_id '{item_var_key}'")
-            if addon_group_key not in addon_group_map:
-                raise ValueError(f"item_variation_addons.csv references unknown addon_group_id '{addon_group_key}'")
-
-            item_variation = item_variation_map[item_var_key]
-            addon_group = addon_group_map[addon_group_key]
-
-            # Check if ItemVariationAddon already exists
-            existing_item_var_addon = db.query(ItemVariationAddon).filter_by(
-                item_variation_id=item_variation.id,
-                addon_group_id=addon_group.id
-            ).first()
-
-            if existing_item_var_addon:
-                # Update existing record
-                existing_item_var_addon.min_selection = int(row["min_selection"])
-                existing_item_var_addon.max_selection = int(row["max_selection"])
-                existing_item_var_addon.is_active = str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"]
-                existing_item_var_addon.priority = int(row.get("priority", 0) or 0)
-            else:
-                # Create new record
-                item_var_addon = ItemVariationAddon(
-                    item_variation_id=item_variation.id,
-                    addon_group_id=addon_group.id,
-                    min_selection=int(row["min_selection"]),
-                    max_selection=int(row["max_selection"]),
-                    is_active=str(row.get("is_active", "true")).lower().strip() in ["1", "true", "yes"],
-                    priority=int(row.get("priority", 0) or 0),
-                )
-                db.add(item_var_addon)
+        df = item_variation_addons_df.assign(
+            _item_variation=clean_str(item_variation_addons_df["item_variation_id"]).map(item_variation_map),
+            _group=clean_str(item_variation_addons_df["addon_group_id"]).map(addon_group_map),
+        )
+        if df["_item_variation"].isna().any():
+            # Validated against item_variations.csv, so only a pair dropped as a duplicate above lands here
+            unknown = df.loc[df["_item_variation"].isna(), "item_variation_id"].astype(str).unique().tolist()
+            raise ValueError(f"item_variation_addons.csv references unknown item_variation_id {unknown}")
+        df = df.drop_duplicates(["_item_variation", "_group"], keep="last")
+        rows = [
+            {
+                "item_variation_id": int(item_variation_id), "addon_group_id": int(group_id),
+                "min_selection": int(min_sel), "max_selection": int(max_sel),
+                "is_active": bool(active), "priority": int(priority),
+            }
+            for item_variation_id, group_id, min_sel, max_sel, active, priority in zip(
+                df["_item_variation"], df["_group"], df["min_selection"], df["max_selection"],
+                _is_active(df), _priority(df),
+            )
+        ]
+        bulk_upsert(db, ItemVariationAddon, rows, "uix_item_variation_addon",
+                    ["min_selection", "max_selection", "is_active", "priority"])
+        logger.info(f"Item variation addons: {len(rows)} upserted")
 
     # 9. Update Menu Item flags
     # items with variations
@@ -717,13 +663,215 @@ def onboard_no_pos(folder: Path, db, restaurant_id: int, df_menu: pd.DataFrame,
 
 # -----------------------------------------------------------------------------
 
+def menu_item_values(row: dict, petpooja_items_map: dict | None = None, attributes_map: dict | None = None) -> dict:
+    """MenuItem column values of one cleaned menu.csv row (plus PetPooja flags / tags when onboarding from POS)."""
+    values = {}
+    values["name"] = str(row["name"])
+
+    category_brief_val = row["category_brief"]
+    values["category_brief"] = str(category_brief_val) if pd.notna(category_brief_val) else ""
+
+    group_category_val = row["group_category"]
+    values["group_category"] = str(group_category_val) if pd.notna(group_category_val) else ""
+
+    description_val = row["description"]
+    values["description"] = str(description_val) if pd.notna(description_val) else ""
+
+    show_on_menu_val = row["show_on_menu"]
+    values["show_on_menu"] = bool(show_on_menu_val) if pd.notna(show_on_menu_val) else True
+
+    # Handle price conversion properly
+    try:
+        price_val = row["price"]
+        if pd.notna(price_val) and str(price_val).strip():
+            values["price"] = float(price_val)
+        else:
+            logger.warning(f"⚠️  Missing price for {row['name']}, setting to 0.0")
+            values["price"] = 0.0
+    except (ValueError, TypeError):
+        logger.warning(f"⚠️  Invalid price for {row['name']}: {row['price']}, setting to 0.0")
+        values["price"] = 0.0
+
+    # Set image and cloudflare fields
+    for col in ("image_path", "cloudflare_image_id", "cloudflare_video_id"):
+        val = row[col]
+        values[col] = str(val) if pd.notna(val) and str(val).strip() else None
+
+    # Set boolean and other fields
+    for col in ("veg_flag", "is_bestseller", "is_recommended", "promote"):
+        val = row.get(col)
+        values[col] = bool(val) if pd.notna(val) else False
+
+    kind_val = row.get("kind")
+    values["kind"] = str(kind_val) if pd.notna(kind_val) else "food"
+
+    priority_val = row.get("priority")
+    try:
+        values["priority"] = int(priority_val) if pd.notna(priority_val) and priority_val is not None else 0
+    except (ValueError, TypeError):
+        values["priority"] = 0
+
+    # Set timing fields if they exist in the CSV (formats were validated up front)
+    for col in ("timing_start", "timing_end"):
+        val = row.get(col)
+        if pd.notna(val) and str(val).strip():
+            try:
+                values[col] = datetime.strptime(str(val).strip(), "%H:%M").time()
+            except ValueError:
+                logger.warning(f"⚠️  Invalid {col} format for {row['name']}: {val}, skipping")
+                values[col] = None
+        else:
+            values[col] = None
+
+    # Set timing_schedule to None (weekly schedule not supported in CSV yet)
+    values["timing_schedule"] = None
+
+    # Set new schema fields with defaults for simple restaurants
+    external_id_val = row.get("id")
+    values["external_id"] = str(external_id_val) if pd.notna(external_id_val) and str(external_id_val).strip() else None
+    values["external_data"] = None  # No external data for simple restaurants
+    values["itemallowvariation"] = False  # Simple restaurants don't have variations
+    values["itemallowaddon"] = False  # Simple restaurants don't have addons
+    values["pos_system_id"] = None  # No POS system integration
+
+    tags_val = row.get("tags", "")
+    if tags_val is None or pd.isna(tags_val) or not str(tags_val).strip():
+        tags_list = []
+    else:
+        tags_list = [tag.strip() for tag in str(tags_val).split(";") if tag.strip()]
+
+    # Add "veg" tag if item is vegetarian and tag not already present
+    if values["veg_flag"] and "veg" not in [t.lower() for t in tags_list]:
+        tags_list.append("veg")
+    values["tags"] = tags_list
+    values["content_hash"] = row["content_hash"]
+
+    # Add POS-specific basic fields (external_id, flags) if applicable
+    if petpooja_items_map and values["external_id"] in petpooja_items_map:
+        p_item = petpooja_items_map[values["external_id"]]
+        values["itemallowvariation"] = p_item.get("itemallowvariation", "0") == "1"
+        values["itemallowaddon"] = p_item.get("itemallowaddon", "0") == "1"
+        values["external_data"] = p_item
+        # basic tag enrichment
+        tags_list = p_item.get("item_tags", []).copy()
+        attr_id_val = p_item.get("item_attributeid")
+
+        if attr_id_val and attributes_map and attr_id_val in attributes_map:
+            tags_list.append(attributes_map[attr_id_val])
+        values["tags"] = tags_list
+    return values
+
+
+def write_menu_items(db, restaurant_id: int, df_menu: pd.DataFrame, existing_items: dict,
+                     petpooja_items_map: dict | None = None, attributes_map: dict | None = None) -> int:
+    """Insert new and update stored menu items in bulk (matched on external id). Returns the row count."""
+    new_rows, update_rows = [], []
+    for row in df_menu.to_dict("records"):
+        values = menu_item_values(row, petpooja_items_map, attributes_map)
+        stored = existing_items.get(str(row["id"]))
+        if stored:
+            update_rows.append({"id": stored[0], **values})
+        else:
+            new_rows.append({"public_id": str(row["public_id"]), "restaurant_id": restaurant_id, **values})
+
+    bulk_insert(db, MenuItem, new_rows)
+    for start in range(0, len(update_rows), INSERT_CHUNK):
+        # ORM bulk UPDATE by primary key: one executemany per chunk
+        db.execute(update(MenuItem), update_rows[start:start + INSERT_CHUNK])
+    logger.info(f"🍽️  Menu items: {len(new_rows)} inserted, {len(update_rows)} updated")
+    return len(new_rows) + len(update_rows)
+
+
+def commit_content_hashes(restaurant_id: int, df_changed: pd.DataFrame) -> None:
+    """Store the content hashes of re-embedded items, once their vectors are in Qdrant."""
+    rows = [
+        {"pid": str(pid), "hash": content_hash}
+        for pid, content_hash in zip(df_changed["public_id"], df_changed["content_hash"])
+    ]
+    if not rows:
+        return
+    table = MenuItem.__table__
+    statement = (
+        update(table)
+        .where(table.c.restaurant_id == restaurant_id, table.c.public_id == bindparam("pid"))
+        .values(content_hash=bindparam("hash"))
+    )
+    with SessionLocal() as db:
+        # Core executemany (matched on public_id, not the primary key)
+        connection = db.connection()
+        for start in range(0, len(rows), INSERT_CHUNK):
+            connection.execute(statement, rows[start:start + INSERT_CHUNK])
+        db.commit()
+
+
 # ---------- core loader -------------------------------------------------------
 
-def seed_folder(folder: Path):
+def load_folder_config(folder: Path):
+    """Read meta.json and check the files its POS type requires. Returns (meta, pos_type, tables config)."""
+    assert (folder / "meta.json").exists(), "meta.json missing"
+    meta = json.loads((folder / "meta.json").read_text())
+
+    has_pos_config = bool(meta.get("pos_config") and meta["pos_config"].get("pos_type"))
+    pos_type = meta["pos_config"].get("pos_type") if has_pos_config else None
+
+    is_ppdinein = pos_type == "petpooja_dinein"
+    is_no_pos = pos_type == "no_pos"
+    is_ppdelivery = pos_type == "petpooja"
+
+    # tables.json not required for petpooja_dinein since tables come from areas.json
+    if is_ppdinein:
+        assert (folder / "menu.csv").exists(), "menu.csv missing"
+        assert (folder / "areas.json").exists(), "areas.json missing"
+        assert (folder / "menu.json").exists(), "menu.json missing"
+        assert (folder / "images").exists(), "images directory missing"
+        tbl_cfg = None
+
+    elif is_no_pos:
+        assert (folder / "menu.csv").exists(), "menu.csv missing"
+        assert (folder / "customisations").exists(), "customisations directory missing"
+        assert (folder / "images").exists(), "images directory missing"
+        assert (folder / "tables.json").exists(), "tables.json missing"
+        tbl_cfg = json.loads((folder / "tables.json").read_text())
+
+    elif is_ppdelivery:
+        assert (folder / "menu.csv").exists(), "menu.csv missing"
+        assert (folder / "menu.json").exists(), "menu.json missing"
+        assert (folder / "images").exists(), "images directory missing"
+        assert (folder / "tables.json").exists(), "tables.json missing"
+        tbl_cfg = json.loads((folder / "tables.json").read_text())
+    return meta, pos_type, tbl_cfg
+
+
+def validate_folder(folder: Path) -> bool:
+    """--validate-only: check the folder layout and CSVs without touching Postgres, Qdrant or the models."""
+    try:
+        meta, pos_type, _ = load_folder_config(folder)
+        df_menu = validate_and_clean_csv(pd.read_csv(folder / "menu.csv"))
+        if pos_type == "no_pos":
+            issues = validate_customisation_csvs(load_customisation_csvs(folder / "customisations"), df_menu["id"])
+            if issues:
+                raise CsvValidationError(issues)
+    except CsvValidationError as e:
+        logger.error(f"❌ Validation failed for {folder.name}: {len(e.issues)} issue(s)")
+        for issue in e.issues:
+            logger.error(f"   • {issue}")
+        return False
+    except (AssertionError, ValueError, FileNotFoundError) as e:
+        logger.error(f"❌ Validation failed for {folder.name}: {e}")
+        return False
+    logger.success(f"✅ {meta.get('restaurant_name', folder.name)} ({pos_type or 'no pos_type'}): {len(df_menu)} menu rows valid")
+    return True
+
+
+def seed_folder(folder: Path, full: bool = False, embedding_cache: EmbeddingCache | None = None) -> dict:
+    """Seed one restaurant folder in its own transaction (rolled back on failure). Returns counts for the summary."""
     logger.info(f"On-boarding folder: {folder}")
     
-    # Keep track of created resources for rollback
+    # Keep track of created resources for rollback. A re-onboarded restaurant
+    # is never deleted: only a swapped-in Qdrant build is undone
     created_qdrant_collection = None
+    created_restaurant = False
+    qdrant_undo = {}
     restaurant_id = None
 
     try:
@@ -731,39 +879,11 @@ def seed_folder(folder: Path):
         # Validate required files (POS vs Non-POS have different expectations)
         # ------------------------------------------------------------------
 
-        assert (folder / "meta.json").exists(), "meta.json missing"
-        meta = json.loads((folder / "meta.json").read_text())
-
-        has_pos_config = bool(meta.get("pos_config") and meta["pos_config"].get("pos_type"))
-        pos_type = meta["pos_config"].get("pos_type") if has_pos_config else None
-
-
+        meta, pos_type, tbl_cfg = load_folder_config(folder)
         is_ppdinein = pos_type == "petpooja_dinein"
         is_no_pos = pos_type == "no_pos"
         is_ppdelivery = pos_type == "petpooja"
 
-        # tables.json not required for petpooja_dinein since tables come from areas.json
-        if is_ppdinein:
-            assert (folder / "menu.csv").exists(), "menu.csv missing"
-            assert (folder / "areas.json").exists(), "areas.json missing"
-            assert (folder / "menu.json").exists(), "menu.json missing"
-            assert (folder / "images").exists(), "images directory missing"
-            tbl_cfg = None
-
-        elif is_no_pos:
-            assert (folder / "menu.csv").exists(), "menu.csv missing"
-            assert (folder / "customisations").exists(), "customisations directory missing"
-            assert (folder / "images").exists(), "images directory missing"
-            assert (folder / "tables.json").exists(), "tables.json missing"
-            tbl_cfg = json.loads((folder / "tables.json").read_text())
-
-        elif is_ppdelivery:
-            assert (folder / "menu.csv").exists(), "menu.csv missing"
-            assert (folder / "menu.json").exists(), "menu.json missing"
-            assert (folder / "images").exists(), "images directory missing"
-            assert (folder / "tables.json").exists(), "tables.json missing"
-            tbl_cfg = json.loads((folder / "tables.json").read_text())
-
         hours_fp = folder / "hours.json"
         hours_cfg = json.loads(hours_fp.read_text()) if hours_fp.exists() else None
 
@@ -828,6 +948,7 @@ def seed_folder(folder: Path):
                 )
                 db.add(rest)
                 db.flush()
+                created_restaurant = True
                 logger.success(f"Restaurant created id={rest.id}")
                 logger.success(f"🔑 API Key generated: {api_key}")
                 print(f"\n{'='*60}")
@@ -894,181 +1015,90 @@ def seed_folder(folder: Path):
                 logger.success("Daily pass configured")
 
             # ---- menu items
-            menu_items_processed = 0
+            # One query for the stored items (external id -> (pk, public id)) instead of one per row
+            existing_items = {
+                ext_id: (pk, pid) for ext_id, pk, pid in db.query(
+                    MenuItem.external_id, MenuItem.id, MenuItem.public_id
+                ).filter(MenuItem.restaurant_id == restaurant_id).all()
+            }
             # Generate unique public_ids for menu items if not present
-            for idx, row in df_menu.iterrows():
-                public_id_value = row.get('public_id')
-                has_public_id = pd.notna(public_id_value) and str(public_id_value).strip() != ''
+            external_ids = df_menu["id"].astype(str)
+            missing_pid = clean_str(df_menu["public_id"]).isna()
+            df_menu["public_id"] = df_menu["public_id"].astype(object)
+            df_menu.loc[missing_pid, "public_id"] = [
+                existing_items[ext_id][1] if ext_id in existing_items else new_id()
+                for ext_id in external_ids[missing_pid]
+            ]
+
+            # ---- incremental re-onboarding: diff content hashes against the stored items
+            df_menu['content_hash'] = [row_content_hash(row) for row in df_menu.to_dict("records")]
+            stored_hashes = {} if full else dict(
+                db.query(MenuItem.public_id, MenuItem.content_hash).filter(
+                    MenuItem.restaurant_id == restaurant_id,
+                    MenuItem.content_hash.isnot(None),
+                ).all()
+            )
+            incremental = bool(stored_hashes)
+            csv_public_ids = set(df_menu['public_id'].astype(str))
+            removed_public_ids = [pid for pid in stored_hashes if pid not in csv_public_ids]
+            unchanged_ids = unchanged_public_ids(df_menu['public_id'].astype(str), df_menu['content_hash'], stored_hashes)
+            # Unchanged items keep their vectors (re-embedded only if the point went missing)
+            reused_vectors = fetch_existing_vectors(meta['slug'], unchanged_ids)
+            changed_mask = ~df_menu['public_id'].astype(str).isin(reused_vectors.keys())
+            if removed_public_ids:
+                # Dropped from the menu: their points are deleted below, nothing left to diff against
+                db.query(MenuItem).filter(
+                    MenuItem.restaurant_id == restaurant_id,
+                    MenuItem.public_id.in_(removed_public_ids),
+                ).update({"content_hash": None}, synchronize_session=False)
+            logger.info(
+                f"🧮 Content diff: {int(changed_mask.sum())} new/changed, {len(reused_vectors)} unchanged, "
+                f"{len(removed_public_ids)} removed" + ("" if incremental else " (full onboarding)")
+            )
 
-                if not has_public_id:
-                    mi = db.query(MenuItem).filter_by(
-                        restaurant_id=restaurant_id,
-                        external_id=str(row["id"])
-                    ).first()
-                    if mi:
-                        df_menu.at[idx, 'public_id'] = mi.public_id
-                    else:
-                        df_menu.at[idx, 'public_id'] = new_id()
-
-            # Generate embeddings for all menu items
+            # Generate embeddings only for new / changed menu items
+            df_to_embed = df_menu[changed_mask]
+            cached_vectors = {}
+            if embedding_cache is not None:
+                # Batch onboarding: items another outlet already embedded share its content hash
+                cached_vectors = embedding_cache.get_many(df_to_embed['content_hash'])
+                df_to_embed = df_to_embed[~df_to_embed['content_hash'].isin(cached_vectors.keys())]
+                logger.info(f"♻️  {int(changed_mask.sum()) - len(df_to_embed)} vectors reused from the embedding cache")
             logger.info("🧠 Generating embeddings for menu items...")
-            df_with_embeddings = generate_embeddings_for_menu_items(df_menu, image_directory)
-
-            # --- BM25 Index Build & Save ---
-            logger.info("🔎 Building BM25 index for menu search...")
-            bm25_corpus = []
-            bm25_id_map = []
-            for idx, row in df_menu.iterrows():
-                # Concatenate fields for BM25
-                text = f"{row['name']} {row['description']} {row['category_brief']} {row['category_brief']} {row['group_category']}"
-                bm25_corpus.append(text.lower().split())
-                bm25_id_map.append(str(row['public_id']))
-            bm25 = BM25Okapi(bm25_corpus)
-            bm25_index_data = {
-                'bm25': bm25,
-                'id_map': bm25_id_map,
+            df_changed = generate_embeddings_for_menu_items(df_to_embed, image_directory)
+            if embedding_cache is not None:
+                embedding_cache.put_many(dict(zip(df_changed['content_hash'], df_changed['vector'])))
+            new_vectors = {
+                str(pid): cached_vectors[content_hash]
+                for pid, content_hash in zip(df_menu['public_id'], df_menu['content_hash'])
+                if content_hash in cached_vectors
             }
-            bm25_dir = Path(__file__).parent.parent / 'bm25_indexes'
-            bm25_dir.mkdir(exist_ok=True)
-            bm25_path = bm25_dir / f"{meta['slug']}_bm25.pkl"
-            with open(bm25_path, 'wb') as f:
-                pickle.dump(bm25_index_data, f)
-            logger.success(f"✅ BM25 index saved to {bm25_path}")
+            new_vectors.update(zip(df_changed['public_id'].astype(str), df_changed['vector']))
+            df_with_embeddings = df_menu.copy()
+            df_with_embeddings['vector'] = [
+                reused_vectors.get(pid, new_vectors.get(pid)) for pid in df_with_embeddings['public_id'].astype(str)
+            ]
+
+            # --- BM25 Index Build & Save (text only changes with the content hash) ---
+            if not incremental or changed_mask.any() or removed_public_ids:
+                logger.info("🔎 Building BM25 index for menu search...")
+                bm25_texts = []
+                bm25_id_map = []
+                for row in df_menu.to_dict("records"):
+                    bm25_texts.append(bm25_document(row['name'], row['description'], row['category_brief'], row['group_category']))
+                    bm25_id_map.append(str(row['public_id']))
+                bm25_path = save_bm25_index(meta['slug'], bm25_texts, bm25_id_map)
+                logger.success(f"✅ BM25 index saved to {bm25_path}")
+            else:
+                logger.info("⏭️  Menu text unchanged, keeping BM25 index")
             
-            for idx, row in df_menu.iterrows():
-                mi = db.query(MenuItem).filter_by(
-                    restaurant_id=restaurant_id,
-                    external_id=str(row["id"])
-                ).first()
-                if not mi:
-                    mi = MenuItem(
-                        public_id=str(row.get("public_id")),
-                        restaurant_id=restaurant_id
-                    )
-                    db.add(mi)
-
-                # Set core fields from CSV - using proper value extraction
-                mi.name = str(row["name"])
-                
-                category_brief_val = row["category_brief"]
-                mi.category_brief = str(category_brief_val) if pd.notna(category_brief_val) else ""
-                
-                group_category_val = row["group_category"]
-                mi.group_category = str(group_category_val) if pd.notna(group_category_val) else ""
-                
-                description_val = row["description"]
-                mi.description = str(description_val) if pd.notna(description_val) else ""
-                
-                show_on_menu_val = row["show_on_menu"]
-                mi.show_on_menu = bool(show_on_menu_val) if pd.notna(show_on_menu_val) else True
-
-                # Handle price conversion properly
-                try:
-                    price_val = row["price"]
-                    if pd.notna(price_val) and str(price_val).strip():
-                        mi.price = float(price_val)
-                    else:
-                        logger.warning(f"⚠️  Missing price for {row['name']}, setting to 0.0")
-                        mi.price = 0.0
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"⚠️  Invalid price for {row['name']}: {row['price']}, setting to 0.0")
-                    mi.price = 0.0
-                
-                # Set image and cloudflare fields
-                image_path_val = row["image_path"]
-                mi.image_path = str(image_path_val) if pd.notna(image_path_val) and str(image_path_val).strip() else None
-                
-                cf_image_id_val = row["cloudflare_image_id"]
-                mi.cloudflare_image_id = str(cf_image_id_val) if pd.notna(cf_image_id_val) and str(cf_image_id_val).strip() else None
-                
-                cf_video_id_val = row["cloudflare_video_id"]
-                mi.cloudflare_video_id = str(cf_video_id_val) if pd.notna(cf_video_id_val) and str(cf_video_id_val).strip() else None
-                
-                # Set boolean and other fields
-                veg_val = row.get("veg_flag")
-                is_veg = bool(veg_val) if pd.notna(veg_val) else False
-                mi.veg_flag = is_veg
-                
-                bestseller_val = row.get("is_bestseller")
-                mi.is_bestseller = bool(bestseller_val) if pd.notna(bestseller_val) else False
-                
-                recommended_val = row.get("is_recommended")
-                mi.is_recommended = bool(recommended_val) if pd.notna(recommended_val) else False
-                
-                kind_val = row.get("kind")
-                mi.kind = str(kind_val) if pd.notna(kind_val) else "food"
-                
-                priority_val = row.get("priority")
-                try:
-                    mi.priority = int(priority_val) if pd.notna(priority_val) and priority_val is not None else 0
-                except (ValueError, TypeError):
-                    mi.priority = 0
-                
-                promote_val = row.get("promote")
-                mi.promote = bool(promote_val) if pd.notna(promote_val) else False
-                
-                # Set timing fields if they exist in the CSV
-                timing_start_val = row.get("timing_start")
-                if pd.notna(timing_start_val) and str(timing_start_val).strip():
-                    try:
-                        mi.timing_start = datetime.strptime(str(timing_start_val).strip(), "%H:%M").time()
-                    except ValueError:
-                        logger.warning(f"⚠️  Invalid timing_start format for {row['name']}: {timing_start_val}, skipping")
-                        mi.timing_start = None
-                else:
-                    mi.timing_start = None
-                
-                timing_end_val = row.get("timing_end")
-                if pd.notna(timing_end_val) and str(timing_end_val).strip():
-                    try:
-                        mi.timing_end = datetime.strptime(str(timing_end_val).strip(), "%H:%M").time()
-                    except ValueError:
-                        logger.warning(f"⚠️  Invalid timing_end format for {row['name']}: {timing_end_val}, skipping")
-                        mi.timing_end = None
-                else:
-                    mi.timing_end = None
-                
-                # Set timing_schedule to None (weekly schedule not supported in CSV yet)
-                mi.timing_schedule = None
-                
-                # Set new schema fields with defaults for simple restaurants
-                external_id_val = row.get("id")
-                mi.external_id = str(external_id_val) if pd.notna(external_id_val) and str(external_id_val).strip() else None
-                mi.external_data = None  # No external data for simple restaurants
-                mi.itemallowvariation = False  # Simple restaurants don't have variations
-                mi.itemallowaddon = False  # Simple restaurants don't have addons
-                mi.pos_system_id = None  # No POS system integration
-
-                tags_val = row.get("tags", "")
-                if isinstance(tags_val, pd.Series) or pd.isna(tags_val) or not str(tags_val).strip():
-                    tags_list = []
-                else:
-                    tags_list = [tag.strip() for tag in str(tags_val).split(";") if tag.strip()]
-                
-                # Add "veg" tag if item is vegetarian and tag not already present
-                if mi.veg_flag and "veg" not in [t.lower() for t in tags_list]:
-                    tags_list.append("veg")
-                mi.tags = tags_list  # Empty tags list
-
-                # Add POS-specific basic fields (external_id, flags) if applicable
-                if menu_api_data:
-                    external_id_str = str(mi.external_id) if mi.external_id else None
-                    if external_id_str and external_id_str in petpooja_items_map:
-                        p_item = petpooja_items_map[external_id_str]
-                        mi.itemallowvariation = p_item.get("itemallowvariation", "0") == "1"
-                        mi.itemallowaddon = p_item.get("itemallowaddon", "0") == "1"
-                        mi.external_data = p_item
-                        # basic tag enrichment
-                        tags_list = p_item.get("item_tags", []).copy()
-                        attr_id_val = p_item.get("item_attributeid")
-                        
-                        if attr_id_val and attr_id_val in attributes_map:
-                            tags_list.append(attributes_map[attr_id_val])
-                        mi.tags = tags_list
-                
-                # Flush this individual item to catch any issues early
-                db.flush()
-                menu_items_processed += 1
+            # Changed items get their hash only once their vector is in Qdrant (see below)
+            menu_items_processed = write_menu_items(
+                db, restaurant_id,
+                df_menu.assign(content_hash=provisional_content_hashes(df_menu['content_hash'], changed_mask)),
+                existing_items,
+                petpooja_items_map if menu_api_data else None, attributes_map,
+            )
 
             logger.success(f"✅ Processed {menu_items_processed} menu items in PostgreSQL")
             
@@ -1129,13 +1159,53 @@ def seed_folder(folder: Path):
         # ---- Push embeddings to Qdrant (outside database transaction)
         logger.info("🔗 Pushing embeddings to Qdrant...")
         created_qdrant_collection = meta["slug"]
-        qdrant_success = push_to_qdrant(meta["slug"], df_with_embeddings)
+        with SessionLocal() as db:
+            filter_payloads = {
+                item.public_id: menu_item_payload(item)
+                for item in db.query(MenuItem).filter_by(restaurant_id=restaurant_id).all()
+            }
+        qdrant_success = push_to_qdrant(
+            meta["slug"],
+            df_with_embeddings[changed_mask] if incremental else df_with_embeddings,
+            removed_public_ids=removed_public_ids,
+            incremental=incremental,
+            filter_payloads=filter_payloads,
+            undo=qdrant_undo,
+        )
         
         if not qdrant_success:
             raise Exception("Failed to push embeddings to Qdrant")
 
+        # Add the filter fields (veg_flag, price, is_active, show_on_menu) from PostgreSQL,
+        # which has the cleaned values and the POS availability
+        with SessionLocal() as db:
+            payload_success = sync_menu_item_payloads(meta["slug"], db.query(MenuItem).filter_by(restaurant_id=restaurant_id).all())
+        if not payload_success:
+            raise Exception("Failed to sync filter payloads to Qdrant")
+
         logger.success("Qdrant seed complete ✔︎")
+
+        # ---- Precompute item-to-item kNN graph (similar dishes / upsell lookups)
+        logger.info("🕸️ Building item similarity graph...")
+        save_similarity_graph(
+            meta["slug"],
+            [str(pid) for pid in df_with_embeddings["public_id"]],
+            np.stack(df_with_embeddings["vector"].values),
+        )
+
+        # The new vectors are live: record the hashes they were built from
+        commit_content_hashes(restaurant_id, df_menu[changed_mask])
+
+        # Invalidate in-process caches (vector index etc.) built from the old menu
+        bump_menu_version(meta["slug"])
         logger.success(f"🎉 On-boarding finished for {meta['restaurant_name']}")
+        return {
+            "slug": meta["slug"],
+            "items": len(df_menu),
+            "embedded": len(df_changed),
+            "reused": len(df_menu) - len(df_changed),
+            "removed": len(removed_public_ids),
+        }
 
     except Exception as e:
         logger.error(f"❌ Onboarding failed: {e}")
@@ -1143,7 +1213,7 @@ def seed_folder(folder: Path):
         # Rollback database changes by rolling back the session
         try:
             with SessionLocal() as rollback_db:
-                if restaurant_id:
+                if restaurant_id and created_restaurant:
                     logger.info(f"🔄 Rolling back restaurant data for ID: {restaurant_id}")
                     # Delete restaurant and all related data (cascading)
                     restaurant_to_delete = rollback_db.query(Restaurant).filter_by(id=restaurant_id).first()
@@ -1156,10 +1226,18 @@ def seed_folder(folder: Path):
         
         # Rollback Qdrant collection
         try:
-            if created_qdrant_collection:
-                logger.info(f"🔄 Rolling back Qdrant collection: {created_qdrant_collection}_qdb")
-                collection_name = f"{created_qdrant_collection}_qdb"
-                qd.delete_collection(collection_name=collection_name)
+            if qdrant_undo and qdrant_undo["previous"] is None and not created_restaurant:
+                # The swap replaced a legacy collection: the validated new build is all there is
+                logger.warning(f"⚠️  Keeping Qdrant build {qdrant_undo['collection']}: no previous version to restore")
+            elif qdrant_undo:
+                # Put the previous build back live; older versions are left alone
+                logger.info(f"🔄 Rolling back Qdrant build {qdrant_undo['collection']} of {created_qdrant_collection}")
+                restore_collection_alias(qdrant_undo["alias"], qdrant_undo["previous"], qdrant_undo["collection"])
+                logger.success("✅ Qdrant rollback complete")
+            elif created_qdrant_collection and created_restaurant:
+                # Brand-new restaurant: nothing of it was live before this run
+                logger.info(f"🔄 Rolling back Qdrant vectors for: {created_qdrant_collection}")
+                delete_restaurant_points(created_qdrant_collection)
                 logger.success("✅ Qdrant rollback complete")
         except Exception as qdrant_rollback_error:
             logger.error(f"❌ Qdrant rollback failed: {qdrant_rollback_error}")
@@ -1167,17 +1245,99 @@ def seed_folder(folder: Path):
         # Re-raise the original exception
         raise e
 
+# ---------- batch onboarding --------------------------------------------------
+
+def _init_batch_worker(torch_threads: int):
+    # Forked children must not reuse the parent's pooled Postgres connections
+    engine.dispose(close=False)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(torch_threads)
+
+
+def _seed_one(folder: str, full: bool, cache_dir: str | None) -> dict:
+    """Pool task: seed one folder, never raise (failures are reported in the summary)."""
+    started = perf_counter()
+    result = {"folder": Path(folder).name, "ok": False, "error": None}
+    try:
+        cache = EmbeddingCache(cache_dir) if cache_dir else None
+        result.update(seed_folder(Path(folder), full=full, embedding_cache=cache) or {})
+        result["ok"] = True
+    except Exception as e:
+        # seed_folder has already rolled back this restaurant's rows and points
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = perf_counter() - started
+    return result
+
+
+def onboard_many(folders: list, full: bool = False, workers: int = 4, cache_dir: str | None = None) -> list:
+    """Seed many restaurant folders on a process pool sharing the embedding models and an embedding cache.
+
+    The models are loaded once in this process before the pool forks, so
+    workers share them copy-on-write (on platforms without fork, e.g. macOS
+    with mps, every worker loads its own copy on first use). The first folder
+    is seeded alone to fill the embedding cache, so outlets sharing a base menu
+    only embed their own dishes. Each folder runs in its own transaction and
+    is rolled back on its own; one failing outlet does not stop the others.
+
+    Nothing in this process may touch Postgres or Qdrant before the fork:
+    children would inherit the pooled connections.
+    """
+    use_fork = sys.platform.startswith("linux")
+    if use_fork:
+        get_text_model()
+        get_clip_model()
+    workers = max(1, min(workers, len(folders)))
+    ctx = multiprocessing.get_context("fork" if use_fork else "spawn")
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    results = []
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_batch_worker,
+                             initargs=(torch_threads,)) as pool:
+        results.append(pool.submit(_seed_one, str(folders[0]), full, cache_dir).result())
+        futures = [pool.submit(_seed_one, str(folder), full, cache_dir) for folder in folders[1:]]
+        results.extend(future.result() for future in futures)
+    return results
+
+
+def print_batch_summary(results: list, elapsed: float):
+    ok = [r for r in results if r["ok"]]
+    print(f"\n{'='*78}")
+    print(f"{'folder':<28} {'status':<8} {'items':>6} {'embedded':>9} {'reused':>7} {'removed':>8} {'secs':>7}")
+    for r in results:
+        status = "ok" if r["ok"] else "FAILED"
+        print(f"{r['folder'][:28]:<28} {status:<8} {r.get('items', '-'):>6} {r.get('embedded', '-'):>9} "
+              f"{r.get('reused', '-'):>7} {r.get('removed', '-'):>8} {r['seconds']:>7.1f}")
+    for r in results:
+        if not r["ok"]:
+            print(f"  ❌ {r['folder']}: {r['error']}")
+    embedded = sum(r.get("embedded", 0) for r in ok)
+    items = sum(r.get("items", 0) for r in ok)
+    print(f"{len(ok)}/{len(results)} restaurants onboarded in {elapsed:.1f}s; "
+          f"{embedded} of {items} items embedded, the rest reused")
+    print(f"{'='*78}\n")
+
 # ---------- cli ---------------------------------------------------------------
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python 1_onboard_restaurants.py /path/to/restaurant_folder")
+    parser = argparse.ArgumentParser(description="Seed restaurant folders into Postgres and Qdrant")
+    parser.add_argument("folders", nargs="+", help="Restaurant folder(s) (meta.json, menu.csv, ...)")
+    # --full re-embeds every item instead of only those whose content hash changed
+    parser.add_argument("--full", action="store_true", help="Re-embed every item")
+    parser.add_argument("--validate-only", action="store_true",
+                        help="Check the folders and CSVs, then exit (no DB, Qdrant or model load)")
+    parser.add_argument("--workers", type=int, default=4, help="Processes for multi-folder onboarding")
+    parser.add_argument("--embedding-cache", default=None,
+                        help="Directory of vectors keyed by content hash (multi-folder default: a temp dir)")
+    args = parser.parse_args()
+
+    folders = [Path(f).expanduser().resolve() for f in args.folders]
+    not_dirs = [str(f) for f in folders if not f.is_dir()]
+    if not_dirs:
+        logger.error(f"Provided path is not a directory: {', '.join(not_dirs)}")
         sys.exit(1)
 
-    folder = Path(sys.argv[1]).expanduser().resolve()
-    if not folder.is_dir():
-        logger.error("Provided path is not a directory")
-        sys.exit(1)
+    if args.validate_only:
+        sys.exit(0 if all([validate_folder(folder) for folder in folders]) else 1)
 
     # try:
     #     seed_folder(folder)
@@ -1185,5 +1345,12 @@ if __name__ == "__main__":
     #     logger.error(f"❌ Onboarding failed: {e}")
     #     sys.exit(1)
 
-    seed_folder(folder)
-
+    if len(folders) == 1:
+        seed_folder(folders[0], full=args.full,
+                    embedding_cache=EmbeddingCache(args.embedding_cache) if args.embedding_cache else None)
+    else:
+        cache_dir = args.embedding_cache or str(Path(tempfile.gettempdir()) / "aglio_embedding_cache")
+        started = perf_counter()
+        results = onboard_many(folders, full=args.full, workers=args.workers, cache_dir=cache_dir)
+        print_batch_summary(results, perf_counter() - started)
+        sys.exit(0 if all(r["ok"] for r in results) else 1)
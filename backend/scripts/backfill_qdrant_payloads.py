@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Backfill filter payloads and payload indexes on existing Qdrant collections.
+
+Collections created before filter pushdown only carry name/description/category
+payload; filtered searches require veg_flag, price, is_active and show_on_menu
+on every point. Run once per deployment (or per restaurant):
+
+    python scripts/backfill_qdrant_payloads.py            # all restaurants
+    python scripts/backfill_qdrant_payloads.py <slug> ...  # selected restaurants
+"""
+
+import sys
+from pathlib import Path
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.schema import SessionLocal, Restaurant, MenuItem
+from common.qdrant_utils import get_collection_name, ensure_payload_indexes, sync_menu_item_payloads
+
+
+def backfill_restaurant(db, restaurant: Restaurant) -> bool:
+    collection_name = get_collection_name(restaurant.slug)
+    try:
+        ensure_payload_indexes(collection_name)
+    except Exception as e:
+        logger.warning(f"⏭️  Skipping {restaurant.slug}: {e}")
+        return False
+
+    items = db.query(MenuItem).filter(MenuItem.restaurant_id == restaurant.id).all()
+    if not sync_menu_item_payloads(restaurant.slug, items):
+        return False
+    logger.success(f"✅ {restaurant.slug}: synced {len(items)} payloads")
+    return True
+
+
+def main() -> bool:
+    slugs = sys.argv[1:]
+    with SessionLocal() as db:
+        query = db.query(Restaurant)
+        if slugs:
+            query = query.filter(Restaurant.slug.in_(slugs))
+        restaurants = query.all()
+        results = [backfill_restaurant(db, restaurant) for restaurant in restaurants]
+
+    logger.info(f"🎯 Backfill complete: {sum(results)}/{len(results)} restaurants")
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
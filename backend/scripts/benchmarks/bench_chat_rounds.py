@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Measure model rounds and tokens per chat answer, before vs after the menu
+digest / compact tool outputs.
+
+Every question is asked in a fresh thread, once in "baseline" mode (no digest,
+tool outputs as `str(result)`) and once in "digest" mode (current behaviour).
+Prints per-mode means of model rounds, tool calls, input/output tokens and
+model seconds per answer. Uses the configured OpenAI endpoint
+(OPENAI_API_KEY / OPENAI_BASE_URL).
+
+Usage:
+    python scripts/benchmarks/bench_chat_rounds.py <restaurant_slug> [--questions questions.txt]
+"""
+
+import argparse
+import statistics
+import sys
+import uuid
+from pathlib import Path
+
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config import rdb
+import recommender.ai as ai
+from recommender.menu_digest import encode_tool_result
+
+DEFAULT_QUESTIONS = [
+    "Most Popular",
+    "Chef's Recommendations",
+    "A Combo Meal",
+    "Something spicy with chicken",
+    "What desserts do you have?",
+    "Any light vegetarian starters?",
+    "What goes well with biryani?",
+    "Suggest a drink under 200",
+]
+
+METRICS = ["rounds", "tool_calls", "input_tokens", "output_tokens", "tool_output_tokens", "model_seconds"]
+
+
+def run_mode(slug: str, questions, digest: bool) -> dict:
+    ai.MENU_DIGEST_ENABLED = digest
+    ai.encode_tool_result = encode_tool_result if digest else str
+
+    samples = {metric: [] for metric in METRICS}
+    for question in questions:
+        thread_id = f"bench-{uuid.uuid4().hex}"
+        payload = {"text": question, "filters": {}, "cart": [], "extra_context": None}
+        stats = {}
+        try:
+            ai.generate_blocks(payload, thread_id, slug, stats=stats)
+        except Exception as e:
+            logger.warning(f"⚠️  '{question}' failed: {e}")
+            continue
+        finally:
+            rdb.delete(ai.RESP_KEY(thread_id))
+        for metric in METRICS:
+            samples[metric].append(stats[metric])
+        logger.debug(f"{'digest' if digest else 'baseline'} | {question}: {stats}")
+    return {metric: statistics.mean(values) if values else float("nan") for metric, values in samples.items()}
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Chat rounds / tokens per answer")
+    parser.add_argument("slug", help="Restaurant slug")
+    parser.add_argument("--questions", type=Path, help="File with one question per line")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        questions = [q.strip() for q in args.questions.read_text().splitlines() if q.strip()]
+
+    results = {
+        "baseline": run_mode(args.slug, questions, digest=False),
+        "digest": run_mode(args.slug, questions, digest=True),
+    }
+
+    logger.info(f"📊 {len(questions)} questions, means per answer:")
+    logger.info(f"{'mode':<10}" + "".join(f"{metric:>20}" for metric in METRICS))
+    for mode, values in results.items():
+        logger.info(f"{mode:<10}" + "".join(f"{values[metric]:>20.2f}" for metric in METRICS))
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Drive N concurrent tables through the chat path over /ws/session.
+
+Each simulated diner opens a table session (POST /table_session with a valid QR
+token), connects to the session websocket and sends `--messages` chat
+questions, each in a fresh thread, waiting for the `chat_response` before the
+next one. Reports end-to-end latency plus the server-side breakdown that the
+API attaches when CHAT_EXPOSE_TIMINGS=True: queue wait, model time per round,
+tool time, enrichment time and event-loop lag.
+
+Run the API against the fake model server so no network access is needed:
+
+    python scripts/benchmarks/fake_llm_server.py --latency-ms 800 &
+    CHAT_EXPOSE_TIMINGS=True OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=fake \\
+        uvicorn main:app --port 8000 &
+    python scripts/benchmarks/bench_chat_ws.py <restaurant_slug> --tables 50 --messages 3
+
+Set ANSWER_CACHE_ENABLED=False on the API to measure the uncached model path.
+
+Usage:
+    python scripts/benchmarks/bench_chat_ws.py <restaurant_slug> [--tables 20] [--messages 3]
+        [--base-url http://localhost:8000] [--questions questions.txt] [--timeout 120]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import requests
+import websockets
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from models.schema import SessionLocal, Restaurant, Table
+from utils.jwt_utils import create_qr_token
+
+DEFAULT_QUESTIONS = [
+    "Most Popular",
+    "Chef's Recommendations",
+    "Something spicy with chicken",
+    "What desserts do you have?",
+    "Any light vegetarian starters?",
+    "Suggest a drink under 200",
+]
+
+SERVER_METRICS = ["server_seconds", "queue_seconds", "model_seconds_per_round", "tool_seconds",
+                  "enrich_seconds", "loop_lag_max_seconds"]
+
+
+def open_table_sessions(base_url: str, slug: str, count: int) -> list:
+    """Create `count` diner sessions, spread over the restaurant's tables."""
+    with SessionLocal() as db:
+        restaurant = db.query(Restaurant).filter(Restaurant.slug == slug).first()
+        if not restaurant:
+            raise ValueError(f"Restaurant {slug} not found")
+        tables = db.query(Table).filter(Table.restaurant_id == restaurant.id, Table.status != "disabled").all()
+        if not tables:
+            raise ValueError(f"Restaurant {slug} has no open tables")
+        tables = [(t.public_id, create_qr_token(restaurant.id, t.number)) for t in tables]
+
+    sessions = []
+    for i in range(count):
+        table_pid, token = tables[i % len(tables)]
+        response = requests.post(f"{base_url}/table_session", json={
+            "table_pid": table_pid,
+            "token": token,
+            "device_id": str(uuid.uuid4()),
+            "restaurant_slug": slug,
+        }, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        sessions.append((data["session_pid"], data["ws_token"]))
+    return sessions
+
+
+async def run_diner(ws_url: str, session_pid: str, ws_token: str, questions: list,
+                    messages: int, timeout: float, results: list):
+    async with websockets.connect(f"{ws_url}/ws/session?sid={session_pid}&token={ws_token}",
+                                  max_size=None) as ws:
+        for _ in range(messages):
+            thread_id = uuid.uuid4().hex
+            question = random.choice(questions)
+            start = time.perf_counter()
+            await ws.send(json.dumps({
+                "type": "chat_message",
+                "sender_name": "bench",
+                "message": question,
+                "thread_id": thread_id,
+                "message_id": uuid.uuid4().hex[:6],
+            }))
+            sample = {"question": question, "status": "timeout"}
+            try:
+                async with asyncio.timeout(timeout):
+                    while True:
+                        event = json.loads(await ws.recv())
+                        if event.get("thread_id") != thread_id and event.get("type") != "error":
+                            continue
+                        if event["type"] == "chat_status" and event["status"] == "queued":
+                            sample["queued"] = True
+                        elif event["type"] == "chat_response":
+                            sample.update(status="ok", e2e_seconds=time.perf_counter() - start,
+                                          timings=event.get("timings") or {})
+                            break
+                        elif event["type"] == "error":
+                            sample.update(status=event.get("code", "error"))
+                            break
+            except TimeoutError:
+                pass
+            results.append(sample)
+
+
+def summarise(values) -> str:
+    if not values:
+        return "n/a"
+    values = np.asarray(values) * 1000
+    return (f"p50={np.percentile(values, 50):8.1f}  p95={np.percentile(values, 95):8.1f}  "
+            f"max={values.max():8.1f} ms")
+
+
+async def run(args) -> bool:
+    sessions = open_table_sessions(args.base_url, args.slug, args.tables)
+    logger.info(f"🍽️  Opened {len(sessions)} diner sessions for {args.slug}")
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        questions = [q.strip() for q in args.questions.read_text().splitlines() if q.strip()]
+
+    ws_url = args.base_url.replace("http", "ws", 1)
+    results: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        run_diner(ws_url, session_pid, ws_token, questions, args.messages, args.timeout, results)
+        for session_pid, ws_token in sessions
+    ])
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r["status"] == "ok"]
+    failed = {}
+    for r in results:
+        if r["status"] != "ok":
+            failed[r["status"]] = failed.get(r["status"], 0) + 1
+
+    server = {metric: [] for metric in SERVER_METRICS}
+    for r in ok:
+        timings = r["timings"]
+        if timings.get("cache_hit") or timings.get("shed"):
+            continue
+        for metric in SERVER_METRICS:
+            if metric == "model_seconds_per_round":
+                if timings.get("rounds"):
+                    server[metric].append(timings["model_seconds"] / timings["rounds"])
+            elif metric in timings:
+                server[metric].append(timings[metric])
+
+    busy = sum(1 for r in ok if r["timings"].get("shed"))
+    logger.info(f"📊 {len(results)} chat turns from {len(sessions)} tables in {wall:.1f}s "
+                f"({len(ok) / wall:.2f} answers/s)")
+    logger.info(f"   ok={len(ok)} failed={failed or 0} queued={sum(1 for r in results if r.get('queued'))} "
+                f"cache_hits={sum(1 for r in ok if r['timings'].get('cache_hit'))}")
+    logger.info(f"   {'e2e':<26}{summarise([r['e2e_seconds'] for r in ok])}")
+    if not any(r["timings"] for r in ok):
+        logger.warning("⚠️  No server timings in responses - start the API with CHAT_EXPOSE_TIMINGS=True")
+        return bool(ok)
+    for metric in SERVER_METRICS:
+        logger.info(f"   {metric:<26}{summarise(server[metric])}")
+    if busy:
+        logger.info(f"   {busy} answers were shed as busy")
+    return bool(ok)
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Concurrent chat benchmark over /ws/session")
+    parser.add_argument("slug", help="Restaurant slug")
+    parser.add_argument("--tables", type=int, default=20, help="Concurrent diners")
+    parser.add_argument("--messages", type=int, default=3, help="Chat questions per diner")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--questions", type=Path, help="File with one question per line")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for each answer")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
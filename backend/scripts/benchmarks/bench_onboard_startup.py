@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark onboarding CLI startup: wall time and peak RSS per mode.
+
+Each mode runs in a fresh Python process (so imports and model loads are not
+shared between modes) which reports its own wall time and ru_maxrss:
+
+* help      – `1_onboard_restaurants.py --help`: module imports only
+* validate  – `--validate-only <folder>`: imports + meta / CSV checks
+* models    – loading the text and CLIP models through the registry
+* seed      – a full onboarding run of <folder> (opt-in with --seed, writes to
+              Postgres / Qdrant)
+
+Usage:
+    python scripts/benchmarks/bench_onboard_startup.py <restaurant_folder> [--runs 3] [--seed]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+ONBOARD_SCRIPT = BACKEND_DIR / "scripts" / "1_onboard_restaurants.py"
+
+# Runs the target in-process and prints {"wall": s, "maxrss_mb": MB} as the last stdout line
+RUNNER = """
+import json, os, resource, runpy, sys, time
+started = time.perf_counter()
+mode, args = sys.argv[1], sys.argv[2:]
+code = 0
+try:
+    if mode == "script":
+        sys.argv = args
+        sys.path.insert(0, os.path.dirname(args[0]))   # as `python script.py` would
+        runpy.run_path(args[0], run_name="__main__")
+    else:
+        sys.path.insert(0, args[0])
+        from common.model_registry import get_text_model, get_clip_model
+        get_text_model(); get_clip_model()
+except SystemExit as e:
+    code = e.code or 0
+maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is KiB on Linux, bytes on macOS
+maxrss_mb = maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+print(json.dumps({"wall": time.perf_counter() - started, "maxrss_mb": maxrss_mb, "code": code}))
+"""
+
+
+def run_mode(mode_args):
+    proc = subprocess.run([sys.executable, "-c", RUNNER, *mode_args],
+                          cwd=BACKEND_DIR, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        logger.error(f"❌ {' '.join(mode_args)} failed:\n{proc.stderr[-2000:]}")
+        return None
+    return json.loads(lines[-1])
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Onboarding CLI startup time and peak memory")
+    parser.add_argument("folder", help="Restaurant folder used by the validate / seed modes")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode")
+    parser.add_argument("--seed", action="store_true", help="Also time a full onboarding run (writes to the DBs)")
+    args = parser.parse_args()
+
+    folder = str(Path(args.folder).expanduser().resolve())
+    modes = {
+        "help": ["script", str(ONBOARD_SCRIPT), "--help"],
+        "validate": ["script", str(ONBOARD_SCRIPT), folder, "--validate-only"],
+        "models": ["models", str(BACKEND_DIR)],
+    }
+    if args.seed:
+        modes["seed"] = ["script", str(ONBOARD_SCRIPT), folder]
+
+    ok = True
+    for name, mode_args in modes.items():
+        results = []
+        for _ in range(1 if name == "seed" else args.runs):
+            result = run_mode(mode_args)
+            if result is None:
+                ok = False
+                break
+            if result["code"]:
+                logger.warning(f"⚠️ {name} exited with {result['code']}")
+            results.append(result)
+        if not results:
+            continue
+        walls = [r["wall"] for r in results]
+        peak = max(r["maxrss_mb"] for r in results)
+        logger.info(f"⏱️ {name:<9} median={np.median(walls):.2f} s  min={min(walls):.2f} s  peak RSS={peak:.0f} MB")
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PetPooja menu sync (the /pp_callback/{slug}/sync_menu path).
+
+Loads a sample menu from backend/test/, optionally blows it up to a realistic
+size by cloning its items (--scale 200 turns the 3-item samples into 600
+items sharing the same variations and addon groups), and runs the sync three
+times against a restaurant with a PetPooja POS system: creating every row,
+re-sending the identical menu (an empty diff) and raising every tenth item's
+price. Reports wall time, SQL statements sent and the change report per run. Everything
+runs in one transaction that is rolled back, so the database is left as it was.
+
+Usage:
+    python scripts/benchmarks/bench_petpooja_sync.py <restaurant_slug> [--menu test/sample_pp_menu2.json] [--scale 200]
+"""
+
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+from loguru import logger
+from sqlalchemy import event
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from models.schema import SessionLocal, engine
+from urls.petpooja_callback import find_restaurant_by_slug, validate_petpooja_pos_system, sync_menu_diff
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+
+def scaled_menu(menu: dict, scale: int) -> dict:
+    """The menu with every item cloned `scale` times under new item ids."""
+    scaled = copy.deepcopy(menu)
+    scaled["items"] = []
+    for copy_no in range(scale):
+        for item in menu.get("items", []):
+            clone = copy.deepcopy(item)
+            clone["itemid"] = f"{item['itemid']}-bench{copy_no}"
+            clone["itemname"] = f"{item['itemname']} #{copy_no}"
+            for variation in clone.get("variation", []):
+                variation["id"] = f"{variation['id']}-bench{copy_no}"
+            scaled["items"].append(clone)
+    return scaled
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def run_sync(db, payload: dict, restaurant_id: int, pos_system_id: int):
+    started = time.perf_counter()
+    menu_diff = sync_menu_diff(payload, restaurant_id, pos_system_id, db)
+    db.flush()
+    return menu_diff, time.perf_counter() - started
+
+
+def describe(menu_diff) -> str:
+    return ", ".join(
+        f"{table} +{d['added']}/~{d['changed']}/-{d['removed']}"
+        for table, d in menu_diff.report().items() if d["added"] or d["changed"] or d["removed"]
+    ) or "no changes"
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="PetPooja menu sync: time and SQL statements per sync")
+    parser.add_argument("slug", help="Restaurant slug (must have a petpooja POS system)")
+    parser.add_argument("--menu", default=str(BACKEND_DIR / "test" / "sample_pp_menu2.json"),
+                        help="PetPooja fetch-menu JSON")
+    parser.add_argument("--scale", type=int, default=200, help="Clone every item this many times")
+    args = parser.parse_args()
+
+    payload = scaled_menu(json.loads(Path(args.menu).read_text()), args.scale)
+    addon_items = sum(len(g.get("addongroupitems", [])) for g in payload.get("addongroups", []))
+    logger.info(f"📋 {len(payload['items'])} items, {len(payload.get('variations', []))} variations, "
+                f"{len(payload.get('addongroups', []))} addon groups ({addon_items} addon items)")
+
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    with SessionLocal() as db:
+        try:
+            restaurant = find_restaurant_by_slug(args.slug, db)
+            pos_system = validate_petpooja_pos_system(restaurant.id, db)
+            changed = copy.deepcopy(payload)
+            for item in changed["items"][::10]:
+                item["price"] = str(float(item["price"]) + 10)
+            # create: every row is new; resync: nothing differs; edit: every 10th price changed
+            for label, menu in (("create", payload), ("resync", payload), ("edit", changed)):
+                counter.count = 0
+                menu_diff, seconds = run_sync(db, menu, restaurant.id, pos_system.id)
+                logger.info(f"⏱️ {label:<7} {seconds * 1000:.0f} ms, {counter.count} SQL statements ({describe(menu_diff)})")
+        finally:
+            db.rollback()
+            event.remove(engine, "before_cursor_execute", counter)
+    logger.info("↩️ Rolled back")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
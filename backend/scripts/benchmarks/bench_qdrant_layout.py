@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark Qdrant layouts: one collection per restaurant vs one shared,
+tenant-partitioned, int8-quantized collection.
+
+For each tenant count (default 10, 100, 1000) synthetic restaurants with
+`--items` random 1280-d dish vectors are loaded into both layouts and random
+tenant-scoped queries are timed. Resident memory is read from Qdrant's
+/metrics endpoint before and after each load, so run this against a scratch
+Qdrant instance – all benchmark collections are prefixed `bench_` and removed
+afterwards.
+
+Usage:
+    python scripts/benchmarks/bench_qdrant_layout.py [--tenants 10 100 1000] [--items 200]
+        [--queries 500] [--qdrant-url http://localhost:6333]
+"""
+
+import argparse
+import re
+import sys
+import time
+
+import numpy as np
+import requests
+from loguru import logger
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, HnswConfigDiff, ScalarQuantization,
+    ScalarQuantizationConfig, ScalarType, KeywordIndexParams, KeywordIndexType,
+    Filter, FieldCondition, MatchValue,
+)
+
+DIM = 1280
+SHARED = "bench_shared"
+
+
+def resident_bytes(url: str) -> float:
+    """Qdrant process RSS from the Prometheus metrics endpoint (NaN if unavailable)."""
+    try:
+        text = requests.get(f"{url}/metrics", timeout=5).text
+    except requests.RequestException:
+        return float("nan")
+    match = re.search(r"^memory_resident_bytes\s+(\d+)", text, re.MULTILINE)
+    return float(match.group(1)) if match else float("nan")
+
+
+def wait_indexed(qd: QdrantClient, name: str):
+    while qd.get_collection(name).status != "green":
+        time.sleep(0.5)
+
+
+def tenant_vectors(rng, items: int) -> np.ndarray:
+    vectors = rng.standard_normal((items, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_per_restaurant(qd, rng, tenants, items):
+    for t in range(tenants):
+        name = f"bench_t{t}_qdb"
+        qd.create_collection(name, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE))
+        vectors = tenant_vectors(rng, items)
+        qd.upsert(name, points=[PointStruct(id=i, vector=v.tolist(), payload={"public_id": f"{t}-{i}"})
+                                for i, v in enumerate(vectors)], wait=True)
+    for t in range(tenants):
+        wait_indexed(qd, f"bench_t{t}_qdb")
+
+
+def load_shared(qd, rng, tenants, items):
+    qd.create_collection(
+        SHARED,
+        vectors_config=VectorParams(size=DIM, distance=Distance.COSINE, on_disk=True),
+        hnsw_config=HnswConfigDiff(payload_m=16, m=0),
+        quantization_config=ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        ),
+    )
+    qd.create_payload_index(SHARED, field_name="restaurant_id",
+                            field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True))
+    for t in range(tenants):
+        vectors = tenant_vectors(rng, items)
+        qd.upsert(SHARED, points=[
+            PointStruct(id=t * items + i, vector=v.tolist(),
+                        payload={"public_id": f"{t}-{i}", "restaurant_id": f"t{t}"})
+            for i, v in enumerate(vectors)
+        ], wait=True)
+    wait_indexed(qd, SHARED)
+
+
+def time_queries(rng, queries, search) -> np.ndarray:
+    samples = []
+    for _ in range(queries):
+        query = tenant_vectors(rng, 1)[0].tolist()
+        start = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - start)
+    return np.asarray(samples) * 1000
+
+
+def cleanup(qd: QdrantClient):
+    for collection in qd.get_collections().collections:
+        if collection.name.startswith("bench_"):
+            qd.delete_collection(collection.name)
+
+
+def report(layout, tenants, items, mem_delta, latencies):
+    per_tenant = mem_delta / tenants / 1024 / 1024 if tenants else float("nan")
+    logger.info(
+        f"{layout:<15} tenants={tenants:<5} items/tenant={items:<4} "
+        f"mem/tenant={per_tenant:7.2f} MiB  p50={np.percentile(latencies, 50):6.2f} ms  "
+        f"p95={np.percentile(latencies, 95):6.2f} ms"
+    )
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Per-restaurant vs shared Qdrant layout benchmark")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--items", type=int, default=200, help="Dishes per restaurant")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--qdrant-url", default="http://localhost:6333")
+    args = parser.parse_args()
+
+    qd = QdrantClient(url=args.qdrant_url, timeout=120)
+    rng = np.random.default_rng(0)
+    cleanup(qd)
+
+    for tenants in args.tenants:
+        # --- one collection per restaurant
+        before = resident_bytes(args.qdrant_url)
+        load_per_restaurant(qd, rng, tenants, args.items)
+        mem = resident_bytes(args.qdrant_url) - before
+        latencies = time_queries(rng, args.queries, lambda q: qd.search(
+            f"bench_t{rng.integers(tenants)}_qdb", query_vector=q, limit=10))
+        report("per_restaurant", tenants, args.items, mem, latencies)
+        cleanup(qd)
+
+        # --- shared, tenant-partitioned, quantized
+        before = resident_bytes(args.qdrant_url)
+        load_shared(qd, rng, tenants, args.items)
+        mem = resident_bytes(args.qdrant_url) - before
+        latencies = time_queries(rng, args.queries, lambda q: qd.search(
+            SHARED, query_vector=q, limit=10,
+            query_filter=Filter(must=[FieldCondition(key="restaurant_id",
+                                                     match=MatchValue(value=f"t{rng.integers(tenants)}"))])))
+        report("shared", tenants, args.items, mem, latencies)
+        cleanup(qd)
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
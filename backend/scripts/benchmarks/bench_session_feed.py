@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark the personalized "For you" ranking for one restaurant.
+
+A throwaway session gets a taste vector in Redis (the mean of a few dish
+vectors), then `rank_feed` and `order_by_session` are timed end to end: Redis
+GET, index lookup and the matmul. Cold sessions (no vector) are timed too, as
+they are what most menu loads hit. Fails if any warm p99 exceeds --target-ms.
+
+Usage:
+    python scripts/benchmarks/bench_session_feed.py <restaurant_slug> [--requests 500] [--target-ms 10]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config import rdb, get_tenant_vec_key, SESSION_VECTOR_TTL
+from common.qdrant_utils import get_collection_name
+from recommender.vector_index import get_vector_index
+from recommender.session_feed import rank_feed, order_by_session
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Session feed ranking latency")
+    parser.add_argument("slug", help="Restaurant slug")
+    parser.add_argument("--requests", type=int, default=500, help="Timed calls per case")
+    parser.add_argument("--limit", type=int, default=20, help="Feed size")
+    parser.add_argument("--target-ms", type=float, default=10.0, help="p99 budget per call")
+    args = parser.parse_args()
+
+    index = get_vector_index(args.slug, get_collection_name(args.slug), force=True)
+    if index is None or len(index) == 0:
+        logger.error(f"❌ No vector index for {args.slug}")
+        return False
+    logger.info(f"📦 {len(index)} dishes, dim {index.vectors.shape[1]}")
+
+    session_id = f"bench-{int(time.time())}"
+    taste = index.vectors[: min(5, len(index))].mean(axis=0)
+    taste = (taste / max(float(np.linalg.norm(taste)), 1e-8)).astype(np.float32)
+    key = get_tenant_vec_key(args.slug, session_id)
+    rdb.set(key, taste.tobytes(), ex=SESSION_VECTOR_TTL)
+
+    public_ids = list(index.public_ids)
+    try:
+        cases = {
+            "rank_feed": lambda: rank_feed(args.slug, session_id, args.limit),
+            "rank_feed veg": lambda: rank_feed(args.slug, session_id, args.limit, is_veg=True),
+            "order_by_session": lambda: order_by_session(args.slug, session_id, public_ids),
+        }
+        ok = True
+        for name, fn in cases.items():
+            fn()  # warm-up
+            samples = timed(fn, args.requests)
+            p99 = percentile_ms(samples, 99)
+            ok &= p99 < args.target_ms
+            logger.info(f"{'⚡' if p99 < args.target_ms else '🐢'} {name:<17} "
+                        f"p50={percentile_ms(samples, 50):.3f} ms  p99={p99:.3f} ms")
+    finally:
+        rdb.delete(key)
+
+    cold = timed(lambda: order_by_session(args.slug, f"{session_id}-cold", public_ids), args.requests)
+    logger.info(f"🧊 cold session     p50={percentile_ms(cold, 50):.3f} ms  p99={percentile_ms(cold, 99):.3f} ms")
+
+    if ok:
+        logger.info(f"✅ All warm p99 under {args.target_ms:.0f} ms")
+    else:
+        logger.error(f"❌ p99 over the {args.target_ms:.0f} ms budget")
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
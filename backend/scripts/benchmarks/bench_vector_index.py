@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-process vector index against Qdrant for one restaurant.
+
+Every dish vector of the restaurant is used as a query. For each query we time
+`MenuVectorIndex.search` and `qd.search` and report p50/p95 latency plus the
+overlap of the two top-k lists (close to 100%: the index is exact, HNSW near-exact at menu sizes).
+
+Usage:
+    python scripts/benchmarks/bench_vector_index.py <restaurant_slug> [--runs 3] [--limit 10]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config import qd
+from common.menu_version import get_menu_version
+from common.qdrant_utils import get_collection_name, build_menu_filter
+from recommender.vector_index import load_vector_index
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="In-process vector index vs Qdrant")
+    parser.add_argument("slug", help="Restaurant slug")
+    parser.add_argument("--runs", type=int, default=3, help="Passes over all dish vectors")
+    parser.add_argument("--limit", type=int, default=10, help="Top-k per query")
+    args = parser.parse_args()
+
+    collection_name = get_collection_name(args.slug)
+
+    start = time.perf_counter()
+    index = load_vector_index(args.slug, collection_name, get_menu_version(args.slug))
+    logger.info(f"📦 Loaded {len(index)} dishes in {(time.perf_counter() - start) * 1000:.1f} ms "
+                f"({index.vectors.nbytes / 1024:.0f} KiB)")
+
+    menu_filter = build_menu_filter(args.slug)
+    local_times, qdrant_times, overlaps = [], [], []
+    for _ in range(args.runs):
+        for query in index.vectors:
+            start = time.perf_counter()
+            local = index.search(query, args.limit)
+            local_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            points = qd.search(collection_name=collection_name, query_vector=query.tolist(),
+                               query_filter=menu_filter, limit=args.limit, with_payload=["public_id"])
+            qdrant_times.append(time.perf_counter() - start)
+
+            remote = [p.payload.get("public_id") for p in points]
+            if remote:
+                local_ids = {pid for pid, _ in local}
+                overlaps.append(len(local_ids & set(remote)) / len(remote))
+
+    logger.info(f"⚡ local  p50={percentile_ms(local_times, 50):.3f} ms  p95={percentile_ms(local_times, 95):.3f} ms")
+    logger.info(f"🌐 qdrant p50={percentile_ms(qdrant_times, 50):.3f} ms  p95={percentile_ms(qdrant_times, 95):.3f} ms")
+    if overlaps:
+        logger.info(f"🎯 top-{args.limit} overlap: {np.mean(overlaps) * 100:.1f}%")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Local fake of the OpenAI Responses API for load-testing the chat path.
+
+Replays scripted tool-calling transcripts with configurable latency, so
+`recommender/ai.py` runs its real tool loop (tools, Qdrant, Postgres,
+enrichment) without network access or API cost. Point the API at it with:
+
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=fake uvicorn main:app
+
+A transcript is picked per user question (first script whose `match` substring
+occurs in the question, otherwise round-robin) and each model round returns
+its next step:
+
+    [
+      {"match": "spicy", "rounds": [
+          {"tool_calls": [{"name": "search_menu", "arguments": {"query": "spicy"}}]},
+          {"text": "A few spicy picks 🌶️", "carousel": true, "quick_replies": ["Less spicy"]}
+      ]}
+    ]
+
+The final round becomes a `Blocks` JSON answer; `"carousel": true` fills a
+dish carousel with up to 4 dishes from the last tool output, so enrichment has
+real ids to work on.
+
+Usage:
+    python scripts/benchmarks/fake_llm_server.py [--port 8100] [--latency-ms 800] [--jitter-ms 200]
+        [--scripts transcripts.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from loguru import logger
+
+DEFAULT_SCRIPTS = [
+    {"match": "popular", "rounds": [
+        {"tool_calls": [{"name": "get_chefs_picks", "arguments": {}}]},
+        {"text": "Our most loved dishes right now:", "carousel": True,
+         "quick_replies": ["Veg only 🌿", "Something spicy 🌶️", "A Combo Meal"]},
+    ]},
+    {"match": "chef", "rounds": [
+        {"tool_calls": [{"name": "get_chefs_picks", "arguments": {}}]},
+        {"text": "The chef recommends:", "carousel": True,
+         "quick_replies": ["Tell me more", "Something lighter", "Desserts"]},
+    ]},
+    {"match": "", "rounds": [
+        {"tool_calls": [{"name": "search_menu", "arguments": {"query": "{question}"}}]},
+        {"tool_calls": [{"name": "list_all_items", "arguments": {"page": 1}}]},
+        {"text": "Here is what I found for you:", "carousel": True,
+         "quick_replies": ["Show veg only 🌿", "Less spicy", "Under ₹300"]},
+    ]},
+]
+
+app = FastAPI(title="Fake Responses API")
+
+SETTINGS: Dict[str, Any] = {"latency_ms": 800.0, "jitter_ms": 200.0, "scripts": DEFAULT_SCRIPTS}
+# response id -> (script, next round, question)
+_responses: Dict[str, tuple] = {}
+_round_robin = itertools.count()
+
+
+def _pick_script(question: str) -> dict:
+    lowered = question.lower()
+    for script in SETTINGS["scripts"]:
+        if script.get("match") and script["match"].lower() in lowered:
+            return script
+    fallbacks = [s for s in SETTINGS["scripts"] if not s.get("match")] or SETTINGS["scripts"]
+    return fallbacks[next(_round_robin) % len(fallbacks)]
+
+
+def _latest_question(items: List[dict]) -> Optional[str]:
+    for item in reversed(items):
+        if item.get("role") == "user":
+            content = item.get("content")
+            return content if isinstance(content, str) else json.dumps(content)
+    return None
+
+
+def _dishes_from_tool_output(items: List[dict], limit: int = 4) -> List[dict]:
+    """Parse `id|name|...` rows from the last function_call_output (see encode_tool_result)."""
+    for item in reversed(items):
+        if item.get("type") != "function_call_output":
+            continue
+        lines = [line for line in str(item.get("output", "")).splitlines() if "|" in line]
+        if not lines:
+            return []
+        header = lines[0].split("|")
+        if "id" not in header or "name" not in header:
+            return []
+        dishes = []
+        for line in lines[1:limit + 1]:
+            row = dict(zip(header, line.split("|")))
+            if row.get("id", "").isdigit():
+                dishes.append({"type": "dish_card", "id": int(row["id"]), "name": row.get("name", "")})
+        return dishes
+    return []
+
+
+def _usage(body: dict, output_text: str) -> dict:
+    input_tokens = len(json.dumps(body.get("input", []))) // 4 + 1
+    output_tokens = len(output_text) // 4 + 1
+    return {
+        "input_tokens": input_tokens,
+        "input_tokens_details": {"cached_tokens": 0},
+        "output_tokens": output_tokens,
+        "output_tokens_details": {"reasoning_tokens": 0},
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+
+def _render_step(step: dict, question: str, items: List[dict]) -> List[dict]:
+    if "tool_calls" in step:
+        output = []
+        for call in step["tool_calls"]:
+            arguments = json.loads(json.dumps(call.get("arguments", {})).replace("{question}", question))
+            output.append({
+                "type": "function_call",
+                "id": f"fc_{uuid.uuid4().hex}",
+                "call_id": f"call_{uuid.uuid4().hex[:12]}",
+                "name": call["name"],
+                "arguments": json.dumps(arguments),
+                "status": "completed",
+            })
+        return output
+
+    blocks = [{"type": "text", "markdown": step.get("text", "")}]
+    if step.get("carousel"):
+        dishes = _dishes_from_tool_output(items)
+        if dishes:
+            blocks.append({"type": "dish_carousal", "options": dishes})
+    blocks.append({"type": "quick_replies", "options": step.get("quick_replies", [])[:3]})
+    return [{
+        "type": "message",
+        "id": f"msg_{uuid.uuid4().hex}",
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": json.dumps({"blocks": blocks}), "annotations": []}],
+    }]
+
+
+@app.post("/v1/responses")
+async def create_response(request: Request):
+    body = await request.json()
+    items = body.get("input") or []
+    if isinstance(items, str):
+        items = [{"role": "user", "content": items}]
+
+    question = _latest_question(items)
+    previous = _responses.get(body.get("previous_response_id"))
+    if question is not None or previous is None:
+        # New user turn: start a transcript from its first round
+        question = question or ""
+        script, step_index = _pick_script(question), 0
+    else:
+        script, step_index, question = previous
+
+    rounds = script["rounds"]
+    step = rounds[min(step_index, len(rounds) - 1)]
+    latency = step.get("latency_ms", SETTINGS["latency_ms"]) + random.uniform(0, SETTINGS["jitter_ms"])
+    await asyncio.sleep(latency / 1000)
+
+    output = _render_step(step, question, items)
+    response_id = f"resp_{uuid.uuid4().hex}"
+    _responses[response_id] = (script, step_index + 1, question)
+
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "fake"),
+        "status": "completed",
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": body.get("tool_choice", "auto"),
+        "tools": body.get("tools", []),
+        "previous_response_id": body.get("previous_response_id"),
+        "text": body.get("text"),
+        "error": None,
+        "incomplete_details": None,
+        "instructions": None,
+        "metadata": {},
+        "temperature": 1.0,
+        "top_p": 1.0,
+        "usage": _usage(body, json.dumps(output)),
+    }
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API replaying scripted transcripts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Base latency per model round")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="Uniform random extra latency")
+    parser.add_argument("--scripts", help="JSON file with transcripts (default: built-in)")
+    args = parser.parse_args()
+
+    SETTINGS["latency_ms"] = args.latency_ms
+    SETTINGS["jitter_ms"] = args.jitter_ms
+    if args.scripts:
+        with open(args.scripts) as f:
+            SETTINGS["scripts"] = json.load(f)
+
+    logger.info(f"🤖 Fake Responses API on http://{args.host}:{args.port}/v1 "
+                f"({len(SETTINGS['scripts'])} transcripts, {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms/round)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Migrate dish vectors from per-restaurant `{slug}_qdb` collections into the
+shared multi-tenant collection (QDRANT_SHARED_COLLECTION).
+
+Points are copied in chunks with their vectors and payload, tagged with the
+`restaurant_id` tenant field and re-keyed with deterministic ids. Each
+restaurant's point count is validated after the copy. Old collections are kept
+unless --drop-old is given, so the API can keep running on the per-restaurant
+layout until QDRANT_LAYOUT=shared is deployed.
+
+Usage:
+    python scripts/migrate_qdrant_layout.py                 # all restaurants
+    python scripts/migrate_qdrant_layout.py slug1 slug2     # selected restaurants
+    python scripts/migrate_qdrant_layout.py --drop-old      # delete old collections after validation
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client.models import PointStruct, FieldCondition, MatchValue, Filter
+
+from config import qd, QDRANT_SHARED_COLLECTION
+from models.schema import SessionLocal, Restaurant
+from common.qdrant_utils import (
+    create_shared_collection, per_restaurant_collection_name, point_id_for, TENANT_FIELD,
+    collection_or_alias_exists, drop_per_restaurant_collections,
+)
+
+CHUNK_SIZE = 256
+
+
+def migrate_restaurant(slug: str, drop_old: bool) -> bool:
+    source = per_restaurant_collection_name(slug)
+    if not collection_or_alias_exists(source):
+        logger.warning(f"⏭️  {slug}: no collection {source}")
+        return True
+
+    copied = 0
+    offset = None
+    while True:
+        points, offset = qd.scroll(
+            collection_name=source,
+            limit=CHUNK_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        batch = []
+        for point in points:
+            payload = dict(point.payload or {})
+            if not payload.get("public_id") or not point.vector:
+                continue
+            payload[TENANT_FIELD] = slug
+            batch.append(PointStruct(
+                id=point_id_for(slug, payload["public_id"]),
+                vector=point.vector,
+                payload=payload,
+            ))
+        if batch:
+            qd.upsert(collection_name=QDRANT_SHARED_COLLECTION, points=batch, wait=True)
+            copied += len(batch)
+        if offset is None:
+            break
+
+    migrated = qd.count(
+        collection_name=QDRANT_SHARED_COLLECTION,
+        count_filter=Filter(must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=slug))]),
+        exact=True,
+    ).count
+    if migrated != copied:
+        logger.error(f"❌ {slug}: copied {copied} points but shared collection has {migrated}")
+        return False
+
+    logger.success(f"✅ {slug}: migrated {copied} points")
+    if drop_old:
+        drop_per_restaurant_collections(slug)
+        logger.info(f"🗑️ {slug}: dropped {source} and its versions")
+    return True
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Migrate per-restaurant Qdrant collections to the shared layout")
+    parser.add_argument("slugs", nargs="*", help="Restaurant slugs (default: all)")
+    parser.add_argument("--drop-old", action="store_true", help="Delete per-restaurant collections after validation")
+    args = parser.parse_args()
+
+    slugs = args.slugs
+    if not slugs:
+        with SessionLocal() as db:
+            slugs = [slug for (slug,) in db.query(Restaurant.slug).all()]
+
+    create_shared_collection(QDRANT_SHARED_COLLECTION)
+    results = [migrate_restaurant(slug, args.drop_old) for slug in slugs]
+    logger.info(f"🎯 Migration complete: {sum(results)}/{len(results)} restaurants")
+    if all(results):
+        logger.info("📝 Next step: set QDRANT_LAYOUT=shared and restart the API")
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Rebuild BM25 keyword indexes from the menu items in Postgres.
+
+Restaurants onboarded before the memory-mapped BM25 format only have a pickled
+`bm25_indexes/{slug}_bm25.pkl`, which search no longer reads. Run once per
+deployment to give them a current index (restaurants that already have one are
+skipped unless named or --force is given):
+
+    python scripts/rebuild_bm25_indexes.py            # restaurants without an index
+    python scripts/rebuild_bm25_indexes.py --force    # every restaurant
+    python scripts/rebuild_bm25_indexes.py <slug> ...  # selected restaurants
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.schema import SessionLocal, Restaurant, MenuItem
+from recommender.bm25 import BM25_INDEX_DIR, bm25_document, get_bm25_index, save_bm25_index
+
+
+def rebuild_restaurant(db, restaurant: Restaurant) -> bool:
+    items = db.query(MenuItem).filter(MenuItem.restaurant_id == restaurant.id).order_by(MenuItem.id).all()
+    if not items:
+        logger.warning(f"⏭️  Skipping {restaurant.slug}: no menu items")
+        return False
+    texts = [bm25_document(item.name, item.description, item.category_brief, item.group_category) for item in items]
+    path = save_bm25_index(restaurant.slug, texts, [item.public_id for item in items])
+    logger.success(f"✅ {restaurant.slug}: indexed {len(items)} items in {path}")
+
+    legacy = BM25_INDEX_DIR / f"{restaurant.slug}_bm25.pkl"
+    if legacy.exists():
+        legacy.unlink()
+        logger.info(f"🗑️ Removed {legacy.name}")
+    return True
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Rebuild BM25 indexes from Postgres")
+    parser.add_argument("slugs", nargs="*", help="Restaurant slugs (default: all without an index)")
+    parser.add_argument("--force", action="store_true", help="Rebuild indexes that already exist")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        query = db.query(Restaurant)
+        if args.slugs:
+            query = query.filter(Restaurant.slug.in_(args.slugs))
+        restaurants = query.all()
+        if not args.slugs and not args.force:
+            restaurants = [r for r in restaurants if get_bm25_index(r.slug) is None]
+        results = [rebuild_restaurant(db, restaurant) for restaurant in restaurants]
+
+    logger.info(f"🎯 Rebuild complete: {sum(results)}/{len(results)} restaurants")
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Rebuild the item co-occurrence table from historical orders.
+
+New confirmations update `item_cooccurrence` incrementally; run this once to
+backfill from existing orders (or to recount after cleaning up order data).
+Each restaurant is recounted from all its confirmed / food_ready orders in
+one transaction.
+
+Usage:
+    python scripts/rebuild_cooccurrence.py                 # all restaurants
+    python scripts/rebuild_cooccurrence.py slug1 slug2     # selected restaurants
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from loguru import logger
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.schema import SessionLocal, Restaurant, ItemCooccurrence
+from services.cooccurrence_service import rebuild_cooccurrence
+
+
+def rebuild_restaurant(restaurant_id: int, slug: str) -> bool:
+    with SessionLocal() as db:
+        try:
+            orders = rebuild_cooccurrence(db, restaurant_id)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ {slug}: rebuild failed: {e}")
+            return False
+        pairs = db.query(ItemCooccurrence).filter(
+            ItemCooccurrence.restaurant_id == restaurant_id,
+            ItemCooccurrence.item_a != ItemCooccurrence.item_b,
+        ).count() // 2
+    logger.success(f"✅ {slug}: {orders} orders, {pairs} dish pairs")
+    return True
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description="Rebuild item co-occurrence counts from historical orders")
+    parser.add_argument("slugs", nargs="*", help="Restaurant slugs (default: all)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        query = db.query(Restaurant.id, Restaurant.slug)
+        if args.slugs:
+            query = query.filter(Restaurant.slug.in_(args.slugs))
+        restaurants = query.all()
+
+    if not restaurants:
+        logger.error("❌ No matching restaurants")
+        return False
+
+    results = [rebuild_restaurant(restaurant_id, slug) for restaurant_id, slug in restaurants]
+    logger.info(f"🎯 Rebuild complete: {sum(results)}/{len(results)} restaurants")
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,214 @@
+"""
+Item co-occurrence model: what diners actually order together.
+
+Every confirmed order adds its basket (the distinct dishes in `Order.payload`)
+to a sparse per-restaurant count table (`item_cooccurrence`). Pairings for a
+cart are scored by lift:
+
+    lift(a, b) = count(a, b) * orders / (count(a) * count(b))
+
+i.e. how much more often b is ordered with a than on its own. The table is
+mirrored in memory per restaurant (refreshed every COOCCURRENCE_REFRESH_SECONDS)
+so `get_cart_pairings` and `/upsell` look pairings up in O(cart size).
+"""
+
+import threading
+import time
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from config import logger
+from models.schema import SessionLocal, ItemCooccurrence, Order, Restaurant, Session as TableSession
+
+# (ORDER_COUNT, ORDER_COUNT) row holds the number of orders counted
+ORDER_COUNT = "*"
+# Pairs seen fewer times than this are noise, not a pairing
+MIN_SUPPORT = 2
+COOCCURRENCE_REFRESH_SECONDS = 300
+# Orders that reached the kitchen
+COUNTED_STATUSES = ("confirmed", "food_ready")
+
+_models: Dict[str, Tuple[float, "CooccurrenceModel"]] = {}
+_lock = threading.Lock()
+
+
+def basket_from_payload(payload: Optional[List[Dict[str, Any]]]) -> List[str]:
+    """Distinct dish public ids of an order payload."""
+    return sorted({
+        line.get("menu_item_pid") or line.get("menu_item_id")
+        for line in payload or []
+        if line.get("menu_item_pid") or line.get("menu_item_id")
+    })
+
+
+def basket_counts(basket: List[str]) -> Dict[Tuple[str, str], int]:
+    """Count increments of one basket: diagonal, both pair directions and the order count."""
+    counts = {(ORDER_COUNT, ORDER_COUNT): 1}
+    for item in basket:
+        counts[(item, item)] = 1
+    for a, b in combinations(basket, 2):
+        counts[(a, b)] = 1
+        counts[(b, a)] = 1
+    return counts
+
+
+def _upsert_counts(db: Session, restaurant_id: int, counts: Dict[Tuple[str, str], int]):
+    if not counts:
+        return
+    rows = [
+        {"restaurant_id": restaurant_id, "item_a": a, "item_b": b, "count": n}
+        for (a, b), n in counts.items()
+    ]
+    stmt = insert(ItemCooccurrence).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["restaurant_id", "item_a", "item_b"],
+        set_={"count": ItemCooccurrence.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def record_order_cooccurrence(db: Session, order: Order) -> None:
+    """Add a newly confirmed order to its restaurant's counts (committed with the caller's transaction).
+
+    Idempotent per order: `Order.cooccurrence_recorded_at` is claimed with a
+    conditional UPDATE, so an order that leaves and re-enters "confirmed" (or is
+    confirmed by two paths) is counted once.
+    """
+    basket = basket_from_payload(order.payload)
+    if not basket:
+        return
+    restaurant_id = order.session.restaurant_id
+    try:
+        # Savepoint, so a failure here leaves the caller's transaction usable
+        with db.begin_nested():
+            recorded_at = datetime.utcnow()
+            claimed = db.query(Order).filter(
+                Order.id == order.id, Order.cooccurrence_recorded_at.is_(None)
+            ).update({"cooccurrence_recorded_at": recorded_at}, synchronize_session=False)
+            if not claimed:
+                return
+            _upsert_counts(db, restaurant_id, basket_counts(basket))
+        order.cooccurrence_recorded_at = recorded_at
+    except Exception as e:
+        # Pairing stats must never block an order confirmation
+        logger.warning(f"Could not record co-occurrence for order {order.public_id}: {e}")
+
+
+def rebuild_cooccurrence(db: Session, restaurant_id: int) -> int:
+    """Recount a restaurant's table from all its confirmed orders. Returns the number of orders."""
+    orders = db.query(Order.payload).join(
+        TableSession, TableSession.id == Order.session_id
+    ).filter(
+        TableSession.restaurant_id == restaurant_id,
+        Order.status.in_(COUNTED_STATUSES),
+    ).yield_per(1000)
+
+    counts: Dict[Tuple[str, str], int] = {}
+    order_count = 0
+    for (payload,) in orders:
+        basket = basket_from_payload(payload)
+        if not basket:
+            continue
+        order_count += 1
+        for key, n in basket_counts(basket).items():
+            counts[key] = counts.get(key, 0) + n
+
+    # The recorded flags follow the recount: counted orders are marked, the rest may count later
+    restaurant_orders = db.query(TableSession.id).filter(TableSession.restaurant_id == restaurant_id)
+    db.query(Order).filter(
+        Order.session_id.in_(restaurant_orders), Order.status.in_(COUNTED_STATUSES),
+        Order.cooccurrence_recorded_at.is_(None),
+    ).update({"cooccurrence_recorded_at": datetime.utcnow()}, synchronize_session=False)
+    db.query(Order).filter(
+        Order.session_id.in_(restaurant_orders), Order.status.notin_(COUNTED_STATUSES),
+        Order.cooccurrence_recorded_at.isnot(None),
+    ).update({"cooccurrence_recorded_at": None}, synchronize_session=False)
+
+    db.query(ItemCooccurrence).filter(ItemCooccurrence.restaurant_id == restaurant_id).delete()
+    rows = [
+        {"restaurant_id": restaurant_id, "item_a": a, "item_b": b, "count": n}
+        for (a, b), n in counts.items()
+    ]
+    for start in range(0, len(rows), 5000):
+        db.execute(insert(ItemCooccurrence).values(rows[start:start + 5000]))
+    return order_count
+
+
+class CooccurrenceModel:
+    """In-memory view of one restaurant's co-occurrence counts."""
+
+    def __init__(self, pairs: Dict[str, Dict[str, int]], item_counts: Dict[str, int], orders: int):
+        self.pairs = pairs              # a -> {b: count(a, b)}
+        self.item_counts = item_counts  # a -> count(a)
+        self.orders = orders
+
+    def lift(self, a: str, b: str) -> float:
+        together = self.pairs.get(a, {}).get(b, 0)
+        if not together or not self.orders:
+            return 0.0
+        return together * self.orders / (self.item_counts[a] * self.item_counts[b])
+
+    def pairings(self, cart_public_ids: Iterable[str], limit: int = 10,
+                 min_support: int = MIN_SUPPORT) -> List[Tuple[str, float]]:
+        """(public_id, lift) of dishes ordered with the cart more often than chance, best first.
+
+        A candidate's score is its best lift against any cart item.
+        """
+        cart = set(cart_public_ids)
+        best: Dict[str, float] = {}
+        for a in cart:
+            for b, together in self.pairs.get(a, {}).items():
+                if b in cart or together < min_support:
+                    continue
+                lift = together * self.orders / (self.item_counts[a] * self.item_counts[b])
+                if lift > 1.0 and lift > best.get(b, 0.0):
+                    best[b] = lift
+        return sorted(best.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+
+def load_cooccurrence_model(restaurant_slug: str) -> CooccurrenceModel:
+    with SessionLocal() as db:
+        rows = db.query(ItemCooccurrence.item_a, ItemCooccurrence.item_b, ItemCooccurrence.count).join(
+            Restaurant, Restaurant.id == ItemCooccurrence.restaurant_id
+        ).filter(Restaurant.slug == restaurant_slug).all()
+
+    pairs: Dict[str, Dict[str, int]] = {}
+    item_counts: Dict[str, int] = {}
+    orders = 0
+    for a, b, count in rows:
+        if a == ORDER_COUNT:
+            orders = count
+        elif a == b:
+            item_counts[a] = count
+        else:
+            pairs.setdefault(a, {})[b] = count
+    return CooccurrenceModel(pairs, item_counts, orders)
+
+
+def get_cooccurrence_model(restaurant_slug: str) -> CooccurrenceModel:
+    """Cached model of a restaurant, reloaded every COOCCURRENCE_REFRESH_SECONDS."""
+    now = time.time()
+    cached = _models.get(restaurant_slug)
+    if cached and now - cached[0] < COOCCURRENCE_REFRESH_SECONDS:
+        return cached[1]
+
+    with _lock:
+        cached = _models.get(restaurant_slug)
+        if cached and now - cached[0] < COOCCURRENCE_REFRESH_SECONDS:
+            return cached[1]
+        try:
+            model = load_cooccurrence_model(restaurant_slug)
+        except Exception as e:
+            logger.warning(f"Could not load co-occurrence model for {restaurant_slug}: {e}")
+            model = cached[1] if cached else CooccurrenceModel({}, {}, 0)
+        _models[restaurant_slug] = (now, model)
+        return model
+
+
+def get_lift_pairings(restaurant_slug: str, cart_public_ids: Iterable[str], limit: int = 10) -> List[Tuple[str, float]]:
+    """Lift-scored pairings of a cart (empty until the restaurant has order history)."""
+    return get_cooccurrence_model(restaurant_slug).pairings(cart_public_ids, limit)
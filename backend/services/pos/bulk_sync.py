@@ -0,0 +1,149 @@
+"""
+bulk_sync.py – Set-based writes for POS menu syncs.
+
+A PetPooja menu sync used to look every item, variation, addon group, addon
+item and link up with its own SELECT before updating or adding it: a 600-item
+menu meant thousands of round trips inside one callback request. The sync now
+
+1. preloads the POS system's entities into external-id → primary-key maps
+   (`load_entity_maps`, three queries),
+2. writes each table with batched INSERT … ON CONFLICT DO UPDATE on its unique
+   constraint (menu items, which have none, are split with the map into one
+   multi-row INSERT and one bulk UPDATE by primary key),
+3. resolves foreign keys of the next table from the maps / RETURNING rows.
+
+The PetPooja field mapping stays with the callers (urls/petpooja_callback.py
+and services/pos/petpooja.py); this module only knows tables and keys.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from common.bulk_ops import INSERT_CHUNK, bulk_insert, bulk_upsert
+from models.schema import (
+    MenuItem, Variation, AddonGroup, AddonGroupItem, ItemVariation, ItemAddon, ItemVariationAddon
+)
+
+Row = Dict[str, Any]
+
+
+@dataclass
+class PosEntityMaps:
+    """External id → primary key of a restaurant's synced entities."""
+    menu_items: Dict[str, int] = field(default_factory=dict)
+    variations: Dict[str, int] = field(default_factory=dict)
+    addon_groups: Dict[str, int] = field(default_factory=dict)
+
+
+def load_entity_maps(db: Session, restaurant_id: int, pos_system_id: int) -> PosEntityMaps:
+    return PosEntityMaps(
+        menu_items=dict(
+            db.query(MenuItem.external_id, MenuItem.id)
+            .filter(MenuItem.restaurant_id == restaurant_id, MenuItem.external_id.isnot(None)).all()
+        ),
+        variations=dict(
+            db.query(Variation.external_variation_id, Variation.id)
+            .filter(Variation.pos_system_id == pos_system_id).all()
+        ),
+        addon_groups=dict(
+            db.query(AddonGroup.external_group_id, AddonGroup.id)
+            .filter(AddonGroup.pos_system_id == pos_system_id).all()
+        ),
+    )
+
+
+def _created(before: Dict[str, int], keys: Iterable[str]) -> int:
+    return len({key for key in keys if key not in before})
+
+
+def sync_menu_items(db: Session, maps: PosEntityMaps, rows: List[Row],
+                    update_columns: Iterable[str]) -> Tuple[int, int]:
+    """Insert items missing from the map, update `update_columns` of the others. Returns (created, updated)."""
+    update_columns = list(update_columns)
+    # A repeated itemid in one payload: the last one wins, as with per-row updates
+    rows = list({row["external_id"]: row for row in rows}.values())
+    new_rows = [row for row in rows if row["external_id"] not in maps.menu_items]
+    update_rows = [
+        {"id": maps.menu_items[row["external_id"]], **{col: row[col] for col in update_columns}}
+        for row in rows if row["external_id"] in maps.menu_items
+    ]
+    maps.menu_items.update(
+        (ext_id, pk) for pk, ext_id in bulk_insert(db, MenuItem, new_rows, returning=[MenuItem.id, MenuItem.external_id])
+    )
+    for start in range(0, len(update_rows), INSERT_CHUNK):
+        # ORM bulk UPDATE by primary key: one executemany per chunk
+        db.execute(update(MenuItem), update_rows[start:start + INSERT_CHUNK])
+    return len(new_rows), len(update_rows)
+
+
+def upsert_variations(db: Session, maps: PosEntityMaps, rows: List[Row]) -> Tuple[int, int]:
+    """Upsert global variations on (external_variation_id, pos_system_id). Returns (created, updated)."""
+    created = _created(maps.variations, (row["external_variation_id"] for row in rows))
+    returned = bulk_upsert(
+        db, Variation, rows, "uix_variation_pos",
+        ["name", "display_name", "group_name", "is_active", "external_data"],
+        returning=[Variation.id, Variation.external_variation_id],
+        dedupe_on=["external_variation_id", "pos_system_id"],
+    )
+    maps.variations.update((ext_id, pk) for pk, ext_id in returned)
+    return created, len(returned) - created
+
+
+def upsert_addon_groups(db: Session, maps: PosEntityMaps, rows: List[Row]) -> Tuple[int, int]:
+    """Upsert addon groups on (external_group_id, pos_system_id). Returns (created, updated)."""
+    created = _created(maps.addon_groups, (row["external_group_id"] for row in rows))
+    returned = bulk_upsert(
+        db, AddonGroup, rows, "uix_addon_group_pos",
+        ["name", "display_name", "is_active", "priority", "external_data"],
+        returning=[AddonGroup.id, AddonGroup.external_group_id],
+        dedupe_on=["external_group_id", "pos_system_id"],
+    )
+    maps.addon_groups.update((ext_id, pk) for pk, ext_id in returned)
+    return created, len(returned) - created
+
+
+def upsert_addon_items(db: Session, rows: List[Row]) -> Tuple[int, int]:
+    """Upsert addon group items on (external_addon_id, addon_group_id). Returns (created, updated)."""
+    group_ids = {row["addon_group_id"] for row in rows}
+    existing = set(
+        db.query(AddonGroupItem.addon_group_id, AddonGroupItem.external_addon_id)
+        .filter(AddonGroupItem.addon_group_id.in_(group_ids)).all()
+    ) if group_ids else set()
+    keys = {(row["addon_group_id"], row["external_addon_id"]) for row in rows}
+    bulk_upsert(
+        db, AddonGroupItem, rows, "uix_addon_item_pos",
+        ["name", "display_name", "price", "is_active", "priority", "tags", "external_data"],
+        dedupe_on=["external_addon_id", "addon_group_id"],
+    )
+    created = len(keys - existing)
+    return created, len(keys) - created
+
+
+def upsert_item_variations(db: Session, rows: List[Row],
+                           update_columns: Iterable[str]) -> Dict[Tuple[int, int], int]:
+    """Upsert item ↔ variation links. Returns {(menu_item_id, variation_id): item_variation_id}."""
+    returned = bulk_upsert(
+        db, ItemVariation, rows, "uix_item_variation", update_columns,
+        returning=[ItemVariation.id, ItemVariation.menu_item_id, ItemVariation.variation_id],
+        dedupe_on=["menu_item_id", "variation_id"],
+    )
+    return {(menu_item_id, variation_id): pk for pk, menu_item_id, variation_id in returned}
+
+
+def upsert_item_addons(db: Session, rows: List[Row], update_columns: Iterable[str]) -> int:
+    """Upsert item ↔ addon group links. Returns the number of distinct links written."""
+    return len(bulk_upsert(
+        db, ItemAddon, rows, "uix_item_addon", update_columns,
+        returning=[ItemAddon.id], dedupe_on=["menu_item_id", "addon_group_id"],
+    ))
+
+
+def upsert_item_variation_addons(db: Session, rows: List[Row], update_columns: Iterable[str]) -> int:
+    """Upsert item variation ↔ addon group links. Returns the number of distinct links written."""
+    return len(bulk_upsert(
+        db, ItemVariationAddon, rows, "uix_item_variation_addon", update_columns,
+        returning=[ItemVariationAddon.id], dedupe_on=["item_variation_id", "addon_group_id"],
+    ))
@@ -0,0 +1,127 @@
+"""
+menu_diff.py – Structural diff between a POS menu payload and the stored menu.
+
+A sync used to deactivate every menu row and then re-activate whatever the
+payload contained, rewriting every row on every sync. Instead each table is
+diffed on its natural key (external ids, or the foreign-key pair for link
+tables) over the columns the sync owns:
+
+    current = load_current_rows(db, Variation, ["external_variation_id"], VARIATION_COLUMNS, filter)
+    entity_diff = diff_entities(current, incoming, VARIATION_COLUMNS)
+
+and only `added` / `changed` rows are upserted and only `removed` rows (stored,
+still active, no longer in the payload) are deactivated. The per-table diffs
+are collected in a `MenuDiff`, which is the sync's change report and tells the
+caller whether the menu version / Qdrant payloads need refreshing at all.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+Row = Dict[str, Any]
+
+
+@dataclass
+class EntityDiff:
+    """Keys of one table's rows that the payload adds, changes or removes."""
+    added: List[Hashable] = field(default_factory=list)
+    changed: List[Hashable] = field(default_factory=list)
+    removed: List[Hashable] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def summary(self) -> Dict[str, int]:
+        return {"added": len(self.added), "changed": len(self.changed),
+                "removed": len(self.removed), "unchanged": self.unchanged}
+
+
+@dataclass
+class MenuDiff:
+    """Per-table diffs of one sync, in write order."""
+    tables: Dict[str, EntityDiff] = field(default_factory=dict)
+    # Primary keys of the MenuItems whose row was inserted, changed or deactivated
+    menu_item_ids: List[int] = field(default_factory=list)
+    # Called with the table name as each table is diffed (job progress reporting)
+    on_record: Optional[Callable[[str], None]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def is_empty(self) -> bool:
+        return all(entity_diff.is_empty for entity_diff in self.tables.values())
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        return {table: entity_diff.summary() for table, entity_diff in self.tables.items()}
+
+
+def diff_entities(current: Dict[Hashable, Row],
+                  incoming: Dict[Hashable, Row],
+                  columns: Sequence[str]) -> EntityDiff:
+    """Compare stored rows with payload rows (both keyed by natural key) over `columns`.
+
+    Stored rows missing from the payload count as removed only while they are
+    still active, so a re-sync never touches rows an earlier sync retired.
+    """
+    entity_diff = EntityDiff()
+    for key, row in incoming.items():
+        stored = current.get(key)
+        if stored is None:
+            entity_diff.added.append(key)
+        elif any(stored.get(col) != row.get(col) for col in columns):
+            entity_diff.changed.append(key)
+        else:
+            entity_diff.unchanged += 1
+    entity_diff.removed = [
+        key for key, stored in current.items()
+        if key not in incoming and stored.get("is_active", True)
+    ]
+    return entity_diff
+
+
+def keyed(rows: Iterable[Row], key_columns: Sequence[str]) -> Dict[Hashable, Row]:
+    """Rows by natural key (a repeated key: the last row wins, as with the upsert)."""
+    if len(key_columns) == 1:
+        return {row[key_columns[0]]: row for row in rows}
+    return {tuple(row[col] for col in key_columns): row for row in rows}
+
+
+def load_current_rows(db: Session, model, key_columns: Sequence[str], columns: Sequence[str],
+                      *filters) -> Dict[Hashable, Row]:
+    """Stored rows of `model` (id + key + compared columns) by natural key, in one query."""
+    names = ["id", *key_columns, *[col for col in columns if col not in key_columns]]
+    if "is_active" not in names:
+        names.append("is_active")
+    query = db.query(*[getattr(model, name) for name in names])
+    if filters:
+        query = query.filter(*filters)
+    return keyed((dict(zip(names, values)) for values in query.all()), key_columns)
+
+
+def rows_for(incoming: Dict[Hashable, Row], keys: Iterable[Hashable]) -> List[Row]:
+    return [incoming[key] for key in keys]
+
+
+def ids_for(current: Dict[Hashable, Row], keys: Iterable[Hashable]) -> List[int]:
+    return [current[key]["id"] for key in keys]
+
+
+def deactivate(db: Session, model, ids: List[int], chunk: int = 1000) -> int:
+    """Set is_active = False on the given primary keys. Returns the number of rows."""
+    for start in range(0, len(ids), chunk):
+        db.query(model).filter(model.id.in_(ids[start:start + chunk])).update(
+            {"is_active": False}, synchronize_session=False
+        )
+    return len(ids)
+
+
+def record(menu_diff: MenuDiff, table: str, entity_diff: EntityDiff,
+           menu_item_ids: Optional[Iterable[int]] = None) -> EntityDiff:
+    menu_diff.tables[table] = entity_diff
+    if menu_item_ids:
+        menu_diff.menu_item_ids.extend(menu_item_ids)
+    if menu_diff.on_record:
+        menu_diff.on_record(table)
+    return entity_diff
@@ -0,0 +1,344 @@
+"""
+menu_sync_jobs.py – Background execution of POS menu syncs.
+
+A PetPooja menu push used to be applied inside the callback request, with
+blocking ORM calls on the event loop; large menus ran past PetPooja's timeout
+and the retried push doubled the load. The callback now only validates the
+push and stores it as a `MenuSyncJob`:
+
+    job, created = enqueue_menu_sync(db, restaurant_id, pos_system_id, payload)
+
+and `MenuSyncWorker` (started with the API) applies queued jobs one at a time
+in a worker thread, recording the stage / progress while it runs and the
+MenuDiff change report (or the error) when it is done. Jobs live in Postgres,
+so pushes survive restarts, several API processes can each run a worker
+(jobs are claimed with SELECT … FOR UPDATE SKIP LOCKED) and the admin
+dashboard reads job status from the table.
+
+Deduplication is by payload hash: a push identical to a job still queued or
+running, or to the restaurant's latest applied menu, returns that job instead
+of queueing another. A new push supersedes the restaurant's jobs still
+waiting in the queue, since it replaces the whole menu anyway.
+
+A running job heartbeats (`updated_at`) on every stage and every
+MENU_SYNC_HEARTBEAT_SECONDS; it is only considered dead once the heartbeat
+stops. Each run writes under its claim (status running and its own
+`attempts` number), so a run that was recovered as stale and claimed again
+can neither overwrite the newer run's outcome nor keep applying: its next
+stage raises `ClaimLost`. Payloads are dropped once a job succeeds or is
+superseded, and those of failed jobs after MENU_SYNC_PAYLOAD_RETENTION_DAYS.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, defer
+
+from config import (
+    logger, MENU_SYNC_POLL_SECONDS, MENU_SYNC_HEARTBEAT_SECONDS, MENU_SYNC_STALE_SECONDS,
+    MENU_SYNC_MAX_ATTEMPTS, MENU_SYNC_PAYLOAD_RETENTION_DAYS,
+)
+from models.schema import SessionLocal, MenuSyncJob
+from utils.general import new_id
+
+# Stages of a sync in order; a running job's progress is the share of stages reached
+SYNC_STAGES = (
+    "config", "menu_items", "variations", "addon_groups", "addon_items",
+    "item_variations", "item_addons", "item_variation_addons", "search_index",
+)
+
+# apply(restaurant_id, pos_system_id, payload, on_stage) -> change report
+SyncHandler = Callable[[int, int, Dict[str, Any], Callable[[str], None]], Dict[str, Any]]
+
+
+class ClaimLost(Exception):
+    """The job was recovered as stale (and possibly re-claimed) while this run was applying it."""
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """sha256 of the payload as canonical JSON (key order does not matter)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def stage_progress(stage: str) -> int:
+    """Progress (0-100) of a job that has reached `stage`."""
+    if stage not in SYNC_STAGES:
+        return 0
+    return int(100 * SYNC_STAGES.index(stage) / len(SYNC_STAGES))
+
+
+def enqueue_menu_sync(db: Session, restaurant_id: int, pos_system_id: int,
+                      payload: Dict[str, Any]) -> Tuple[MenuSyncJob, bool]:
+    """Queue a menu push unless it repeats a pending or already applied one. Returns (job, created)."""
+    digest = payload_hash(payload)
+    jobs = db.query(MenuSyncJob).options(defer(MenuSyncJob.payload)).filter(MenuSyncJob.restaurant_id == restaurant_id)
+
+    pending = jobs.filter(
+        MenuSyncJob.payload_hash == digest, MenuSyncJob.status.in_(("queued", "running"))
+    ).order_by(MenuSyncJob.id.desc()).first()
+    if pending:
+        return pending, False
+    latest = jobs.filter(MenuSyncJob.status.in_(("queued", "running", "succeeded"))).order_by(MenuSyncJob.id.desc()).first()
+    if latest and latest.status == "succeeded" and latest.payload_hash == digest:
+        return latest, False
+
+    now = datetime.utcnow()
+    superseded = db.query(MenuSyncJob).filter(
+        MenuSyncJob.restaurant_id == restaurant_id, MenuSyncJob.status == "queued"
+    ).update(
+        {"status": "superseded", "finished_at": now, "updated_at": now, "payload": None}, synchronize_session=False
+    )
+    job = MenuSyncJob(
+        public_id=new_id(),
+        restaurant_id=restaurant_id,
+        pos_system_id=pos_system_id,
+        payload=payload,
+        payload_hash=digest,
+        status="queued",
+        progress=0,
+        attempts=0,
+        created_at=now,
+    )
+    db.add(job)
+    db.commit()
+    if superseded:
+        logger.info(f"Menu sync job {job.public_id} supersedes {superseded} queued job(s)")
+    return job, True
+
+
+def claim_next_job(db: Session) -> Optional[int]:
+    """Mark the oldest runnable queued job as running and return its id.
+
+    A restaurant's jobs never run concurrently: restaurants with a running job are skipped.
+    """
+    running = select(MenuSyncJob.restaurant_id).where(MenuSyncJob.status == "running")
+    job = (
+        db.query(MenuSyncJob)
+        .options(defer(MenuSyncJob.payload))
+        .filter(MenuSyncJob.status == "queued", MenuSyncJob.restaurant_id.notin_(running))
+        .order_by(MenuSyncJob.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+    job.status = "running"
+    job.stage = None
+    job.progress = 0
+    job.error = None
+    job.attempts += 1
+    job.started_at = job.updated_at = datetime.utcnow()
+    db.commit()
+    return job.id
+
+
+def requeue_stale_jobs(db: Session, stale_after: float, max_attempts: int) -> int:
+    """Re-queue running jobs without a heartbeat for `stale_after` seconds (or fail them after `max_attempts` runs).
+
+    Returns the count.
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=stale_after)
+    stale = (
+        db.query(MenuSyncJob)
+        .options(defer(MenuSyncJob.payload))
+        .filter(MenuSyncJob.status == "running", MenuSyncJob.updated_at < cutoff)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in stale:
+        newer = db.query(MenuSyncJob.id).filter(
+            MenuSyncJob.restaurant_id == job.restaurant_id,
+            MenuSyncJob.status == "queued",
+            MenuSyncJob.id > job.id,
+        ).first()
+        job.updated_at = now
+        if newer:
+            job.status = "superseded"
+            job.payload = None
+        elif job.attempts >= max_attempts:
+            job.status = "failed"
+            job.error = f"Worker stopped responding ({job.attempts} attempts)"
+        else:
+            job.status = "queued"
+            continue
+        job.finished_at = now
+    db.commit()
+    if stale:
+        logger.warning(f"Recovered {len(stale)} stale menu sync job(s)")
+    return len(stale)
+
+
+def purge_finished_payloads(db: Session, retention_days: float) -> int:
+    """Drop the payloads of jobs finished more than `retention_days` ago. Returns the count."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    purged = db.query(MenuSyncJob).filter(
+        MenuSyncJob.status.in_(("succeeded", "failed", "superseded")),
+        MenuSyncJob.finished_at < cutoff,
+        MenuSyncJob.payload.isnot(None),
+    ).update({"payload": None}, synchronize_session=False)
+    db.commit()
+    return purged
+
+
+def _update_job(job_id: int, attempt: int, **values) -> bool:
+    # Own short transaction: progress must be visible while the sync transaction is open.
+    # Only under this run's claim, so a run recovered as stale cannot overwrite the newer outcome.
+    with SessionLocal() as db:
+        updated = db.query(MenuSyncJob).filter(
+            MenuSyncJob.id == job_id, MenuSyncJob.status == "running", MenuSyncJob.attempts == attempt
+        ).update(
+            {**values, "updated_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+    return updated > 0
+
+
+def _heartbeat(job_id: int, attempt: int, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        try:
+            if not _update_job(job_id, attempt):
+                return
+        except Exception as e:
+            logger.warning(f"Menu sync job {job_id} heartbeat failed: {e}")
+
+
+def run_job(job_id: int, apply: SyncHandler, heartbeat_interval: float = MENU_SYNC_HEARTBEAT_SECONDS) -> str:
+    """Apply a claimed job with `apply` and record the outcome. Returns the final status."""
+    with SessionLocal() as db:
+        job = db.get(MenuSyncJob, job_id)
+        public_id, restaurant_id, pos_system_id = job.public_id, job.restaurant_id, job.pos_system_id
+        payload, attempt = job.payload, job.attempts
+
+    def on_stage(stage: str):
+        if not _update_job(job_id, attempt, stage=stage, progress=stage_progress(stage)):
+            raise ClaimLost(f"menu sync job {public_id} is no longer claimed by run {attempt}")
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, attempt, heartbeat_interval, stop), daemon=True)
+    heartbeat.start()
+    logger.info(f"Running menu sync job {public_id} for restaurant {restaurant_id} (attempt {attempt})")
+    try:
+        result = apply(restaurant_id, pos_system_id, payload, on_stage)
+    except ClaimLost as e:
+        logger.warning(f"Menu sync job {public_id} abandoned: {e}")
+        return "abandoned"
+    except Exception as e:
+        logger.error(f"Menu sync job {public_id} failed: {e}")
+        _update_job(job_id, attempt, status="failed", error=str(e), finished_at=datetime.utcnow())
+        return "failed"
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    if not _update_job(job_id, attempt, status="succeeded", stage=None, progress=100, result=result,
+                       payload=None, finished_at=datetime.utcnow()):
+        logger.warning(f"Menu sync job {public_id} finished after losing its claim; outcome not recorded")
+        return "abandoned"
+    logger.info(f"Menu sync job {public_id} succeeded: {result}")
+    return "succeeded"
+
+
+def job_summary(job: MenuSyncJob) -> Dict[str, Any]:
+    """Job status for the admin dashboard (without the payload)."""
+    return {
+        "job_id": job.public_id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "attempts": job.attempts,
+        "payload_hash": job.payload_hash,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def get_job(db: Session, restaurant_id: int, public_id: str) -> Optional[MenuSyncJob]:
+    return (
+        db.query(MenuSyncJob)
+        .options(defer(MenuSyncJob.payload))
+        .filter(MenuSyncJob.public_id == public_id, MenuSyncJob.restaurant_id == restaurant_id)
+        .first()
+    )
+
+
+def recent_jobs(db: Session, restaurant_id: int, limit: int = 20) -> List[MenuSyncJob]:
+    return (
+        db.query(MenuSyncJob)
+        .options(defer(MenuSyncJob.payload))
+        .filter(MenuSyncJob.restaurant_id == restaurant_id)
+        .order_by(MenuSyncJob.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+class MenuSyncWorker:
+    """Applies queued menu sync jobs one at a time, off the event loop
+
+    The callback wakes it after queueing a job; it also polls every
+    `poll_interval` seconds for jobs queued by other processes, for stale
+    running jobs to recover and for old payloads to drop.
+    """
+
+    def __init__(self, apply: SyncHandler, poll_interval: float = MENU_SYNC_POLL_SECONDS,
+                 stale_after: float = MENU_SYNC_STALE_SECONDS, max_attempts: int = MENU_SYNC_MAX_ATTEMPTS,
+                 payload_retention_days: float = MENU_SYNC_PAYLOAD_RETENTION_DAYS):
+        self.apply = apply
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.payload_retention_days = payload_retention_days
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def _claim(self) -> Optional[int]:
+        with SessionLocal() as db:
+            return claim_next_job(db)
+
+    def _requeue_stale(self) -> int:
+        with SessionLocal() as db:
+            purge_finished_payloads(db, self.payload_retention_days)
+            return requeue_stale_jobs(db, self.stale_after, self.max_attempts)
+
+    async def _run(self):
+        while True:
+            # Cleared before draining, so a job queued meanwhile wakes the next round
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self._requeue_stale)
+                while (job_id := await asyncio.to_thread(self._claim)) is not None:
+                    await asyncio.to_thread(run_job, job_id, self.apply)
+            except Exception as e:
+                logger.error(f"Menu sync worker error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        # A job cut off by shutdown never commits and is re-queued once stale
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def wake(self):
+        """Check the queue now (called after a job is queued)."""
+        if self._wake is not None:
+            self._wake.set()
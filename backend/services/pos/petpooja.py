@@ -4,7 +4,6 @@ import httpx
 from typing import Dict, List, Optional, Any, Set
 from openai import NoneType
 from sqlalchemy.orm import Session
-from sqlalchemy import select
 from uuid import uuid4
 import sys, os
 from pathlib import Path
@@ -13,10 +12,11 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from config import logger, BACKEND_URL
 from .interface import POSInterface
-from models.schema import (
-    POSSystem, Order, CartItem, MenuItem, Variation, AddonGroup, 
-    AddonGroupItem, ItemVariation, ItemAddon
+from .bulk_sync import (
+    PosEntityMaps, load_entity_maps, sync_menu_items, upsert_variations, upsert_addon_groups,
+    upsert_addon_items, upsert_item_variations, upsert_item_addons,
 )
+from models.schema import POSSystem, Order, CartItem
 
 
 class PetPoojaIntegration(POSInterface):
@@ -58,8 +58,11 @@ class PetPoojaIntegration(POSInterface):
                 "errors": []
             }
             
+            # External id -> primary key of everything already synced, loaded once
+            maps = load_entity_maps(db, self.pos_system.restaurant_id, self.pos_system.id)
+
             # Step 1: Create global variations first
-            result["variations_synced"] = await self._sync_global_variations(db, menu_data.get("variations", []))
+            result["variations_synced"] = await self._sync_global_variations(db, menu_data.get("variations", []), maps)
             
 
             
@@ -69,10 +72,10 @@ class PetPoojaIntegration(POSInterface):
 
             # Step 3: Create global addon groups and items
             addon_groups_data = menu_data.get("addongroups", [])
-            result["addon_groups_synced"], result["addon_items_synced"] = await self._sync_global_addon_groups(db, addon_groups_data, attributes_map)
+            result["addon_groups_synced"], result["addon_items_synced"] = await self._sync_global_addon_groups(db, addon_groups_data, attributes_map, maps)
 
 
-            items_result = await self._sync_items_with_relationships(db, menu_data, attributes_map, categories_map)
+            items_result = await self._sync_items_with_relationships(db, menu_data, attributes_map, categories_map, maps)
             result["items_synced"] = items_result["items_synced"]
             result["item_variations_synced"] = items_result["item_variations_synced"]
             result["item_addons_synced"] = items_result["item_addons_synced"]
@@ -114,158 +117,97 @@ class PetPoojaIntegration(POSInterface):
             response.raise_for_status()
             return response.json()
 
-    async def _sync_global_variations(self, db: Session, variations_data: List[Dict]) -> int:
-        """Create global variation entities"""
-        synced_count = 0
-        
-        for var_data in variations_data:
-            # Check if variation exists
-            existing_variation = db.execute(
-                select(Variation).where(
-                    Variation.pos_system_id == self.pos_system.id,
-                    Variation.external_variation_id == var_data["variationid"]
-                )
-            ).scalar_one_or_none()
-            
-            if existing_variation:
-                # Update existing variation
-                setattr(existing_variation, 'name', var_data["name"])
-                setattr(existing_variation, 'display_name', var_data["name"])
-                setattr(existing_variation, 'group_name', var_data["groupname"])
-                setattr(existing_variation, 'is_active', var_data["status"] == "1")
-                setattr(existing_variation, 'external_data', var_data)
-            else:
-                # Create new variation
-                variation = Variation(
-                    name=var_data["name"],
-                    display_name=var_data["name"],
-                    group_name=var_data["groupname"],
-                    is_active=var_data["status"] == "1",
-                    external_variation_id=var_data["variationid"],
-                    external_data=var_data,
-                    pos_system_id=self.pos_system.id
-                )
-                db.add(variation)
-            
-            synced_count += 1
-        
-        return synced_count
-
-    async def _sync_global_addon_groups(self, db: Session, addon_groups_data: List[Dict], attributes_map: Dict) -> tuple[int, int]:
-        """Create global addon group entities and their items"""
-        groups_synced = 0
-        items_synced = 0
-        
-        for group_data in addon_groups_data:
-            # Check if addon group exists
-            existing_group = db.execute(
-                select(AddonGroup).where(
-                    AddonGroup.pos_system_id == self.pos_system.id,
-                    AddonGroup.external_group_id == group_data["addongroupid"]
-                )
-            ).scalar_one_or_none()
-            
-            if existing_group:
-                # Update existing group
-                setattr(existing_group, 'name', group_data["addongroup_name"])
-                setattr(existing_group, 'display_name', group_data["addongroup_name"])
-                setattr(existing_group, 'is_active', group_data["active"] == "1")
-                setattr(existing_group, 'priority', int(group_data.get("addongroup_rank", 0)))
-                setattr(existing_group, 'external_data', group_data)
-                addon_group = existing_group
-            else:
-                # Create new addon group
-                addon_group = AddonGroup(
-                    name=group_data["addongroup_name"],
-                    display_name=group_data["addongroup_name"],
-                    is_active=group_data["active"] == "1",
-                    priority=int(group_data.get("addongroup_rank", 0)),
-                    external_group_id=group_data["addongroupid"],
-                    external_data=group_data,
-                    pos_system_id=self.pos_system.id
-                )
-                db.add(addon_group)
-            
-            groups_synced += 1
-            
-            # Sync addon group items
-            for item_data in group_data.get("addongroupitems", []):
-                # Check if addon item exists
-                existing_item = db.execute(
-                    select(AddonGroupItem).where(
-                        AddonGroupItem.addon_group_id == addon_group.id,
-                        AddonGroupItem.external_addon_id == item_data["addonitemid"]
-                    )
-                ).scalar_one_or_none()
-                
-                tags = self._get_item_tags_from_attributes(attributes_map, item_data.get("attributes", ""))
-                
-                if existing_item:
-                    # Update existing item
-                    setattr(existing_item, 'name', item_data["addonitem_name"])
-                    setattr(existing_item, 'display_name', item_data["addonitem_name"])
-                    setattr(existing_item, 'price', float(item_data["addonitem_price"]))
-                    setattr(existing_item, 'is_active', item_data["active"] == "1")
-                    setattr(existing_item, 'priority', int(item_data.get("addonitem_rank", 0)))
-                    setattr(existing_item, 'tags', tags)
-                    setattr(existing_item, 'external_data', item_data)
-                else:
-                    # Create new addon item
-                    addon_item = AddonGroupItem(
-                        addon_group_id=addon_group.id,
-                        name=item_data["addonitem_name"],
-                        display_name=item_data["addonitem_name"],
-                        price=float(item_data["addonitem_price"]),
-                        is_active=item_data["active"] == "1",
-                        priority=int(item_data.get("addonitem_rank", 0)),
-                        tags=tags,
-                        external_addon_id=item_data["addonitemid"],
-                        external_data=item_data
-                    )
-                    db.add(addon_item)
-                
-                items_synced += 1
-        
-        return groups_synced, items_synced
+    async def _sync_global_variations(self, db: Session, variations_data: List[Dict], maps: PosEntityMaps) -> int:
+        """Upsert global variation entities"""
+        rows = [
+            {
+                "name": var_data["name"],
+                "display_name": var_data["name"],
+                "group_name": var_data["groupname"],
+                "is_active": var_data["status"] == "1",
+                "external_variation_id": var_data["variationid"],
+                "external_data": var_data,
+                "pos_system_id": self.pos_system.id,
+            }
+            for var_data in variations_data
+        ]
+        upsert_variations(db, maps, rows)
+        return len(rows)
+
+    async def _sync_global_addon_groups(self, db: Session, addon_groups_data: List[Dict], attributes_map: Dict,
+                                        maps: PosEntityMaps) -> tuple[int, int]:
+        """Upsert global addon group entities and their items"""
+        group_rows = [
+            {
+                "name": group_data["addongroup_name"],
+                "display_name": group_data["addongroup_name"],
+                "is_active": group_data["active"] == "1",
+                "priority": int(group_data.get("addongroup_rank", 0)),
+                "external_group_id": group_data["addongroupid"],
+                "external_data": group_data,
+                "pos_system_id": self.pos_system.id,
+            }
+            for group_data in addon_groups_data
+        ]
+        upsert_addon_groups(db, maps, group_rows)
 
-    async def _sync_items_with_relationships(self, db: Session, menu_data: Dict, attributes_map: Dict, categories_map: Dict) -> Dict[str, int]:
-        """Sync menu items and create their relationships"""
+        # Addon items reference the (possibly just created) groups by primary key
+        item_rows = [
+            {
+                "addon_group_id": maps.addon_groups[group_data["addongroupid"]],
+                "name": item_data["addonitem_name"],
+                "display_name": item_data["addonitem_name"],
+                "price": float(item_data["addonitem_price"]),
+                "is_active": item_data["active"] == "1",
+                "priority": int(item_data.get("addonitem_rank", 0)),
+                "tags": self._get_item_tags_from_attributes(attributes_map, item_data.get("attributes", "")),
+                "external_addon_id": item_data["addonitemid"],
+                "external_data": item_data,
+            }
+            for group_data in addon_groups_data
+            for item_data in group_data.get("addongroupitems", [])
+        ]
+        upsert_addon_items(db, item_rows)
+        return len(group_rows), len(item_rows)
+
+    async def _sync_items_with_relationships(self, db: Session, menu_data: Dict, attributes_map: Dict, categories_map: Dict,
+                                             maps: PosEntityMaps) -> Dict[str, int]:
+        """Sync menu items, then their variation / addon links, one batched statement per table"""
         items_data = menu_data.get("items", [])
-        items_synced = 0
-        item_variations_synced = 0
-        item_addons_synced = 0
-        
+        sync_menu_items(
+            db, maps,
+            [self._menu_item_row(item_data, attributes_map, categories_map) for item_data in items_data],
+            self.MENU_ITEM_UPDATE_COLUMNS,
+        )
+
+        item_variation_rows, item_addon_rows = [], []
         for item_data in items_data:
-            # Create or update the main menu item
-            menu_item = await self._sync_menu_item(db, item_data, attributes_map, categories_map)
-            items_synced += 1
-            
+            menu_item_id = maps.menu_items[item_data["itemid"]]
             # Create item-variation relationships if allowed and present
-            if getattr(menu_item, 'itemallowvariation') and item_data.get("variation"):
-                item_variations_synced += await self._sync_item_variations(db, item_data, menu_item)
-            
+            if item_data.get("itemallowvariation", "0") == "1" and item_data.get("variation"):
+                item_variation_rows.extend(self._item_variation_rows(item_data, menu_item_id, maps))
             # Create item-addon relationships if allowed and present
-            if getattr(menu_item, 'itemallowaddon') and item_data.get("addon"):
-                item_addons_synced += await self._sync_item_addons(db, item_data, menu_item)
-        
+            if item_data.get("itemallowaddon", "0") == "1" and item_data.get("addon"):
+                item_addon_rows.extend(self._item_addon_rows(item_data, menu_item_id, maps))
+
+        upsert_item_variations(db, item_variation_rows, ["price", "is_active", "priority", "external_id", "external_data"])
+        upsert_item_addons(db, item_addon_rows, ["min_selection", "max_selection", "is_active"])
         return {
-            "items_synced": items_synced,
-            "item_variations_synced": item_variations_synced,
-            "item_addons_synced": item_addons_synced
+            "items_synced": len(items_data),
+            "item_variations_synced": len(item_variation_rows),
+            "item_addons_synced": len(item_addon_rows)
         }
 
-    async def _sync_menu_item(self, db: Session, item_data: Dict, attributes_map: Dict, categories_map: Dict) -> MenuItem:
-        """Create or update a menu item"""
-        # Check if item exists
-        existing_item = db.execute(
-            select(MenuItem).where(
-                MenuItem.restaurant_id == self.pos_system.restaurant_id,
-                MenuItem.external_id == item_data["itemid"]
-            )
-        ).scalar_one_or_none()
-        
+    # MenuItem columns a re-sync overwrites (public_id and pos_system_id are set on creation only)
+    MENU_ITEM_UPDATE_COLUMNS = [
+        "name", "category_brief", "group_category", "description", "price", "image_path", "veg_flag",
+        "is_active", "tags", "priority", "external_data", "itemallowvariation", "itemallowaddon",
+    ]
+
+    def _menu_item_row(self, item_data: Dict, attributes_map: Dict, categories_map: Dict) -> Dict[str, Any]:
+        """MenuItem column values of a PetPooja item"""
         # Get item tags
-        tags = item_data.get("item_tags", [])
+        tags = list(item_data.get("item_tags", []))
         if item_data.get("item_attributeid"):
             attr_name = attributes_map.get(item_data["item_attributeid"])
             if attr_name:
@@ -274,142 +216,66 @@ class PetPoojaIntegration(POSInterface):
         # Get category name
         category_name = categories_map.get(item_data["item_categoryid"], "")
         
-        if existing_item:
-            # Update existing item
-            setattr(existing_item, 'name', item_data["itemname"])
-            setattr(existing_item, 'category_brief', category_name)
-            setattr(existing_item, 'group_category', category_name)
-            setattr(existing_item, 'description', item_data.get("itemdescription", ""))
-            setattr(existing_item, 'price', float(item_data["price"]))
-            setattr(existing_item, 'image_path', item_data.get("item_image_url", ""))
-            setattr(existing_item, 'veg_flag', item_data.get("item_attributeid") == "1")
-            setattr(existing_item, 'is_active', item_data["active"] == "1")
-            setattr(existing_item, 'tags', tags)
-            setattr(existing_item, 'priority', int(item_data.get("itemrank", 0)))
-            setattr(existing_item, 'external_data', item_data)
-            setattr(existing_item, 'itemallowvariation', item_data.get("itemallowvariation", "0") == "1")
-            setattr(existing_item, 'itemallowaddon', item_data.get("itemallowaddon", "0") == "1")
-            return existing_item
-        else:
-            # Create new item
-            menu_item = MenuItem(
-                public_id=str(uuid4())[0:8],
-                restaurant_id=self.pos_system.restaurant_id,
-                name=item_data["itemname"],
-                category_brief=category_name,
-                group_category=category_name,
-                description=item_data.get("itemdescription", ""),
-                price=float(item_data["price"]),
-                image_path=item_data.get("item_image_url", ""),
-                veg_flag=item_data.get("item_attributeid") == "1",
-                is_active=item_data["active"] == "1",
-                tags=tags,
-                priority=int(item_data.get("itemrank", 0)),
-                external_id=item_data["itemid"],
-                external_data=item_data,
-                itemallowvariation=item_data.get("itemallowvariation", "0") == "1",
-                itemallowaddon=item_data.get("itemallowaddon", "0") == "1",
-                pos_system_id=self.pos_system.id
-            )
-            db.add(menu_item)
-            return menu_item
+        return {
+            "public_id": str(uuid4())[0:8],
+            "restaurant_id": self.pos_system.restaurant_id,
+            "name": item_data["itemname"],
+            "category_brief": category_name,
+            "group_category": category_name,
+            "description": item_data.get("itemdescription", ""),
+            "price": float(item_data["price"]),
+            "image_path": item_data.get("item_image_url", ""),
+            "veg_flag": item_data.get("item_attributeid") == "1",
+            "is_active": item_data["active"] == "1",
+            "tags": tags,
+            "priority": int(item_data.get("itemrank", 0)),
+            "external_id": item_data["itemid"],
+            "external_data": item_data,
+            "itemallowvariation": item_data.get("itemallowvariation", "0") == "1",
+            "itemallowaddon": item_data.get("itemallowaddon", "0") == "1",
+            "pos_system_id": self.pos_system.id,
+        }
 
-    async def _sync_item_variations(self, db: Session, item_data: Dict, menu_item: MenuItem) -> int:
-        """Create item-variation relationships"""
-        synced_count = 0
-        
+    def _item_variation_rows(self, item_data: Dict, menu_item_id: int, maps: PosEntityMaps) -> List[Dict[str, Any]]:
+        """Item-variation link rows (variations missing from the sync are skipped)"""
+        rows = []
         for var_data in item_data["variation"]:
             # Find the global variation by external_variation_id
-            global_variation = db.execute(
-                select(Variation).where(
-                    Variation.pos_system_id == self.pos_system.id,
-                    Variation.external_variation_id == var_data["variationid"]
-                )
-            ).scalar_one_or_none()
-            
-            if not global_variation:
-                logger.info(f"Warning: Global variation {var_data['variationid']} not found for item {menu_item.name}")
+            variation_id = maps.variations.get(var_data["variationid"])
+            if not variation_id:
+                logger.info(f"Warning: Global variation {var_data['variationid']} not found for item {item_data['itemname']}")
                 continue
-            
-            # Check if item-variation relationship exists
-            existing_item_variation = db.execute(
-                select(ItemVariation).where(
-                    ItemVariation.menu_item_id == menu_item.id,
-                    ItemVariation.variation_id == global_variation.id
-                )
-            ).scalar_one_or_none()
-            
-            if existing_item_variation:
-                # Update existing relationship
-                setattr(existing_item_variation, 'price', float(var_data["price"]))
-                setattr(existing_item_variation, 'is_active', var_data["active"] == "1")
-                setattr(existing_item_variation, 'priority', int(var_data.get("variationrank", 0)))
-                setattr(existing_item_variation, 'external_id', var_data["id"])  # variation.id for orders
-                setattr(existing_item_variation, 'external_data', var_data)
-            else:
-                # Create new item-variation relationship
-                item_variation = ItemVariation(
-                    menu_item_id=menu_item.id,
-                    variation_id=global_variation.id,
-                    price=float(var_data["price"]),
-                    is_active=var_data["active"] == "1",
-                    priority=int(var_data.get("variationrank", 0)),
-                    external_id=var_data["id"],  # variation.id for orders
-                    external_data=var_data
-                )
-                db.add(item_variation)
-            
-            synced_count += 1
-        
-        return synced_count
+            rows.append({
+                "menu_item_id": menu_item_id,
+                "variation_id": variation_id,
+                "price": float(var_data["price"]),
+                "is_active": var_data["active"] == "1",
+                "priority": int(var_data.get("variationrank", 0)),
+                "external_id": var_data["id"],  # variation.id for orders
+                "external_data": var_data,
+            })
+        return rows
 
-    async def _sync_item_addons(self, db: Session, item_data: Dict, menu_item: MenuItem) -> int:
-        """Create item-addon relationships"""
-        synced_count = 0
-        
+    def _item_addon_rows(self, item_data: Dict, menu_item_id: int, maps: PosEntityMaps) -> List[Dict[str, Any]]:
+        """Item-addon link rows (addon groups missing from the sync are skipped)"""
+        rows = []
         for addon_ref in item_data["addon"]:
             addon_group_id = addon_ref["addon_group_id"]
             
             # Find the global addon group by external_group_id
-            global_addon_group = db.execute(
-                select(AddonGroup).where(
-                    AddonGroup.pos_system_id == self.pos_system.id,
-                    AddonGroup.external_group_id == addon_group_id
-                )
-            ).scalar_one_or_none()
-            
-            if not global_addon_group:
-                logger.info(f"Warning: Global addon group {addon_group_id} not found for item {menu_item.name}")
+            global_addon_group_id = maps.addon_groups.get(addon_group_id)
+            if not global_addon_group_id:
+                logger.info(f"Warning: Global addon group {addon_group_id} not found for item {item_data['itemname']}")
                 continue
-            
-            # Check if item-addon relationship exists
-            existing_item_addon = db.execute(
-                select(ItemAddon).where(
-                    ItemAddon.menu_item_id == menu_item.id,
-                    ItemAddon.addon_group_id == global_addon_group.id
-                )
-            ).scalar_one_or_none()
-            
-            if existing_item_addon:
-                # Update existing relationship
-                setattr(existing_item_addon, 'min_selection', int(addon_ref.get("addon_item_selection_min", 0)))
-                setattr(existing_item_addon, 'max_selection', int(addon_ref.get("addon_item_selection_max", 999)))
-                setattr(existing_item_addon, 'is_active', True)
-            else:
-                # Create new item-addon relationship
-                item_addon = ItemAddon(
-                    menu_item_id=menu_item.id,
-                    addon_group_id=global_addon_group.id,
-                    min_selection=int(addon_ref.get("addon_item_selection_min", 0)),
-                    max_selection=int(addon_ref.get("addon_item_selection_max", 999)),
-                    is_active=True,
-                    priority=0
-                )
-                db.add(item_addon)
-            
-            synced_count += 1
-        
-        return synced_count
+            rows.append({
+                "menu_item_id": menu_item_id,
+                "addon_group_id": global_addon_group_id,
+                "min_selection": int(addon_ref.get("addon_item_selection_min", 0)),
+                "max_selection": int(addon_ref.get("addon_item_selection_max", 999)),
+                "is_active": True,
+                "priority": 0,
+            })
+        return rows
 
     def _get_item_tags_from_attributes(self, attributes_map: Dict, attributes_str: str) -> List[str]:
         """Convert PetPooja attributes to tags"""
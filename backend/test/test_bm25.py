@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for the CSR BM25 engine (recommender/bm25.py).
+Builds a tiny index in a temp directory and checks scores against the BM25 formula.
+"""
+
+import math
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from recommender.bm25 import tokenize, build_bm25_arrays, save_bm25_index, get_bm25_index
+
+DOCS = [
+    "Paneer Tikka - smoky cottage cheese, grilled",
+    "Chicken Tikka Masala",
+    "Garlic Naan",
+    "Butter Naan",
+    "Mango Lassi",
+]
+IDS = ["p1", "p2", "p3", "p4", "p5"]
+
+
+def reference_score(query, corpus, doc, k1=1.5, b=0.75, epsilon=0.25):
+    """Straight BM25Okapi formula, one document at a time."""
+    n = len(corpus)
+    avgdl = sum(len(d) for d in corpus) / n
+    df = {}
+    for d in corpus:
+        for t in set(d):
+            df[t] = df.get(t, 0) + 1
+    idf = {t: math.log(n - c + 0.5) - math.log(c + 0.5) for t, c in df.items()}
+    floor = epsilon * sum(idf.values()) / len(idf)
+    idf = {t: (v if v >= 0 else floor) for t, v in idf.items()}
+    score = 0.0
+    for t in query:
+        tf = doc.count(t)
+        if t in idf:
+            score += idf[t] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avgdl))
+    return score
+
+
+def test_tokenize():
+    assert tokenize("Paneer Tikka - smoky, GRILLED!") == ["paneer", "tikka", "smoky", "grilled"]
+
+
+def test_scores_match_formula():
+    corpus = [tokenize(d) for d in DOCS]
+    with tempfile.TemporaryDirectory() as tmp:
+        save_bm25_index("demo", DOCS, IDS, index_dir=Path(tmp))
+        index = get_bm25_index("demo", index_dir=Path(tmp))
+        for query in ["tikka", "garlic naan", "naan naan", "lassi tikka"]:
+            scores = index.get_scores(query)
+            expected = [reference_score(tokenize(query), corpus, d) for d in corpus]
+            assert np.allclose(scores, expected, atol=1e-5), (query, scores, expected)
+
+
+def test_search_ranking():
+    with tempfile.TemporaryDirectory() as tmp:
+        save_bm25_index("demo", DOCS, IDS, index_dir=Path(tmp))
+        index = get_bm25_index("demo", index_dir=Path(tmp))
+        results = index.search("garlic naan", limit=2)
+        assert [pid for pid, _ in results] == ["p3", "p4"]
+        assert index.search("biryani") == []
+
+
+def test_rebuild_switches_generation():
+    with tempfile.TemporaryDirectory() as tmp:
+        save_bm25_index("demo", DOCS, IDS, index_dir=Path(tmp))
+        assert get_bm25_index("demo", index_dir=Path(tmp)).search("lassi")[0][0] == "p5"
+        save_bm25_index("demo", DOCS[:2], IDS[:2], index_dir=Path(tmp))
+        save_bm25_index("demo", ["Mango Lassi"], ["m1"], index_dir=Path(tmp))
+        index = get_bm25_index("demo", index_dir=Path(tmp))
+        assert len(index) == 1 and index.search("lassi")[0][0] == "m1"
+        # The live generation and the one before it are kept, older ones removed
+        generations = [p for p in (Path(tmp) / "demo_bm25").iterdir() if p.is_dir()]
+        assert len(generations) == 2
+
+
+def test_missing_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "demo_bm25.pkl").write_bytes(b"")
+        assert get_bm25_index("demo", index_dir=Path(tmp)) is None
+
+
+def test_empty_vocab_arrays():
+    arrays = build_bm25_arrays([])
+    assert arrays["indptr"].tolist() == [0]
+
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_scores_match_formula()
+    test_search_ranking()
+    test_rebuild_switches_generation()
+    test_missing_index()
+    test_empty_vocab_arrays()
+    print("✅ All BM25 tests passed")
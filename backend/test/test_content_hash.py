@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for re-onboarding content hashes (common/content_hash.py).
+Replays the onboarding flow against an in-memory "menu_items" table and checks
+that an item whose push to Qdrant failed is embedded again on the next run.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.content_hash import menu_item_content_hash, unchanged_public_ids, provisional_content_hashes
+
+
+def onboard(stored: dict, menu: dict, push_ok: bool) -> list:
+    """One seed_folder run over {public_id: description}. Returns the embedded ids; updates `stored` in place."""
+    ids = list(menu)
+    hashes = [menu_item_content_hash(pid, "Mains", "Food", menu[pid]) for pid in ids]
+    unchanged = set(unchanged_public_ids(ids, hashes, stored))
+    changed = [pid not in unchanged for pid in ids]
+
+    # Postgres commit before the push
+    stored.clear()
+    stored.update({pid: h for pid, h in zip(ids, provisional_content_hashes(hashes, changed)) if h})
+    if push_ok:
+        # commit_content_hashes after Qdrant succeeded
+        stored.update({pid: h for pid, h, is_changed in zip(ids, hashes, changed) if is_changed})
+    return [pid for pid, is_changed in zip(ids, changed) if is_changed]
+
+
+def test_first_run_embeds_everything():
+    stored = {}
+    assert onboard(stored, {"a": "Spicy", "b": "Mild"}, push_ok=True) == ["a", "b"]
+    assert onboard(stored, {"a": "Spicy", "b": "Mild"}, push_ok=True) == []
+
+
+def test_failed_push_is_retried():
+    stored = {}
+    onboard(stored, {"a": "Spicy", "b": "Mild"}, push_ok=True)
+
+    # "a" changed but its vector never reached Qdrant
+    assert onboard(stored, {"a": "Very spicy", "b": "Mild"}, push_ok=False) == ["a"]
+    assert "a" not in stored and "b" in stored
+    # The next run embeds it again instead of reusing the old vector
+    assert onboard(stored, {"a": "Very spicy", "b": "Mild"}, push_ok=True) == ["a"]
+    assert onboard(stored, {"a": "Very spicy", "b": "Mild"}, push_ok=True) == []
+
+
+def test_failed_first_onboarding():
+    stored = {}
+    assert onboard(stored, {"a": "Spicy"}, push_ok=False) == ["a"]
+    assert stored == {}
+    assert onboard(stored, {"a": "Spicy"}, push_ok=True) == ["a"]
+
+
+if __name__ == "__main__":
+    test_first_run_embeds_everything()
+    test_failed_push_is_retried()
+    test_failed_first_onboarding()
+    print("✅ All content hash tests passed")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the order co-occurrence model (services/cooccurrence_service.py).
+Counts a handful of baskets in memory and checks lift-scored pairings.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.cooccurrence_service import (
+    basket_from_payload, basket_counts, CooccurrenceModel, ORDER_COUNT
+)
+
+BASKETS = [
+    ["biryani", "raita"],
+    ["biryani", "raita", "coke"],
+    ["biryani", "raita"],
+    ["naan", "paneer"],
+    ["naan", "paneer", "coke"],
+    ["coke"],
+]
+
+
+def model_from_baskets(baskets):
+    counts = {}
+    for basket in baskets:
+        for key, n in basket_counts(sorted(set(basket))).items():
+            counts[key] = counts.get(key, 0) + n
+    pairs, item_counts, orders = {}, {}, 0
+    for (a, b), n in counts.items():
+        if a == ORDER_COUNT:
+            orders = n
+        elif a == b:
+            item_counts[a] = n
+        else:
+            pairs.setdefault(a, {})[b] = n
+    return CooccurrenceModel(pairs, item_counts, orders)
+
+
+def test_basket_from_payload():
+    payload = [
+        {"menu_item_pid": "b", "qty": 2},
+        {"menu_item_pid": "a", "qty": 1},
+        {"menu_item_pid": "b", "qty": 1},
+        {"name": "no id"},
+    ]
+    assert basket_from_payload(payload) == ["a", "b"]
+    assert basket_from_payload(None) == []
+
+
+def test_basket_counts_symmetric():
+    counts = basket_counts(["a", "b"])
+    assert counts == {(ORDER_COUNT, ORDER_COUNT): 1, ("a", "a"): 1, ("b", "b"): 1, ("a", "b"): 1, ("b", "a"): 1}
+
+
+def test_lift_pairings():
+    model = model_from_baskets(BASKETS)
+    # raita with biryani 3 times out of 6 orders, each ordered 3 times: lift = 3*6/(3*3) = 2
+    assert abs(model.lift("biryani", "raita") - 2.0) < 1e-9
+    pairings = model.pairings(["biryani"])
+    assert [pid for pid, _ in pairings] == ["raita"]
+    # coke co-occurs only once with biryani: below min support
+    assert "coke" not in dict(model.pairings(["biryani"]))
+    # cart items are never suggested back
+    assert model.pairings(["biryani", "raita"]) == []
+
+
+if __name__ == "__main__":
+    test_basket_from_payload()
+    test_basket_counts_symmetric()
+    test_lift_pairings()
+    print("✅ All co-occurrence tests passed")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for the onboarding media pipeline (common/media_pipeline.py).
+Runs the pipeline against a fake downloader and the local stub uploader, and
+checks retries and that a re-run after a failure only redoes unfinished rows.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.media_pipeline import MediaJob, MediaPipeline, LocalStubUploader, MANIFEST_NAME
+
+
+BROKEN_HOSTS = {"broken"}
+
+
+def fake_downloader(url, save_dir, base_filename):
+    if any(host in url for host in BROKEN_HOSTS):
+        return "", "unknown", False
+    path = Path(save_dir) / f"{base_filename}.jpg"
+    path.write_bytes(url.encode())
+    return str(path), "image", True
+
+
+class FlakyUploader(LocalStubUploader):
+    """Fails the first `failures` calls for every file."""
+
+    def __init__(self, directory, failures):
+        super().__init__(directory)
+        self.failures = failures
+        self.seen = {}
+
+    def __call__(self, file_path, item_name, restaurant_slug):
+        self.seen[file_path] = self.seen.get(file_path, 0) + 1
+        if self.seen[file_path] <= self.failures:
+            self.calls += 1
+            return None, None, False, "temporary error"
+        return super().__call__(file_path, item_name, restaurant_slug)
+
+
+def make_jobs(image_dir):
+    (Path(image_dir) / "local.jpg").write_bytes(b"local")
+    return [
+        MediaJob(0, "d1", "Paneer Tikka", "https://example.com/paneer.jpg", True),
+        MediaJob(1, "d2", "Dal", "https://example.com/broken.jpg", True),
+        MediaJob(2, "d3", "Naan", "local.jpg", False),
+        MediaJob(3, "d4", "Lassi", "missing.jpg", False),
+    ]
+
+
+def pipeline(image_dir, uploader):
+    return MediaPipeline(image_dir, "test-slug", uploader=uploader, downloader=fake_downloader,
+                         download_workers=2, upload_workers=2, backoff=0.0)
+
+
+def test_pipeline_downloads_and_uploads():
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / "images"
+        image_dir.mkdir()
+        uploader = FlakyUploader(Path(tmp) / "cf", failures=1)
+        results = {job.item_id: result for job, result in pipeline(str(image_dir), uploader).run(make_jobs(image_dir))}
+
+        assert results["d1"].image_path == "0_Paneer_Tikka.jpg"
+        assert results["d1"].cloudflare_image_id.startswith("stub-")
+        assert results["d2"].image_path is None and not results["d2"].done
+        assert results["d3"].cloudflare_image_id.startswith("stub-")
+        assert not results["d4"].done
+        # one failed + one successful attempt for each of the two uploads
+        assert uploader.calls == 4
+
+
+def test_rerun_resumes_from_manifest():
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / "images"
+        image_dir.mkdir()
+        jobs = make_jobs(image_dir)
+
+        # First run: uploads keep failing and the dead link fails; nothing is recorded
+        failing = FlakyUploader(Path(tmp) / "cf", failures=10)
+        results = dict((job.item_id, result) for job, result in pipeline(str(image_dir), failing).run(jobs))
+        assert not results["d1"].done and not results["d3"].done and not results["d2"].done
+        assert not (image_dir / MANIFEST_NAME).exists()
+
+        # Second run: the two unfinished uploads are redone and the dead link is tried again
+        uploader = LocalStubUploader(Path(tmp) / "cf")
+        results = dict((job.item_id, result) for job, result in pipeline(str(image_dir), uploader).run(jobs))
+        assert uploader.calls == 2
+        assert results["d2"].message == "download failed"
+        assert results["d1"].done and results["d3"].done
+
+        # Third run: nothing left to do
+        uploader = LocalStubUploader(Path(tmp) / "cf")
+        results = dict((job.item_id, result) for job, result in pipeline(str(image_dir), uploader).run(jobs))
+        assert uploader.calls == 0
+        assert results["d1"].cloudflare_image_id.startswith("stub-")
+
+
+def test_failed_download_retried_next_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / "images"
+        image_dir.mkdir()
+        jobs = [MediaJob(0, "d1", "Paneer Tikka", "https://flaky.example.com/paneer.jpg", True)]
+
+        # The host is down for the whole first run
+        BROKEN_HOSTS.add("flaky")
+        try:
+            results = dict((job.item_id, result) for job, result in pipeline(str(image_dir), LocalStubUploader(Path(tmp) / "cf")).run(jobs))
+        finally:
+            BROKEN_HOSTS.discard("flaky")
+        assert results["d1"].image_path is None and not results["d1"].done
+
+        # It is back: the row is downloaded and uploaded instead of "resumed" without media
+        uploader = LocalStubUploader(Path(tmp) / "cf")
+        results = dict((job.item_id, result) for job, result in pipeline(str(image_dir), uploader).run(jobs))
+        assert results["d1"].done and results["d1"].cloudflare_image_id.startswith("stub-")
+        assert uploader.calls == 1
+
+
+if __name__ == "__main__":
+    test_pipeline_downloads_and_uploads()
+    test_rerun_resumes_from_manifest()
+    test_failed_download_retried_next_run()
+    print("✅ All media pipeline tests passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the POS menu diff (services/pos/menu_diff.py).
+Checks which stored rows a payload adds, changes, removes or leaves alone, and
+that a re-sync of an identical payload is an empty diff.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.pos.menu_diff import MenuDiff, diff_entities, keyed, record
+
+COLUMNS = ["name", "price", "is_active", "tags"]
+
+
+def stored(pk, name, price, is_active=True, tags=None):
+    return {"id": pk, "external_id": name.lower(), "name": name, "price": price,
+            "is_active": is_active, "tags": tags or []}
+
+
+def payload_row(name, price, is_active=True, tags=None):
+    return {"external_id": name.lower(), "name": name, "price": price, "is_active": is_active,
+            "tags": tags or [], "public_id": "new"}
+
+
+def test_diff_entities():
+    current = keyed([
+        stored(1, "Dosa", 80.0),
+        stored(2, "Idli", 50.0),
+        stored(3, "Vada", 40.0),
+        stored(4, "Upma", 60.0, is_active=False),   # retired by an earlier sync
+        stored(5, "Poha", 45.0, tags=["veg"]),
+    ], ["external_id"])
+    incoming = keyed([
+        payload_row("Dosa", 80.0),                   # unchanged (public_id is not compared)
+        payload_row("Idli", 55.0),                   # price changed
+        payload_row("Poha", 45.0, tags=["veg", "spicy"]),
+        payload_row("Pongal", 70.0),                 # new
+    ], ["external_id"])
+
+    entity_diff = diff_entities(current, incoming, COLUMNS)
+    assert entity_diff.added == ["pongal"]
+    assert sorted(entity_diff.changed) == ["idli", "poha"]
+    assert entity_diff.removed == ["vada"]           # "upma" is already inactive
+    assert entity_diff.unchanged == 1
+    assert entity_diff.summary() == {"added": 1, "changed": 2, "removed": 1, "unchanged": 1}
+
+
+def test_reactivation_is_a_change():
+    current = keyed([stored(1, "Upma", 60.0, is_active=False)], ["external_id"])
+    incoming = keyed([payload_row("Upma", 60.0)], ["external_id"])
+    assert diff_entities(current, incoming, COLUMNS).changed == ["upma"]
+
+
+def test_identical_payload_is_empty():
+    rows = [stored(1, "Dosa", 80.0), stored(2, "Idli", 50.0)]
+    current = keyed(rows, ["external_id"])
+    incoming = keyed([{k: v for k, v in row.items() if k != "id"} for row in rows], ["external_id"])
+
+    menu_diff = MenuDiff()
+    record(menu_diff, "menu_items", diff_entities(current, incoming, COLUMNS))
+    record(menu_diff, "item_addons", diff_entities({}, {}, COLUMNS))
+    assert menu_diff.is_empty
+    assert menu_diff.menu_item_ids == []
+    assert menu_diff.report()["menu_items"]["unchanged"] == 2
+
+
+def test_composite_keys():
+    rows = [
+        {"menu_item_id": 1, "addon_group_id": 7, "min_selection": 0},
+        {"menu_item_id": 1, "addon_group_id": 7, "min_selection": 1},   # repeated key: last wins
+        {"menu_item_id": 2, "addon_group_id": 7, "min_selection": 0},
+    ]
+    by_key = keyed(rows, ["menu_item_id", "addon_group_id"])
+    assert list(by_key) == [(1, 7), (2, 7)]
+    assert by_key[(1, 7)]["min_selection"] == 1
+
+    current = {(1, 7): {"id": 10, "min_selection": 0, "is_active": True}}
+    entity_diff = diff_entities(current, by_key, ["min_selection"])
+    assert entity_diff.changed == [(1, 7)] and entity_diff.added == [(2, 7)]
+
+
+if __name__ == "__main__":
+    test_diff_entities()
+    test_reactivation_is_a_change()
+    test_identical_payload_is_empty()
+    test_composite_keys()
+    print("✅ All menu diff tests passed")
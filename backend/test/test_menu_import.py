@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for menu CSV validation (common/menu_import.py).
+Checks that every problem of an import is reported at once, that timings are
+judged like strptime("%H:%M") and that a 20k-row chain menu validates quickly.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.menu_import import (
+    MENU_REQUIRED_COLUMNS, CsvValidationError, bool_column, invalid_timing_mask,
+    validate_customisation_csvs, validate_menu_csv,
+)
+
+
+def menu_frame(n: int) -> pd.DataFrame:
+    df = pd.DataFrame({col: [""] * n for col in MENU_REQUIRED_COLUMNS})
+    df["id"] = [f"item{i}" for i in range(n)]
+    df["name"] = [f"Dish {i}" for i in range(n)]
+    df["price"] = 100
+    df["timing_start"] = "09:00"
+    df["timing_end"] = None
+    return df
+
+
+def test_valid_menu():
+    assert validate_menu_csv(menu_frame(10)) == []
+
+
+def test_missing_columns():
+    issues = validate_menu_csv(menu_frame(3).drop(columns=["price", "kind"]))
+    assert len(issues) == 1 and "price" in issues[0].message
+
+
+def test_all_issues_reported_at_once():
+    df = menu_frame(6)
+    df.loc[1, "id"] = None
+    df.loc[3, "id"] = "item2"
+    df.loc[4, "timing_start"] = "25:00"
+    df.loc[5, "timing_end"] = "9pm"
+    issues = {(issue.column, issue.message): issue for issue in validate_menu_csv(df)}
+
+    assert issues[("id", "Missing ID values")].rows == [1]
+    assert issues[("id", "Duplicate IDs found")].rows == [2, 3]
+    assert issues[("id", "Duplicate IDs found")].values == ["item2"]
+    assert issues[("timing_start", "Invalid time format (must be HH:MM)")].rows == [4]
+    assert issues[("timing_end", "Invalid time format (must be HH:MM)")].rows == [5]
+
+    error = CsvValidationError(list(issues.values()))
+    assert isinstance(error, ValueError)
+    assert "menu.csv[id]: Duplicate IDs found in rows [2, 3]" in str(error)
+
+
+def test_timing_mask():
+    series = pd.Series(["09:00", "9:5", " 23:59 ", "", None, "24:00", "12:60", "noon", "1200"])
+    assert invalid_timing_mask(series).tolist() == [False, False, False, False, False, True, True, True, True]
+
+
+def test_bool_column():
+    series = pd.Series(["TRUE", "yes", "1", "0", "no", None])
+    assert bool_column(series).tolist() == [True, True, True, False, False, True]
+    assert bool_column(series, default=False).tolist()[-1] is False
+
+
+def test_customisation_references():
+    frames = {
+        "variations.csv": pd.DataFrame({"id": ["v1", "v2"], "name": ["S", "L"],
+                                        "display_name": ["Small", "Large"], "group_name": ["Size", "Size"]}),
+        "addon_groups.csv": pd.DataFrame({"id": ["g1"], "name": ["Extras"], "display_name": ["Extras"]}),
+        "item_variations.csv": pd.DataFrame({"id": ["iv1", "iv2", "iv3"], "menu_item_id": ["item0", "item1", "nope"],
+                                             "variation_id": ["v1", "v3", "v2"], "price": [100, 120, None]}),
+        "item_variation_addons.csv": pd.DataFrame({"item_variation_id": ["iv1", "iv9"], "addon_group_id": ["g1", "g1"],
+                                                   "min_selection": [0, 0], "max_selection": [1, 1]}),
+    }
+    issues = validate_customisation_csvs(frames, ["item0", "item1"])
+    found = {(issue.file, issue.column): issue for issue in issues}
+
+    assert found[("item_variations.csv", "price")].rows == [2]
+    assert found[("item_variations.csv", "menu_item_id")].values == ["nope"]
+    assert found[("item_variations.csv", "variation_id")].values == ["v3"]
+    assert found[("item_variation_addons.csv", "item_variation_id")].values == ["iv9"]
+    assert ("item_variation_addons.csv", "addon_group_id") not in found
+
+
+def test_large_menu_validates_fast():
+    df = menu_frame(20_000)
+    df.loc[19_999, "id"] = "item0"
+    start = time.perf_counter()
+    issues = validate_menu_csv(df)
+    elapsed = time.perf_counter() - start
+    assert [issue.rows for issue in issues] == [[0, 19_999]]
+    assert elapsed < 2.0, f"validation took {elapsed:.2f}s"
+
+
+if __name__ == "__main__":
+    test_valid_menu()
+    test_missing_columns()
+    test_all_issues_reported_at_once()
+    test_timing_mask()
+    test_bool_column()
+    test_customisation_references()
+    test_large_menu_validates_fast()
+    print("✅ All menu import tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for background menu sync jobs (services/pos/menu_sync_jobs.py).
+Checks the payload hash used to dedupe retried pushes, the progress
+reported as a sync moves through its stages and that a run which lost its
+claim neither keeps applying nor records an outcome.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from types import SimpleNamespace
+
+from services.pos import menu_sync_jobs
+from services.pos.menu_diff import MenuDiff, EntityDiff, record
+from services.pos.menu_sync_jobs import SYNC_STAGES, payload_hash, stage_progress, run_job
+
+
+def test_payload_hash():
+    menu = {"items": [{"itemid": "1", "price": "80"}], "variations": [], "addongroups": []}
+    reordered = {"addongroups": [], "variations": [], "items": [{"price": "80", "itemid": "1"}]}
+    changed = {"items": [{"itemid": "1", "price": "90"}], "variations": [], "addongroups": []}
+
+    assert payload_hash(menu) == payload_hash(reordered)     # a retried push dedupes
+    assert payload_hash(menu) != payload_hash(changed)
+    assert len(payload_hash(menu)) == 64
+
+
+def test_stage_progress():
+    progress = [stage_progress(stage) for stage in SYNC_STAGES]
+    assert progress == sorted(progress) and progress[0] == 0 and progress[-1] < 100
+    assert stage_progress("unknown") == 0
+
+
+def test_tables_report_stages():
+    reached = []
+    menu_diff = MenuDiff(on_record=reached.append)
+    for table in SYNC_STAGES[1:-1]:
+        record(menu_diff, table, EntityDiff())
+    # Every table the sync diffs is a known stage, in order
+    assert reached == list(SYNC_STAGES[1:-1])
+
+
+class FakeSession:
+    def __init__(self, job):
+        self.job = job
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get(self, model, job_id):
+        return self.job
+
+
+def run_with_claim(claimed_until: int):
+    """run_job with a job whose claim is lost after `claimed_until` updates. Returns (status, stages, updates)."""
+    job = SimpleNamespace(public_id="job1", restaurant_id=1, pos_system_id=2, payload={"items": []}, attempts=2)
+    updates, stages = [], []
+
+    def update_job(job_id, attempt, **values):
+        updates.append((attempt, values))
+        return len(updates) <= claimed_until
+
+    def apply(restaurant_id, pos_system_id, payload, on_stage):
+        for stage in SYNC_STAGES:
+            on_stage(stage)
+            stages.append(stage)
+        return {"changed": 0}
+
+    original = menu_sync_jobs.SessionLocal, menu_sync_jobs._update_job
+    menu_sync_jobs.SessionLocal, menu_sync_jobs._update_job = (lambda: FakeSession(job)), update_job
+    try:
+        status = run_job(1, apply, heartbeat_interval=60)
+    finally:
+        menu_sync_jobs.SessionLocal, menu_sync_jobs._update_job = original
+    return status, stages, updates
+
+
+def test_run_job_claim():
+    status, stages, updates = run_with_claim(claimed_until=100)
+    assert status == "succeeded" and stages == list(SYNC_STAGES)
+    assert all(attempt == 2 for attempt, _ in updates)          # every write is under this run's claim
+    assert updates[-1][1]["status"] == "succeeded" and updates[-1][1]["payload"] is None
+
+    # Recovered as stale mid-sync: the run stops at its next stage and records nothing
+    status, stages, updates = run_with_claim(claimed_until=2)
+    assert status == "abandoned" and stages == list(SYNC_STAGES[:2])
+    assert not any("status" in values for _, values in updates)
+
+
+if __name__ == "__main__":
+    test_payload_hash()
+    test_stage_progress()
+    test_tables_report_stages()
+    test_run_job_claim()
+    print("✅ All menu sync job tests passed")
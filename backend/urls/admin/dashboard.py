@@ -16,6 +16,7 @@ from config import FRONTEND_URL, DEBUG_MODE
 import os
 
 from models.schema import ItemVariation, CartItemAddon, CartItemVariationAddon
+from services.pos.menu_sync_jobs import get_job, job_summary, recent_jobs
 from utils.addon_helpers import resolve_addon_context, build_selected_addon_responses
 
 # Setup templates
@@ -867,6 +868,39 @@ def resolve_waiter_request(
     )
 
 
+# ------------------------------------------------------------------------------------
+# Menu sync jobs (PetPooja menu pushes applied in the background)
+# ------------------------------------------------------------------------------------
+
+@router.get("/api/menu_sync_jobs", response_model=StandardResponse)
+def list_menu_sync_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    auth_data: dict = Depends(auth),
+    db: Session = Depends(get_db)
+):
+    """Recent menu sync jobs of the restaurant, newest first"""
+    restaurant = get_restaurant_by_slug(db, auth_data["restaurant_slug"])
+    jobs = recent_jobs(db, restaurant.id, limit)
+    return StandardResponse(success=True, data={"jobs": [job_summary(job) for job in jobs]})
+
+
+@router.get("/api/menu_sync_jobs/{job_id}", response_model=StandardResponse)
+def get_menu_sync_job(
+    job_id: str,
+    auth_data: dict = Depends(auth),
+    db: Session = Depends(get_db)
+):
+    """Status, progress and change report of one menu sync job"""
+    restaurant = get_restaurant_by_slug(db, auth_data["restaurant_slug"])
+    job = get_job(db, restaurant.id, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Menu sync job not found"
+        )
+    return StandardResponse(success=True, data=job_summary(job))
+
+
 # ------------------------------------------------------------------------------------
 # QR Code URL generator endpoint
 # ------------------------------------------------------------------------------------
@@ -16,6 +16,7 @@ from services.table_service import (
     enable_table_service, restore_table_service, move_table_service
 )
 from models.schema import WaiterRequest, Table, Member, Order, Session, Restaurant
+from services.cooccurrence_service import record_order_cooccurrence
 
 
 router = APIRouter()
@@ -646,6 +647,8 @@ async def approve_order_service(db, restaurant, order_id: str):
         
         if success:
             # Update order status
+            if order.status != "confirmed":
+                record_order_cooccurrence(db, order)
             order.status = "confirmed"
             order.confirmed_at = datetime.utcnow()
             order.pos_order_id = pos_order_id or order_id
@@ -844,6 +847,8 @@ async def edit_order_service(db, restaurant, order_id: str, updated_order: dict)
         
         if success:
             # Update order status
+            if order.status != "confirmed":
+                record_order_cooccurrence(db, order)
             order.status = "confirmed"
             order.confirmed_at = datetime.utcnow()
             order.pos_order_id = pos_order_id or order_id
@@ -960,6 +965,8 @@ async def retry_pos_service(db, restaurant, order_id: str):
         
         if success:
             # Update order status
+            if order.status != "confirmed":
+                record_order_cooccurrence(db, order)
             order.status = "confirmed"
             order.confirmed_at = datetime.utcnow()
             order.pos_order_id = pos_order_id or order_id
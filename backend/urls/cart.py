@@ -3,6 +3,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import text
 from sqlalchemy.orm import joinedload
 from datetime import datetime
+import asyncio
 import uuid
 import hashlib
 from loguru import logger
@@ -23,6 +24,7 @@ from models.cart_models import (
 from utils.jwt_utils import decode_ws_token
 from websocket.manager import connection_manager
 from utils.addon_helpers import resolve_addon_context, build_selected_addon_responses
+from recommender.session_feed import record_feed_event
 
 router = APIRouter()
 
@@ -382,6 +384,8 @@ async def create_cart_item(
             # Update session activity
             session.last_activity_at = datetime.utcnow()
             db.commit()
+
+            await asyncio.to_thread(record_feed_event, restaurant.slug, data.session_pid, menu_item.public_id, "cart_add")
             
             return CartItemCreateResponse(
                 data={"public_id": cart_item.public_id, "version": cart_item.version}
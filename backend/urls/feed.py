@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Path
+from pydantic import BaseModel
+from typing import Any, Dict, Literal, Optional
+
+from models.schema import SessionLocal, Session, Restaurant
+from recommender.session_feed import rank_feed, record_feed_event
+from urls.cart import verify_auth_and_get_member
+
+router = APIRouter()
+
+
+def verify_feed_session(restaurant_slug: str, session_pid: str, authorization: str) -> None:
+    """The caller must hold a table token for an active session of this restaurant."""
+    verify_auth_and_get_member(authorization, session_pid)
+    with SessionLocal() as db:
+        session = (
+            db.query(Session)
+            .join(Restaurant, Restaurant.id == Session.restaurant_id)
+            .filter(Session.public_id == session_pid, Restaurant.slug == restaurant_slug)
+            .first()
+        )
+        if not session or session.state != 'active':
+            raise HTTPException(
+                status_code=410,
+                detail={"success": False, "code": "session_closed", "detail": "Session is closed"}
+            )
+
+
+class FeedEvent(BaseModel):
+    session_pid: str
+    menu_item_id: str          # dish public id
+    event: Literal["view", "cart_add"]
+
+
+@router.get("/restaurants/{restaurant_slug}/feed/", summary="Personalized 'For you' feed")
+def read_feed(
+    restaurant_slug: str = Path(..., description="Restaurant slug"),
+    session_pid: str = Query(..., description="Table session public id"),
+    is_veg: Optional[bool] = None,
+    price_cap: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=100),
+    authorization: str = Header(..., alias="Authorization"),
+) -> Dict[str, Any]:
+    """
+    Dishes ranked by the session's taste vector, best first.
+
+    Ranking runs against the restaurant's in-process vector matrix, so the
+    frontend can call this whenever the cart changes. Sessions without any
+    views or cart adds yet get `personalized: false` and no items; the menu's
+    own Recommendations order applies.
+    """
+    verify_feed_session(restaurant_slug, session_pid, authorization)
+    ranked = rank_feed(restaurant_slug, session_pid, limit, is_veg, price_cap)
+    return {
+        "personalized": ranked is not None,
+        "items": [{"id": public_id, "score": round(score, 4)} for public_id, score in ranked or []],
+    }
+
+
+@router.post("/restaurants/{restaurant_slug}/feed/events", summary="Record a dish view or cart add")
+def post_feed_event(
+    event: FeedEvent,
+    restaurant_slug: str = Path(..., description="Restaurant slug"),
+    authorization: str = Header(..., alias="Authorization"),
+) -> Dict[str, Any]:
+    verify_feed_session(restaurant_slug, event.session_pid, authorization)
+    return {"ok": record_feed_event(restaurant_slug, event.session_pid, event.menu_item_id, event.event)}
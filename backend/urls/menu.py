@@ -9,7 +9,8 @@ from models.schema import (
     SessionLocal, Restaurant, MenuItem as MenuItemModel,
     ItemVariation, Variation, AddonGroup, AddonGroupItem, ItemAddon, ItemVariationAddon
 )
-from config import rdb, DEBUG_MODE
+from config import rdb, DEBUG_MODE, logger
+from recommender.session_feed import order_by_session
 
 router = APIRouter()
 
@@ -185,7 +186,18 @@ def read_menu(
                 for item in promoted_items_db
             ]
 
-            random.shuffle(promoted_items)
+            # Sessions with views / cart adds see their closest dishes first
+            try:
+                ranked_ids = order_by_session(restaurant_slug, session_id, [item.id for item in promoted_items])
+            except Exception as e:
+                # Personalization must never break the menu
+                logger.warning(f"Could not personalize Recommendations for {restaurant_slug}: {e}")
+                ranked_ids = None
+            if ranked_ids is None:
+                random.shuffle(promoted_items)
+            else:
+                position = {public_id: rank for rank, public_id in enumerate(ranked_ids)}
+                promoted_items.sort(key=lambda item: position[item.id])
 
             # Fetch all other items excluding promoted ones
             regular_query = db.query(MenuItemModel).options(
@@ -8,6 +8,9 @@ import re
 
 from models.schema import SessionLocal, MenuItem, Restaurant
 from .auth import get_restaurant_from_auth
+from common.menu_version import bump_menu_version
+from recommender.answer_cache import schedule_starter_warmup, WARMUP_DELAY_SECONDS
+from common.qdrant_utils import sync_menu_item_payloads
 
 router = APIRouter()
 
@@ -243,6 +246,8 @@ def create_menu_item(
             db.add(menu_item)
             db.commit()
             db.refresh(menu_item)
+            bump_menu_version(restaurant.slug)
+            schedule_starter_warmup(restaurant.slug, delay=WARMUP_DELAY_SECONDS)
             
             logger.info(f"✅ Created menu item: {menu_item.name} (ID: {public_id}, External ID: {external_id})")
             
@@ -282,6 +287,9 @@ def update_menu_item(
                 setattr(menu_item, field, value)
             
             db.commit()
+            bump_menu_version(restaurant.slug)
+            schedule_starter_warmup(restaurant.slug, delay=WARMUP_DELAY_SECONDS)
+            sync_menu_item_payloads(restaurant.slug, [menu_item])
             
             logger.info(f"✅ Updated menu item: {menu_item.name} (ID: {public_id})")
             
@@ -319,6 +327,9 @@ def toggle_menu_item_active(
             # Toggle active status
             menu_item.is_active = not menu_item.is_active
             db.commit()
+            bump_menu_version(restaurant.slug)
+            schedule_starter_warmup(restaurant.slug, delay=WARMUP_DELAY_SECONDS)
+            sync_menu_item_payloads(restaurant.slug, [menu_item])
             
             status_msg = "activated" if menu_item.is_active else "deactivated"
             logger.info(f"✅ {status_msg.capitalize()} menu item: {menu_item.name} (ID: {public_id})")
@@ -16,6 +16,8 @@ from pathlib import Path
 from models.schema import SessionLocal, MenuItem, Restaurant
 from .auth import get_restaurant_from_auth
 from .embeddings import generate_embeddings_for_menu_item
+from common.menu_version import bump_menu_version
+from recommender.answer_cache import schedule_starter_warmup, WARMUP_DELAY_SECONDS
 from common.utils import is_url, is_instagram_url, is_google_drive_url, download_instagram_content, download_google_drive_content, download_url_content
 from common.cloudflare_utils import upload_media_to_cloudflare
 
@@ -270,6 +272,8 @@ async def update_menu_item_media(
                 
                 # Commit database changes first
                 db.commit()
+                bump_menu_version(restaurant.slug)
+                schedule_starter_warmup(restaurant.slug, delay=WARMUP_DELAY_SECONDS)
                 
                 # Generate embeddings after successful database update
                 embedding_success = await generate_embeddings_for_menu_item(menu_item.id)
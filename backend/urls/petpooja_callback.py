@@ -5,8 +5,9 @@ Handles order status updates from PetPooja POS system via webhook callbacks.
 Maps status values and updates internal order records.
 """
 
+import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from fastapi import APIRouter, Request, HTTPException, Header, Depends
 from fastapi.responses import JSONResponse
@@ -19,6 +20,16 @@ from models.schema import (
 )
 from config import logger
 from utils.general import new_id
+from common.menu_version import bump_menu_version
+from recommender.answer_cache import schedule_starter_warmup, WARMUP_DELAY_SECONDS
+from services.cooccurrence_service import record_order_cooccurrence
+from common.qdrant_utils import sync_menu_item_payloads
+from services.pos.menu_sync_jobs import MenuSyncWorker, enqueue_menu_sync
+from services.pos.menu_diff import MenuDiff, diff_entities, keyed, load_current_rows, rows_for, ids_for, deactivate, record
+from services.pos.bulk_sync import (
+    PosEntityMaps, sync_menu_items, upsert_variations, upsert_addon_groups,
+    upsert_addon_items, upsert_item_variations, upsert_item_addons, upsert_item_variation_addons,
+)
 
 router = APIRouter(prefix="/pp_callback", tags=["petpooja_callback"])
 
@@ -122,6 +133,7 @@ async def update_order_status(order: Order, new_status: str, callback_data: Dict
         setattr(order, 'confirmed_at', current_time)
         logger.info(f"Order {order.public_id} confirmed at {current_time}")
         setattr(order, 'status', new_status)
+        record_order_cooccurrence(db, order)
     
     elif new_status in ["failed", "cancelled"] and str(old_status) not in ["failed", "cancelled"]:
         setattr(order, 'failed_at', current_time)
@@ -313,6 +325,7 @@ async def item_switch(
 
     updated_ids = []
     not_found_ids = []
+    switched_items = []
 
     if switch_type == "item":
         from models.schema import MenuItem
@@ -324,6 +337,7 @@ async def item_switch(
             if item:
                 setattr(item, "is_active", in_stock)
                 updated_ids.append(ext_id)
+                switched_items.append(item)
                 logger.info(f"Set MenuItem {ext_id} is_active={in_stock}")
             else:
                 not_found_ids.append(ext_id)
@@ -345,6 +359,9 @@ async def item_switch(
         raise HTTPException(status_code=400, detail="type must be 'item' or 'addon'")
 
     db.commit()
+    bump_menu_version(restaurant_slug)
+    schedule_starter_warmup(restaurant_slug, delay=WARMUP_DELAY_SECONDS)
+    sync_menu_item_payloads(restaurant_slug, switched_items)
 
     return JSONResponse(
         status_code=200,
@@ -414,11 +431,12 @@ async def set_store_status(
 @router.post("/{restaurant_slug}/sync_menu", summary="PetPooja Menu Sync")
 async def sync_menu(restaurant_slug: str, request: Request):
     """
-    Sync complete menu data from PetPooja POS system.
+    Receive complete menu data from PetPooja POS system.
     
-    This endpoint receives full menu data from PetPooja and updates all
-    related database entities: MenuItem, Variation, AddonGroup, AddonGroupItem,
-    ItemVariation, ItemAddon, ItemVariationAddon.
+    The payload is validated and queued as a MenuSyncJob; the menu sync worker
+    then updates MenuItem, Variation, AddonGroup, AddonGroupItem, ItemVariation,
+    ItemAddon and ItemVariationAddon in the background (see apply_menu_sync).
+    A retried push with the same payload is not queued twice.
     
     Returns success/error response in PetPooja format.
     """
@@ -430,7 +448,7 @@ async def sync_menu(restaurant_slug: str, request: Request):
             logger.error(f"Invalid JSON payload for menu sync: {e}")
             return {"success": "0", "message": "Invalid JSON payload"}
         
-        logger.info(f"Starting menu sync for restaurant {restaurant_slug}")
+        logger.info(f"Received menu sync for restaurant {restaurant_slug}")
         
         # Validate input structure
         if not payload or not isinstance(payload, dict):
@@ -441,39 +459,12 @@ async def sync_menu(restaurant_slug: str, request: Request):
         if missing_keys:
             return {"success": "0", "message": f"Missing required keys: {missing_keys}"}
         
-        # Process menu sync in single transaction
-        with SessionLocal() as db:
-            try:
-                # Find restaurant
-                restaurant = find_restaurant_by_slug(restaurant_slug, db)
-                restaurant_id = int(restaurant.id)
-                
-                # Validate POS system
-                pos_system = validate_petpooja_pos_system(restaurant_id, db)
-                pos_system_id = int(pos_system.id)
-                
-                # Update POS system config with taxes and discounts
-                update_pos_system_config(pos_system, payload, db)
-                
-                # Deactivate all existing entities
-                deactivate_all_entities(restaurant_id, pos_system_id, db)
-                
-                # Process core entities
-                stats = process_menu_entities(payload, restaurant_id, pos_system_id, db)
-                
-                # Process relationships
-                process_menu_relationships(payload, restaurant_id, pos_system_id, db)
-                
-                # Commit all changes
-                db.commit()
-                
-                logger.info(f"Menu sync completed successfully for {restaurant_slug}. Stats: {stats}")
-                return {"success": "1", "message": "Menu items are successfully listed."}
-                
-            except Exception as e:
-                # Transaction will auto-rollback
-                db.rollback()
-                raise e
+        # Store the payload as a job (DB work off the event loop) and let the worker apply it
+        job_id, created = await asyncio.to_thread(queue_menu_sync, restaurant_slug, payload)
+        if created:
+            menu_sync_worker.wake()
+        logger.info(f"Menu sync for {restaurant_slug} {'queued' if created else 'already queued/applied'} as job {job_id}")
+        return {"success": "1", "message": "Menu items are successfully listed."}
         
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -483,6 +474,59 @@ async def sync_menu(restaurant_slug: str, request: Request):
         return {"success": "0", "message": str(e)}
 
 
+def queue_menu_sync(restaurant_slug: str, payload: Dict[str, Any]) -> Tuple[str, bool]:
+    """Validate the restaurant / POS system and queue the push. Returns (job public_id, created)."""
+    with SessionLocal() as db:
+        restaurant = find_restaurant_by_slug(restaurant_slug, db)
+        pos_system = validate_petpooja_pos_system(int(restaurant.id), db)
+        job, created = enqueue_menu_sync(db, int(restaurant.id), int(pos_system.id), payload)
+        return job.public_id, created
+
+
+def apply_menu_sync(restaurant_id: int, pos_system_id: int, payload: Dict[str, Any],
+                    on_stage: Callable[[str], None]) -> Dict[str, Any]:
+    """Apply a queued PetPooja menu push in one transaction (run by the menu sync worker).
+
+    Returns the per-table change report stored on the job.
+    """
+    with SessionLocal() as db:
+        try:
+            restaurant_slug = db.get(Restaurant, restaurant_id).slug
+            pos_system = db.get(POSSystem, pos_system_id)
+            
+            # Update POS system config with taxes and discounts
+            on_stage("config")
+            update_pos_system_config(pos_system, payload, db)
+            
+            # Diff the payload against the stored menu and write only what changed
+            menu_diff = sync_menu_diff(payload, restaurant_id, pos_system_id, db, on_table=on_stage)
+            
+            # Commit all changes
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        # Caches and Qdrant payloads only need a refresh when something changed
+        if not menu_diff.is_empty:
+            bump_menu_version(restaurant_slug)
+            schedule_starter_warmup(restaurant_slug, delay=WARMUP_DELAY_SECONDS)
+        if menu_diff.menu_item_ids:
+            on_stage("search_index")
+            sync_menu_item_payloads(
+                restaurant_slug,
+                db.query(MenuItem).filter(MenuItem.id.in_(menu_diff.menu_item_ids)).all()
+            )
+    
+    stats = menu_diff.report()
+    logger.info(f"Menu sync completed successfully for {restaurant_slug}. Stats: {stats}")
+    return stats
+
+
+# Applies queued menu syncs in the background (started in main.py's lifespan)
+menu_sync_worker = MenuSyncWorker(apply_menu_sync)
+
+
 def validate_petpooja_pos_system(restaurant_id: int, db: Session) -> POSSystem:
     """Validate that restaurant has a PetPooja POS system."""
     pos_system = db.query(POSSystem).filter_by(
@@ -534,155 +578,113 @@ def update_pos_system_config(pos_system: POSSystem, payload: Dict[str, Any], db:
     logger.info(f"Updated POS config with {len(processed_taxes)} taxes and {len(discount_data)} discounts")
 
 
-def deactivate_all_entities(restaurant_id: int, pos_system_id: int, db: Session):
-    """Set all existing menu entities as inactive to prepare for sync."""
-    logger.info("Deactivating existing menu entities")
-    
-    # Get all menu items for this restaurant
-    menu_item_ids = [
-        item.id for item in db.query(MenuItem.id).filter_by(restaurant_id=restaurant_id).all()
-    ]
-    
-    # Get all addon group ids for this POS system
-    addon_group_ids = [
-        ag.id for ag in db.query(AddonGroup.id).filter_by(pos_system_id=pos_system_id).all()
-    ]
-    
-    # Get all item variation ids for menu items
-    item_variation_ids = []
-    if menu_item_ids:
-        item_variation_ids = [
-            iv.id for iv in db.query(ItemVariation.id).filter(
-                ItemVariation.menu_item_id.in_(menu_item_ids)
-            ).all()
-        ]
-    
-    # Deactivate menu items
-    db.query(MenuItem).filter_by(restaurant_id=restaurant_id).update({"is_active": False})
-    
-    # Deactivate variations
-    db.query(Variation).filter_by(pos_system_id=pos_system_id).update({"is_active": False})
-    
-    # Deactivate addon groups
-    db.query(AddonGroup).filter_by(pos_system_id=pos_system_id).update({"is_active": False})
-    
-    # Deactivate addon group items
-    if addon_group_ids:
-        db.query(AddonGroupItem).filter(
-            AddonGroupItem.addon_group_id.in_(addon_group_ids)
-        ).update({"is_active": False})
-    
-    # Deactivate item variations
-    if menu_item_ids:
-        db.query(ItemVariation).filter(
-            ItemVariation.menu_item_id.in_(menu_item_ids)
-        ).update({"is_active": False})
-    
-    # Deactivate item addons  
-    if menu_item_ids:
-        db.query(ItemAddon).filter(
-            ItemAddon.menu_item_id.in_(menu_item_ids)
-        ).update({"is_active": False})
-    
-    # Deactivate item variation addons
-    if item_variation_ids:
-        db.query(ItemVariationAddon).filter(
-            ItemVariationAddon.item_variation_id.in_(item_variation_ids)
-        ).update({"is_active": False})
-    
-    db.flush()
-    logger.info("Deactivated all existing menu entities")
-
-
-def process_menu_entities(payload: Dict[str, Any], restaurant_id: int, pos_system_id: int, db: Session) -> Dict[str, int]:
-    """Process core menu entities from PetPooja data."""
-    stats = {
-        "items_created": 0,
-        "items_updated": 0,
-        "variations_created": 0,
-        "variations_updated": 0,
-        "addon_groups_created": 0,
-        "addon_groups_updated": 0,
-        "addon_items_created": 0,
-        "addon_items_updated": 0
-    }
-    
+def sync_menu_diff(payload: Dict[str, Any], restaurant_id: int, pos_system_id: int, db: Session,
+                   on_table: Optional[Callable[[str], None]] = None) -> MenuDiff:
+    """Bring the stored menu in line with a PetPooja payload, touching only rows that differ.
+
+    Returns the per-table change report; an empty diff means nothing was written.
+    `on_table` is called with each table name as the sync reaches it.
+    """
+    maps = PosEntityMaps()
+    menu_diff = MenuDiff(on_record=on_table)
+    process_menu_entities(payload, restaurant_id, pos_system_id, db, maps, menu_diff)
+    process_menu_relationships(payload, restaurant_id, pos_system_id, db, maps, menu_diff)
+    return menu_diff
+
+
+# Columns the sync owns and diffs (everything else on the rows is left alone)
+VARIATION_COLUMNS = ["name", "display_name", "group_name", "is_active", "external_data"]
+ADDON_GROUP_COLUMNS = ["name", "display_name", "is_active", "priority", "external_data"]
+ADDON_ITEM_COLUMNS = ["name", "display_name", "price", "is_active", "priority", "tags", "external_data"]
+ITEM_VARIATION_COLUMNS = ["price", "is_active", "priority", "variationallowaddon", "external_id", "external_data"]
+
+
+def _restaurant_item_ids(restaurant_id: int):
+    return select(MenuItem.id).where(MenuItem.restaurant_id == restaurant_id)
+
+
+def process_menu_entities(payload: Dict[str, Any], restaurant_id: int, pos_system_id: int, db: Session,
+                          maps: PosEntityMaps, menu_diff: MenuDiff) -> MenuDiff:
+    """Diff and write menu items, variations, addon groups and addon items.
+
+    Fills `maps` (external id -> primary key) for process_menu_relationships.
+    """
     # Create attributes map for tags and veg_flag processing
     attributes_map = {attr["attributeid"]: attr["attribute"] for attr in payload.get("attributes", [])}
     category_map = {cat["categoryid"]: cat["categoryname"] for cat in payload.get("categories", [])}
-    
+
     # Process MenuItems
     logger.info(f"Processing {len(payload.get('items', []))} menu items")
-    for item_data in payload.get("items", []):
-        existing_item = db.query(MenuItem).filter(
-            MenuItem.external_id == item_data["itemid"],
-            MenuItem.restaurant_id == restaurant_id
-        ).first()
-        
-        if existing_item:
-            update_menu_item(existing_item, item_data, pos_system_id, attributes_map, category_map)
-            stats["items_updated"] += 1
-        else:
-            new_item = create_menu_item(item_data, restaurant_id, pos_system_id, attributes_map, category_map)
-            db.add(new_item)
-            stats["items_created"] += 1
-    
+    incoming = keyed(
+        (menu_item_row(item_data, restaurant_id, pos_system_id, attributes_map, category_map)
+         for item_data in payload.get("items", [])),
+        ["external_id"],
+    )
+    current = load_current_rows(
+        db, MenuItem, ["external_id"], MENU_ITEM_UPDATE_COLUMNS,
+        MenuItem.restaurant_id == restaurant_id, MenuItem.external_id.isnot(None),
+    )
+    maps.menu_items.update((key, row["id"]) for key, row in current.items())
+    items_diff = diff_entities(current, incoming, MENU_ITEM_UPDATE_COLUMNS)
+    sync_menu_items(db, maps, rows_for(incoming, items_diff.added + items_diff.changed), MENU_ITEM_UPDATE_COLUMNS)
+    deactivate(db, MenuItem, ids_for(current, items_diff.removed))
+    record(menu_diff, "menu_items", items_diff,
+           [maps.menu_items[key] for key in items_diff.added + items_diff.changed] + ids_for(current, items_diff.removed))
+
     # Process Variations
     logger.info(f"Processing {len(payload.get('variations', []))} variations")
-    for variation_data in payload.get("variations", []):
-        existing_variation = db.query(Variation).filter(
-            Variation.external_variation_id == variation_data["variationid"],
-            Variation.pos_system_id == pos_system_id
-        ).first()
-        
-        if existing_variation:
-            update_variation(existing_variation, variation_data)
-            stats["variations_updated"] += 1
-        else:
-            new_variation = create_variation(variation_data, pos_system_id)
-            db.add(new_variation)
-            stats["variations_created"] += 1
-    
+    incoming = keyed(
+        (variation_row(variation_data, pos_system_id) for variation_data in payload.get("variations", [])),
+        ["external_variation_id"],
+    )
+    current = load_current_rows(
+        db, Variation, ["external_variation_id"], VARIATION_COLUMNS, Variation.pos_system_id == pos_system_id
+    )
+    maps.variations.update((key, row["id"]) for key, row in current.items())
+    variations_diff = record(menu_diff, "variations", diff_entities(current, incoming, VARIATION_COLUMNS))
+    upsert_variations(db, maps, rows_for(incoming, variations_diff.added + variations_diff.changed))
+    deactivate(db, Variation, ids_for(current, variations_diff.removed))
+
     # Process AddonGroups and their items
     logger.info(f"Processing {len(payload.get('addongroups', []))} addon groups")
-    for addon_group_data in payload.get("addongroups", []):
-        existing_group = db.query(AddonGroup).filter(
-            AddonGroup.external_group_id == addon_group_data["addongroupid"],
-            AddonGroup.pos_system_id == pos_system_id
-        ).first()
-        
-        if existing_group:
-            update_addon_group(existing_group, addon_group_data)
-            stats["addon_groups_updated"] += 1
-        else:
-            new_group = create_addon_group(addon_group_data, pos_system_id)
-            db.add(new_group)
-            db.flush()  # Flush to get the ID for addon items
-            existing_group = new_group
-            stats["addon_groups_created"] += 1
-        
-        # Process addon items for this group
-        for addon_item_data in addon_group_data.get("addongroupitems", []):
-            existing_addon_item = db.query(AddonGroupItem).filter(
-                AddonGroupItem.external_addon_id == addon_item_data["addonitemid"],
-                AddonGroupItem.addon_group_id == existing_group.id
-            ).first()
-            
-            if existing_addon_item:
-                update_addon_item(existing_addon_item, addon_item_data, payload.get("attributes", []))
-                stats["addon_items_updated"] += 1
-            else:
-                new_addon_item = create_addon_item(addon_item_data, existing_group.id, payload.get("attributes", []))
-                db.add(new_addon_item)
-                stats["addon_items_created"] += 1
-    
-    db.flush()
-    logger.info(f"Processed core entities: {stats}")
-    return stats
+    incoming = keyed(
+        (addon_group_row(group_data, pos_system_id) for group_data in payload.get("addongroups", [])),
+        ["external_group_id"],
+    )
+    current = load_current_rows(
+        db, AddonGroup, ["external_group_id"], ADDON_GROUP_COLUMNS, AddonGroup.pos_system_id == pos_system_id
+    )
+    maps.addon_groups.update((key, row["id"]) for key, row in current.items())
+    groups_diff = record(menu_diff, "addon_groups", diff_entities(current, incoming, ADDON_GROUP_COLUMNS))
+    upsert_addon_groups(db, maps, rows_for(incoming, groups_diff.added + groups_diff.changed))
+    deactivate(db, AddonGroup, ids_for(current, groups_diff.removed))
+
+    incoming = keyed(
+        (addon_item_row(addon_item_data, maps.addon_groups[group_data["addongroupid"]], attributes_map)
+         for group_data in payload.get("addongroups", [])
+         for addon_item_data in group_data.get("addongroupitems", [])),
+        ["addon_group_id", "external_addon_id"],
+    )
+    current = load_current_rows(
+        db, AddonGroupItem, ["addon_group_id", "external_addon_id"], ADDON_ITEM_COLUMNS,
+        AddonGroupItem.addon_group_id.in_(select(AddonGroup.id).where(AddonGroup.pos_system_id == pos_system_id)),
+    )
+    addon_items_diff = record(menu_diff, "addon_items", diff_entities(current, incoming, ADDON_ITEM_COLUMNS))
+    upsert_addon_items(db, rows_for(incoming, addon_items_diff.added + addon_items_diff.changed))
+    deactivate(db, AddonGroupItem, ids_for(current, addon_items_diff.removed))
+
+    return menu_diff
 
 
-def create_menu_item(item_data: Dict[str, Any], restaurant_id: int, pos_system_id: int, attributes_map: Dict[str, str] = None, category_map: Dict[str, str] = None) -> MenuItem:
-    """Create new MenuItem from PetPooja data."""
+# MenuItem columns a re-sync overwrites (public_id and description are kept)
+MENU_ITEM_UPDATE_COLUMNS = [
+    "name", "category_brief", "group_category", "price", "is_active", "veg_flag",
+    "itemallowvariation", "itemallowaddon", "external_data", "tags",
+]
+
+
+def menu_item_row(item_data: Dict[str, Any], restaurant_id: int, pos_system_id: int, attributes_map: Dict[str, str] = None, category_map: Dict[str, str] = None) -> Dict[str, Any]:
+    """MenuItem column values from PetPooja data."""
     # Handle tags - copy item_tags and add attribute if present
     tags_list = item_data.get("item_tags", []).copy()
     attr_id_val = item_data.get("item_attributeid")
@@ -697,7 +699,8 @@ def create_menu_item(item_data: Dict[str, Any], restaurant_id: int, pos_system_i
         if attributes_map and attr_id_val in attributes_map:
             tags_list.append(attributes_map[attr_id_val])
     
-    return MenuItem(
+    category_map = category_map or {}
+    return dict(
         public_id=new_id(),
         restaurant_id=restaurant_id,
         name=item_data["itemname"],
@@ -716,38 +719,9 @@ def create_menu_item(item_data: Dict[str, Any], restaurant_id: int, pos_system_i
     )
 
 
-def update_menu_item(menu_item: MenuItem, item_data: Dict[str, Any], pos_system_id: int, attributes_map: Dict[str, str] = None, category_map: Dict[str, str] = None):
-    """Update existing MenuItem with PetPooja data."""
-    # Handle tags - copy item_tags and add attribute if present
-    tags_list = item_data.get("item_tags", []).copy()
-    attr_id_val = item_data.get("item_attributeid")
-    
-    # Set veg_flag based on attribute
-    veg_flag = False
-    if attr_id_val:
-        if attr_id_val == "1":  # "1" maps to "veg"
-            veg_flag = True
-        
-        # Add attribute to tags if attributes_map is provided
-        if attributes_map and attr_id_val in attributes_map:
-            tags_list.append(attributes_map[attr_id_val])
-    
-    menu_item.name = item_data["itemname"]
-    # menu_item.description = item_data.get("itemdescription", "")
-    menu_item.category_brief=category_map.get(item_data.get("item_categoryid", ""), "")
-    menu_item.group_category=category_map.get(item_data.get("item_categoryid", ""), "")
-    menu_item.price = float(item_data["price"])
-    menu_item.is_active = item_data.get("active", "0") == "1"
-    menu_item.veg_flag = veg_flag
-    menu_item.itemallowvariation = item_data.get("itemallowvariation", "0") == "1"
-    menu_item.itemallowaddon = item_data.get("itemallowaddon", "0") == "1"
-    menu_item.external_data = item_data
-    menu_item.tags = tags_list
-
-
-def create_variation(variation_data: Dict[str, Any], pos_system_id: int) -> Variation:
-    """Create new Variation from PetPooja data."""
-    return Variation(
+def variation_row(variation_data: Dict[str, Any], pos_system_id: int) -> Dict[str, Any]:
+    """Variation column values from PetPooja data."""
+    return dict(
         name=variation_data["name"],
         display_name=variation_data["name"],
         group_name=variation_data["groupname"],
@@ -758,18 +732,9 @@ def create_variation(variation_data: Dict[str, Any], pos_system_id: int) -> Vari
     )
 
 
-def update_variation(variation: Variation, variation_data: Dict[str, Any]):
-    """Update existing Variation with PetPooja data."""
-    variation.name = variation_data["name"]
-    variation.display_name = variation_data["name"]
-    variation.group_name = variation_data["groupname"]
-    variation.is_active = variation_data["status"] == "1"
-    variation.external_data = variation_data
-
-
-def create_addon_group(addon_group_data: Dict[str, Any], pos_system_id: int) -> AddonGroup:
-    """Create new AddonGroup from PetPooja data."""
-    return AddonGroup(
+def addon_group_row(addon_group_data: Dict[str, Any], pos_system_id: int) -> Dict[str, Any]:
+    """AddonGroup column values from PetPooja data."""
+    return dict(
         name=addon_group_data["addongroup_name"],
         display_name=addon_group_data["addongroup_name"],
         is_active=addon_group_data["active"] == "1",
@@ -780,27 +745,17 @@ def create_addon_group(addon_group_data: Dict[str, Any], pos_system_id: int) ->
     )
 
 
-def update_addon_group(addon_group: AddonGroup, addon_group_data: Dict[str, Any]):
-    """Update existing AddonGroup with PetPooja data."""
-    addon_group.name = addon_group_data["addongroup_name"]
-    addon_group.display_name = addon_group_data["addongroup_name"]
-    addon_group.is_active = addon_group_data["active"] == "1"
-    addon_group.priority = int(addon_group_data.get("addongroup_rank", 0))
-    addon_group.external_data = addon_group_data
-
-
-def create_addon_item(addon_item_data: Dict[str, Any], addon_group_id: int, attributes: list) -> AddonGroupItem:
-    """Create new AddonGroupItem from PetPooja data."""
+def addon_item_row(addon_item_data: Dict[str, Any], addon_group_id: int, attributes_map: Dict[str, str]) -> Dict[str, Any]:
+    """AddonGroupItem column values from PetPooja data."""
     # Get tags from attributes
     tags = []
     if addon_item_data.get("attributes"):
-        attributes_map = {attr["attributeid"]: attr["attribute"] for attr in attributes}
         for attr_id in addon_item_data["attributes"].split(","):
             attr_id = attr_id.strip()
             if attr_id in attributes_map:
                 tags.append(attributes_map[attr_id])
     
-    return AddonGroupItem(
+    return dict(
         addon_group_id=addon_group_id,
         name=addon_item_data["addonitem_name"],
         display_name=addon_item_data["addonitem_name"],
@@ -813,169 +768,100 @@ def create_addon_item(addon_item_data: Dict[str, Any], addon_group_id: int, attr
     )
 
 
-def update_addon_item(addon_item: AddonGroupItem, addon_item_data: Dict[str, Any], attributes: list):
-    """Update existing AddonGroupItem with PetPooja data."""
-    # Get tags from attributes
-    tags = []
-    if addon_item_data.get("attributes"):
-        attributes_map = {attr["attributeid"]: attr["attribute"] for attr in attributes}
-        for attr_id in addon_item_data["attributes"].split(","):
-            attr_id = attr_id.strip()
-            if attr_id in attributes_map:
-                tags.append(attributes_map[attr_id])
-    
-    addon_item.name = addon_item_data["addonitem_name"]
-    addon_item.display_name = addon_item_data["addonitem_name"]
-    addon_item.price = float(addon_item_data["addonitem_price"])
-    addon_item.is_active = addon_item_data["active"] == "1"
-    addon_item.priority = int(addon_item_data.get("addonitem_rank", 0))
-    addon_item.tags = tags
-    addon_item.external_data = addon_item_data
+def _selection_row(addon_data: Dict[str, Any], **keys) -> Dict[str, Any]:
+    return dict(
+        **keys,
+        min_selection=int(addon_data.get("addon_item_selection_min", 0)),
+        max_selection=int(addon_data.get("addon_item_selection_max", 1)),
+        is_active=True,
+        priority=0
+    )
+
+
+SELECTION_UPDATE_COLUMNS = ["min_selection", "max_selection", "is_active", "priority"]
 
 
-def process_menu_relationships(payload: Dict[str, Any], restaurant_id: int, pos_system_id: int, db: Session):
-    """Process relationship entities from PetPooja data."""
+def process_menu_relationships(payload: Dict[str, Any], restaurant_id: int, pos_system_id: int, db: Session,
+                               maps: PosEntityMaps, menu_diff: MenuDiff) -> MenuDiff:
+    """Diff and write item ↔ variation, item ↔ addon group and item variation ↔ addon group links."""
     logger.info("Processing menu item relationships")
-    
-    # Create lookup maps for efficient foreign key resolution
-    menu_items_map = {
-        item.external_id: item for item in 
-        db.query(MenuItem).filter_by(restaurant_id=restaurant_id).all()
-    }
-    
-    variations_map = {
-        variation.external_variation_id: variation for variation in
-        db.query(Variation).filter_by(pos_system_id=pos_system_id).all()
-    }
-    
-    addon_groups_map = {
-        group.external_group_id: group for group in
-        db.query(AddonGroup).filter_by(pos_system_id=pos_system_id).all()
-    }
-    
-    relationship_counts = {
-        "item_variations": 0,
-        "item_addons": 0,
-        "item_variation_addons": 0
-    }
-    
-    # Process each item's relationships
+
+    item_variation_rows, item_addon_rows = [], []
+    # (menu_item_id, variation_id) -> addon refs of that item variation
+    variation_addons: Dict[tuple, list] = {}
     for item_data in payload.get("items", []):
-        menu_item = menu_items_map.get(item_data["itemid"])
-        if not menu_item:
+        menu_item_id = maps.menu_items.get(item_data["itemid"])
+        if not menu_item_id:
             continue
-        
-        # Process ItemVariations
+
         for variation_data in item_data.get("variation", []):
-            variation = variations_map.get(variation_data["variationid"])
-            if variation:
-                # Check if relationship already exists
-                existing = db.query(ItemVariation).filter_by(
-                    menu_item_id=menu_item.id,
-                    variation_id=variation.id
-                ).first()
-                
-                if not existing:
-                    item_variation = ItemVariation(
-                        menu_item_id=menu_item.id,
-                        variation_id=variation.id,
-                        price=float(variation_data["price"]),
-                        is_active=variation_data["active"] == "1",
-                        priority=int(variation_data.get("variationrank", 0)),
-                        variationallowaddon=variation_data.get("variationallowaddon", 0) == 1,
-                        external_id=variation_data["id"],
-                        external_data=variation_data
-                    )
-                    db.add(item_variation)
-                    db.flush()  # Get the ID for variation addons
-                    relationship_counts["item_variations"] += 1
-                    
-                    # Process ItemVariationAddons
-                    for var_addon_data in variation_data.get("addon", []):
-                        addon_group = addon_groups_map.get(var_addon_data["addon_group_id"])
-                        if addon_group:
-                            existing_var_addon = db.query(ItemVariationAddon).filter_by(
-                                item_variation_id=item_variation.id,
-                                addon_group_id=addon_group.id
-                            ).first()
-                            
-                            if not existing_var_addon:
-                                item_var_addon = ItemVariationAddon(
-                                    item_variation_id=item_variation.id,
-                                    addon_group_id=addon_group.id,
-                                    min_selection=int(var_addon_data.get("addon_item_selection_min", 0)),
-                                    max_selection=int(var_addon_data.get("addon_item_selection_max", 1)),
-                                    is_active=True,
-                                    priority=0
-                                )
-                                db.add(item_var_addon)
-                                relationship_counts["item_variation_addons"] += 1
-                else:
-                    # Update existing ItemVariation
-                    existing.price = float(variation_data["price"])
-                    existing.is_active = variation_data["active"] == "1"
-                    existing.priority = int(variation_data.get("variationrank", 0))
-                    existing.variationallowaddon = variation_data.get("variationallowaddon", 0) == 1
-                    existing.external_id = variation_data["id"]
-                    existing.external_data = variation_data
-                    item_variation = existing
-                    
-                    # Process ItemVariationAddons for existing ItemVariation
-                    for var_addon_data in variation_data.get("addon", []):
-                        addon_group = addon_groups_map.get(var_addon_data["addon_group_id"])
-                        if addon_group:
-                            existing_var_addon = db.query(ItemVariationAddon).filter_by(
-                                item_variation_id=item_variation.id,
-                                addon_group_id=addon_group.id
-                            ).first()
-                            
-                            if not existing_var_addon:
-                                item_var_addon = ItemVariationAddon(
-                                    item_variation_id=item_variation.id,
-                                    addon_group_id=addon_group.id,
-                                    min_selection=int(var_addon_data.get("addon_item_selection_min", 0)),
-                                    max_selection=int(var_addon_data.get("addon_item_selection_max", 1)),
-                                    is_active=True,
-                                    priority=0
-                                )
-                                db.add(item_var_addon)
-                                relationship_counts["item_variation_addons"] += 1
-                            else:
-                                # Update existing ItemVariationAddon
-                                existing_var_addon.min_selection = int(var_addon_data.get("addon_item_selection_min", 0))
-                                existing_var_addon.max_selection = int(var_addon_data.get("addon_item_selection_max", 1))
-                                existing_var_addon.is_active = True
-                                existing_var_addon.priority = 0
-        
-        # Process ItemAddons  
+            variation_id = maps.variations.get(variation_data["variationid"])
+            if not variation_id:
+                continue
+            item_variation_rows.append(dict(
+                menu_item_id=menu_item_id,
+                variation_id=variation_id,
+                price=float(variation_data["price"]),
+                is_active=variation_data["active"] == "1",
+                priority=int(variation_data.get("variationrank", 0)),
+                variationallowaddon=variation_data.get("variationallowaddon", 0) == 1,
+                external_id=variation_data["id"],
+                external_data=variation_data
+            ))
+            variation_addons[(menu_item_id, variation_id)] = variation_data.get("addon", [])
+
         for addon_data in item_data.get("addon", []):
-            addon_group = addon_groups_map.get(addon_data["addon_group_id"])
-            if addon_group:
-                existing = db.query(ItemAddon).filter_by(
-                    menu_item_id=menu_item.id,
-                    addon_group_id=addon_group.id
-                ).first()
-                
-                if not existing:
-                    item_addon = ItemAddon(
-                        menu_item_id=menu_item.id,
-                        addon_group_id=addon_group.id,
-                        min_selection=int(addon_data.get("addon_item_selection_min", 0)),
-                        max_selection=int(addon_data.get("addon_item_selection_max", 1)),
-                        is_active=True,
-                        priority=0
-                    )
-                    db.add(item_addon)
-                    relationship_counts["item_addons"] += 1
-                else:
-                    # Update existing ItemAddon
-                    existing.min_selection = int(addon_data.get("addon_item_selection_min", 0))
-                    existing.max_selection = int(addon_data.get("addon_item_selection_max", 1))
-                    existing.is_active = True
-                    existing.priority = 0
-    
-    db.flush()
-    logger.info(f"Created relationships: {relationship_counts}")
+            addon_group_id = maps.addon_groups.get(addon_data["addon_group_id"])
+            if addon_group_id:
+                item_addon_rows.append(_selection_row(addon_data, menu_item_id=menu_item_id, addon_group_id=addon_group_id))
+
+    # ItemVariations
+    key_columns = ["menu_item_id", "variation_id"]
+    incoming = keyed(item_variation_rows, key_columns)
+    current = load_current_rows(
+        db, ItemVariation, key_columns, ITEM_VARIATION_COLUMNS,
+        ItemVariation.menu_item_id.in_(_restaurant_item_ids(restaurant_id)),
+    )
+    item_variations_diff = record(menu_diff, "item_variations", diff_entities(current, incoming, ITEM_VARIATION_COLUMNS))
+    item_variation_ids = {key: row["id"] for key, row in current.items()}
+    item_variation_ids.update(upsert_item_variations(
+        db, rows_for(incoming, item_variations_diff.added + item_variations_diff.changed), ITEM_VARIATION_COLUMNS
+    ))
+    deactivate(db, ItemVariation, ids_for(current, item_variations_diff.removed))
+
+    # ItemAddons
+    key_columns = ["menu_item_id", "addon_group_id"]
+    incoming = keyed(item_addon_rows, key_columns)
+    current = load_current_rows(
+        db, ItemAddon, key_columns, SELECTION_UPDATE_COLUMNS,
+        ItemAddon.menu_item_id.in_(_restaurant_item_ids(restaurant_id)),
+    )
+    item_addons_diff = record(menu_diff, "item_addons", diff_entities(current, incoming, SELECTION_UPDATE_COLUMNS))
+    upsert_item_addons(db, rows_for(incoming, item_addons_diff.added + item_addons_diff.changed), SELECTION_UPDATE_COLUMNS)
+    deactivate(db, ItemAddon, ids_for(current, item_addons_diff.removed))
+
+    # ItemVariationAddons
+    key_columns = ["item_variation_id", "addon_group_id"]
+    incoming = keyed(
+        (_selection_row(var_addon_data, item_variation_id=item_variation_ids[key],
+                        addon_group_id=maps.addon_groups[var_addon_data["addon_group_id"]])
+         for key, addons in variation_addons.items()
+         for var_addon_data in addons
+         if var_addon_data["addon_group_id"] in maps.addon_groups),
+        key_columns,
+    )
+    current = load_current_rows(
+        db, ItemVariationAddon, key_columns, SELECTION_UPDATE_COLUMNS,
+        ItemVariationAddon.item_variation_id.in_(
+            select(ItemVariation.id).where(ItemVariation.menu_item_id.in_(_restaurant_item_ids(restaurant_id)))
+        ),
+    )
+    var_addons_diff = record(menu_diff, "item_variation_addons", diff_entities(current, incoming, SELECTION_UPDATE_COLUMNS))
+    upsert_item_variation_addons(db, rows_for(incoming, var_addons_diff.added + var_addons_diff.changed), SELECTION_UPDATE_COLUMNS)
+    deactivate(db, ItemVariationAddon, ids_for(current, var_addons_diff.removed))
+
+    logger.info(f"Menu diff: {menu_diff.report()}")
+    return menu_diff
 
 
 # Health check endpoint for callback service
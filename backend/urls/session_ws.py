@@ -1,8 +1,10 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
+import asyncio
 import json
+import time
 import uuid
 from datetime import datetime
-from config import logger
+from config import logger, CHAT_EXPOSE_TIMINGS
 import uuid
 import secrets
 from sqlalchemy import select
@@ -21,6 +23,7 @@ from models.cart_models import (
 # Utilities
 from utils.jwt_utils import decode_ws_token
 from utils.general import new_id
+from utils.loop_lag import loop_lag_monitor
 from websocket.manager import connection_manager
 from services.pos.utils import get_any_pos_integration
 from utils.addon_helpers import resolve_addon_context, build_selected_addon_responses
@@ -30,11 +33,20 @@ from models.schema import CartItemVariationAddon, ItemVariationAddon
 
 # Import AI chat functionality
 from recommender.ai import generate_blocks
+from websocket.chat_scheduler import chat_scheduler, ChatBusyError
+from recommender.answer_cache import (
+    is_cacheable, lookup_answer, store_answer, fork_thread, schedule_starter_warmup
+)
+from recommender.session_feed import record_feed_event
 from common.utils import enrich_blocks
+from common.menu_version import get_menu_version
 
 
 router = APIRouter()
 
+# Running chat turns (kept referenced until done)
+_chat_tasks: set = set()
+
 @router.websocket("/ws/session")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time table-session communication (cart & member events)."""
@@ -99,8 +111,11 @@ async def websocket_endpoint(websocket: WebSocket):
                         # Cart mutation message
                         await handle_cart_mutation(websocket, message, payload["sub"], session_pid)
                     elif message.get("type") == "chat_message":
-                        # Chat message - handle and broadcast to AI
-                        await handle_chat_message(websocket, message, payload["sub"], session_pid)
+                        # Chat message - handled in the background so a queued chat
+                        # turn does not hold up cart traffic on this socket
+                        task = asyncio.create_task(handle_chat_message(websocket, message, payload["sub"], session_pid))
+                        _chat_tasks.add(task)
+                        task.add_done_callback(_chat_tasks.discard)
                     elif message.get("type") == "place_order":
                         # Order placement message
                         await handle_place_order(websocket, session_pid, payload["sub"], message)
@@ -133,6 +148,29 @@ async def websocket_endpoint(websocket: WebSocket):
             connection_manager.disconnect(websocket)
 
 
+def _answer_chat_message(ai_payload: dict, thread_id: str, restaurant_slug: str,
+                         user_message: str, cacheable: bool, stats: dict) -> dict:
+    """Generate and enrich an AI answer (runs in a chat scheduler worker thread)"""
+    version = get_menu_version(restaurant_slug)
+    filters = ai_payload["filters"]
+    blocks = generate_blocks(ai_payload, thread_id, restaurant_slug, stats=stats)
+    t_enrich = time.time()
+    enriched_blocks = enrich_blocks(blocks, restaurant_slug)
+    stats["enrich_seconds"] = time.time() - t_enrich
+    if cacheable:
+        store_answer(restaurant_slug, user_message, filters, enriched_blocks, stats["response_id"], version)
+    logger.debug(f"Chat turn stats for {restaurant_slug}: {stats}")
+    return enriched_blocks
+
+
+def _busy_blocks(user_message: str) -> dict:
+    """Polite answer sent when the chat queue sheds a message"""
+    return {"blocks": [
+        {"type": "text", "markdown": "Our AI waiter is serving a lot of tables right now. Please try again in a moment 🙏"},
+        {"type": "quick_replies", "options": [user_message[:60]]},
+    ]}
+
+
 async def handle_chat_message(websocket: WebSocket, message: dict, member_pid: str, session_pid: str):
     """Handle chat message and generate AI response"""
     try:
@@ -180,10 +218,47 @@ async def handle_chat_message(websocket: WebSocket, message: dict, member_pid: s
             "extra_context": extra_context
         }
         
-        # # Generate blocks using AI system
-        blocks = generate_blocks(ai_payload, thread_id, restaurant.slug)
-        enriched_blocks = enrich_blocks(blocks, restaurant.slug)
-        
+        started_at = time.time()
+        stats = {}
+
+        # Precompute starter quick-reply answers once per menu version
+        schedule_starter_warmup(restaurant.slug)
+
+        # Opening questions of a thread are served from the semantic answer cache
+        cacheable = is_cacheable(ai_payload, thread_id)
+        cached = None
+        if cacheable:
+            cached = await asyncio.to_thread(lookup_answer, restaurant.slug, user_message, ai_payload["filters"])
+        if cached:
+            fork_thread(thread_id, cached)
+            enriched_blocks = cached["blocks"]
+        else:
+            async def send_status(status: str, **extra):
+                if status == "thinking":
+                    stats["queue_seconds"] = time.time() - started_at
+                await connection_manager.broadcast_to_session(session_pid, {
+                    "type": "chat_status",
+                    "status": status,
+                    "thread_id": thread_id,
+                    "message_id": message_id,
+                    **extra,
+                })
+
+            try:
+                enriched_blocks, coalesced = await chat_scheduler.submit(
+                    restaurant.slug,
+                    chat_scheduler.coalesce_key(thread_id, user_message),
+                    _answer_chat_message, ai_payload, thread_id, restaurant.slug, user_message, cacheable, stats,
+                    on_status=send_status,
+                )
+            except ChatBusyError as e:
+                logger.warning(f"Shedding chat message in session {session_pid}: {e}")
+                enriched_blocks, coalesced = _busy_blocks(user_message), False
+                stats["shed"] = True
+            if coalesced:
+                # The identical in-flight turn broadcasts the answer to the session
+                return
+
         # Broadcast AI response to all session members
         ai_response_event = {
             "type": "chat_response",
@@ -192,6 +267,13 @@ async def handle_chat_message(websocket: WebSocket, message: dict, member_pid: s
             "thread_id": thread_id,
             "message_id": uuid.uuid4().hex[:6]
         }
+        if CHAT_EXPOSE_TIMINGS:
+            ai_response_event["timings"] = {
+                **{k: v for k, v in stats.items() if k != "response_id"},
+                "cache_hit": bool(cached),
+                "server_seconds": time.time() - started_at,
+                "loop_lag_max_seconds": loop_lag_monitor.max_lag_since(started_at),
+            }
         
         logger.info(f"Sending AI response to session {session_pid}")
         await connection_manager.broadcast_to_session(session_pid, ai_response_event)
@@ -482,6 +564,8 @@ async def handle_cart_mutation(
             # Dispatch operation
             if cart_event.op == "create":
                 await handle_cart_create(websocket, cart_event, member, session, session_pid, db)
+                if cart_event.menu_item_id:
+                    await asyncio.to_thread(record_feed_event, restaurant.slug, session_pid, cart_event.menu_item_id, "cart_add")
             elif cart_event.op == "update":
                 await handle_cart_update(websocket, cart_event, member, session, session_pid, db)
             elif cart_event.op == "delete":
@@ -1,13 +1,11 @@
-import random
 from fastapi import APIRouter, Header, Query, Body, Request
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import json
 
-from config import qd
-from middleware.tenant_resolver import get_qdrant_collection
-from recommender import DishCard, TextBlock, Blocks, DishCarouselBlock
-from common.utils import enrich_blocks
+from recommender import TextBlock
+from recommender.upsell_pool import get_upsell_pool
+from services.cooccurrence_service import get_lift_pairings
 
 router = APIRouter()
 
@@ -15,104 +13,71 @@ router = APIRouter()
 def get_upsell_recommendations(
     request: Request,
     session_id: str = Header(..., alias="x-session-id"),
+    restaurant_slug: str = Query(..., description="Restaurant slug"),
     cart: Optional[str] = Query(None, description="JSON string of cart items"),
+    item_ids: Optional[List[str]] = Query(None, description="Dish ids in the cart (alternative to cart)"),
     is_veg: Optional[bool] = Query(None, description="Filter for vegetarian items"),
     price_cap: Optional[int] = Query(None, description="Maximum price filter"),
     category: Optional[str] = Query(None, description="Category filter")
 ) -> Dict[str, Any]:
     """
     Get upsell recommendations based on cart and filters.
-    
+
+    Served from the restaurant's precomputed upsell pool (rebuilt per menu
+    version), so no Qdrant or Postgres round trip happens per request.
+
     - **session_id**: Required session identifier
+    - **restaurant_slug**: Restaurant the cart belongs to
     - **cart**: JSON string representing the current cart items
+    - **item_ids**: Dish public ids / ids in the cart, repeatable
     - **is_veg**: Optional filter for vegetarian items
     - **price_cap**: Optional maximum price filter
     - **category**: Optional category filter
     - **Returns**: Upsell recommendations
     """
-    # Get tenant-specific collection name
-    collection_name = get_qdrant_collection(request)
-    
     # Parse cart items if provided
     cart_items = []
-    cart_item_ids = set()
+    cart_item_ids = set(item_ids or [])
     if cart:
         try:
             cart_items = json.loads(cart)
             # Extract item IDs from cart
-            cart_item_ids = {item.get('id') for item in cart_items if item.get('id') is not None}
+            cart_item_ids |= {item.get('id') for item in cart_items if item.get('id') is not None}
         except json.JSONDecodeError:
             pass
-    
-    # Build filter for Qdrant query
-    filters = [
-        {"key": "is_high_margin", "match": {"value": 1}},
-        {"key": "group_category", "match": {"value": "Appetizers"}} ###### REMOVE THIS LATER
-    ]
-    if is_veg:
-        filters.append({"key": "veg_flag", "match": {"value": 1}})
-    
-    # Fetch high-margin items from Qdrant
-    limit = 10
-    offset = 0
-    high_margin_items = []
-    
-    points, next_offset = qd.scroll(
-        collection_name=collection_name,
-        limit=limit,
-        offset=offset,
-        with_payload=True,
-        with_vectors=False,
-        scroll_filter={"must": filters} if filters else None,
+
+    pool = get_upsell_pool(restaurant_slug)
+    # Dishes often ordered with this cart get a lift-proportional boost
+    cart_public_ids = pool.cart_public_ids(cart_item_ids)
+    boosts = {public_id: lift for public_id, lift in get_lift_pairings(restaurant_slug, cart_public_ids, 20)}
+    candidates = pool.select(
+        cart_public_ids,
+        is_veg=is_veg,
+        price_cap=price_cap,
+        category=category,
+        limit=3,
+        boosts=boosts,
     )
-    
-    if points:
-        high_margin_items = points
-    
-    # Convert to DishCard format and exclude items already in cart
-    dish_cards = []
-    for item in high_margin_items:
-        # Skip if the item is already in the cart
-        if item.id in cart_item_ids:
-            continue
-            
-        dish_cards.append(
-            DishCard(
-                type="dish_card",
-                id=item.id,
-                name=(item.payload or {}).get("name")
-            )
-        )
-    
-    # Randomly select 3 items from dish_cards
-    dish_cards = random.sample(dish_cards, min(3, len(dish_cards)))
-    
+
     # Create text block
     text_block = TextBlock(
         type="text",
         markdown="This goes amazing with your cart. Add this to your cart to complete your meal."
     )
-    
-    # Create a dish carousel block instead of individual dish cards
-    dish_carousel = DishCarouselBlock(
-        type="dish_carousal",  # Note: API uses 'carousal' spelling
-        options=dish_cards,
-        title="Recommended For You"
-    )
-    
-    # Prepare the blocks for the response
-    blocks = [text_block, dish_carousel]
-    
-    # Create Blocks object and enrich with additional data
-    response_blocks = Blocks(blocks=blocks)
-    enriched_blocks = enrich_blocks(response_blocks, collection_name)
-    
+
+    # Dish carousel from the pool's pre-enriched cards
+    dish_carousel = {
+        "type": "dish_carousal",  # Note: API uses 'carousal' spelling
+        "options": [dict(candidate.card) for candidate in candidates],
+        "title": "Recommended For You",
+    }
+
     return {
         "status": "success",
         "message": "Upsell recommendations",
-        "blocks": enriched_blocks["blocks"],
+        "blocks": [text_block.model_dump(), dish_carousel],
         "data": {
-            "cart_items_count": len(cart_items),
-            "recommendations_count": len(dish_cards)
+            "cart_items_count": len(cart_items) or len(cart_item_ids),
+            "recommendations_count": len(candidates)
         }
     }
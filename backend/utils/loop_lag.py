@@ -0,0 +1,42 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how late a periodic sleep wakes up
+
+    Blocking calls on the event loop (sync DB/model work in async handlers)
+    show up as lag; the chat benchmark reports it per turn.
+    """
+
+    def __init__(self, interval: float = 0.05, keep: int = 12000):
+        self.interval = interval
+        # (wall time, lag seconds)
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=keep)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append((time.time(), max(loop.time() - start - self.interval, 0.0)))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def max_lag_since(self, since: float) -> float:
+        """Largest lag (seconds) sampled after wall time `since`"""
+        return max((lag for at, lag in self.samples if at >= since), default=0.0)
+
+
+# Global monitor, started by the API when CHAT_EXPOSE_TIMINGS is enabled
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,209 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Set, Tuple
+from loguru import logger
+
+from config import (
+    CHAT_MAX_CONCURRENCY, CHAT_MAX_CONCURRENCY_PER_RESTAURANT,
+    CHAT_MAX_QUEUE_PER_RESTAURANT, CHAT_QUEUE_TIMEOUT,
+)
+
+StatusCallback = Callable[..., Awaitable[None]]
+
+# How often background work re-checks for a slot no chat turn is waiting on
+BACKGROUND_POLL_SECONDS = 0.5
+
+
+class ChatBusyError(Exception):
+    """Raised when a chat turn is shed instead of queued (queue full or wait too long)"""
+
+
+class ChatScheduler:
+    """Bounds concurrent chat model calls per restaurant and globally
+
+    Each chat turn takes a per-restaurant slot and then a global slot before its
+    blocking work runs in a worker thread, so a busy dining room queues instead
+    of flooding the model provider. Turns that cannot start within
+    `queue_timeout` seconds, or arrive while a restaurant's queue is full, are
+    rejected with ChatBusyError. A question already in flight for the same
+    thread is coalesced onto the running turn instead of calling the model twice;
+    the running turn alone reports status and answers (or sheds) for the group.
+
+    Background work (answer cache warmup) runs under the same slots at low
+    priority: one call at a time, and only while no chat turn is waiting.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_restaurant: int,
+                 max_queue_per_restaurant: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_per_restaurant = max_per_restaurant
+        self.max_queue_per_restaurant = max_queue_per_restaurant
+        self.queue_timeout = queue_timeout
+
+        self._global = asyncio.Semaphore(max_concurrency)
+        # restaurant_slug -> slot semaphore
+        self._restaurants: Dict[str, asyncio.Semaphore] = {}
+        # restaurant_slug -> tickets of turns waiting for a slot, in arrival order
+        self._waiting: Dict[str, List[object]] = {}
+        # coalescing key -> running turn
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        self._background = asyncio.Semaphore(1)
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Bind to the serving event loop so background work can be spawned from worker threads"""
+        self._loop = asyncio.get_running_loop()
+
+    @staticmethod
+    def coalesce_key(thread_id: str, question: str) -> Tuple[str, str]:
+        return thread_id or "", " ".join(question.lower().split())
+
+    def _restaurant_semaphore(self, restaurant_slug: str) -> asyncio.Semaphore:
+        if restaurant_slug not in self._restaurants:
+            self._restaurants[restaurant_slug] = asyncio.Semaphore(self.max_per_restaurant)
+        return self._restaurants[restaurant_slug]
+
+    async def submit(self, restaurant_slug: str, key: Tuple[str, str], fn: Callable[..., Any], *args,
+                     on_status: Optional[StatusCallback] = None) -> Tuple[Any, bool]:
+        """
+        Run `fn(*args)` in a worker thread once a slot is free
+
+        Args:
+            restaurant_slug: Restaurant the turn belongs to
+            key: Coalescing key (see coalesce_key)
+            fn: Blocking callable producing the answer
+            on_status: Awaited with ("queued", position=n) / ("thinking",)
+
+        Returns:
+            (result, coalesced) - coalesced is True when the result belongs to an
+            identical turn already in flight, which has delivered it (or the
+            busy reply) itself
+
+        Raises:
+            ChatBusyError: If the turn was shed
+        """
+        running = self._inflight.get(key)
+        if running is not None:
+            logger.info(f"Coalescing duplicate chat turn for thread {key[0]}")
+            try:
+                return await asyncio.shield(running), True
+            except ChatBusyError:
+                # The running turn sends the one busy reply for the group
+                return None, True
+
+        waiting = self._waiting.setdefault(restaurant_slug, [])
+        if len(waiting) >= self.max_queue_per_restaurant:
+            raise ChatBusyError(f"Chat queue full for {restaurant_slug}")
+
+        # Queued before the task starts so concurrent submits see the queue depth
+        ticket = object()
+        waiting.append(ticket)
+        task = asyncio.create_task(self._run(restaurant_slug, ticket, fn, args, on_status))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def queue_position(self, restaurant_slug: str, ticket: object) -> int:
+        """1-based place of a waiting turn in its restaurant's queue"""
+        waiting = self._waiting.get(restaurant_slug, [])
+        return waiting.index(ticket) + 1 if ticket in waiting else 0
+
+    async def _run(self, restaurant_slug: str, ticket: object, fn: Callable[..., Any], args: tuple,
+                   on_status: Optional[StatusCallback]) -> Any:
+        restaurant = self._restaurant_semaphore(restaurant_slug)
+        acquired = []
+        queued = False
+
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.queue_timeout
+            for semaphore in (restaurant, self._global):
+                if semaphore.locked():
+                    if on_status and not queued:
+                        await on_status("queued", position=self.queue_position(restaurant_slug, ticket))
+                    queued = True
+                    await asyncio.wait_for(semaphore.acquire(), max(deadline - loop.time(), 0))
+                else:
+                    # Free slot: acquire() returns without suspending
+                    await semaphore.acquire()
+                acquired.append(semaphore)
+        except asyncio.TimeoutError:
+            for semaphore in acquired:
+                semaphore.release()
+            raise ChatBusyError(f"No chat slot for {restaurant_slug} within {self.queue_timeout}s")
+        finally:
+            self._waiting[restaurant_slug].remove(ticket)
+
+        try:
+            if on_status:
+                await on_status("thinking")
+            return await asyncio.to_thread(fn, *args)
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
+
+    async def run_background(self, restaurant_slug: str, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run low-priority `fn(*args)` in a worker thread under the chat slots
+
+        Waits until the restaurant and global slots are free and no chat turn is
+        queued anywhere, so background work never delays or sheds a diner's turn.
+        At most one background call holds a slot at a time.
+        """
+        restaurant = self._restaurant_semaphore(restaurant_slug)
+        async with self._background:
+            while any(self._waiting.values()) or restaurant.locked() or self._global.locked():
+                await asyncio.sleep(BACKGROUND_POLL_SECONDS)
+            # Both free: acquire() returns without suspending
+            await restaurant.acquire()
+            await self._global.acquire()
+            try:
+                return await asyncio.to_thread(fn, *args)
+            finally:
+                self._global.release()
+                restaurant.release()
+
+    def spawn(self, coro: Coroutine) -> bool:
+        """
+        Start `coro` as a task on the serving loop; safe to call from worker threads
+
+        Returns False (and closes `coro`) when no loop is bound, e.g. in scripts.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            coro.close()
+            return False
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._track(coro)
+        else:
+            loop.call_soon_threadsafe(self._track, coro)
+        return True
+
+    def _track(self, coro: Coroutine) -> None:
+        # The loop only keeps weak references to tasks
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def stats(self) -> dict:
+        """Current queue depth and slot usage, for logging and health checks"""
+        return {
+            "inflight": len(self._inflight),
+            "background": len(self._background_tasks),
+            "global_free": self._global._value,
+            "waiting": {slug: len(tickets) for slug, tickets in self._waiting.items() if tickets},
+        }
+
+
+# Global chat scheduler instance
+chat_scheduler = ChatScheduler(
+    CHAT_MAX_CONCURRENCY,
+    CHAT_MAX_CONCURRENCY_PER_RESTAURANT,
+    CHAT_MAX_QUEUE_PER_RESTAURANT,
+    CHAT_QUEUE_TIMEOUT,
+)
@@ -1,6 +1,7 @@
 import { useInfiniteQuery, useQuery } from '@tanstack/react-query';
 import { getBaseApiCandidates } from './base';
 import useMenuStore from '../store/menu';
+import { useSessionStore } from '../store/session.js';
 import React from 'react';
 
 const restaurantSlug = import.meta.env.VITE_RESTAURANT_SLUG;
@@ -57,9 +58,10 @@ export const useMenu = (filters = {}) => {
       }
       
       // Fetch full menu without any filters
+      // The table session orders Recommendations by its views / cart adds
       const path = `/restaurants/${restaurantSlug}/menu/`;
       const res = await fetchWithFallback(path, {
-        headers: { 'x-session-id': '1234' },
+        headers: { 'x-session-id': useSessionStore.getState().sessionPid || '1234' },
       });
       if (!res.ok) throw new Error('Failed to fetch menu');
       const data = await res.json();
@@ -271,4 +273,15 @@ export const useMenuItem = (itemId) => {
       return failureCount < 2;
     }
   });
-}; 
\ No newline at end of file
+}; 
+
+// Record a dish view for the session's "For you" ranking (fire and forget)
+export const trackDishView = (menuItemId) => {
+  const { sessionPid, wsToken } = useSessionStore.getState();
+  if (!sessionPid || !wsToken || !menuItemId) return;
+  fetchWithFallback(`/restaurants/${restaurantSlug}/feed/events`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${wsToken}` },
+    body: JSON.stringify({ session_pid: sessionPid, menu_item_id: menuItemId, event: 'view' }),
+  }).catch(() => {});
+};
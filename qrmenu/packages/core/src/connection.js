@@ -130,6 +130,10 @@ function handleWebSocketMessage(data) {
       console.log('Chat AI response received:', data);
       chatStore.handleWebSocketMessage(data);
       break;
+
+    case 'chat_status':
+      chatStore.handleWebSocketMessage(data);
+      break;
       
     // Order processing messages
     case 'cart_locked':
@@ -1,5 +1,5 @@
 export { App } from './App.jsx';
-export { useMenu, useCategories, getMenuItem, useMenuItem } from './api/menu.js';
+export { useMenu, useCategories, getMenuItem, useMenuItem, trackDishView } from './api/menu.js';
 export { constructImageUrl, getOptimalVariant } from './api/base.js';
 export { useCartStore } from './store/cart.js';
 export { useSessionStore } from './store/session.js';
@@ -37,6 +37,8 @@ export const useChatStore = create((set, get) => ({
   // UI states
   isDrawerOpen: false,
   isTyping: false,
+  // Server-side progress of the pending AI answer: { status: 'queued' | 'thinking', position }
+  chatStatus: null,
   
   // Notification flag for unread inbound messages (not persisted)
   hasUnreadMessages: false,
@@ -201,12 +203,18 @@ export const useChatStore = create((set, get) => ({
           thread_id: data.thread_id
         });
         get().setTyping(false);
+        set({ chatStatus: null });
         // Mark unread if drawer closed
         if (!get().isDrawerOpen) {
           set({ hasUnreadMessages: true });
         }
         break;
         
+      case 'chat_status':
+        // AI answer is queued or being generated
+        set({ isTyping: true, chatStatus: { status: data.status, position: data.position } });
+        break;
+        
       default:
         console.log('Unknown chat message type:', data.type);
     }
@@ -8,6 +8,7 @@ export function AIChatDrawer() {
   const isOpen = useChatStore((state) => state.isDrawerOpen);
   const messages = useChatStore((state) => state.messages);
   const isTyping = useChatStore((state) => state.isTyping);
+  const chatStatus = useChatStore((state) => state.chatStatus);
   const sendMessage = useChatStore((state) => state.sendMessage);
   const closeDrawer = useChatStore((state) => state.closeDrawer);
   const isMessageOptimistic = useChatStore((state) => state.isMessageOptimistic);
@@ -157,7 +158,9 @@ export function AIChatDrawer() {
                   <span className="text-xs text-white">🤖</span>
                 </div>
                 <span className="text-xs font-medium text-gray-600" style={{ fontFamily: "-apple-system, BlinkMacSystemFont, 'SF Pro Text', sans-serif" }}>
-                  AI Waiter is typing...
+                  {chatStatus?.status === 'queued'
+                    ? `AI Waiter is serving other tables${chatStatus.position ? ` (you're #${chatStatus.position})` : ''}...`
+                    : 'AI Waiter is typing...'}
                 </span>
               </div>
               <div className="bg-gray-50/80 backdrop-blur-sm border-l-2 border-red-500 pl-4 pr-4 py-3 rounded-r-xl">
@@ -1,5 +1,5 @@
 import React from 'react';
-import { useCartStore, useSessionStore, addItemToCart, updateCartItem, deleteCartItem, constructImageUrl, getOptimalVariant } from '@qrmenu/core';
+import { useCartStore, useSessionStore, addItemToCart, updateCartItem, deleteCartItem, constructImageUrl, getOptimalVariant, trackDishView } from '@qrmenu/core';
 import { OptimizedMedia } from './OptimizedMedia.jsx';
 
 export function ItemCard({ item, containerWidth, onItemClick, preload=false, autoplay=false, muted=true, context_namespace=null }) {
@@ -47,6 +47,7 @@ export function ItemCard({ item, containerWidth, onItemClick, preload=false, aut
     // Don't trigger if clicking on add/remove buttons
     if (e.target.closest('button')) return;
     
+    trackDishView(item.id);
     onItemClick?.(item);
   };
 